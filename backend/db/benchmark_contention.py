@@ -0,0 +1,150 @@
+"""
+Config DB contention benchmark.
+
+Runs API-style reads (first /logs page, dashboard summary, latest runs) on reader
+threads while writer threads insert and complete stage logs the way runs.py and the
+drivers do, then reports p50/p99 latency and lock errors for each side.
+
+    --mode pooled  uses db.connection (pool, WAL, synchronous=NORMAL, busy_timeout)
+    --mode legacy  opens a fresh default sqlite3 connection per operation in
+                   rollback-journal mode, as the backend did before
+
+Writes real rows (source_tablename 'bench_contention'), so run it against a copy:
+    cp databases/config_db/data/config.db /tmp/bench.db
+    cd backend && python -m db.benchmark_contention --db /tmp/bench.db
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import uuid6
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from db import connection, queries
+
+IST = timezone(timedelta(hours=5, minutes=30))
+BENCH_TABLENAME = "bench_contention"
+
+READ_QUERIES = [
+    (queries.GET_ALL_LOGS_BASE + queries.LOGS_KEYSET_ORDER, (10,)),
+    (queries.GET_TOTAL_STATS, ()),
+    (queries.GET_STATUS_DISTRIBUTION, ()),
+    (queries.GET_ALL_RUNS_MASTER, ()),
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.lock_errors = 0
+        self.other_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, started: float, error: Exception = None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if error is None:
+                self.latencies_ms.append(elapsed_ms)
+            elif "locked" in str(error) or "busy" in str(error):
+                self.lock_errors += 1
+            else:
+                self.other_errors += 1
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+        return {
+            "ops": len(ordered),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            "lock_errors": self.lock_errors,
+            "other_errors": self.other_errors,
+        }
+
+
+def open_connection(mode: str, db_path: str):
+    if mode == "pooled":
+        return connection.get_db_connection()
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def reader(mode: str, db_path: str, deadline: float, recorder: Recorder):
+    i = 0
+    while time.perf_counter() < deadline:
+        query, params = READ_QUERIES[i % len(READ_QUERIES)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn = open_connection(mode, db_path)
+            conn.execute(query, params).fetchall()
+            conn.close()
+            recorder.record(started)
+        except sqlite3.Error as e:
+            recorder.record(started, e)
+
+
+def writer(mode: str, db_path: str, deadline: float, recorder: Recorder):
+    while time.perf_counter() < deadline:
+        log_id = str(uuid6.uuid7())
+        now = datetime.now(IST).isoformat()
+        started = time.perf_counter()
+        try:
+            conn = open_connection(mode, db_path)
+            conn.execute(queries.INSERT_STAGE_LOG_RUNNING, (log_id, BENCH_TABLENAME, "loader_dl_to_sink", now, None, 5))
+            conn.commit()
+            conn.execute(queries.UPDATE_STAGE_LOG_SUCCESS, (now, "00:00:00.000", 1, None, log_id))
+            conn.commit()
+            conn.close()
+            recorder.record(started)
+        except sqlite3.Error as e:
+            recorder.record(started, e)
+
+
+def run(mode: str, db_path: str, readers: int, writers: int, seconds: float) -> Dict[str, Dict[str, float]]:
+    if mode == "pooled":
+        connection.DB_PATH = db_path
+    else:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+    read_recorder, write_recorder = Recorder(), Recorder()
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=reader, args=(mode, db_path, deadline, read_recorder)) for _ in range(readers)
+    ] + [
+        threading.Thread(target=writer, args=(mode, db_path, deadline, write_recorder)) for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {"reads": read_recorder.summary(), "writes": write_recorder.summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent read/write benchmark for the config DB")
+    parser.add_argument("--db", required=True, help="Path to a scratch copy of config.db")
+    parser.add_argument("--mode", choices=["pooled", "legacy"], default="pooled")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    result = run(args.mode, args.db, args.readers, args.writers, args.seconds)
+    print(json.dumps({"mode": args.mode, "readers": args.readers, "writers": args.writers, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,123 @@
+import os
+import time
+import queue
 import sqlite3
+from contextlib import contextmanager
+from utils import metrics
 
 DB_PATH = "/data/config.db"
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+# The config DB is written concurrently by API handlers, background run threads and
+# both driver containers, so every connection waits on locks instead of failing fast.
+BUSY_TIMEOUT_MS = int(os.getenv("CONFIG_DB_BUSY_TIMEOUT_MS", "10000"))
+# Idle connections kept for reuse; more are opened on demand under load
+POOL_SIZE = int(os.getenv("CONFIG_DB_POOL_SIZE", "16"))
+# Per-connection cache of prepared statements (queries.py has ~60 distinct queries)
+CACHED_STATEMENTS = 256
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # connections move between threadpool workers via the pool
+        cached_statements=CACHED_STATEMENTS
+    )
     conn.row_factory = sqlite3.Row
+    # WAL lets readers run alongside the single writer; NORMAL is durable across app crashes in WAL mode
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
     return conn
+
+
+class ConnectionPool:
+    """Bounded pool of idle config DB connections.
+
+    acquire() never blocks: it reuses an idle connection or opens a new one.
+    release() returns it for reuse, or closes it when POOL_SIZE are already idle.
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _connect(self.db_path)
+
+    def release(self, conn: sqlite3.Connection):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+class PooledConnection:
+    """sqlite3.Connection stand-in whose close() returns the connection to the pool"""
+
+    def __init__(self, pool: ConnectionPool):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", pool.acquire())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        conn = self._conn
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        # Routers may switch row_factory; restore the default before reuse
+        conn.row_factory = sqlite3.Row
+        self._pool.release(conn)
+
+    def __del__(self):
+        # Handlers that raise before close() still give their connection back
+        if self.__dict__.get("_conn") is not None:
+            self.close()
+
+
+_pool = None
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None or _pool.db_path != DB_PATH:
+        _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def get_db_connection():
+    return PooledConnection(get_pool())
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with block"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def begin_write(conn):
+    """Open a write transaction now (BEGIN IMMEDIATE) and record how long the lock took"""
+    started = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE")
+    metrics.observe("config_db_lock_wait_seconds", time.perf_counter() - started, writer="backend")
@@ -0,0 +1,119 @@
+"""
+Run log retention for the config DB.
+
+Moves finished pipeline_run_stage_logs and pipeline_runs_master rows older than the
+retention age into date-partitioned Parquet files in the datalake bucket, deletes
+them from SQLite and reclaims the freed pages. The stats rollups are not touched,
+so dashboard totals keep counting archived history. GET /logs?include_archived=true
+reads the archive back.
+
+Usage (from backend/, e.g. daily via cron or `docker exec backend_api ...`):
+    python -m db.log_retention [--days 30] [--dry-run]
+"""
+
+import os
+import argparse
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+import pandas as pd
+from db import queries
+from db.connection import db_connection
+from utils import datalake
+
+IST = timezone(timedelta(hours=5, minutes=30))
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '30'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# table -> (days query, rows-for-day query, delete-by-id query)
+ARCHIVED_TABLES = {
+    "pipeline_run_stage_logs": (
+        queries.GET_ARCHIVABLE_STAGE_LOG_DAYS,
+        queries.GET_ARCHIVABLE_STAGE_LOGS_FOR_DAY,
+        queries.DELETE_STAGE_LOG_BY_ID,
+    ),
+    "pipeline_runs_master": (
+        queries.GET_ARCHIVABLE_RUN_MASTER_DAYS,
+        queries.GET_ARCHIVABLE_RUNS_MASTER_FOR_DAY,
+        queries.DELETE_RUN_MASTER_BY_ID,
+    ),
+}
+
+
+def archive_table(conn: sqlite3.Connection, client, table: str, cutoff: str, dry_run: bool = False) -> int:
+    """Archive one table day by day; each day is uploaded before its rows are deleted"""
+    days_query, rows_query, delete_query = ARCHIVED_TABLES[table]
+    archived = 0
+
+    days = [row["day"] for row in conn.execute(days_query, (cutoff,)).fetchall() if row["day"]]
+    for day in days:
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        rows = [dict(row) for row in conn.execute(rows_query, (day, next_day, cutoff)).fetchall()]
+        if not rows:
+            continue
+
+        object_name = datalake.archive_object_name(table, day, rows[0]["id"])
+        if dry_run:
+            logger.info(f"[dry run] Would archive {len(rows)} {table} rows to {object_name}")
+            archived += len(rows)
+            continue
+
+        datalake.put_parquet(client, object_name, pd.DataFrame(rows))
+        with conn:
+            conn.executemany(delete_query, [(row["id"],) for row in rows])
+        logger.info(f"Archived {len(rows)} {table} rows to {datalake.MINIO_BUCKET}/{object_name}")
+        archived += len(rows)
+
+    return archived
+
+
+def reclaim_space(conn: sqlite3.Connection):
+    """Return freed pages to the filesystem.
+
+    The first run switches the DB to incremental auto-vacuum, which needs one full
+    VACUUM; later runs only release the free pages.
+    """
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if auto_vacuum != 2:  # 2 = INCREMENTAL
+        logger.info("Enabling incremental auto-vacuum (one-time full VACUUM)")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute("PRAGMA incremental_vacuum")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA optimize")
+
+
+def run_retention(days: int = LOG_RETENTION_DAYS, dry_run: bool = False) -> Dict[str, int]:
+    cutoff = (datetime.now(IST) - timedelta(days=days)).isoformat()
+    logger.info(f"Archiving finished run logs started before {cutoff}")
+
+    client = None
+    if not dry_run:
+        client = datalake.get_minio_client()
+        datalake.ensure_bucket(client)
+
+    with db_connection() as conn:
+        archived = {table: archive_table(conn, client, table, cutoff, dry_run) for table in ARCHIVED_TABLES}
+        if not dry_run and any(archived.values()):
+            reclaim_space(conn)
+
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old run logs from the config DB to the datalake")
+    parser.add_argument("--days", type=int, default=LOG_RETENTION_DAYS, help="Keep logs newer than this many days")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be archived without changing anything")
+    args = parser.parse_args()
+
+    archived = run_retention(args.days, args.dry_run)
+    for table, count in archived.items():
+        logger.info(f"{table}: {count} rows {'to archive' if args.dry_run else 'archived'}")
+
+
+if __name__ == "__main__":
+    main()
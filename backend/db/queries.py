@@ -3,12 +3,50 @@ GET_ALL_CONFIGS = "SELECT * FROM pipeline_config"
 GET_CONFIG_BY_TABLE = "SELECT * FROM pipeline_config WHERE source_tablename = ?"
 CHECK_TABLE_EXISTS = "SELECT source_tablename FROM pipeline_config WHERE source_tablename = ? limit 1"
 
+# Version of a config table, bumped by triggers on every write (utils/response_cache.py)
+GET_CONFIG_VERSION = "SELECT version FROM config_versions WHERE table_name = ?"
+
 # Logs Queries
 GET_ALL_LOGS_BASE = """
     SELECT * FROM pipeline_run_stage_logs
     WHERE 1=1
 """
 
+# Keyset pagination for /logs: rows strictly after the cursor in (started_at DESC, id DESC) order
+LOGS_AFTER_CURSOR = " AND (started_at, id) < (?, ?)"
+LOGS_KEYSET_ORDER = " ORDER BY started_at DESC, id DESC LIMIT ?"
+
+# Count estimates for /logs without scanning: rowid span for the whole table,
+# ANALYZE statistics (average rows per table) for a large source_tablename
+ESTIMATE_LOG_COUNT = """
+    SELECT (SELECT MAX(rowid) FROM pipeline_run_stage_logs)
+         - (SELECT MIN(rowid) FROM pipeline_run_stage_logs) + 1 as estimate
+"""
+
+GET_LOGS_INDEX_STAT = """
+    SELECT stat FROM sqlite_stat1
+    WHERE tbl = 'pipeline_run_stage_logs' AND idx = 'idx_stage_logs_table_started_at_id'
+"""
+
+# Filtered /logs: counted on the started_at indexes, stopping after LIMIT rows
+COUNT_LOGS_IN_RANGE = """
+    SELECT COUNT(*) as estimate FROM (
+        SELECT 1 FROM pipeline_run_stage_logs
+        WHERE started_at >= ? AND started_at <= ?
+        LIMIT ?
+    )
+"""
+
+COUNT_LOGS_IN_RANGE_BY_TABLE = """
+    SELECT COUNT(*) as estimate FROM (
+        SELECT 1 FROM pipeline_run_stage_logs
+        WHERE source_tablename = ? AND started_at >= ? AND started_at <= ?
+        LIMIT ?
+    )
+"""
+
+GET_STAGE_LOG_PROFILE_PATH = "SELECT profile_path FROM pipeline_run_stage_logs WHERE id = ?"
+
 GET_LOGS_BY_TABLE = """
     SELECT * FROM pipeline_run_stage_logs 
     WHERE source_tablename = ? 
@@ -16,57 +54,173 @@ GET_LOGS_BY_TABLE = """
 """
 
 # Stats Queries
+# Dashboard stats read the rollup tables maintained by triggers on pipeline_run_stage_logs
+# (databases/config_db/migrations/003_stats_rollups.sql) instead of aggregating raw logs.
+
+# Records loaded since a cutoff: whole hours from the hourly rollup plus the partial
+# first hour (cutoff up to the next hour boundary) from the raw logs
 GET_LOADED_RECORDS_STATS = """
-    SELECT 
-        source_tablename,
-        SUM(COALESCE(rows_processed, 0)) as total_loaded
-    FROM pipeline_run_stage_logs 
-    WHERE pipeline_type = 'loader_dl_to_sink'
-    AND status = 'success'
-    AND started_at >= ?
+    SELECT source_tablename, SUM(total_loaded) as total_loaded
+    FROM (
+        SELECT source_tablename, SUM(rows_processed) as total_loaded
+        FROM pipeline_stats_hourly
+        WHERE pipeline_type = 'loader_dl_to_sink'
+        AND status = 'success'
+        AND bucket_hour >= ?
+        GROUP BY source_tablename
+        UNION ALL
+        SELECT source_tablename, SUM(COALESCE(rows_processed, 0)) as total_loaded
+        FROM pipeline_run_stage_logs
+        WHERE pipeline_type = 'loader_dl_to_sink'
+        AND status = 'success'
+        AND started_at >= ? AND started_at < ?
+        GROUP BY source_tablename
+    )
     GROUP BY source_tablename
 """
 
 GET_STATUS_DISTRIBUTION = """
-    SELECT status, COUNT(*) as count 
-    FROM pipeline_run_stage_logs 
+    SELECT status, SUM(run_count) as count 
+    FROM pipeline_stats_daily_live 
     GROUP BY status
 """
 
 GET_PIPELINE_TYPE_DISTRIBUTION = """
-    SELECT pipeline_type, COUNT(*) as count 
-    FROM pipeline_run_stage_logs 
+    SELECT pipeline_type, SUM(run_count) as count 
+    FROM pipeline_stats_daily_live 
     GROUP BY pipeline_type
 """
 
 GET_RUNS_PER_TABLE = """
     SELECT source_tablename, 
-           COUNT(*) as total_runs,
-           SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success_count,
-           SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_count,
-           SUM(COALESCE(rows_processed, 0)) as total_rows
-    FROM pipeline_run_stage_logs 
+           SUM(run_count) as total_runs,
+           SUM(CASE WHEN status = 'success' THEN run_count ELSE 0 END) as success_count,
+           SUM(CASE WHEN status = 'failed' THEN run_count ELSE 0 END) as failed_count,
+           SUM(rows_processed) as total_rows
+    FROM pipeline_stats_daily_live 
     GROUP BY source_tablename
 """
 
 GET_DAILY_RUNS = """
-    SELECT DATE(started_at) as run_date, 
-           COUNT(*) as runs,
-           SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success,
-           SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed
-    FROM pipeline_run_stage_logs 
-    WHERE started_at >= DATE('now', '-7 days')
-    GROUP BY DATE(started_at)
+    SELECT bucket_date as run_date, 
+           SUM(run_count) as runs,
+           SUM(CASE WHEN status = 'success' THEN run_count ELSE 0 END) as success,
+           SUM(CASE WHEN status = 'failed' THEN run_count ELSE 0 END) as failed
+    FROM pipeline_stats_daily_live 
+    WHERE bucket_date >= DATE('now', '-7 days')
+    GROUP BY bucket_date
     ORDER BY run_date
 """
 
 GET_TOTAL_STATS = """
     SELECT 
-        COUNT(*) as total_runs,
-        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as total_success,
-        SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as total_failed,
-        SUM(COALESCE(rows_processed, 0)) as total_rows_processed
+        COALESCE(SUM(run_count), 0) as total_runs,
+        COALESCE(SUM(CASE WHEN status = 'success' THEN run_count ELSE 0 END), 0) as total_success,
+        COALESCE(SUM(CASE WHEN status = 'failed' THEN run_count ELSE 0 END), 0) as total_failed,
+        COALESCE(SUM(rows_processed), 0) as total_rows_processed
+    FROM pipeline_stats_daily_live
+"""
+
+# Duration percentiles (nearest rank) and throughput of successful stages started in
+# [start, end), optionally narrowed to one table / stage type.
+# Params: start, end, source_tablename, source_tablename, pipeline_type, pipeline_type
+GET_DURATION_STATS_BY_TABLE = """
+    WITH ranked AS (
+        SELECT source_tablename, pipeline_type, duration_ms, COALESCE(rows_processed, 0) as rows_processed,
+               ROW_NUMBER() OVER (PARTITION BY source_tablename, pipeline_type ORDER BY duration_ms) as rn,
+               COUNT(*) OVER (PARTITION BY source_tablename, pipeline_type) as cnt
+        FROM pipeline_run_stage_logs
+        WHERE status = 'success'
+        AND started_at >= ? AND started_at < ?
+        AND duration_ms IS NOT NULL
+        AND (? IS NULL OR source_tablename = ?)
+        AND (? IS NULL OR pipeline_type = ?)
+    )
+    SELECT source_tablename, pipeline_type,
+           COUNT(*) as run_count,
+           MIN(CASE WHEN rn >= 0.50 * cnt THEN duration_ms END) as p50_ms,
+           MIN(CASE WHEN rn >= 0.90 * cnt THEN duration_ms END) as p90_ms,
+           MIN(CASE WHEN rn >= 0.99 * cnt THEN duration_ms END) as p99_ms,
+           MAX(duration_ms) as max_ms,
+           SUM(rows_processed) as rows_processed,
+           ROUND(SUM(rows_processed) * 1000.0 / NULLIF(SUM(duration_ms), 0), 2) as rows_per_sec
+    FROM ranked
+    GROUP BY source_tablename, pipeline_type
+    ORDER BY source_tablename, pipeline_type
+"""
+
+# Same as above across all tables, per stage type
+GET_DURATION_STATS_BY_STAGE_TYPE = """
+    WITH ranked AS (
+        SELECT pipeline_type, duration_ms, COALESCE(rows_processed, 0) as rows_processed,
+               ROW_NUMBER() OVER (PARTITION BY pipeline_type ORDER BY duration_ms) as rn,
+               COUNT(*) OVER (PARTITION BY pipeline_type) as cnt
+        FROM pipeline_run_stage_logs
+        WHERE status = 'success'
+        AND started_at >= ? AND started_at < ?
+        AND duration_ms IS NOT NULL
+        AND (? IS NULL OR source_tablename = ?)
+        AND (? IS NULL OR pipeline_type = ?)
+    )
+    SELECT pipeline_type,
+           COUNT(*) as run_count,
+           MIN(CASE WHEN rn >= 0.50 * cnt THEN duration_ms END) as p50_ms,
+           MIN(CASE WHEN rn >= 0.90 * cnt THEN duration_ms END) as p90_ms,
+           MIN(CASE WHEN rn >= 0.99 * cnt THEN duration_ms END) as p99_ms,
+           MAX(duration_ms) as max_ms,
+           SUM(rows_processed) as rows_processed,
+           ROUND(SUM(rows_processed) * 1000.0 / NULLIF(SUM(duration_ms), 0), 2) as rows_per_sec
+    FROM ranked
+    GROUP BY pipeline_type
+    ORDER BY pipeline_type
+"""
+
+# Stats Rollup Maintenance (db/stats_rollups.py)
+DELETE_STATS_HOURLY = "DELETE FROM pipeline_stats_hourly"
+DELETE_STATS_DAILY = "DELETE FROM pipeline_stats_daily"
+
+# Same bucketing and duration expressions as the rollup triggers
+RAW_STATS_HOURLY = """
+    SELECT substr(COALESCE(started_at, completed_at), 1, 13) || ':00:00' as bucket_hour,
+           source_tablename, pipeline_type, status,
+           COUNT(*) as run_count,
+           SUM(COALESCE(rows_processed, 0)) as rows_processed,
+           SUM(COALESCE(CAST(ROUND((julianday(completed_at) - julianday(started_at)) * 86400000) AS INTEGER), 0)) as total_duration_ms
     FROM pipeline_run_stage_logs
+    WHERE status IN ('success', 'failed')
+    GROUP BY 1, 2, 3, 4
+"""
+
+BACKFILL_STATS_HOURLY = """
+    INSERT INTO pipeline_stats_hourly
+        (bucket_hour, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+""" + RAW_STATS_HOURLY
+
+BACKFILL_STATS_DAILY = """
+    INSERT INTO pipeline_stats_daily
+        (bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+    SELECT substr(bucket_hour, 1, 10), source_tablename, pipeline_type, status,
+           SUM(run_count), SUM(rows_processed), SUM(total_duration_ms)
+    FROM pipeline_stats_hourly
+    GROUP BY 1, 2, 3, 4
+"""
+
+GET_STATS_HOURLY = """
+    SELECT bucket_hour, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms
+    FROM pipeline_stats_hourly
+"""
+
+GET_STATS_DAILY = """
+    SELECT bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms
+    FROM pipeline_stats_daily
+"""
+
+GET_STATS_DAILY_FROM_HOURLY = """
+    SELECT substr(bucket_hour, 1, 10) as bucket_date, source_tablename, pipeline_type, status,
+           SUM(run_count) as run_count, SUM(rows_processed) as rows_processed,
+           SUM(total_duration_ms) as total_duration_ms
+    FROM pipeline_stats_hourly
+    GROUP BY 1, 2, 3, 4
 """
 
 # Stages Queries
@@ -123,26 +277,31 @@ UPDATE_RUN_MASTER_STAGE = """
 
 UPDATE_STAGE_LOG_SUCCESS = """
     UPDATE pipeline_run_stage_logs 
-    SET status = 'success', completed_at = ?, time_taken = ?, 
+    SET status = 'success', completed_at = ?, time_taken = ?, duration_ms = ?,
         rows_processed = ?, file_paths = ?
     WHERE id = ?
 """
 
 UPDATE_STAGE_LOG_FAILED = """
     UPDATE pipeline_run_stage_logs 
-    SET status = 'failed', completed_at = ?, time_taken = ?, error_message = ?
+    SET status = 'failed', completed_at = ?, time_taken = ?, duration_ms = ?, error_message = ?
     WHERE id = ?
 """
 
+UPDATE_STAGE_LOG_PROFILE_PATH = "UPDATE pipeline_run_stage_logs SET profile_path = ? WHERE id = ?"
+
+UPDATE_STAGE_LOG_CACHE_STATS = "UPDATE pipeline_run_stage_logs SET cache_hits = ?, cache_misses = ? WHERE id = ?"
+
 UPDATE_STAGE_LOG_TIMEOUT = """
     UPDATE pipeline_run_stage_logs 
-    SET status = 'failed', completed_at = ?, error_message = 'Stage timeout after 5 minutes'
+    SET status = 'failed', completed_at = ?, time_taken = ?, duration_ms = ?,
+        error_message = 'Stage timeout after 5 minutes'
     WHERE id = ?
 """
 
 UPDATE_STAGE_LOG_ERROR = """
     UPDATE pipeline_run_stage_logs 
-    SET status = 'failed', completed_at = ?, error_message = ?
+    SET status = 'failed', completed_at = ?, time_taken = ?, duration_ms = ?, error_message = ?
     WHERE id = ?
 """
 
@@ -165,22 +324,63 @@ GET_ALL_SOURCES = "SELECT * FROM sources_config"
 CHECK_SOURCE_EXISTS_BY_NAME = "SELECT id FROM sources_config WHERE source_name = ?"
 INSERT_SOURCE = """
     INSERT INTO sources_config (
-        id, source_name, source_type, source_creds
-    ) VALUES (?, ?, ?, ?)
+        id, source_name, source_type, source_creds, source_creds_masked
+    ) VALUES (?, ?, ?, ?, ?)
 """
 DELETE_SOURCE_BY_NAME = "DELETE FROM sources_config WHERE source_name = ?"
 UPDATE_SOURCE_BY_NAME = """
     UPDATE sources_config 
-    SET source_type = ?, source_creds = ?
+    SET source_type = ?, source_creds = ?, source_creds_masked = ?
+    WHERE source_name = ?
+"""
+# Key rotation (POST /connections/rotate-keys)
+GET_ALL_SOURCE_CREDS = "SELECT source_name, source_creds FROM sources_config WHERE source_creds IS NOT NULL"
+UPDATE_SOURCE_CREDS = """
+    UPDATE sources_config
+    SET source_creds = ?, source_creds_masked = ?
     WHERE source_name = ?
 """
 
 # External Database Queries
-GET_PUBLIC_TABLES = """
-    SELECT table_name 
-    FROM information_schema.tables 
-    WHERE table_schema = 'public'
+GET_SOURCE_TABLE_COLUMNS = """
+    SELECT column_name
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = %s
+    ORDER BY ordinal_position
+"""
+# Table catalog of a source (utils/source_catalog.py): planner estimates, size and candidate keys.
+# Only the leading column of an index supports range scans, so only those count as indexed time columns.
+GET_SOURCE_TABLE_CATALOG = """
+    SELECT
+        n.nspname AS table_schema,
+        c.relname AS table_name,
+        c.relkind,
+        c.reltuples::bigint AS row_estimate,
+        pg_total_relation_size(c.oid) AS total_bytes,
+        (SELECT array_agg(a.attname::text ORDER BY array_position(i.indkey::int2[], a.attnum))
+           FROM pg_index i
+           JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+          WHERE i.indrelid = c.oid AND i.indisprimary) AS primary_key,
+        (SELECT array_agg(DISTINCT a.attname::text)
+           FROM pg_index i
+           JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+          WHERE i.indrelid = c.oid
+            AND a.atttypid IN ('timestamp'::regtype, 'timestamptz'::regtype, 'date'::regtype)) AS indexed_time_columns,
+        (SELECT array_agg(a.attname::text)
+           FROM pg_partitioned_table p
+           JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = ANY(p.partattrs)
+          WHERE p.partrelid = c.oid) AS partition_key
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND NOT c.relispartition
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname !~ '^pg_(toast|temp)'
+      AND has_table_privilege(c.oid, 'SELECT')
+    ORDER BY n.nspname, c.relname
 """
+# Planned, never executed: checks that a row filter parses and only references existing columns
+EXPLAIN_SOURCE_ROW_FILTER = 'EXPLAIN SELECT 1 FROM "{tablename}" WHERE ({row_filter})'
 
 # Destination Queries
 GET_DESTINATION_BY_NAME = "SELECT * FROM destinations_config WHERE destination_name = ?"
@@ -189,13 +389,21 @@ GET_ALL_DESTINATIONS = "SELECT * FROM destinations_config"
 CHECK_DESTINATION_EXISTS_BY_NAME = "SELECT id FROM destinations_config WHERE destination_name = ?"
 INSERT_DESTINATION = """
     INSERT INTO destinations_config (
-        id, destination_name, destination_type, destination_creds
-    ) VALUES (?, ?, ?, ?)
+        id, destination_name, destination_type, destination_creds, destination_creds_masked
+    ) VALUES (?, ?, ?, ?, ?)
 """
 DELETE_DESTINATION_BY_NAME = "DELETE FROM destinations_config WHERE destination_name = ?"
 UPDATE_DESTINATION_BY_NAME = """
     UPDATE destinations_config 
-    SET destination_type = ?, destination_creds = ?
+    SET destination_type = ?, destination_creds = ?, destination_creds_masked = ?
+    WHERE destination_name = ?
+"""
+GET_ALL_DESTINATION_CREDS = """
+    SELECT destination_name, destination_creds FROM destinations_config WHERE destination_creds IS NOT NULL
+"""
+UPDATE_DESTINATION_CREDS = """
+    UPDATE destinations_config
+    SET destination_creds = ?, destination_creds_masked = ?
     WHERE destination_name = ?
 """
 
@@ -204,7 +412,87 @@ INSERT_PIPELINE_CONFIG = """
     INSERT INTO pipeline_config (
         source_tablename, sink_tablename, source_name, destination_name, source_type, sink_type,
         source_to_dl_schedule, source_to_dl_load_type,
-        dl_to_sink_schedule, dl_to_sink_load_type
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        dl_to_sink_schedule, dl_to_sink_load_type,
+        source_to_dl_columns, source_to_dl_row_filter,
+        source_to_dl_schedule_offset, dl_to_sink_schedule_offset, dl_to_sink_is_active
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Bulk onboarding (POST /config/bulk, utils/bulk_onboarding.py)
+GET_ALL_CONFIG_TABLENAMES = "SELECT source_tablename FROM pipeline_config"
+# Schedule offset planning (utils/schedule_planner.py)
+GET_PIPELINE_SCHEDULES = """
+    SELECT source_tablename, source_name, source_to_dl_is_active,
+           source_to_dl_schedule, source_to_dl_schedule_offset,
+           dl_to_sink_schedule, dl_to_sink_schedule_offset
+    FROM pipeline_config
+"""
+GET_PIPELINE_SCHEDULES_BY_SOURCE = GET_PIPELINE_SCHEDULES + " WHERE source_name = ?"
+UPDATE_SCHEDULE_OFFSETS = """
+    UPDATE pipeline_config SET source_to_dl_schedule_offset = ?, dl_to_sink_schedule_offset = ?
+    WHERE source_tablename = ?
+"""
+INSERT_PIPELINE_CONFIG_BULK = """
+    INSERT INTO pipeline_config (
+        source_tablename, sink_tablename, source_name, destination_name, source_type, sink_type,
+        source_to_dl_schedule, source_to_dl_schedule_offset, source_to_dl_load_type,
+        dl_to_sink_schedule, dl_to_sink_schedule_offset, dl_to_sink_load_type,
+        source_to_dl_incremental_key, source_to_dl_tiebreaker_key,
+        dl_compaction_is_active, dl_parquet_sort_by_incremental_key
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 """
 DELETE_PIPELINE_CONFIG = "DELETE FROM pipeline_config WHERE source_tablename = ?"
+# COALESCE: loaders that print no WATERMARK line keep the stored one
+UPDATE_INCREMENTAL_WATERMARK = """
+    UPDATE pipeline_config
+    SET source_to_dl_last_incremental_value = ?, source_to_dl_watermark = COALESCE(?, source_to_dl_watermark)
+    WHERE source_tablename = ?
+"""
+
+# Schema Registry Queries (data_pipeline_resources/common/schema_registry.py)
+GET_LATEST_SOURCE_SCHEMA = """
+    SELECT version, fingerprint, schema_json FROM source_schema_versions
+    WHERE source_tablename = ? ORDER BY version DESC LIMIT 1
+"""
+GET_SOURCE_SCHEMA_VERSIONS = """
+    SELECT version, fingerprint, schema_json, registered_at FROM source_schema_versions
+    WHERE source_tablename = ? ORDER BY version DESC
+"""
+INSERT_SOURCE_SCHEMA_VERSION = """
+    INSERT INTO source_schema_versions (source_tablename, version, fingerprint, schema_json, registered_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Log Retention Queries (db/log_retention.py)
+# Only terminal rows are archived: they never change again, so deleting by id after
+# the upload cannot lose an update.
+GET_ARCHIVABLE_STAGE_LOG_DAYS = """
+    SELECT DISTINCT substr(started_at, 1, 10) as day
+    FROM pipeline_run_stage_logs
+    WHERE started_at < ?
+    ORDER BY day
+"""
+
+GET_ARCHIVABLE_STAGE_LOGS_FOR_DAY = """
+    SELECT * FROM pipeline_run_stage_logs
+    WHERE started_at >= ? AND started_at < ? AND started_at < ?
+    AND status IN ('success', 'failed')
+    ORDER BY started_at, id
+"""
+
+DELETE_STAGE_LOG_BY_ID = "DELETE FROM pipeline_run_stage_logs WHERE id = ?"
+
+GET_ARCHIVABLE_RUN_MASTER_DAYS = """
+    SELECT DISTINCT substr(started_at, 1, 10) as day
+    FROM pipeline_runs_master
+    WHERE started_at < ?
+    ORDER BY day
+"""
+
+GET_ARCHIVABLE_RUNS_MASTER_FOR_DAY = """
+    SELECT * FROM pipeline_runs_master
+    WHERE started_at >= ? AND started_at < ? AND started_at < ?
+    AND status IN ('success', 'failed')
+    ORDER BY started_at, id
+"""
+
+DELETE_RUN_MASTER_BY_ID = "DELETE FROM pipeline_runs_master WHERE id = ?"
@@ -0,0 +1,95 @@
+"""
+Query plan check for the config DB.
+
+Runs EXPLAIN QUERY PLAN for every query in db/queries.py and the shared ones in
+data_pipeline_resources/common against a migrated config.db and fails if any of
+them does a full scan of a run log table.
+
+Usage (from backend/):
+    python -m db.query_plans [path/to/config.db]
+"""
+
+import sys
+import sqlite3
+from typing import Dict, List, Tuple
+import scheduling
+from db import queries
+from db.connection import DB_PATH
+
+# Tables that grow with every run and therefore must never be scanned without an index
+INDEXED_TABLES = ("pipeline_run_stage_logs", "pipeline_runs_master")
+
+# The GET_ALL_LOGS_BASE fragments are completed by routers/logs.py before execution and
+# are checked through their composed forms below; the external database queries run against the source Postgres.
+SKIPPED_QUERIES = {"GET_ALL_LOGS_BASE", "LOGS_AFTER_CURSOR", "LOGS_KEYSET_ORDER", "GET_SOURCE_TABLE_CATALOG",
+                   "GET_SOURCE_TABLE_COLUMNS", "EXPLAIN_SOURCE_ROW_FILTER"}
+
+# Queries as routers/logs.py builds them from GET_ALL_LOGS_BASE
+COMPOSED_QUERIES = {
+    "GET_ALL_LOGS (first page)": queries.GET_ALL_LOGS_BASE + queries.LOGS_KEYSET_ORDER,
+    "GET_ALL_LOGS (next page)": queries.GET_ALL_LOGS_BASE + queries.LOGS_AFTER_CURSOR + queries.LOGS_KEYSET_ORDER,
+    "GET_ALL_LOGS (date range)": queries.GET_ALL_LOGS_BASE + " AND started_at >= ? AND started_at <= ?" + queries.LOGS_KEYSET_ORDER,
+    "GET_ALL_LOGS (date range, next page)": queries.GET_ALL_LOGS_BASE + " AND started_at >= ?" + queries.LOGS_AFTER_CURSOR + queries.LOGS_KEYSET_ORDER,
+    "GET_ALL_LOGS (table + date range, next page)": queries.GET_ALL_LOGS_BASE + " AND started_at >= ? AND source_tablename = ?" + queries.LOGS_AFTER_CURSOR + queries.LOGS_KEYSET_ORDER,
+}
+
+# Config DB queries of data_pipeline_resources/common, run by both the backend and the drivers
+SHARED_QUERIES = {
+    "RECENT_SOURCE_DURATIONS (common/scheduling.py)": scheduling.RECENT_SOURCE_DURATIONS,
+}
+
+
+def collect_queries() -> Dict[str, str]:
+    """All SQL string constants from db.queries plus the composed router queries and the shared ones"""
+    collected = {
+        name: value for name, value in vars(queries).items()
+        if name.isupper() and isinstance(value, str) and name not in SKIPPED_QUERIES
+    }
+    collected.update(COMPOSED_QUERIES)
+    collected.update(SHARED_QUERIES)
+    return collected
+
+
+def explain(conn: sqlite3.Connection, query: str) -> List[str]:
+    """Return the detail lines of EXPLAIN QUERY PLAN for a query, binding NULL to every parameter"""
+    params = [None] * query.count("?")
+    cursor = conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    return [row[3] for row in cursor.fetchall()]
+
+
+def find_full_scans(plan: List[str]) -> List[str]:
+    """Plan lines that scan a run log table without using an index"""
+    return [
+        line for line in plan
+        if line.startswith("SCAN ")
+        and line.split()[1] in INDEXED_TABLES
+        and "INDEX" not in line
+    ]
+
+
+def check_query_plans(conn: sqlite3.Connection) -> List[Tuple[str, List[str]]]:
+    """Returns (query_name, offending plan lines) for every query that needs an index but has none"""
+    failures = []
+    for name, query in collect_queries().items():
+        full_scans = find_full_scans(explain(conn, query))
+        if full_scans:
+            failures.append((name, full_scans))
+    return failures
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(db_path)
+    failures = check_query_plans(conn)
+    conn.close()
+
+    if failures:
+        for name, lines in failures:
+            print(f"FAIL {name}: {'; '.join(lines)}")
+        sys.exit(1)
+
+    print(f"OK: {len(collect_queries())} queries checked, no unindexed scans of {', '.join(INDEXED_TABLES)}")
+
+
+if __name__ == "__main__":
+    main()
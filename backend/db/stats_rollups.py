@@ -0,0 +1,103 @@
+"""
+Maintenance commands for the dashboard stats rollups.
+
+pipeline_stats_hourly / pipeline_stats_daily are kept up to date by triggers on
+pipeline_run_stage_logs. These commands rebuild them from the raw logs and verify
+that they still agree.
+
+Usage (from backend/):
+    python -m db.stats_rollups backfill [--db path/to/config.db]
+    python -m db.stats_rollups check [--since YYYY-MM-DD] [--db path/to/config.db]
+"""
+
+import sys
+import argparse
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+from db import queries
+from db.connection import DB_PATH
+
+STAT_COLUMNS = ("run_count", "rows_processed", "total_duration_ms")
+
+
+def backfill(conn: sqlite3.Connection):
+    """Rebuild both rollup tables from the raw logs in a single transaction.
+
+    Only logs still present in pipeline_run_stage_logs are counted, so run this
+    before archiving old logs, not after.
+    """
+    with conn:
+        conn.execute(queries.DELETE_STATS_HOURLY)
+        conn.execute(queries.DELETE_STATS_DAILY)
+        conn.execute(queries.BACKFILL_STATS_HOURLY)
+        conn.execute(queries.BACKFILL_STATS_DAILY)
+
+
+def _keyed(rows: List[sqlite3.Row], since: Optional[str]) -> Dict[Tuple, Tuple]:
+    """Map (bucket, table, pipeline_type, status) -> stat values, dropping buckets before since"""
+    return {
+        tuple(row[:4]): tuple(row[4:])
+        for row in rows
+        if since is None or row[0] >= since
+    }
+
+
+def _diff(name: str, expected: Dict[Tuple, Tuple], actual: Dict[Tuple, Tuple]) -> List[str]:
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want = expected.get(key, (0, 0, 0))
+        got = actual.get(key, (0, 0, 0))
+        if want != got:
+            diffs = ", ".join(
+                f"{col} expected {w} got {g}" for col, w, g in zip(STAT_COLUMNS, want, got) if w != g
+            )
+            mismatches.append(f"{name} {'/'.join(str(k) for k in key)}: {diffs}")
+    return mismatches
+
+
+def check(conn: sqlite3.Connection, since: Optional[str] = None) -> List[str]:
+    """Compare rollups against the raw logs; returns a description of every mismatching bucket.
+
+    Use since (a 'YYYY-MM-DD' bucket prefix) to skip history that has been archived
+    out of pipeline_run_stage_logs.
+    """
+    cursor = conn.cursor()
+
+    cursor.execute(queries.RAW_STATS_HOURLY)
+    raw_hourly = _keyed(cursor.fetchall(), since)
+    cursor.execute(queries.GET_STATS_HOURLY)
+    hourly = _keyed(cursor.fetchall(), since)
+
+    cursor.execute(queries.GET_STATS_DAILY_FROM_HOURLY)
+    hourly_by_day = _keyed(cursor.fetchall(), since)
+    cursor.execute(queries.GET_STATS_DAILY)
+    daily = _keyed(cursor.fetchall(), since)
+
+    return _diff("hourly", raw_hourly, hourly) + _diff("daily", hourly_by_day, daily)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify the stats rollup tables")
+    parser.add_argument("command", choices=["backfill", "check"])
+    parser.add_argument("--db", default=DB_PATH, help="Path to config.db")
+    parser.add_argument("--since", default=None, help="Only check buckets from this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    if args.command == "backfill":
+        backfill(conn)
+        print("Rollups rebuilt from pipeline_run_stage_logs")
+        conn.close()
+        return
+
+    mismatches = check(conn, args.since)
+    conn.close()
+    if mismatches:
+        for line in mismatches:
+            print(f"MISMATCH {line}")
+        sys.exit(1)
+    print("OK: rollups match pipeline_run_stage_logs")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import configs, logs, stats, runs, stages, sources, destinations, connections
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from routers import configs, logs, stats, runs, stages, sources, destinations, connections, metrics
+from utils.responses import GZIP_MINIMUM_SIZE
 
-app = FastAPI()
+# orjson for every JSON response; the hot paths skip FastAPI's encoder too (utils/responses.py)
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -11,8 +15,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["ETag"],  # Read by the frontend for If-None-Match (utils/response_cache.py)
 )
 
+# Compress /runs, /logs and other large bodies; small ones aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # Include Routers
 app.include_router(configs.router)
 app.include_router(logs.router)
@@ -22,6 +30,7 @@ app.include_router(runs.router)
 app.include_router(sources.router)
 app.include_router(destinations.router)
 app.include_router(connections.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -1,24 +1,86 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
-from db.connection import get_db_connection
+import json
+from db.connection import begin_write, get_db_connection
 from db import queries
-from schemas.models import ConfigUpdate, ConfigCreate
+from routers.sources import load_source_catalog
+from schemas.models import BulkConfigCreate, ConfigUpdate, ConfigCreate, SchedulePlanRequest
+from scheduling import SCHEDULE_DURATION_WINDOW_HOURS, effective_offset, recent_durations
+from source_projection import parse_columns
+from utils.bulk_onboarding import build_plan
+from utils.encryption import decrypt
+from utils.external_db import run_external
+from utils.response_cache import cached_json
+from utils.schedule_planner import DEFAULT_DURATION_MINUTES, current_placements, peak, plan_offsets, sink_offset
+from utils.source_schema import validate_projection
 
 router = APIRouter(
     prefix="/config",
     tags=["config"]
 )
 
-@router.get("", response_model=List[Dict[str, Any]])
-def get_config():
+def check_projection(cursor, source_name: str, source_type: str, source_tablename: str,
+                     columns: Optional[str], row_filter: Optional[str], key_columns: List[str] = []):
+    """400 if the column projection, row filter or key columns do not fit the source table"""
+    if not parse_columns(columns) and not (row_filter or '').strip() and not any(key_columns):
+        return
+    cursor.execute(queries.GET_SOURCE_BY_NAME, (source_name,))
+    source = cursor.fetchone()
+    if source is None or not source["source_creds"]:
+        raise HTTPException(status_code=400, detail="Source credentials not found")
+    try:
+        validate_projection(source_type or source["source_type"], decrypt(source["source_creds"]) or {},
+                            source_tablename, columns, row_filter, key_columns, source_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def check_cdc_sink(load_type: Optional[str], dl_to_sink_is_active: Optional[int]):
+    """400 for a cdc pipeline with an active sink stage: the sink loader cannot apply change files yet"""
+    if load_type == 'cdc' and dl_to_sink_is_active:
+        raise HTTPException(status_code=400, detail="cdc pipelines load to the datalake only: the sink cannot apply "
+                                                    "change files yet, set dl_to_sink_is_active to 0")
+
+def check_compaction(load_type: Optional[str], dl_compaction_is_active: Optional[int]):
+    """400 for compaction of a full load: an hour partition holds whole snapshots, merging them repeats every row"""
+    if (load_type or 'full') == 'full' and dl_compaction_is_active:
+        raise HTTPException(status_code=400, detail="Datalake compaction merges incremental files only: full loads "
+                                                    "write a complete snapshot per run, set dl_compaction_is_active to 0")
+
+def source_placements(cursor, source_name: str) -> List[Dict[str, Any]]:
+    """The source's active pipelines on the schedule timeline (utils/schedule_planner.py)"""
+    cursor.execute(queries.GET_PIPELINE_SCHEDULES_BY_SOURCE, (source_name,))
+    return current_placements([dict(row) for row in cursor.fetchall()], recent_durations(cursor))
+
+def new_pipeline_offsets(cursor, config: ConfigCreate) -> Tuple[Optional[int], Optional[int]]:
+    """The given schedule offsets, else ones planned around the source's other pipelines"""
+    source_offset, dl_to_sink_offset = config.source_to_dl_schedule_offset, config.dl_to_sink_schedule_offset
+    if source_offset is None and config.source_to_dl_schedule > 0:
+        offsets, _ = plan_offsets(source_placements(cursor, config.source_name), [{
+            "source_tablename": config.source_tablename,
+            "schedule": config.source_to_dl_schedule,
+            "duration_minutes": DEFAULT_DURATION_MINUTES,
+        }])
+        source_offset = offsets[config.source_tablename]
+    if dl_to_sink_offset is None and source_offset is not None and config.dl_to_sink_schedule > 0:
+        dl_to_sink_offset = sink_offset(source_offset, DEFAULT_DURATION_MINUTES, config.dl_to_sink_schedule)
+    return source_offset, dl_to_sink_offset
+
+@router.get("")
+def get_config(request: Request):
+    """All pipeline configs; ETag / If-None-Match aware (utils/response_cache.py)"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(queries.GET_ALL_CONFIGS)
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+
+        def build():
+            cursor = conn.cursor()
+            cursor.execute(queries.GET_ALL_CONFIGS)
+            return [dict(row) for row in cursor.fetchall()]
+
+        try:
+            return cached_json(request, conn, "config", "pipeline_config", build)
+        finally:
+            conn.close()
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
     except Exception as e:
@@ -40,6 +102,27 @@ def get_table_config(source_tablename: str):
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
+@router.get("/{source_tablename}/schema", response_model=List[Dict[str, Any]])
+def get_table_schema_versions(source_tablename: str):
+    """Registered source schema versions of the table, newest first"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(queries.GET_SOURCE_SCHEMA_VERSIONS, (source_tablename,))
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {
+                "version": row["version"],
+                "fingerprint": row["fingerprint"],
+                "registered_at": row["registered_at"],
+                "columns": json.loads(row["schema_json"])["columns"],
+            }
+            for row in rows
+        ]
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
 @router.post("", status_code=201)
 def create_config(config: ConfigCreate):
     try:
@@ -52,23 +135,186 @@ def create_config(config: ConfigCreate):
              conn.close()
              raise HTTPException(status_code=400, detail="Configuration for this source table already exists")
 
+        try:
+            check_projection(cursor, config.source_name, config.source_type, config.source_tablename,
+                             config.source_to_dl_columns, config.source_to_dl_row_filter)
+        except HTTPException:
+            conn.close()
+            raise
+
+        for offset, schedule, name in ((config.source_to_dl_schedule_offset, config.source_to_dl_schedule, "source_to_dl"),
+                                       (config.dl_to_sink_schedule_offset, config.dl_to_sink_schedule, "dl_to_sink")):
+            if offset is not None and offset >= schedule:
+                conn.close()
+                raise HTTPException(status_code=400, detail=f"{name}_schedule_offset must be less than {name}_schedule ({schedule})")
+        source_offset, dl_to_sink_offset = new_pipeline_offsets(cursor, config)
+
         # Insert new config
-        # Using default active status (1) for new configs
+        # Using default active status (1) for new configs; cdc ones keep the sink stage off (check_cdc_sink)
+        dl_to_sink_is_active = 0 if config.source_to_dl_load_type == 'cdc' else 1
         cursor.execute(queries.INSERT_PIPELINE_CONFIG, (
             config.source_tablename, config.sink_tablename, 
             config.source_name, config.destination_name,
             config.source_type, config.sink_type,
             config.source_to_dl_schedule, config.source_to_dl_load_type,
-            config.dl_to_sink_schedule, config.dl_to_sink_load_type
+            config.dl_to_sink_schedule, config.dl_to_sink_load_type,
+            ','.join(parse_columns(config.source_to_dl_columns)) or None,
+            (config.source_to_dl_row_filter or '').strip() or None,
+            source_offset, dl_to_sink_offset, dl_to_sink_is_active
         ))
         
         conn.commit()
         conn.close()
         
-        return {"message": "Config created successfully", "config": config}
+        return {"message": "Config created successfully", "config": {
+            **config.dict(), "source_to_dl_schedule_offset": source_offset, "dl_to_sink_schedule_offset": dl_to_sink_offset,
+            "dl_to_sink_is_active": dl_to_sink_is_active
+        }}
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
+def bulk_onboard(request: BulkConfigCreate) -> Dict[str, Any]:
+    catalog = load_source_catalog(request.source_name, request.refresh)
+    try:
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(queries.GET_SOURCE_BY_NAME, (request.source_name,))
+            source_type = cursor.fetchone()["source_type"] or 'postgres'
+            cursor.execute(queries.GET_DESTINATION_BY_NAME, (request.destination_name,))
+            destination = cursor.fetchone()
+            if destination is None:
+                raise HTTPException(status_code=404, detail="Destination not found")
+            cursor.execute(queries.GET_ALL_CONFIG_TABLENAMES)
+            existing = [row[0] for row in cursor.fetchall()]
+            placements = source_placements(cursor, request.source_name)
+            try:
+                plan = build_plan(catalog.tables, existing, placements, request.tables, request.table_regex,
+                                  request.sink_table_prefix, request.source_to_dl_schedule,
+                                  request.dl_to_sink_schedule)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            if not request.dry_run and plan["create"]:
+                begin_write(conn)
+                # Pipelines created since the plan was made would fail the whole insert
+                cursor.execute(queries.GET_ALL_CONFIG_TABLENAMES)
+                conflicts = {row[0] for row in cursor.fetchall()} & {p["source_tablename"] for p in plan["create"]}
+                if conflicts:
+                    conn.rollback()
+                    raise HTTPException(status_code=409, detail=f"Pipelines were created meanwhile for: "
+                                                                f"{', '.join(sorted(conflicts))}; plan again")
+                cursor.executemany(queries.INSERT_PIPELINE_CONFIG_BULK, [
+                    (p["source_tablename"], p["sink_tablename"], request.source_name, request.destination_name,
+                     source_type, destination["destination_type"] or 'postgres',
+                     p["source_to_dl_schedule"], p["source_to_dl_schedule_offset"], p["source_to_dl_load_type"],
+                     p["dl_to_sink_schedule"], p["dl_to_sink_schedule_offset"], p["dl_to_sink_load_type"],
+                     p["source_to_dl_incremental_key"], p["source_to_dl_tiebreaker_key"],
+                     p["dl_compaction_is_active"], p["dl_parquet_sort_by_incremental_key"])
+                    for p in plan["create"]
+                ])
+                conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    return {
+        "source_name": request.source_name,
+        "destination_name": request.destination_name,
+        "dry_run": request.dry_run,
+        "catalog_fetched_at": catalog.fetched_at.isoformat(),
+        "created": 0 if request.dry_run else len(plan["create"]),
+        **plan,
+    }
+
+@router.post("/bulk")
+async def bulk_create_configs(request: BulkConfigCreate):
+    """
+    Pipelines for many tables of a source at once: every table, a table_regex or a list
+    of tables. Returns the plan (load type, keys and staggered schedule offsets per
+    table, skipped tables, utils/bulk_onboarding.py); with dry_run=false the planned
+    pipelines are also inserted, all in one transaction.
+    """
+    # Reads the source catalog: on the external DB workers (utils/external_db.py)
+    return await run_external(bulk_onboard, request)
+
+@router.post("/schedule-plan")
+def plan_schedules(request: SchedulePlanRequest):
+    """
+    Re-plan the schedule offsets of the active pipelines of a source (of every source when
+    source_name is not given) from their recent run durations, to flatten the peak of
+    loads running against the source at once (utils/schedule_planner.py). Returns the
+    plan per source; with dry_run=false the offsets are saved, all in one transaction.
+    A source whose plan would not lower its peak keeps its offsets.
+    """
+    try:
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            if request.source_name is None:
+                cursor.execute(queries.GET_PIPELINE_SCHEDULES)
+            else:
+                cursor.execute(queries.GET_PIPELINE_SCHEDULES_BY_SOURCE, (request.source_name,))
+            configs = [dict(row) for row in cursor.fetchall()]
+            if request.source_name is not None and not configs:
+                raise HTTPException(status_code=404, detail="No pipelines for this source")
+            durations = recent_durations(cursor)
+
+            by_source: Dict[str, List[Dict[str, Any]]] = {}
+            for config in configs:
+                by_source.setdefault(config["source_name"] or '', []).append(config)
+
+            sources, updates = [], []
+            for source_name, source_configs in sorted(by_source.items()):
+                current = current_placements(source_configs, durations)
+                peak_before = peak(current)
+                offsets, peak_after = plan_offsets([], current)
+                replanned = peak_after < peak_before
+                configs_by_table = {config["source_tablename"]: config for config in source_configs}
+                pipelines = []
+                for placement in current:
+                    config = configs_by_table[placement["source_tablename"]]
+                    offset = offsets[placement["source_tablename"]] if replanned else placement["offset"]
+                    dl_to_sink_schedule = config["dl_to_sink_schedule"]
+                    if replanned and dl_to_sink_schedule and dl_to_sink_schedule > 0:
+                        dl_to_sink_offset = sink_offset(offset, placement["duration_minutes"], dl_to_sink_schedule)
+                    else:
+                        dl_to_sink_offset = effective_offset(placement["source_tablename"], dl_to_sink_schedule,
+                                                             config["dl_to_sink_schedule_offset"], 'dl_to_sink')
+                    pipelines.append({
+                        "source_tablename": placement["source_tablename"],
+                        "source_to_dl_schedule": placement["schedule"],
+                        "duration_minutes": placement["duration_minutes"],
+                        "duration_measured": placement["source_tablename"] in durations,
+                        "previous_source_to_dl_schedule_offset": placement["offset"],
+                        "source_to_dl_schedule_offset": offset,
+                        "dl_to_sink_schedule_offset": dl_to_sink_offset,
+                    })
+                    if replanned:
+                        updates.append((offset, dl_to_sink_offset, placement["source_tablename"]))
+                sources.append({
+                    "source_name": source_name,
+                    "replanned": replanned,
+                    "peak_concurrent_loads": {"before": peak_before, "after": peak_after if replanned else peak_before},
+                    "pipelines": pipelines,
+                })
+
+            if not request.dry_run and updates:
+                begin_write(conn)
+                cursor.executemany(queries.UPDATE_SCHEDULE_OFFSETS, updates)
+                conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    return {
+        "dry_run": request.dry_run,
+        "duration_window_hours": SCHEDULE_DURATION_WINDOW_HOURS,
+        "sources": sources,
+    }
+
 @router.delete("/{source_tablename}", status_code=204)
 def delete_config(source_tablename: str):
     try:
@@ -95,10 +341,49 @@ def update_table_config(source_tablename: str, config: ConfigUpdate):
         cursor = conn.cursor()
         
         # Check if table exists
-        cursor.execute(queries.CHECK_TABLE_EXISTS, (source_tablename,))
-        if cursor.fetchone() is None:
+        cursor.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,))
+        current = cursor.fetchone()
+        if current is None:
             conn.close()
             raise HTTPException(status_code=404, detail="Table config not found")
+
+        # Key columns are checked when they change (the editor sends them with every save)
+        changed_keys = [
+            value for value, column in ((config.source_to_dl_incremental_key, "source_to_dl_incremental_key"),
+                                        (config.source_to_dl_tiebreaker_key, "source_to_dl_tiebreaker_key"))
+            if value and value != current[column]
+        ]
+
+        load_type = config.source_to_dl_load_type if config.source_to_dl_load_type is not None else current["source_to_dl_load_type"]
+        try:
+            check_cdc_sink(
+                load_type,
+                config.dl_to_sink_is_active if config.dl_to_sink_is_active is not None else current["dl_to_sink_is_active"],
+            )
+            check_compaction(
+                load_type,
+                config.dl_compaction_is_active if config.dl_compaction_is_active is not None else current["dl_compaction_is_active"],
+            )
+        except HTTPException:
+            conn.close()
+            raise
+
+        # Validate the projection as it will be after the update, also when only the source changes
+        if config.source_to_dl_columns is not None or config.source_to_dl_row_filter is not None \
+                or config.source_name is not None or changed_keys:
+            try:
+                check_projection(
+                    cursor,
+                    config.source_name if config.source_name is not None else current["source_name"],
+                    current["source_type"],
+                    source_tablename,
+                    config.source_to_dl_columns if config.source_to_dl_columns is not None else current["source_to_dl_columns"],
+                    config.source_to_dl_row_filter if config.source_to_dl_row_filter is not None else current["source_to_dl_row_filter"],
+                    changed_keys,
+                )
+            except HTTPException:
+                conn.close()
+                raise
             
         # Update config dynamically based on what's provided
         update_fields = []
@@ -130,6 +415,72 @@ def update_table_config(source_tablename: str, config: ConfigUpdate):
         if config.destination_name is not None:
             update_fields.append("destination_name = ?")
             params.append(config.destination_name)
+        if config.profiling_enabled is not None:
+            update_fields.append("profiling_enabled = ?")
+            params.append(config.profiling_enabled)
+        if config.dl_compaction_schedule is not None:
+            update_fields.append("dl_compaction_schedule = ?")
+            params.append(config.dl_compaction_schedule)
+        if config.dl_compaction_is_active is not None:
+            update_fields.append("dl_compaction_is_active = ?")
+            params.append(config.dl_compaction_is_active)
+        if config.dl_retention_keep_snapshots is not None:
+            update_fields.append("dl_retention_keep_snapshots = ?")
+            params.append(config.dl_retention_keep_snapshots)
+        if config.dl_retention_keep_days is not None:
+            update_fields.append("dl_retention_keep_days = ?")
+            params.append(config.dl_retention_keep_days)
+        if config.dl_gc_is_active is not None:
+            update_fields.append("dl_gc_is_active = ?")
+            params.append(config.dl_gc_is_active)
+        if config.dl_parquet_compression is not None:
+            update_fields.append("dl_parquet_compression = ?")
+            params.append(config.dl_parquet_compression)
+        if config.dl_parquet_compression_level is not None:
+            update_fields.append("dl_parquet_compression_level = ?")
+            params.append(config.dl_parquet_compression_level)
+        if config.dl_parquet_row_group_size is not None:
+            update_fields.append("dl_parquet_row_group_size = ?")
+            params.append(config.dl_parquet_row_group_size)
+        if config.dl_parquet_dictionary is not None:
+            update_fields.append("dl_parquet_dictionary = ?")
+            params.append(config.dl_parquet_dictionary)
+        if config.dl_parquet_statistics is not None:
+            update_fields.append("dl_parquet_statistics = ?")
+            params.append(config.dl_parquet_statistics)
+        if config.dl_parquet_sort_by_incremental_key is not None:
+            update_fields.append("dl_parquet_sort_by_incremental_key = ?")
+            params.append(config.dl_parquet_sort_by_incremental_key)
+        if config.source_to_dl_columns is not None:
+            update_fields.append("source_to_dl_columns = ?")
+            params.append(','.join(parse_columns(config.source_to_dl_columns)) or None)
+        if config.source_to_dl_row_filter is not None:
+            update_fields.append("source_to_dl_row_filter = ?")
+            params.append(config.source_to_dl_row_filter.strip() or None)
+        if config.source_to_dl_incremental_key is not None \
+                and (config.source_to_dl_incremental_key.strip() or None) != current["source_to_dl_incremental_key"]:
+            update_fields.append("source_to_dl_incremental_key = ?")
+            params.append(config.source_to_dl_incremental_key.strip() or None)
+            # A watermark of another column means nothing for the new key: the next run reads everything
+            update_fields.append("source_to_dl_last_incremental_value = NULL")
+            update_fields.append("source_to_dl_watermark = NULL")
+        if config.source_to_dl_tiebreaker_key is not None:
+            update_fields.append("source_to_dl_tiebreaker_key = ?")
+            params.append(config.source_to_dl_tiebreaker_key.strip() or None)
+        if config.source_to_dl_incremental_overlap is not None:
+            update_fields.append("source_to_dl_incremental_overlap = ?")
+            params.append(config.source_to_dl_incremental_overlap)
+        for offset_column, schedule_column in (("source_to_dl_schedule_offset", "source_to_dl_schedule"),
+                                               ("dl_to_sink_schedule_offset", "dl_to_sink_schedule")):
+            offset = getattr(config, offset_column)
+            if offset is None:
+                continue
+            schedule = getattr(config, schedule_column) or current[schedule_column]
+            if offset >= 0 and schedule and offset >= schedule:
+                conn.close()
+                raise HTTPException(status_code=400, detail=f"{offset_column} must be less than {schedule_column} ({schedule})")
+            update_fields.append(f"{offset_column} = ?")
+            params.append(offset if offset >= 0 else None)
 
         if not update_fields:
              conn.close()
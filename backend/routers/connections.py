@@ -1,7 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
+import sqlite3
 import psycopg2
+from db.connection import db_connection, begin_write
+from db import queries
+from utils import external_db
+from utils.encryption import decrypt, masked_json, rotate
 
 router = APIRouter(
     prefix="/connections",
@@ -12,8 +17,46 @@ class ConnectionTestRequest(BaseModel):
     type: str = 'postgres'
     creds: Dict[str, Any]
 
+@router.get("/pools")
+def get_connection_pools():
+    """External database pools: concurrency limit, waiting requests and per-pool connection counts"""
+    return external_db.pool_stats()
+
+@router.post("/rotate-keys")
+def rotate_keys():
+    """
+    Re-encrypt every stored source and destination credential under the first ENCRYPTION_KEY
+    (common/credentials.py) and refresh its masked projection. Run after deploying "new,old"
+    keys; once nothing is reported as failed, the old key can be dropped.
+    """
+    result = {}
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            begin_write(conn)
+            for kind, select, update in (("sources", queries.GET_ALL_SOURCE_CREDS, queries.UPDATE_SOURCE_CREDS),
+                                         ("destinations", queries.GET_ALL_DESTINATION_CREDS, queries.UPDATE_DESTINATION_CREDS)):
+                rotated, failed = 0, []
+                for name, token in cursor.execute(select).fetchall():
+                    new_token = rotate(token)
+                    if new_token is None:
+                        failed.append(name)
+                        continue
+                    cursor.execute(update, (new_token, masked_json(decrypt(new_token)), name))
+                    rotated += 1
+                result[kind] = {"rotated": rotated, "failed": failed}
+            conn.commit()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    return result
+
+def check_postgres(creds: Dict[str, Any]):
+    """Borrow (and health-check) a pooled connection; a reachable database keeps it warm for later requests"""
+    with external_db.external_connection(creds, "connection_test", connect_timeout=3, check=True):
+        pass
+
 @router.post("/test")
-def test_connection(request: ConnectionTestRequest):
+async def test_connection(request: ConnectionTestRequest):
     creds = request.creds
     conn_type = request.type
     
@@ -38,16 +81,8 @@ def test_connection(request: ConnectionTestRequest):
 
     try:
         if conn_type == 'postgres':
-            # Real connection test for Postgres
-            conn = psycopg2.connect(
-                host=creds.get('host'),
-                port=creds.get('port'),
-                user=creds.get('user'),
-                password=creds.get('password'),
-                dbname=creds.get('dbname'),
-                connect_timeout=3
-            )
-            conn.close()
+            # Real connection test for Postgres, on the external DB workers so slow hosts don't block the API
+            await external_db.run_external(check_postgres, creds)
             return {"status": "success", "message": "Connection successful"}
             
         elif conn_type == 'googlesheets':
@@ -89,6 +124,8 @@ def test_connection(request: ConnectionTestRequest):
     except psycopg2.Error as e:
         error_msg = str(e).strip()
         raise HTTPException(status_code=400, detail=f"Connection failed: {error_msg}")
+    except external_db.PoolExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
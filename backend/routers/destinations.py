@@ -1,12 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any
 import sqlite3
 import json
 import uuid6
 from db.connection import get_db_connection
 from schemas.models import DestinationConfig
-from schemas.models import DestinationConfig
-from utils.encryption import encrypt, decrypt, mask_credentials
+from utils.encryption import encrypt, masked_json, read_masked, summary_creds
+from utils.response_cache import cached_json
 from db.queries import (
     GET_ALL_DESTINATIONS,
     GET_DESTINATION_BY_ID,
@@ -34,8 +34,7 @@ def get_destinations():
         for row in rows:
             data = dict(row)
             if data["destination_creds"]:
-                data["destination_creds"] = decrypt(data["destination_creds"])
-                data["destination_creds"] = mask_credentials(data["destination_creds"])
+                data["destination_creds"] = read_masked(data["destination_creds_masked"], data["destination_creds"])
             dests.append(data)
             
         conn.close()
@@ -43,6 +42,32 @@ def get_destinations():
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
+@router.get("/summary")
+def get_destinations_summary(request: Request):
+    """
+    Lightweight list of destinations with their non-secret credentials fields, for listing pages.
+    ETag / If-None-Match aware (utils/response_cache.py).
+    """
+    try:
+        conn = get_db_connection()
+
+        def build():
+            cursor = conn.cursor()
+            cursor.execute(GET_ALL_DESTINATIONS)
+            dests = []
+            for row in cursor.fetchall():
+                data = dict(row)
+                data["destination_creds"] = summary_creds(data.pop("destination_creds_masked"), data["destination_creds"])
+                dests.append(data)
+            return dests
+
+        try:
+            return cached_json(request, conn, "destinations_summary", "destinations_config", build)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
 @router.post("", status_code=201)
 def create_destination(destination: DestinationConfig):
     try:
@@ -60,7 +85,7 @@ def create_destination(destination: DestinationConfig):
         
         cursor.execute(INSERT_DESTINATION, (
             new_id, destination.destination_name, destination.destination_type,
-            creds_json
+            creds_json, masked_json(destination.destination_creds)
         ))
         
         conn.commit()
@@ -108,7 +133,7 @@ def update_destination(destination_name: str, destination: DestinationConfig):
         creds_json = encrypt(destination.destination_creds) if destination.destination_creds else None
         
         cursor.execute(UPDATE_DESTINATION_BY_NAME, (
-            destination.destination_type, creds_json, destination_name
+            destination.destination_type, creds_json, masked_json(destination.destination_creds), destination_name
         ))
         
         conn.commit()
@@ -1,26 +1,118 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
+import base64
+import json
+import pandas as pd
 from db.connection import get_db_connection
 from db import queries
+from utils import datalake
+from utils.responses import json_response
 
 router = APIRouter(
     prefix="/logs",
     tags=["logs"]
 )
 
-@router.get("", response_model=List[Dict[str, Any]])
+def encode_cursor(started_at: str, log_id: str) -> str:
+    """Opaque next-page token for the (started_at, id) keyset"""
+    return base64.urlsafe_b64encode(json.dumps([started_at, log_id]).encode('utf-8')).decode('utf-8')
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        started_at, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        return str(started_at), str(log_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Filtered counts are exact up to this many rows, estimated (or null) beyond
+LOG_COUNT_LIMIT = 10000
+
+def estimate_log_count(cursor: sqlite3.Cursor, source_tablename: Optional[str],
+                       start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[int]:
+    """Approximate number of logs, read from index endpoints and ANALYZE stats instead of COUNT(*).
+
+    Filtered logs are counted on the started_at indexes, stopping after LOG_COUNT_LIMIT
+    rows. Past that a table filter alone falls back to the ANALYZE average rows per
+    table; a date range has no cheap estimate and gives None.
+    """
+    if not (source_tablename or start_date or end_date):
+        cursor.execute(queries.ESTIMATE_LOG_COUNT)
+        return cursor.fetchone()["estimate"]
+
+    # started_at is an ISO string: "" and "9999" bound an open end
+    bounds = (start_date or "", end_date or "9999")
+    if source_tablename:
+        cursor.execute(queries.COUNT_LOGS_IN_RANGE_BY_TABLE, (source_tablename, *bounds, LOG_COUNT_LIMIT + 1))
+    else:
+        cursor.execute(queries.COUNT_LOGS_IN_RANGE, (*bounds, LOG_COUNT_LIMIT + 1))
+    count = cursor.fetchone()["estimate"]
+    if count <= LOG_COUNT_LIMIT:
+        return count
+    if start_date or end_date:
+        return None
+
+    cursor.execute(queries.GET_LOGS_INDEX_STAT)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    # stat is "<rows> <avg rows per source_tablename> ..."
+    parts = row["stat"].split()
+    return int(parts[1]) if len(parts) > 1 else None
+
+def get_archived_logs(limit: int, start_date: Optional[str], end_date: Optional[str],
+                      source_tablename: Optional[str], after: Optional[Tuple[str, str]],
+                      newer_than: Optional[str]) -> List[Dict[str, Any]]:
+    """Up to limit logs from the Parquet archive matching the /logs filters, newest first.
+
+    newer_than skips archive days older than a row already on the page; those could
+    never sort into it.
+    """
+    start_day = max(filter(None, [start_date and start_date[:10], newer_than and newer_than[:10]]), default=None)
+    end_day = min(filter(None, [end_date and end_date[:10], after and after[0][:10]]), default=None)
+
+    client = datalake.get_minio_client()
+    object_names = datalake.list_archive_objects(client, "pipeline_run_stage_logs", start_day, end_day)
+    df = datalake.read_parquet_objects(client, object_names)
+    if df.empty:
+        return []
+
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= df["started_at"] >= start_date
+    if end_date:
+        mask &= df["started_at"] <= end_date
+    if source_tablename:
+        mask &= df["source_tablename"] == source_tablename
+    if after:
+        mask &= (df["started_at"] < after[0]) | ((df["started_at"] == after[0]) & (df["id"] < after[1]))
+
+    df = df[mask].sort_values(["started_at", "id"], ascending=False).head(limit)
+    # NaN -> None so the rows serialize like the SQLite ones
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+@router.get("")
 def get_all_logs(
-    page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    source_tablename: Optional[str] = None
+    source_tablename: Optional[str] = None,
+    include_total: bool = False,
+    include_archived: bool = False
 ):
-    """Get all pipeline run logs with pagination and filtering"""
+    """Get pipeline run logs, newest first, with keyset pagination and filtering.
+
+    Pass the returned next_cursor back as cursor to fetch the following page.
+    include_archived also reads logs moved to the datalake by the retention job.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    after = decode_cursor(cursor) if cursor else None
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
         query = queries.GET_ALL_LOGS_BASE
         params = []
@@ -29,23 +121,49 @@ def get_all_logs(
             query += " AND started_at >= ?"
             params.append(start_date)
             
-        if end_date:
+        # A cursor at or before end_date already bounds the range from above; keeping both
+        # would let SQLite seek on end_date and walk every earlier page again
+        if end_date and not (after and after[0] <= end_date):
             query += " AND started_at <= ?"
             params.append(end_date)
 
         if source_tablename:
             query += " AND source_tablename = ?"
             params.append(source_tablename)
+
+        if after:
+            query += queries.LOGS_AFTER_CURSOR
+            params.extend(after)
             
-        # Add sorting and pagination
-        offset = (page - 1) * limit
-        query += " ORDER BY started_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        # Fetch one extra row to know whether another page exists
+        query += queries.LOGS_KEYSET_ORDER
+        params.append(limit + 1)
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        db_cursor.execute(query, params)
+        rows = [dict(row) for row in db_cursor.fetchall()]
+
+        if include_archived:
+            # Archived and hot rows are disjoint; merge and keep the newest limit + 1
+            newer_than = rows[-1]["started_at"] if len(rows) > limit else None
+            try:
+                rows += get_archived_logs(limit + 1, start_date, end_date, source_tablename, after, newer_than)
+            except Exception as e:
+                raise HTTPException(status_code=502, detail=f"Failed to read archived logs: {e}")
+            rows = sorted(rows, key=lambda row: (row["started_at"] or "", row["id"]), reverse=True)[:limit + 1]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["started_at"], rows[-1]["id"])
+
+        total_estimate = estimate_log_count(db_cursor, source_tablename, start_date, end_date) if include_total else None
         conn.close()
-        return [dict(row) for row in rows]
+
+        return json_response({
+            "logs": rows,
+            "next_cursor": next_cursor,
+            "total_estimate": total_estimate
+        })
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -83,7 +201,46 @@ def get_logs_summary():
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-@router.get("/{source_tablename}", response_model=List[Dict[str, Any]])
+def get_profile_object_name(log_id: str) -> str:
+    """Datalake object of a stage log's profile (.prof), or 404"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(queries.GET_STAGE_LOG_PROFILE_PATH, (log_id,))
+        row = cursor.fetchone()
+        conn.close()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if row is None or not row["profile_path"]:
+        raise HTTPException(status_code=404, detail="No profile recorded for this log")
+    return datalake.object_name_from_path(row["profile_path"])
+
+@router.get("/{log_id}/profile")
+def get_log_profile(log_id: str):
+    """Profile summary of a stage (wall time, tracemalloc peak, RSS high-water, top functions)"""
+    object_name = get_profile_object_name(log_id)
+    try:
+        data = datalake.get_object_bytes(datalake.get_minio_client(), object_name[:-len(".prof")] + ".json")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to read profile: {e}")
+    return {"profile_path": object_name, **json.loads(data)}
+
+@router.get("/{log_id}/profile/download")
+def download_log_profile(log_id: str):
+    """Raw pstats dump of a stage, e.g. for `snakeviz` or `python -m pstats`"""
+    object_name = get_profile_object_name(log_id)
+    try:
+        data = datalake.get_object_bytes(datalake.get_minio_client(), object_name)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to read profile: {e}")
+    filename = object_name.rsplit("/", 1)[-1]
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{source_tablename}")
 def get_logs_by_table(source_tablename: str):
     """Get pipeline run logs for a specific table"""
     try:
@@ -92,6 +249,6 @@ def get_logs_by_table(source_tablename: str):
         cursor.execute(queries.GET_LOGS_BY_TABLE, (source_tablename,))
         rows = cursor.fetchall()
         conn.close()
-        return [dict(row) for row in rows]
+        return json_response([dict(row) for row in rows])
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
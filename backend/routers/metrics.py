@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from utils import metrics  # noqa: F401  registers the pipeline collector
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+@router.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint: backend runs plus driver/loader histograms from METRICS_DIR"""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
 import uuid6
 import subprocess
 import threading
 import time
-import os
+import json
 from datetime import datetime, timezone, timedelta
-from db.connection import get_db_connection
+from db.connection import get_db_connection, db_connection, begin_write
 from db import queries
+from utils import metrics
+from profiling import parse_profile_path
 from schemas.models import TriggerRequest
+from utils.responses import json_response
 
 # IST timezone
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -21,28 +24,102 @@ router = APIRouter(
 # Store last file path from source_to_dl stage for minio verification
 _pipeline_context = {}
 
-def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
-    """Execute a single pipeline stage based on stage_type"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def calculate_time_taken(started_at: datetime, completed_at: datetime) -> Tuple[str, int]:
+    """Duration as HH:MM:SS.mmm text (same format as the drivers) and integer milliseconds"""
+    duration_ms = round((completed_at - started_at).total_seconds() * 1000)
+    seconds, milliseconds = divmod(duration_ms, 1000)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}", duration_ms
+
+def observe_stage(metric_labels: Dict[str, str], status: str, duration_ms: int, rows_processed: Optional[int] = None):
+    metrics.observe("pipeline_stage_duration_seconds", duration_ms / 1000, status=status, **metric_labels)
+    if rows_processed is not None:
+        metrics.observe("pipeline_stage_rows", rows_processed, **metric_labels)
+
+def parse_cache_stats(stdout: str) -> Tuple[Optional[int], Optional[int]]:
+    """(hits, misses) of the loader's datalake cache (CACHE_HITS/CACHE_MISSES lines), when caching is on"""
+    hits, misses = None, None
+    for line in (stdout or '').split('\n'):
+        try:
+            if line.startswith('CACHE_HITS:'):
+                hits = int(line.split(':', 1)[1])
+            elif line.startswith('CACHE_MISSES:'):
+                misses = int(line.split(':', 1)[1])
+        except ValueError:
+            pass
+    return hits, misses
+
+# pipeline_config columns passed to the source loader as Parquet writer settings
+# (data_pipeline_resources/common/parquet_format.py)
+PARQUET_ENV_COLUMNS = {
+    'dl_parquet_compression': 'PARQUET_COMPRESSION',
+    'dl_parquet_compression_level': 'PARQUET_COMPRESSION_LEVEL',
+    'dl_parquet_row_group_size': 'PARQUET_ROW_GROUP_SIZE',
+    'dl_parquet_dictionary': 'PARQUET_DICTIONARY',
+    'dl_parquet_statistics': 'PARQUET_STATISTICS',
+    'dl_parquet_sort_by_incremental_key': 'PARQUET_SORT_BY_INCREMENTAL_KEY',
+}
+
+def parquet_env_args(config_dict: Dict[str, Any]) -> List[str]:
+    """docker exec -e arguments for the configured Parquet settings; unset columns keep the loader defaults"""
+    args = []
+    for column, env_name in PARQUET_ENV_COLUMNS.items():
+        value = config_dict.get(column)
+        if value is not None and value != '':
+            args += ['-e', f'{env_name}={value}']
+    return args
+
+def projection_env_args(config_dict: Dict[str, Any]) -> List[str]:
+    """docker exec -e arguments for the configured column projection and row filter
+    (data_pipeline_resources/common/source_projection.py); unset columns keep SELECT *"""
+    args = []
+    columns = ','.join(c.strip() for c in (config_dict.get('source_to_dl_columns') or '').split(',') if c.strip())
+    if columns:
+        args += ['-e', f'SOURCE_COLUMNS={columns}']
+    if (config_dict.get('source_to_dl_row_filter') or '').strip():
+        args += ['-e', f'SOURCE_ROW_FILTER={config_dict["source_to_dl_row_filter"].strip()}']
+    return args
+
+def register_source_schema(source_tablename: str, schema_json: str):
+    """Store the loader's SCHEMA line as the table's next schema version, unless it is already the latest
+    (data_pipeline_resources/common/schema_registry.py)"""
+    fingerprint = json.loads(schema_json)['fingerprint']
+    with db_connection() as conn:
+        begin_write(conn)
+        latest = conn.execute(queries.GET_LATEST_SOURCE_SCHEMA, (source_tablename,)).fetchone()
+        if latest is None or latest['fingerprint'] != fingerprint:
+            version = latest['version'] + 1 if latest else 1
+            conn.execute(queries.INSERT_SOURCE_SCHEMA_VERSION,
+                         (source_tablename, version, fingerprint, schema_json, datetime.now(IST).isoformat()))
+        conn.commit()
+
+def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str, metric_labels: Optional[Dict[str, str]] = None):
+    """Execute a single pipeline stage based on stage_type.
+
+    Config DB connections are borrowed only around the reads and writes, never while
+    a stage subprocess runs, so long loaders don't pin a connection or a read snapshot.
+    """
     started_at = datetime.now(IST)
     stage_type = stage['stage_type']
+    metric_labels = dict(metric_labels or {'source_tablename': source_tablename}, stage_type=stage_type)
     
-    # Insert stage log as running
     log_id = str(uuid6.uuid7())
-    cursor.execute(queries.INSERT_STAGE_LOG_RUNNING, (log_id, source_tablename, stage_type, started_at.isoformat(), run_id, stage['stage_order']))
-    conn.commit()
-    
-    # Update pipeline run current stage
-    cursor.execute(queries.UPDATE_RUN_MASTER_STAGE, (stage['stage_order'], run_id))
-    conn.commit()
+    with db_connection() as conn:
+        begin_write(conn)
+        cursor = conn.cursor()
+        # Insert stage log as running and update pipeline run current stage
+        cursor.execute(queries.INSERT_STAGE_LOG_RUNNING, (log_id, source_tablename, stage_type, started_at.isoformat(), run_id, stage['stage_order']))
+        cursor.execute(queries.UPDATE_RUN_MASTER_STAGE, (stage['stage_order'], run_id))
+        conn.commit()
     
     try:
         success = False
         error_msg = None
         rows_processed = 0
         file_paths = []
+        profile_path = None
+        cache_stats = (None, None)
         
         if stage_type == 'driver_source_to_dl':
             # Stage 1: Driver check for source to DL - just verify container is running
@@ -58,19 +135,24 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
         elif stage_type == 'loader_source_to_dl':
             # Stage 2: Run the actual loader with environment variables via -e flags
             # Get config for this table to pass correct parameters
-            cursor.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,))
-            config = cursor.fetchone()
-            config_dict = dict(config) if config else {}
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,))
+                config = cursor.fetchone()
+                config_dict = dict(config) if config else {}
+                
+                # Fetch source credentials
+                cursor.execute(queries.GET_SOURCE_BY_NAME, (config_dict.get('source_name'),))
+                source_config = cursor.fetchone()
+
+                cursor.execute(queries.GET_LATEST_SOURCE_SCHEMA, (source_tablename,))
+                registered_schema = cursor.fetchone()
             
             load_type = config_dict.get('source_to_dl_load_type', 'full')
             incremental_key = config_dict.get('source_to_dl_incremental_key', '')
             last_inc_value = config_dict.get('source_to_dl_last_incremental_value', '')
             
-            # Fetch source credentials
-            source_name = config_dict.get('source_name')
-            cursor.execute(queries.GET_SOURCE_BY_NAME, (source_name,))
-            source_config = cursor.fetchone()
-            
+            new_inc_value, new_watermark, new_schema = None, None, None
             source_creds = {}
             if source_config and source_config['source_creds']:
                  from utils.encryption import decrypt
@@ -82,18 +164,38 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
                 '-e', f'LOAD_TYPE={load_type}',
                 '-e', f'INCREMENTAL_KEY={incremental_key or ""}',
                 '-e', f'LAST_INCREMENTAL_VALUE={last_inc_value or ""}',
-                '-e', f'ENCRYPTION_KEY={os.getenv("ENCRYPTION_KEY")}',
+                '-e', f'WATERMARK={config_dict.get("source_to_dl_watermark") or ""}',
+                '-e', f'TIEBREAKER_KEY={config_dict.get("source_to_dl_tiebreaker_key") or ""}',
+                '-e', f'INCREMENTAL_OVERLAP={config_dict.get("source_to_dl_incremental_overlap") or 0}',
+                '-e', f'SOURCE_SCHEMA={registered_schema["schema_json"] if registered_schema else ""}',
+                '-e', f'PROFILE_ENABLED={"1" if config_dict.get("profiling_enabled") else "0"}',
                 # Pass credentials dynamically
                 '-e', f'POSTGRES_HOST={source_creds.get("host", "")}',
                 '-e', f'POSTGRES_PORT={source_creds.get("port", "")}',
                 '-e', f'POSTGRES_USER={source_creds.get("user", "")}',
                 '-e', f'POSTGRES_PASSWORD={source_creds.get("password", "")}',
                 '-e', f'POSTGRES_DB={source_creds.get("dbname", "")}',
+                *parquet_env_args(config_dict),
+                *projection_env_args(config_dict),
                 'driver_source_to_dl',
                 'python', '/loaders/postgres_to_dl/main.py'
             ]
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            metrics.observe_loader_output(result.stdout, metric_labels)
+            profile_path = parse_profile_path(result.stdout)
             success = result.returncode == 0
+            for line in result.stdout.split('\n'):
+                # Kept on failure too: cdc prints its LSN before advancing the slot (postgres_to_dl/cdc.py)
+                if line.startswith('LAST_INCREMENTAL_VALUE:'):
+                    new_inc_value = line.split(':', 1)[1].strip()
+                elif line.startswith('WATERMARK:'):
+                    new_watermark = line.split(':', 1)[1].strip()
+            # Same as driver_source_to_dl: the next run continues from here instead of re-reading
+            if new_inc_value:
+                with db_connection() as conn:
+                    begin_write(conn)
+                    conn.execute(queries.UPDATE_INCREMENTAL_WATERMARK, (new_inc_value, new_watermark, source_tablename))
+                    conn.commit()
             if success:
                 for line in result.stdout.split('\n'):
                     if line.startswith('ROWS_PROCESSED:'):
@@ -105,6 +207,10 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
                         file_path = line.split(':', 1)[1]
                         file_paths.append(file_path)
                         _pipeline_context[run_id] = {'file_path': file_path}
+                    elif line.startswith('SCHEMA:'):
+                        new_schema = line.split(':', 1)[1].strip()
+                if new_schema:
+                    register_source_schema(source_tablename, new_schema)
             else:
                 error_msg = result.stderr[:500] if result.stderr else result.stdout[:500] if result.stdout else "Loader failed"
                 
@@ -136,13 +242,14 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
             # Stage 5: Run the DL to sink loader with environment variables via -e flags
             
             # Fetch destination credentials
-            cursor.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,))
-            config = cursor.fetchone()
-            config_dict = dict(config) if config else {}
-            
-            destination_name = config_dict.get('destination_name')
-            cursor.execute(queries.GET_DESTINATION_BY_NAME, (destination_name,))
-            dest_config = cursor.fetchone()
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,))
+                config = cursor.fetchone()
+                config_dict = dict(config) if config else {}
+                
+                cursor.execute(queries.GET_DESTINATION_BY_NAME, (config_dict.get('destination_name'),))
+                dest_config = cursor.fetchone()
 
             dest_creds = {}
             if dest_config and dest_config['destination_creds']:
@@ -153,18 +260,36 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
                 'docker', 'exec',
                 '-e', f'SOURCE_TABLE_NAME={source_tablename}',
                 '-e', f'SINK_TABLENAME={source_tablename}',
-                '-e', f'ENCRYPTION_KEY={os.getenv("ENCRYPTION_KEY")}',
                 # Pass credentials dynamically
                 '-e', f'SINK_POSTGRES_HOST={dest_creds.get("host", "")}',
                 '-e', f'SINK_POSTGRES_PORT={dest_creds.get("port", "")}',
                 '-e', f'SINK_POSTGRES_USER={dest_creds.get("user", "")}',
                 '-e', f'SINK_POSTGRES_PASSWORD={dest_creds.get("password", "")}',
                 '-e', f'SINK_POSTGRES_DB={dest_creds.get("dbname", "")}',
+                '-e', f'PROFILE_ENABLED={"1" if config_dict.get("profiling_enabled") else "0"}',
+                '-e', f'INCREMENTAL_KEY={config_dict.get("source_to_dl_incremental_key") or ""}',
+                # The sink reads only the projected columns (the row filter already applied at the source)
+                *projection_env_args(config_dict),
                 'driver_dl_to_sink',
                 'python', '/loaders/dl_to_postgres/main.py'
             ]
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            metrics.observe_loader_output(result.stdout, metric_labels)
+            profile_path = parse_profile_path(result.stdout)
+            cache_stats = parse_cache_stats(result.stdout)
             success = result.returncode == 0
+            for line in result.stdout.split('\n'):
+                # Kept on failure too: cdc prints its LSN before advancing the slot (postgres_to_dl/cdc.py)
+                if line.startswith('LAST_INCREMENTAL_VALUE:'):
+                    new_inc_value = line.split(':', 1)[1].strip()
+                elif line.startswith('WATERMARK:'):
+                    new_watermark = line.split(':', 1)[1].strip()
+            # Same as driver_source_to_dl: the next run continues from here instead of re-reading
+            if new_inc_value:
+                with db_connection() as conn:
+                    begin_write(conn)
+                    conn.execute(queries.UPDATE_INCREMENTAL_WATERMARK, (new_inc_value, new_watermark, source_tablename))
+                    conn.commit()
             if success:
                 for line in result.stdout.split('\n'):
                     if line.startswith('ROWS_PROCESSED:'):
@@ -181,57 +306,78 @@ def execute_pipeline_stage(run_id: str, stage: Dict, source_tablename: str):
             success = True
         
         completed_at = datetime.now(IST)
-        time_taken = str(completed_at - started_at)
+        time_taken, duration_ms = calculate_time_taken(started_at, completed_at)
         
-        if success:
-            cursor.execute(queries.UPDATE_STAGE_LOG_SUCCESS, (completed_at.isoformat(), time_taken, rows_processed, 
-                  ','.join(file_paths) if file_paths else None, log_id))
-            conn.commit()
-            conn.close()
-            return True, None
-        else:
-            cursor.execute(queries.UPDATE_STAGE_LOG_FAILED, (completed_at.isoformat(), time_taken, error_msg, log_id))
+        with db_connection() as conn:
+            begin_write(conn)
+            if success:
+                conn.execute(queries.UPDATE_STAGE_LOG_SUCCESS, (completed_at.isoformat(), time_taken, duration_ms, rows_processed, 
+                      ','.join(file_paths) if file_paths else None, log_id))
+            else:
+                conn.execute(queries.UPDATE_STAGE_LOG_FAILED, (completed_at.isoformat(), time_taken, duration_ms, error_msg, log_id))
+            if profile_path:
+                conn.execute(queries.UPDATE_STAGE_LOG_PROFILE_PATH, (profile_path, log_id))
+            if cache_stats != (None, None):
+                conn.execute(queries.UPDATE_STAGE_LOG_CACHE_STATS, (*cache_stats, log_id))
             conn.commit()
-            conn.close()
-            return False, error_msg
+        observe_stage(metric_labels, 'success' if success else 'failed', duration_ms,
+                      rows_processed if success and stage_type.startswith('loader') else None)
+        return success, error_msg
             
     except subprocess.TimeoutExpired:
-        cursor.execute(queries.UPDATE_STAGE_LOG_TIMEOUT, (datetime.now(IST).isoformat(), log_id))
-        conn.commit()
-        conn.close()
+        completed_at = datetime.now(IST)
+        time_taken, duration_ms = calculate_time_taken(started_at, completed_at)
+        with db_connection() as conn:
+            begin_write(conn)
+            conn.execute(queries.UPDATE_STAGE_LOG_TIMEOUT, (completed_at.isoformat(), time_taken, duration_ms, log_id))
+            conn.commit()
+        observe_stage(metric_labels, 'failed', duration_ms)
         return False, "Stage timeout"
     except Exception as e:
-        cursor.execute(queries.UPDATE_STAGE_LOG_ERROR, (datetime.now(IST).isoformat(), str(e)[:500], log_id))
-        conn.commit()
-        conn.close()
+        completed_at = datetime.now(IST)
+        time_taken, duration_ms = calculate_time_taken(started_at, completed_at)
+        with db_connection() as conn:
+            begin_write(conn)
+            conn.execute(queries.UPDATE_STAGE_LOG_ERROR, (completed_at.isoformat(), time_taken, duration_ms, str(e)[:500], log_id))
+            conn.commit()
+        observe_stage(metric_labels, 'failed', duration_ms)
         return False, str(e)
 
 
-def run_pipeline_async(run_id: str, stages: List[Dict], source_tablename: str):
+def run_pipeline_async(run_id: str, stages: List[Dict], source_tablename: str, triggered_at: Optional[datetime] = None):
     """Run all pipeline stages sequentially in background"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     all_success = True
     error_message = None
+
+    with db_connection() as conn:
+        config = conn.execute(queries.GET_CONFIG_BY_TABLE, (source_tablename,)).fetchone()
+    metric_labels = {
+        'source_tablename': source_tablename,
+        'source_name': config['source_name'] if config else None,
+        'destination_name': config['destination_name'] if config else None,
+    }
+    if triggered_at:
+        metrics.observe("pipeline_queue_wait_seconds", (datetime.now(IST) - triggered_at).total_seconds(), **metric_labels)
     
-    for stage in stages:
-        success, error = execute_pipeline_stage(run_id, stage, source_tablename)
-        if not success:
-            all_success = False
-            error_message = error
-            break
+    with metrics.RUNS_IN_PROGRESS.track_inprogress():
+        for stage in stages:
+            success, error = execute_pipeline_stage(run_id, stage, source_tablename, metric_labels)
+            if not success:
+                all_success = False
+                error_message = error
+                break
     
     # Update pipeline run status
     completed_at = datetime.now(IST)
     final_status = 'success' if all_success else 'failed'
     
-    cursor.execute(queries.UPDATE_RUN_MASTER_STATUS, (final_status, completed_at.isoformat(), error_message, run_id))
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        begin_write(conn)
+        conn.execute(queries.UPDATE_RUN_MASTER_STATUS, (final_status, completed_at.isoformat(), error_message, run_id))
+        conn.commit()
 
 
-@router.get("/runs", response_model=List[Dict[str, Any]])
+@router.get("/runs")
 def get_pipeline_runs():
     """Get all pipeline runs with their stage statuses"""
     try:
@@ -246,7 +392,7 @@ def get_pipeline_runs():
             run['stages'] = [dict(row) for row in cursor.fetchall()]
         
         conn.close()
-        return runs
+        return json_response(runs)
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -274,7 +420,7 @@ def get_pipeline_run(run_id: str):
         run_dict['stage_definitions'] = [dict(row) for row in cursor.fetchall()]
         
         conn.close()
-        return run_dict
+        return json_response(run_dict)
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -293,7 +439,7 @@ def get_runs_by_table(source_tablename: str):
             run['stages'] = [dict(row) for row in cursor.fetchall()]
         
         conn.close()
-        return runs
+        return json_response(runs)
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -326,7 +472,7 @@ def trigger_pipeline(source_tablename: str, request: TriggerRequest, background_
         
         # Start pipeline execution in background
         # Using threading to match original behavior, but background_tasks could also be used
-        thread = threading.Thread(target=run_pipeline_async, args=(run_id, stages, source_tablename))
+        thread = threading.Thread(target=run_pipeline_async, args=(run_id, stages, source_tablename, started_at))
         thread.start()
         
         return {
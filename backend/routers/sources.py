@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from typing import List, Dict, Any, Optional
 import sqlite3
 import json
 import uuid6
 from db.connection import get_db_connection
 from schemas.models import SourceConfig
-from schemas.models import SourceConfig
-from utils.encryption import encrypt, decrypt, mask_credentials
+from utils.encryption import encrypt, decrypt, masked_json, read_masked, summary_creds
+from utils import source_catalog
+from utils.external_db import run_external
+from utils.response_cache import cached_json
 from db.queries import (
     GET_SOURCE_BY_NAME,
     GET_SOURCE_BY_ID,
@@ -14,8 +16,7 @@ from db.queries import (
     CHECK_SOURCE_EXISTS_BY_NAME,
     INSERT_SOURCE, 
     DELETE_SOURCE_BY_NAME, 
-    UPDATE_SOURCE_BY_NAME,
-    GET_PUBLIC_TABLES
+    UPDATE_SOURCE_BY_NAME
 )
 
 router = APIRouter(
@@ -23,8 +24,11 @@ router = APIRouter(
     tags=["sources"]
 )
 
-@router.get("/{source_name}/tables", response_model=List[str])
-def get_source_tables(source_name: str):
+# Page size limit of GET /sources/{source_name}/catalog
+MAX_CATALOG_PAGE_SIZE = 1000
+
+def load_source_catalog(source_name: str, refresh: bool = False) -> source_catalog.Catalog:
+    """The source's cached table catalog (utils/source_catalog.py); 404/400/500 as HTTP errors"""
     try:
         conn = get_db_connection()
         conn.row_factory = sqlite3.Row
@@ -34,78 +38,75 @@ def get_source_tables(source_name: str):
         cursor.execute(GET_SOURCE_BY_NAME, (source_name,))
         row = cursor.fetchone()
         conn.close()
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
         
-        if not row:
-            raise HTTPException(status_code=404, detail="Source not found")
-            
-        data = dict(row)
-        if not data["source_creds"]:
-            raise HTTPException(status_code=400, detail="Source credentials not found")
-            
-        # Decrypt creds
-        creds = decrypt(data["source_creds"])
+    if not row:
+        raise HTTPException(status_code=404, detail="Source not found")
         
-        # Connect to source DB
-        # Note: This assumes postgres source type. 
-        # In a generic system, we'd switch based on data['source_type']
-        import psycopg2
+    data = dict(row)
+    if not data["source_creds"]:
+        raise HTTPException(status_code=400, detail="Source credentials not found")
         
-        try:
-            source_conn = psycopg2.connect(
-                host=creds.get("host"),
-                port=creds.get("port"),
-                user=creds.get("user"),
-                password=creds.get("password"),
-                dbname=creds.get("dbname")
-            )
-            
-            source_cursor = source_conn.cursor()
-            source_cursor.execute(GET_PUBLIC_TABLES)
-            
-            tables = [r[0] for r in source_cursor.fetchall()]
-            
-            source_conn.close()
-            return tables
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to connect to source database: {e}")
-            
-    except sqlite3.Error as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    try:
+        return source_catalog.get_catalog(source_name, data["source_type"] or "postgres",
+                                          decrypt(data["source_creds"]) or {}, refresh)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{source_name}/tables", response_model=List[str])
+async def get_source_tables(source_name: str, refresh: bool = False):
+    """Names of the source's public tables (the schema the loaders read from), from the cached catalog"""
+    # On the external DB workers (utils/external_db.py): a slow source does not hold up other requests
+    catalog = await run_external(load_source_catalog, source_name, refresh)
+    return [table["name"] for table in source_catalog.search_tables(catalog.tables, schema="public")]
+
+@router.get("/{source_name}/catalog")
+async def get_source_catalog(source_name: str, search: Optional[str] = None, schema: Optional[str] = None,
+                       limit: int = 100, offset: int = 0, refresh: bool = False):
+    """
+    Page of the source's tables with row and size estimates and candidate incremental keys
+    (primary key, indexed timestamp/date columns, partition key). Served from a cache
+    (SOURCE_CATALOG_TTL_SECONDS); refresh=true reads the source catalog again.
+    """
+    if limit < 1 or limit > MAX_CATALOG_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_CATALOG_PAGE_SIZE}")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    catalog = await run_external(load_source_catalog, source_name, refresh)
+    tables = source_catalog.search_tables(catalog.tables, search, schema)
+    return {
+        "tables": tables[offset:offset + limit],
+        "total": len(tables),
+        "limit": limit,
+        "offset": offset,
+        "fetched_at": catalog.fetched_at.isoformat(),
+    }
 
 @router.get("/summary")
-def get_sources_summary():
+def get_sources_summary(request: Request):
     """
     Returns a lightweight list of sources with masked/minimal credentials.
-    Suitable for listing pages.
+    Suitable for listing pages. ETag / If-None-Match aware (utils/response_cache.py).
     """
     try:
         conn = get_db_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(GET_ALL_SOURCES)
-        rows = cursor.fetchall()
-        
-        sources = []
-        safe_keys = ['host', 'port', 'dbname', 'user', 'region_name', 'bucket_name', 'url', 'spreadsheet_link', 'username']
 
-        for row in rows:
-            data = dict(row)
-            if data["source_creds"]:
-                try:
-                    full_creds = decrypt(data["source_creds"])
-                    # Filter only safe keys
-                    safe_creds = {k: v for k, v in full_creds.items() if k in safe_keys} if full_creds else {}
-                    data["source_creds"] = safe_creds
-                except:
-                    data["source_creds"] = {} # Fail safe
-            else:
-                 data["source_creds"] = {}
-                 
-            sources.append(data)
-            
-        conn.close()
-        return sources
+        def build():
+            cursor = conn.cursor()
+            cursor.execute(GET_ALL_SOURCES)
+            sources = []
+            for row in cursor.fetchall():
+                data = dict(row)
+                # Only safe keys, from the masked projection (no decryption)
+                data["source_creds"] = summary_creds(data.pop("source_creds_masked"), data["source_creds"])
+                sources.append(data)
+            return sources
+
+        try:
+            return cached_json(request, conn, "sources_summary", "sources_config", build)
+        finally:
+            conn.close()
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -132,8 +133,7 @@ def get_source_by_id(source_id: str):
             
         data = dict(row)
         if data["source_creds"]:
-            data["source_creds"] = decrypt(data["source_creds"])
-            data["source_creds"] = mask_credentials(data["source_creds"])
+            data["source_creds"] = read_masked(data["source_creds_masked"], data["source_creds"])
             
         return data
     except sqlite3.Error as e:
@@ -154,8 +154,7 @@ def get_sources():
         for row in rows:
             data = dict(row)
             if data["source_creds"]:
-                data["source_creds"] = decrypt(data["source_creds"])
-                data["source_creds"] = mask_credentials(data["source_creds"])
+                data["source_creds"] = read_masked(data["source_creds_masked"], data["source_creds"])
             sources.append(data)
             
         conn.close()
@@ -179,7 +178,7 @@ def create_source(source: SourceConfig):
         creds_json = encrypt(source.source_creds) if source.source_creds else None
 
         cursor.execute(INSERT_SOURCE, (
-            new_id, source.source_name, source.source_type, creds_json
+            new_id, source.source_name, source.source_type, creds_json, masked_json(source.source_creds)
         ))
         
         conn.commit()
@@ -204,6 +203,7 @@ def delete_source(source_name: str):
         cursor.execute(DELETE_SOURCE_BY_NAME, (source_name,))
         conn.commit()
         conn.close()
+        source_catalog.invalidate(source_name)
         return None
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -227,11 +227,13 @@ def update_source(source_name: str, source: SourceConfig):
         creds_json = encrypt(source.source_creds) if source.source_creds else None
         
         cursor.execute(UPDATE_SOURCE_BY_NAME, (
-            source.source_type, creds_json, source_name
+            source.source_type, creds_json, masked_json(source.source_creds), source_name
         ))
         
         conn.commit()
         conn.close()
+        # The credentials may now point at another database
+        source_catalog.invalidate(source_name)
         
         source.id = current_id
         return source
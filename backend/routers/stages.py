@@ -1,30 +1,36 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
 import sqlite3
 import uuid6
 from db.connection import get_db_connection
 from db import queries
 from schemas.models import StageCreate
+from utils.response_cache import cached_json
+from utils.responses import json_response
 
 router = APIRouter(
     prefix="/stages",
     tags=["stages"]
 )
 
-@router.get("", response_model=List[Dict[str, Any]])
-def get_pipeline_stages():
-    """Get all pipeline stage definitions"""
+@router.get("")
+def get_pipeline_stages(request: Request):
+    """Get all pipeline stage definitions; ETag / If-None-Match aware (utils/response_cache.py)"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(queries.GET_ALL_STAGES)
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+
+        def build():
+            cursor = conn.cursor()
+            cursor.execute(queries.GET_ALL_STAGES)
+            return [dict(row) for row in cursor.fetchall()]
+
+        try:
+            return cached_json(request, conn, "stages", "pipeline_stages", build)
+        finally:
+            conn.close()
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-@router.get("/{pipeline_name}", response_model=List[Dict[str, Any]])
+@router.get("/{pipeline_name}")
 def get_stages_by_pipeline(pipeline_name: str):
     """Get stages for a specific pipeline"""
     try:
@@ -33,7 +39,7 @@ def get_stages_by_pipeline(pipeline_name: str):
         cursor.execute(queries.GET_STAGES_BY_PIPELINE, (pipeline_name,))
         rows = cursor.fetchall()
         conn.close()
-        return [dict(row) for row in rows]
+        return json_response([dict(row) for row in rows])
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timedelta, timezone
 import sqlite3
 from db.connection import get_db_connection
@@ -22,8 +22,14 @@ def get_loaded_records_stats(hours: float = 24.0):
         
         # Calculate cutoff time
         cutoff_time = datetime.now(IST) - timedelta(hours=hours)
+        # Whole hours after the cutoff come from the hourly rollup, the rest from raw logs
+        next_hour = cutoff_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
         
-        cursor.execute(queries.GET_LOADED_RECORDS_STATS, (cutoff_time.isoformat(),))
+        cursor.execute(queries.GET_LOADED_RECORDS_STATS, (
+            next_hour.strftime('%Y-%m-%dT%H:00:00'),
+            cutoff_time.isoformat(),
+            next_hour.isoformat()
+        ))
         
         rows = cursor.fetchall()
         conn.close()
@@ -34,3 +40,51 @@ def get_loaded_records_stats(hours: float = 24.0):
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/durations")
+def get_duration_stats(
+    hours: float = 24.0,
+    end_date: Optional[str] = None,
+    source_tablename: Optional[str] = None,
+    pipeline_type: Optional[str] = None
+):
+    """Get p50/p90/p99 stage duration and rows/sec throughput of successful stages.
+
+    Covers stages started in the hours before end_date (default now), per table and
+    stage type and per stage type across all tables.
+    """
+    if hours <= 0:
+        raise HTTPException(status_code=400, detail="hours must be positive")
+    try:
+        window_end = datetime.fromisoformat(end_date) if end_date else datetime.now(IST)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid end_date")
+    # started_at is stored as IST text, so compare against IST timestamps
+    window_end = window_end.replace(tzinfo=IST) if window_end.tzinfo is None else window_end.astimezone(IST)
+    window_start = window_end - timedelta(hours=hours)
+    params = (
+        window_start.isoformat(), window_end.isoformat(),
+        source_tablename, source_tablename,
+        pipeline_type, pipeline_type
+    )
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(queries.GET_DURATION_STATS_BY_TABLE, params)
+        by_table = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute(queries.GET_DURATION_STATS_BY_STAGE_TYPE, params)
+        by_stage_type = [dict(row) for row in cursor.fetchall()]
+
+        conn.close()
+
+        return {
+            "window_start": window_start.isoformat(),
+            "window_end": window_end.isoformat(),
+            "by_table": by_table,
+            "by_stage_type": by_stage_type
+        }
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 
 class ConfigUpdate(BaseModel):
     source_to_dl_schedule: Optional[int] = None
@@ -10,6 +10,29 @@ class ConfigUpdate(BaseModel):
     dl_to_sink_is_active: Optional[int] = None
     source_name: Optional[str] = None
     destination_name: Optional[str] = None
+    profiling_enabled: Optional[int] = None
+    dl_compaction_schedule: Optional[int] = None
+    dl_compaction_is_active: Optional[int] = None
+    dl_retention_keep_snapshots: Optional[int] = None
+    dl_retention_keep_days: Optional[int] = None
+    dl_gc_is_active: Optional[int] = None
+    # Parquet writer settings for the datalake files (data_pipeline_resources/common/parquet_format.py)
+    dl_parquet_compression: Optional[Literal['snappy', 'zstd', 'lz4', 'gzip', 'brotli', 'none']] = None
+    dl_parquet_compression_level: Optional[int] = Field(None, ge=0, le=22)
+    dl_parquet_row_group_size: Optional[int] = Field(None, ge=1)
+    dl_parquet_dictionary: Optional[str] = None  # 'all', 'none' or comma-separated columns
+    dl_parquet_statistics: Optional[int] = None
+    dl_parquet_sort_by_incremental_key: Optional[int] = None
+    # Pushed down to the source query, validated against the source schema on save ('' clears)
+    source_to_dl_columns: Optional[str] = None  # comma-separated columns
+    source_to_dl_row_filter: Optional[str] = None  # SQL boolean expression
+    # Incremental extraction (data_pipeline_resources/source_to_dl/postgres_to_dl/watermark.py)
+    source_to_dl_incremental_key: Optional[str] = None
+    source_to_dl_tiebreaker_key: Optional[str] = None  # unique column ordering rows with equal keys
+    source_to_dl_incremental_overlap: Optional[int] = Field(None, ge=0)  # seconds, or key units for numeric keys
+    # Phase offsets in minutes (data_pipeline_resources/common/scheduling.py); -1 clears
+    source_to_dl_schedule_offset: Optional[int] = Field(None, ge=-1)
+    dl_to_sink_schedule_offset: Optional[int] = Field(None, ge=-1)
 
 class ConfigCreate(BaseModel):
     source_tablename: str
@@ -22,6 +45,29 @@ class ConfigCreate(BaseModel):
     source_to_dl_load_type: str = 'full'
     dl_to_sink_schedule: int = 60
     dl_to_sink_load_type: str = 'full'
+    source_to_dl_columns: Optional[str] = None
+    source_to_dl_row_filter: Optional[str] = None
+    # Phase offsets in minutes; planned around the source's other pipelines when not given
+    source_to_dl_schedule_offset: Optional[int] = Field(None, ge=0)
+    dl_to_sink_schedule_offset: Optional[int] = Field(None, ge=0)
+
+class BulkConfigCreate(BaseModel):
+    """POST /config/bulk: a pipeline per selected source table, planned by utils/bulk_onboarding.py"""
+    source_name: str
+    destination_name: str
+    # Selection: explicit table names or a regex on the names; neither = every table
+    tables: Optional[List[str]] = None
+    table_regex: Optional[str] = None
+    sink_table_prefix: str = ''
+    source_to_dl_schedule: int = Field(60, ge=1)
+    dl_to_sink_schedule: int = Field(60, ge=1)
+    refresh: bool = False  # read the source catalog again instead of the cached one
+    dry_run: bool = True  # only return the plan
+
+class SchedulePlanRequest(BaseModel):
+    """POST /config/schedule-plan: re-plan the schedule offsets from recent run durations"""
+    source_name: Optional[str] = None  # None = every source
+    dry_run: bool = True  # only return the plan
 
 # New Models: Connections (Sources/Destinations)
 class SourceConfig(BaseModel):
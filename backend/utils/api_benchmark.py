@@ -0,0 +1,168 @@
+"""
+Micro-benchmark of the GET /runs and GET /logs responses.
+
+Copies a migrated config DB, seeds it with --runs pipeline runs of --stages stage
+logs each (failed stages carry an error_message of --error-bytes, like loader
+tracebacks), and requests both endpoints in-process through the ASGI app. Reports
+per endpoint the median/p95 latency, the body size and the gzip-compressed size,
+and how long the same payload takes to serialize with FastAPI's stock encoder
+(jsonable_encoder + json.dumps) versus utils/responses.py.
+
+    python -m utils.api_benchmark run /data/config.db --output after.json
+    python -m utils.api_benchmark compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+# name -> request path
+ENDPOINTS = {
+    "runs": "/runs",
+    "logs": "/logs?limit=100",
+}
+
+# Metrics compared by `compare`; all lower is better
+COMPARED_METRICS = ["median_ms", "p95_ms", "bytes", "gzip_bytes"]
+
+
+def seed(db_path: str, runs: int, stages: int, error_bytes: int):
+    """Insert runs with their stage logs; every third stage failed with an error_message"""
+    conn = sqlite3.connect(db_path)
+    started = datetime(2026, 1, 1)
+    error_message = ("Traceback (most recent call last):\n" * (error_bytes // 36 + 1))[:error_bytes]
+    temp_runs, temp_logs = [], []
+    for run in range(runs):
+        run_id = f"bench-run-{run:06d}"
+        run_started = started + timedelta(minutes=run)
+        temp_runs.append((run_id, "bench_orders", "source_to_sink", "success", stages, stages, "schedule",
+                          run_started.isoformat(), (run_started + timedelta(seconds=30)).isoformat()))
+        for stage in range(stages):
+            failed = (run * stages + stage) % 3 == 0
+            temp_logs.append((
+                f"bench-log-{run:06d}-{stage}", "bench_orders", "source_to_dl" if stage == 0 else "dl_to_sink",
+                "failed" if failed else "success", error_message if failed else None, 10000,
+                f"datalake/postgres_to_dl/dl_bench_orders/2026/01/01/00/{run_id}.parquet",
+                (run_started + timedelta(seconds=stage)).isoformat(),
+                (run_started + timedelta(seconds=stage + 1)).isoformat(),
+                "00:00:01.000", run_id, stage + 1, 1000,
+            ))
+    with conn:
+        conn.executemany("""
+            INSERT INTO pipeline_runs_master (id, source_tablename, pipeline_name, status, current_stage,
+                total_stages, triggered_by, started_at, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, temp_runs)
+        conn.executemany("""
+            INSERT INTO pipeline_run_stage_logs (id, source_tablename, pipeline_type, status, error_message,
+                rows_processed, file_paths, started_at, completed_at, time_taken, pipeline_run_id, stage_order,
+                duration_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, temp_logs)
+    conn.close()
+
+
+def time_calls(func: Callable[[], Any], iterations: int) -> List[float]:
+    temp_times = []
+    for _ in range(iterations):
+        temp_started = time.perf_counter()
+        func()
+        temp_times.append((time.perf_counter() - temp_started) * 1000)
+    return temp_times
+
+
+def summarize(times_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(times_ms)
+    return {"median_ms": statistics.median(ordered), "p95_ms": ordered[int(len(ordered) * 0.95) - 1]}
+
+
+def run(args) -> Dict[str, Any]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    import db.connection as db_connection
+    from main import app
+    from utils.responses import dumps
+
+    temp_dir = tempfile.mkdtemp(prefix="api_benchmark_")
+    try:
+        db_path = os.path.join(temp_dir, "config.db")
+        shutil.copy(args.db_path, db_path)
+        seed(db_path, args.runs, args.stages, args.error_bytes)
+        db_connection.DB_PATH = db_path
+
+        client = TestClient(app)
+        report = {"runs": args.runs, "stages": args.stages, "error_bytes": args.error_bytes, "endpoints": {}}
+        for name, path in ENDPOINTS.items():
+            plain = client.get(path, headers={"Accept-Encoding": "identity"})
+            plain.raise_for_status()
+            compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+            payload = plain.json()
+            result = {
+                **summarize(time_calls(lambda: client.get(path, headers={"Accept-Encoding": "identity"}),
+                                       args.iterations)),
+                "bytes": len(plain.content),
+                # httpx decodes the body; the header is what went over the wire
+                "gzip_bytes": int(compressed.headers.get("content-length", len(compressed.content))),
+                "gzip_median_ms": summarize(time_calls(lambda: client.get(path, headers={"Accept-Encoding": "gzip"}),
+                                                       args.iterations))["median_ms"],
+                "stock_serialize_ms": summarize(time_calls(
+                    lambda: json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8"),
+                    args.iterations))["median_ms"],
+                "fast_serialize_ms": summarize(time_calls(lambda: dumps(payload), args.iterations))["median_ms"],
+            }
+            report["endpoints"][name] = result
+            print(f"{name:5s} median {result['median_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                  f"{result['bytes']:>10,d} B  gzip {result['gzip_bytes']:>9,d} B  "
+                  f"serialize stock {result['stock_serialize_ms']:7.2f} ms / fast {result['fast_serialize_ms']:7.2f} ms")
+        return report
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]):
+    for name in ENDPOINTS:
+        if name not in before["endpoints"] or name not in after["endpoints"]:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before["endpoints"][name][metric], after["endpoints"][name][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"{name:5s} {metric:11s} {old:12.2f} -> {new:12.2f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("db_path", help="Migrated config DB to copy (it is not modified)")
+    run_parser.add_argument("--runs", type=int, default=50)
+    run_parser.add_argument("--stages", type=int, default=3)
+    run_parser.add_argument("--error-bytes", type=int, default=4000)
+    run_parser.add_argument("--iterations", type=int, default=50)
+    run_parser.add_argument("--output")
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.before) as before, open(args.after) as after:
+            compare(json.load(before), json.load(after))
+        return 0
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Plan of a bulk onboarding (POST /config/bulk): a pipeline per selected source table.
+
+The tables come from the source's cached catalog (utils/source_catalog.py), read once
+for the whole selection. Each table gets defaults from its catalog entry:
+
+    load type       incremental on an indexed timestamp/date column (the partition key
+                    when the table is partitioned by one, so runs prune partitions),
+                    with a single-column primary key as tiebreaker; otherwise full
+    large tables    (BULK_LARGE_TABLE_BYTES / BULK_LARGE_TABLE_ROWS) loaded incrementally
+                    get datalake compaction and sorted files; a large table without
+                    an incremental key is reloaded daily (LARGE_FULL_LOAD_SCHEDULE)
+                    instead of every interval, since the loader reads it in one query,
+                    and is not compacted (its files are whole snapshots)
+    offsets         phase offsets (data_pipeline_resources/common/scheduling.py) planned
+                    around the source's existing pipelines (utils/schedule_planner.py), with
+                    run times estimated from table size (BULK_ESTIMATED_BYTES_PER_MINUTE)
+
+Tables that already have a pipeline (pipeline_config is keyed by source_tablename) are
+skipped, as are explicitly requested tables missing from the catalog.
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from utils.schedule_planner import DEFAULT_DURATION_MINUTES, peak, plan_offsets, sink_offset
+
+BULK_LARGE_TABLE_BYTES = int(os.getenv('BULK_LARGE_TABLE_BYTES', str(1024 ** 3)))
+BULK_LARGE_TABLE_ROWS = int(os.getenv('BULK_LARGE_TABLE_ROWS', '10000000'))
+
+# Minutes between full reloads of large tables without an incremental key
+LARGE_FULL_LOAD_SCHEDULE = 1440
+
+# Extraction throughput assumed for tables that have not run yet
+BULK_ESTIMATED_BYTES_PER_MINUTE = int(os.getenv('BULK_ESTIMATED_BYTES_PER_MINUTE', str(512 * 1024 ** 2)))
+
+# Preferred incremental keys: columns that change on every update
+UPDATE_TIME_COLUMN = re.compile(r'(updated|modified|changed)', re.IGNORECASE)
+
+# The loaders read unqualified table names, i.e. the public schema
+ONBOARDING_SCHEMA = 'public'
+
+
+def select_tables(catalog_tables: List[Dict[str, Any]], tables: Optional[List[str]],
+                  table_regex: Optional[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """(selected catalog entries, requested names missing from the catalog); ValueError on a bad selection"""
+    if tables is not None and table_regex:
+        raise ValueError("Give either tables or table_regex, not both")
+    candidates = [table for table in catalog_tables if table["schema"] == ONBOARDING_SCHEMA]
+    if tables is not None:
+        by_name = {table["name"]: table for table in candidates}
+        requested = list(dict.fromkeys(name.strip() for name in tables if name.strip()))
+        return [by_name[name] for name in requested if name in by_name], \
+            [name for name in requested if name not in by_name]
+    if table_regex:
+        try:
+            pattern = re.compile(table_regex)
+        except re.error as e:
+            raise ValueError(f"Invalid table_regex: {e}")
+        return [table for table in candidates if pattern.search(table["name"])], []
+    return candidates, []
+
+
+def is_large(table: Dict[str, Any]) -> bool:
+    return (table.get("total_bytes") or 0) >= BULK_LARGE_TABLE_BYTES \
+        or (table.get("row_estimate") or 0) >= BULK_LARGE_TABLE_ROWS
+
+
+def incremental_key(table: Dict[str, Any]) -> Optional[str]:
+    """Indexed time column to load incrementally on: the partition key, then an update timestamp, then any"""
+    indexed = table.get("indexed_time_columns") or []
+    partition_key = table.get("partition_key") or []
+    if len(partition_key) == 1 and partition_key[0] in indexed:
+        return partition_key[0]
+    for column in indexed:
+        if UPDATE_TIME_COLUMN.search(column):
+            return column
+    return indexed[0] if indexed else None
+
+
+def plan_table(table: Dict[str, Any], sink_table_prefix: str, source_to_dl_schedule: int,
+               dl_to_sink_schedule: int) -> Dict[str, Any]:
+    key = incremental_key(table)
+    primary_key = table.get("primary_key") or []
+    large = is_large(table)
+    notes = []
+    plan = {
+        "source_tablename": table["name"],
+        "sink_tablename": f"{sink_table_prefix}{table['name']}",
+        "kind": table["kind"],
+        "row_estimate": table.get("row_estimate"),
+        "total_bytes": table.get("total_bytes"),
+        "large": large,
+        "estimated_minutes": max(DEFAULT_DURATION_MINUTES,
+                                 math.ceil((table.get("total_bytes") or 0) / BULK_ESTIMATED_BYTES_PER_MINUTE)),
+        "source_to_dl_load_type": "incremental" if key else "full",
+        # Incremental batches are appended in the sink; full loads replace the table
+        "dl_to_sink_load_type": "incremental" if key else "full",
+        "source_to_dl_incremental_key": key,
+        "source_to_dl_tiebreaker_key": primary_key[0] if key and len(primary_key) == 1 else None,
+        "source_to_dl_schedule": source_to_dl_schedule,
+        "dl_to_sink_schedule": dl_to_sink_schedule,
+        "dl_compaction_is_active": 1 if large and key else 0,
+        "dl_parquet_sort_by_incremental_key": 1 if large and key else 0,
+        "notes": notes,
+    }
+    if key and not plan["source_to_dl_tiebreaker_key"]:
+        notes.append("No single-column primary key: rows sharing the last incremental value may be read again")
+    if table.get("row_estimate") is None:
+        notes.append("Never analyzed: row count unknown")
+    if large and not key:
+        plan["source_to_dl_schedule"] = max(source_to_dl_schedule, LARGE_FULL_LOAD_SCHEDULE)
+        plan["dl_to_sink_schedule"] = max(dl_to_sink_schedule, LARGE_FULL_LOAD_SCHEDULE)
+        notes.append("Large table without an indexed timestamp: full reload daily; "
+                     "set an incremental key or a row filter to load it more often")
+    return plan
+
+
+def assign_offsets(plans: List[Dict[str, Any]], existing_placements: List[Dict[str, Any]]) -> int:
+    """Set the schedule offsets of the plans, placed around the source's existing pipelines; returns the peak"""
+    offsets, planned_peak = plan_offsets(existing_placements, [
+        {"source_tablename": p["source_tablename"], "schedule": p["source_to_dl_schedule"],
+         "duration_minutes": p["estimated_minutes"]}
+        for p in plans
+    ])
+    for plan in plans:
+        plan["source_to_dl_schedule_offset"] = offsets[plan["source_tablename"]]
+        plan["dl_to_sink_schedule_offset"] = sink_offset(plan["source_to_dl_schedule_offset"],
+                                                         plan["estimated_minutes"], plan["dl_to_sink_schedule"])
+    return planned_peak
+
+
+def build_plan(catalog_tables: List[Dict[str, Any]], existing: List[str], existing_placements: List[Dict[str, Any]],
+               tables: Optional[List[str]], table_regex: Optional[str], sink_table_prefix: str,
+               source_to_dl_schedule: int, dl_to_sink_schedule: int) -> Dict[str, Any]:
+    """
+    {"create": [table plans], "skipped": [{"source_tablename", "reason"}], "peak_concurrent_loads"};
+    existing_placements are the source's current pipelines (schedule_planner.current_placements)
+    """
+    selected, missing = select_tables(catalog_tables, tables, table_regex)
+    existing_names = set(existing)
+    skipped = [{"source_tablename": name, "reason": "Not found in the source catalog"} for name in missing]
+    create = []
+    for table in selected:
+        if table["name"] in existing_names:
+            skipped.append({"source_tablename": table["name"], "reason": "A pipeline for this table already exists"})
+            continue
+        create.append(plan_table(table, sink_table_prefix, source_to_dl_schedule, dl_to_sink_schedule))
+    planned_peak = assign_offsets(create, existing_placements)
+    return {
+        "create": create,
+        "skipped": skipped,
+        # Most source stages running in the same minute, before and after the new pipelines
+        "peak_concurrent_loads": {"before": peak(existing_placements), "after": planned_peak},
+    }
@@ -0,0 +1,121 @@
+import io
+import os
+import socket
+from datetime import date
+from typing import List, Optional
+import pandas as pd
+from minio import Minio
+from minio.error import S3Error
+
+MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio_server:9000')
+MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
+MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+MINIO_BUCKET = os.getenv('MINIO_BUCKET', 'datalake')
+MINIO_USE_SSL = os.getenv('MINIO_USE_SSL', 'false').lower() == 'true'
+
+# Run logs moved out of the config DB by db/log_retention.py:
+# config_db_archive/dl_<table>/yyyy/mm/dd/<table>_yyyymmdd_<first id>.parquet
+ARCHIVE_PREFIX = "config_db_archive"
+
+
+def get_minio_client() -> Minio:
+    endpoint = MINIO_ENDPOINT.replace('http://', '').replace('https://', '')
+    # Same workaround as the loaders: the minio client rejects the underscore in minio_server
+    if ':' in endpoint:
+        host, port = endpoint.split(':')
+        try:
+            endpoint = f"{socket.gethostbyname(host)}:{port}"
+        except OSError:
+            pass
+    return Minio(
+        endpoint,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=MINIO_USE_SSL
+    )
+
+
+def ensure_bucket(client: Minio, bucket_name: str = MINIO_BUCKET):
+    try:
+        if not client.bucket_exists(bucket_name):
+            client.make_bucket(bucket_name)
+    except S3Error as e:
+        if getattr(e, 'code', '') not in ['BucketAlreadyOwnedByYou', 'BucketAlreadyExists']:
+            raise
+
+
+def archive_table_prefix(table: str) -> str:
+    return f"{ARCHIVE_PREFIX}/dl_{table}/"
+
+
+def archive_object_name(table: str, day: str, first_id: str) -> str:
+    """Object path for one day of archived rows; named after the batch's first id so a retried upload overwrites itself"""
+    year, month, dom = day.split('-')
+    return f"{archive_table_prefix(table)}{year}/{month}/{dom}/{table}_{year}{month}{dom}_{first_id}.parquet"
+
+
+def archive_object_day(object_name: str) -> Optional[str]:
+    """Partition day ('YYYY-MM-DD') encoded in an archive object path"""
+    parts = object_name.split('/')
+    if len(parts) < 6:
+        return None
+    try:
+        return date(int(parts[2]), int(parts[3]), int(parts[4])).isoformat()
+    except ValueError:
+        return None
+
+
+def put_parquet(client: Minio, object_name: str, df: pd.DataFrame):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, engine='pyarrow')
+    buffer.seek(0)
+    client.put_object(
+        MINIO_BUCKET,
+        object_name,
+        buffer,
+        length=buffer.getbuffer().nbytes,
+        content_type='application/parquet'
+    )
+
+
+def list_archive_objects(client: Minio, table: str, start_day: Optional[str] = None,
+                         end_day: Optional[str] = None) -> List[str]:
+    """Archive objects of a table whose partition day falls within [start_day, end_day]"""
+    names = []
+    for obj in client.list_objects(MINIO_BUCKET, prefix=archive_table_prefix(table), recursive=True):
+        day = archive_object_day(obj.object_name)
+        if day is None or not obj.object_name.endswith('.parquet'):
+            continue
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        names.append(obj.object_name)
+    return names
+
+
+def get_object_bytes(client: Minio, object_name: str) -> bytes:
+    response = client.get_object(MINIO_BUCKET, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def object_name_from_path(path: str) -> str:
+    """Strip the bucket from a '<bucket>/<object>' path as stored in the stage logs"""
+    prefix = f"{MINIO_BUCKET}/"
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def read_parquet_objects(client: Minio, object_names: List[str]) -> pd.DataFrame:
+    frames = []
+    for name in object_names:
+        response = client.get_object(MINIO_BUCKET, name)
+        try:
+            frames.append(pd.read_parquet(io.BytesIO(response.read())))
+        finally:
+            response.close()
+            response.release_conn()
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,238 @@
+"""
+Pooled connections to external (source) Postgres databases.
+
+Every backend endpoint that talks to a source database (connection tests, table
+discovery, projection checks) borrows its connection here instead of calling
+psycopg2.connect itself:
+
+- One bounded pool per set of credentials (host, port, user, dbname, password),
+  at most EXTERNAL_DB_POOL_SIZE connections each; a caller waits up to
+  EXTERNAL_DB_ACQUIRE_TIMEOUT_SECONDS for a free one, then gets PoolExhausted.
+- Idle connections are closed after EXTERNAL_DB_IDLE_SECONDS, and pools without
+  connections are dropped, so testing many ad-hoc credentials leaves nothing behind.
+- A connection idle for EXTERNAL_DB_HEALTH_CHECK_SECONDS is checked with SELECT 1
+  before it is handed out again; broken connections are discarded.
+- Connections are read-only sessions: the backend only ever reads source databases.
+
+Async handlers run the blocking work through run_external(), on worker threads
+limited to EXTERNAL_DB_MAX_CONCURRENCY, so slow or unreachable hosts wait there
+instead of taking the threadpool that serves the rest of the API.
+GET /connections/pools reports the limits and per-pool statistics.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import anyio
+import psycopg2
+
+POOL_SIZE = int(os.getenv("EXTERNAL_DB_POOL_SIZE", "4"))
+IDLE_SECONDS = float(os.getenv("EXTERNAL_DB_IDLE_SECONDS", "300"))
+HEALTH_CHECK_SECONDS = float(os.getenv("EXTERNAL_DB_HEALTH_CHECK_SECONDS", "30"))
+ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("EXTERNAL_DB_ACQUIRE_TIMEOUT_SECONDS", "10"))
+CONNECT_TIMEOUT_SECONDS = int(os.getenv("EXTERNAL_DB_CONNECT_TIMEOUT_SECONDS", "5"))
+MAX_CONCURRENCY = int(os.getenv("EXTERNAL_DB_MAX_CONCURRENCY", "8"))
+
+
+class PoolExhausted(Exception):
+    """No connection of the pool became free within EXTERNAL_DB_ACQUIRE_TIMEOUT_SECONDS"""
+
+
+class ExternalPool:
+    """Bounded pool of connections for one set of credentials"""
+
+    def __init__(self, creds: Dict[str, Any], size: int = POOL_SIZE):
+        self.host = creds.get("host")
+        self.port = creds.get("port")
+        self.user = creds.get("user")
+        self.dbname = creds.get("dbname")
+        self._password = creds.get("password")
+        self.size = size
+        self.labels = set()
+        # Callers between get_pool() and release(), guarded by _pools_lock; sweep() keeps the pool while > 0
+        self.borrowers = 0
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[Tuple[Any, float]] = []  # (connection, released at), most recent last
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.counters = {"connects": 0, "reuses": 0, "idle_evictions": 0,
+                         "health_check_failures": 0, "acquire_timeouts": 0}
+
+    def _connect(self, connect_timeout: int):
+        conn = psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self._password,
+            dbname=self.dbname,
+            connect_timeout=connect_timeout
+        )
+        conn.set_session(readonly=True)
+        return conn
+
+    def _healthy(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self, connect_timeout: int = CONNECT_TIMEOUT_SECONDS, check: bool = False):
+        """A healthy connection; check=True always runs the health check (connection tests)"""
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT_SECONDS):
+            with self._lock:
+                self.counters["acquire_timeouts"] += 1
+            raise PoolExhausted(f"All {self.size} connections to {self.host}/{self.dbname} are busy")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    break
+                conn, released_at = entry
+                fresh = not check and time.monotonic() - released_at < HEALTH_CHECK_SECONDS
+                if not conn.closed and (fresh or self._healthy(conn)):
+                    with self._lock:
+                        self.counters["reuses"] += 1
+                        self.in_use += 1
+                    return conn
+                with self._lock:
+                    self.counters["health_check_failures"] += 1
+                conn.close()
+            conn = self._connect(connect_timeout)
+            with self._lock:
+                self.counters["connects"] += 1
+                self.in_use += 1
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken: bool = False):
+        """Return a connection; broken ones (and ones that cannot end their transaction) are closed"""
+        if not broken and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        with self._lock:
+            self.in_use -= 1
+            if not broken and not conn.closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+        if conn is not None:
+            conn.close()
+        self._slots.release()
+
+    def evict_idle(self, now: float) -> int:
+        """Close connections idle for IDLE_SECONDS; returns the connections left open"""
+        with self._lock:
+            expired = [conn for conn, released_at in self._idle if now - released_at >= IDLE_SECONDS]
+            self._idle = [(conn, released_at) for conn, released_at in self._idle if now - released_at < IDLE_SECONDS]
+            self.counters["idle_evictions"] += len(expired)
+            remaining = len(self._idle) + self.in_use
+        for conn in expired:
+            conn.close()
+        return remaining
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "host": self.host,
+                "port": self.port,
+                "dbname": self.dbname,
+                "user": self.user,
+                "labels": sorted(self.labels),
+                "max_size": self.size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                **self.counters,
+            }
+
+
+_pools: Dict[Tuple[str, ...], ExternalPool] = {}
+_pools_lock = threading.Lock()
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def pool_key(creds: Dict[str, Any]) -> Tuple[str, ...]:
+    # Different passwords get different pools; the key never holds the password itself
+    password_hash = hashlib.sha256(str(creds.get("password") or "").encode("utf-8")).hexdigest()
+    return (str(creds.get("host")), str(creds.get("port")), str(creds.get("user")), str(creds.get("dbname")),
+            password_hash)
+
+
+def sweep():
+    """Close idle connections past IDLE_SECONDS and drop pools that have none left"""
+    now = time.monotonic()
+    with _pools_lock:
+        for key, pool in list(_pools.items()):
+            if pool.evict_idle(now) == 0 and pool.borrowers == 0:
+                del _pools[key]
+
+
+def get_pool(creds: Dict[str, Any], label: str) -> ExternalPool:
+    with _pools_lock:
+        pool = _pools.get(pool_key(creds))
+        if pool is None:
+            pool = _pools[pool_key(creds)] = ExternalPool(creds)
+        pool.labels.add(label)
+        pool.borrowers += 1
+        return pool
+
+
+@contextmanager
+def external_connection(creds: Dict[str, Any], label: str, connect_timeout: int = CONNECT_TIMEOUT_SECONDS,
+                        check: bool = False) -> Iterator[Any]:
+    """Borrow a read-only connection for a with block; label names the user (source name or 'connection_test')"""
+    sweep()
+    pool = get_pool(creds, label)
+    try:
+        conn = pool.acquire(connect_timeout, check)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            pool.release(conn, broken)
+    finally:
+        with _pools_lock:
+            pool.borrowers -= 1
+
+
+def get_limiter() -> anyio.CapacityLimiter:
+    # Created on first use, inside the event loop
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(MAX_CONCURRENCY)
+    return _limiter
+
+
+async def run_external(func: Callable, *args):
+    """Run blocking external DB work on a worker thread, at most MAX_CONCURRENCY at a time"""
+    return await anyio.to_thread.run_sync(func, *args, limiter=get_limiter())
+
+
+def pool_stats() -> Dict[str, Any]:
+    sweep()
+    limiter = _limiter
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {
+        "max_concurrency": MAX_CONCURRENCY,
+        "running": limiter.borrowed_tokens if limiter else 0,
+        "waiting": limiter.statistics().tasks_waiting if limiter else 0,
+        "pool_size": POOL_SIZE,
+        "idle_seconds": IDLE_SECONDS,
+        "health_check_seconds": HEALTH_CHECK_SECONDS,
+        "acquire_timeout_seconds": ACQUIRE_TIMEOUT_SECONDS,
+        "pools": [pool.stats() for pool in pools],
+    }
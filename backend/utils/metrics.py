@@ -0,0 +1,118 @@
+import os
+import json
+import glob
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from prometheus_client import REGISTRY, Gauge
+from prometheus_client.core import HistogramMetricFamily
+# data_pipeline_resources/common/metrics.py: the buckets and loader keys the drivers write with
+from metrics import LOADER_METRICS, SECONDS_BUCKETS, SIZE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Driver containers write their cumulative histograms here as <driver>.json (same
+# layout as _state below); GET /metrics merges them with the backend's own.
+METRICS_DIR = os.getenv('METRICS_DIR', '/data/metrics')
+
+INF = float("inf")
+
+PIPELINE_LABELS = ("source_tablename", "source_name", "destination_name")
+STAGE_LABELS = PIPELINE_LABELS + ("stage_type",)
+
+# name -> (help, buckets, label names)
+HISTOGRAMS = {
+    "pipeline_stage_duration_seconds": ("Stage wall time", SECONDS_BUCKETS, STAGE_LABELS + ("status",)),
+    "pipeline_stage_rows": ("Rows processed per stage", SIZE_BUCKETS, STAGE_LABELS),
+    "pipeline_stage_bytes": ("Parquet bytes written or read per stage", SIZE_BUCKETS, STAGE_LABELS),
+    "pipeline_extract_query_seconds": ("Source extract query time", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "pipeline_parquet_encode_seconds": ("DataFrame to Parquet encode time", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "pipeline_minio_upload_seconds": ("Parquet upload time to MinIO", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "pipeline_minio_download_seconds": ("Parquet download time from MinIO", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "pipeline_sink_load_seconds": ("Sink write time", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "pipeline_queue_wait_seconds": ("Time a run waited after being triggered or falling due", SECONDS_BUCKETS, PIPELINE_LABELS),
+    "config_db_lock_wait_seconds": ("Time spent waiting for the config DB write lock", SECONDS_BUCKETS, ("writer",)),
+}
+
+RUNS_IN_PROGRESS = Gauge("pipeline_runs_in_progress", "Pipeline runs currently executing in the backend")
+
+# name -> {label values: [per-bucket counts, sum, count]}
+_state: Dict[str, Dict[Tuple[str, ...], list]] = {name: {} for name in HISTOGRAMS}
+_lock = threading.Lock()
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation; label values missing from labels are exported as ''"""
+    _, buckets, label_names = HISTOGRAMS[name]
+    key = tuple(str(labels.get(label) or '') for label in label_names)
+    index = next(i for i, bound in enumerate(buckets) if value <= bound)
+    with _lock:
+        series = _state[name].get(key)
+        if series is None:
+            series = _state[name][key] = [[0] * len(buckets), 0.0, 0]
+        series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+
+def observe_loader_output(stdout: str, labels: Dict[str, str]):
+    """Feed the METRIC lines printed by a loader into the matching histograms"""
+    for line in (stdout or '').split('\n'):
+        if not line.startswith('METRIC:'):
+            continue
+        try:
+            _, key, value = line.strip().split(':', 2)
+            name, _ = LOADER_METRICS[key]
+            observe(name, float(value), **labels)
+        except (KeyError, ValueError):
+            logger.warning(f"Ignoring malformed loader metric line: {line}")
+
+
+def _load_driver_state(path: str) -> Dict[str, List[dict]]:
+    try:
+        with open(path) as f:
+            return json.load(f).get("histograms", {})
+    except (OSError, ValueError) as e:
+        logger.warning(f"Skipping metrics file {path}: {e}")
+        return {}
+
+
+def _merged_series(name: str, driver_states: Iterable[Dict[str, List[dict]]]) -> Dict[Tuple[str, ...], list]:
+    _, buckets, label_names = HISTOGRAMS[name]
+    with _lock:
+        merged = {key: [list(counts), total, count] for key, (counts, total, count) in _state[name].items()}
+
+    for histograms in driver_states:
+        for entry in histograms.get(name, []):
+            # Bucket layouts have to agree to be summed; drivers write with the same common ones
+            if [float(bound) for bound in entry["buckets"]] != list(buckets):
+                logger.warning(f"Skipping {name} series with mismatched buckets")
+                continue
+            key = tuple(str(entry["labels"].get(label) or '') for label in label_names)
+            series = merged.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            series[0] = [a + b for a, b in zip(series[0], entry["counts"])]
+            series[1] += entry["sum"]
+            series[2] += entry["count"]
+    return merged
+
+
+class PipelineMetricsCollector:
+    """Exposes the histograms above: backend observations plus the driver state files"""
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self.metrics_dir = metrics_dir or METRICS_DIR
+
+    def collect(self):
+        driver_states = [_load_driver_state(path) for path in sorted(glob.glob(os.path.join(self.metrics_dir, "*.json")))]
+        for name, (help_text, buckets, label_names) in HISTOGRAMS.items():
+            family = HistogramMetricFamily(name, help_text, labels=label_names)
+            for key, (counts, total, _) in sorted(_merged_series(name, driver_states).items()):
+                cumulative, running = [], 0
+                for bound, bucket_count in zip(buckets, counts):
+                    running += bucket_count
+                    cumulative.append(("+Inf" if bound == INF else str(bound), running))
+                family.add_metric(list(key), cumulative, total)
+            yield family
+
+
+REGISTRY.register(PipelineMetricsCollector())
@@ -0,0 +1,61 @@
+"""
+Serialized responses of rarely changing listings, with ETags and 304 Not Modified.
+
+GET /config, /stages, /sources/summary and /destinations/summary are re-fetched on
+every dashboard load and refresh. Each depends on one config table, whose version
+counter (config_versions, bumped by triggers on every write, including the drivers')
+is read first: while it is unchanged the JSON body serialized earlier is reused, and
+a client sending the same ETag in If-None-Match gets an empty 304.
+
+The ETag is a hash of the body, not the version, so it stays correct when the
+config DB is recreated and its counters restart.
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from fastapi import Request, Response
+from db import queries
+from utils.responses import dumps
+
+
+class CachedBody(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+
+
+_bodies: Dict[str, CachedBody] = {}
+_lock = threading.Lock()
+
+
+def table_version(cursor, table_name: str) -> Optional[int]:
+    cursor.execute(queries.GET_CONFIG_VERSION, (table_name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [value.strip() for value in header.split(",")]
+
+
+def cached_json(request: Request, conn, key: str, table_name: str, build: Callable[[], Any]) -> Response:
+    """JSON response of build(), reused while table_name's version is unchanged; 304 on a matching If-None-Match"""
+    version = table_version(conn.cursor(), table_name)
+    with _lock:
+        cached = _bodies.get(key)
+    if cached is None or version is None or cached.version != version:
+        # The version is read before building, so a concurrent write can only leave a newer body under an older version
+        body = dumps(build())
+        cached = CachedBody(version, f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        if version is not None:
+            with _lock:
+                _bodies[key] = cached
+    # no-cache: browsers may keep the body but must revalidate with If-None-Match
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if not_modified(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,38 @@
+"""
+Fast JSON responses.
+
+FastAPI runs every returned value through jsonable_encoder (and response_model
+validation) before json.dumps; for /runs and /logs, lists of SQLite rows with
+error_message blobs, that costs more than the queries. Handlers on the hot paths
+return json_response(...) instead: the rows go straight to bytes with orjson.
+Everything else uses ORJSONResponse as the app's default response class.
+
+Large responses are gzip-compressed by GZipMiddleware (main.py) above
+API_GZIP_MINIMUM_SIZE bytes; measure with `python -m utils.api_benchmark`.
+"""
+
+import os
+from typing import Any
+import orjson
+from fastapi import Response
+
+GZIP_MINIMUM_SIZE = int(os.getenv("API_GZIP_MINIMUM_SIZE", "1024"))
+
+# numpy values come from archived logs read with pandas; non-str keys from stats rows
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # pandas Timestamps (archived logs); orjson handles datetime/date itself
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """Already-serializable content (dicts of SQLite rows) as JSON, skipping jsonable_encoder"""
+    return Response(content=dumps(content), status_code=status_code, media_type="application/json")
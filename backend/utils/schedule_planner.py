@@ -0,0 +1,118 @@
+"""
+Load-aware schedule offsets (data_pipeline_resources/common/scheduling.py).
+
+The source stages of one source are laid out on a timeline of the schedules' least
+common multiple, capped at PLAN_HORIZON_MINUTES or the longest schedule (a weekly
+schedule gets a week-long timeline), counting per minute how many
+extractions run against the source. Each pipeline occupies [offset + k * schedule,
++ duration) for each of its runs. Pipelines are placed longest first, each at the
+offset whose busiest minute is least busy, then with the least total overlap, then
+earliest in spread_order: the plan flattens the peak of concurrent loads per source.
+
+Durations are the p90 of a pipeline's successful source stages over the last
+SCHEDULE_DURATION_WINDOW_HOURS (scheduling.recent_durations); pipelines
+without runs count as DEFAULT_DURATION_MINUTES unless the caller has an estimate.
+The sink stage is planned to start when the source stage is expected to be done.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from scheduling import effective_offset
+
+PLAN_HORIZON_MINUTES = 1440
+
+DEFAULT_DURATION_MINUTES = 1
+
+def spread_order(count: int) -> List[int]:
+    """0..count-1 ordered by bit-reversed index, so each prefix is spread evenly (0, 4, 2, 6, 1, ...)"""
+    bits = max(count - 1, 0).bit_length()
+    return sorted(range(count), key=lambda index: int(f"{index:0{bits}b}"[::-1], 2) if bits else 0)
+
+
+def duration_minutes(duration_ms: Optional[float]) -> int:
+    if not duration_ms:
+        return DEFAULT_DURATION_MINUTES
+    return max(1, math.ceil(duration_ms / 60000))
+
+
+class Timeline:
+    """Concurrent source stages per minute of the horizon"""
+
+    def __init__(self, schedules: Iterable[int]):
+        schedules = set(schedules)
+        # Every run of the longest schedule fits, whatever PLAN_HORIZON_MINUTES is
+        cap = max(schedules | {PLAN_HORIZON_MINUTES})
+        horizon = 1
+        for schedule in schedules:
+            horizon = math.lcm(horizon, schedule)
+            if horizon >= cap:
+                horizon = cap
+                break
+        self.horizon = horizon
+        self.counts = [0] * horizon
+
+    def minutes(self, schedule: int, offset: int, duration: int) -> List[int]:
+        # A run longer than its interval delays the next one rather than overlapping it
+        duration = min(duration, schedule)
+        return [(start + minute) % self.horizon
+                for start in range(offset, self.horizon, schedule)
+                for minute in range(duration)]
+
+    def cost(self, schedule: int, offset: int, duration: int) -> Tuple[int, int]:
+        counts = [self.counts[minute] for minute in self.minutes(schedule, offset, duration)]
+        return max(counts, default=0), sum(counts)
+
+    def add(self, schedule: int, offset: int, duration: int):
+        for minute in self.minutes(schedule, offset, duration):
+            self.counts[minute] += 1
+
+    def peak(self) -> int:
+        return max(self.counts, default=0)
+
+
+def plan_offsets(fixed: List[Dict[str, Any]], pipelines: List[Dict[str, Any]]) -> Tuple[Dict[str, int], int]:
+    """
+    Offsets for pipelines around the fixed ones, and the resulting peak.
+    Both are dicts with source_tablename, schedule, duration_minutes; fixed ones also offset.
+    """
+    timeline = Timeline([p["schedule"] for p in fixed + pipelines])
+    for p in fixed:
+        timeline.add(p["schedule"], p["offset"], p["duration_minutes"])
+
+    offsets = {}
+    for p in sorted(pipelines, key=lambda p: (-min(p["duration_minutes"], p["schedule"]), p["source_tablename"])):
+        best_offset, best_cost = 0, None
+        for offset in spread_order(p["schedule"]):
+            cost = timeline.cost(p["schedule"], offset, p["duration_minutes"])
+            if best_cost is None or cost < best_cost:
+                best_offset, best_cost = offset, cost
+        timeline.add(p["schedule"], best_offset, p["duration_minutes"])
+        offsets[p["source_tablename"]] = best_offset
+    return offsets, timeline.peak() if fixed or pipelines else 0
+
+
+def current_placements(configs: List[Dict[str, Any]], durations: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Active source stages of pipeline_config rows at their effective offsets (configured or default)"""
+    placements = []
+    for config in configs:
+        schedule = config["source_to_dl_schedule"]
+        if not config["source_to_dl_is_active"] or not schedule or schedule <= 0:
+            continue
+        offset = effective_offset(config["source_tablename"], schedule, config["source_to_dl_schedule_offset"])
+        placements.append({
+            "source_tablename": config["source_tablename"],
+            "schedule": schedule,
+            # Without stagger (SCHEDULE_STAGGER=0) unplaced pipelines drift; count them at 0
+            "offset": offset if offset is not None else 0,
+            "duration_minutes": duration_minutes(durations.get(config["source_tablename"])),
+        })
+    return placements
+
+
+def peak(placements: List[Dict[str, Any]]) -> int:
+    return plan_offsets(placements, [])[1]
+
+
+def sink_offset(source_offset: int, source_duration_minutes: int, dl_to_sink_schedule: int) -> int:
+    """The sink stage starts once the source stage is expected to have finished"""
+    return (source_offset + source_duration_minutes) % dl_to_sink_schedule
@@ -0,0 +1,108 @@
+"""
+Cached table catalog of a source database.
+
+Listing a source's tables used to open a connection and query information_schema on
+every call, which blocks the Add Pipeline dialog for seconds on sources with thousands
+of tables. The catalog is now read once per source with a single pg_class query
+(queries.GET_SOURCE_TABLE_CATALOG) and kept in memory for SOURCE_CATALOG_TTL_SECONDS;
+routers/sources.py pages and searches the cached entries. A request with refresh=true,
+and any change to the source's config, reads it again.
+
+Row counts are the planner's estimates (pg_class.reltuples), so they are only as fresh
+as the table's last ANALYZE; None means the table was never analyzed.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+import psycopg2
+from db.queries import GET_SOURCE_TABLE_CATALOG
+from utils.external_db import PoolExhausted, external_connection
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+SOURCE_CATALOG_TTL_SECONDS = int(os.getenv('SOURCE_CATALOG_TTL_SECONDS', '300'))
+
+RELKINDS = {'r': 'table', 'p': 'partitioned table', 'v': 'view', 'm': 'materialized view', 'f': 'foreign table'}
+
+
+class Catalog(NamedTuple):
+    tables: List[Dict[str, Any]]
+    fetched_at: datetime
+    expires_at: float  # time.monotonic()
+
+
+_catalogs: Dict[str, Catalog] = {}
+# One lock per source: concurrent requests for a stale catalog wait for a single refresh
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(source_name: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(source_name, threading.Lock())
+
+
+def fetch_catalog(source_name: str, source_creds: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Read the catalog from the source; ValueError with a user-facing message on failure"""
+    try:
+        # Pooled read-only connection (utils/external_db.py)
+        with external_connection(source_creds, source_name) as source_conn:
+            source_cursor = source_conn.cursor()
+            try:
+                source_cursor.execute(GET_SOURCE_TABLE_CATALOG)
+                rows = source_cursor.fetchall()
+            except psycopg2.Error as e:
+                raise ValueError(f"Failed to read the source catalog: {str(e).strip()}")
+    except PoolExhausted as e:
+        raise ValueError(str(e))
+    except psycopg2.OperationalError as e:
+        raise ValueError(f"Failed to connect to source database: {str(e).strip()}")
+
+    return [
+        {
+            "schema": table_schema,
+            "name": table_name,
+            "qualified_name": f"{table_schema}.{table_name}",
+            "kind": RELKINDS.get(relkind, relkind),
+            # -1 (PostgreSQL 14+) or 0 before the first ANALYZE
+            "row_estimate": row_estimate if row_estimate and row_estimate > 0 else None,
+            "total_bytes": total_bytes,
+            "primary_key": primary_key or [],
+            "indexed_time_columns": sorted(indexed_time_columns or []),
+            "partition_key": partition_key or [],
+        }
+        for table_schema, table_name, relkind, row_estimate, total_bytes,
+        primary_key, indexed_time_columns, partition_key in rows
+    ]
+
+
+def get_catalog(source_name: str, source_type: str, source_creds: Dict[str, Any], refresh: bool = False) -> Catalog:
+    """The source's cached catalog, read again when older than the TTL or when refresh is set"""
+    if source_type != 'postgres':
+        raise ValueError(f"Table discovery is not supported for {source_type} sources")
+    with _lock(source_name):
+        catalog = _catalogs.get(source_name)
+        if catalog is None or refresh or catalog.expires_at <= time.monotonic():
+            catalog = Catalog(fetch_catalog(source_name, source_creds), datetime.now(IST),
+                              time.monotonic() + SOURCE_CATALOG_TTL_SECONDS)
+            _catalogs[source_name] = catalog
+        return catalog
+
+
+def invalidate(source_name: str):
+    """Forget the source's catalog (its credentials changed or it was deleted)"""
+    _catalogs.pop(source_name, None)
+
+
+def search_tables(tables: List[Dict[str, Any]], search: Optional[str] = None,
+                  schema: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Tables of `schema` whose qualified name contains `search` (case-insensitive)"""
+    if schema:
+        tables = [table for table in tables if table["schema"] == schema]
+    if search:
+        needle = search.strip().lower()
+        tables = [table for table in tables if needle in table["qualified_name"].lower()]
+    return tables
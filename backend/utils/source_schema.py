@@ -0,0 +1,54 @@
+"""
+Validation of a pipeline's column projection and row filter against the source schema.
+
+The loaders push both into the source query (data_pipeline_resources/common/source_projection.py),
+so a typo would otherwise only show up as a failed run. Columns are checked against
+information_schema; the row filter is planned with EXPLAIN (never executed) in a
+read-only transaction, which fails on syntax errors and unknown columns.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+import psycopg2
+from db.queries import GET_SOURCE_TABLE_COLUMNS, EXPLAIN_SOURCE_ROW_FILTER
+from source_projection import check_row_filter, parse_columns
+from utils.external_db import PoolExhausted, external_connection
+
+
+def validate_projection(source_type: str, source_creds: Dict[str, Any], source_tablename: str,
+                        columns: Optional[str], row_filter: Optional[str], key_columns: Sequence[str] = (),
+                        source_name: str = "projection_check"):
+    """Raises ValueError with a user-facing message if the projection, or the incremental and
+    tiebreaker key columns, do not fit the source table"""
+    column_list = parse_columns(columns)
+    key_columns = [column for column in key_columns if column]
+    row_filter = (row_filter or '').strip()
+    if not column_list and not row_filter and not key_columns:
+        return
+    if source_type != 'postgres':
+        raise ValueError(f"Column projection, row filters and key columns are not supported for {source_type} sources")
+    # Same rule as the loaders: the filter must stay inside its parentheses
+    row_filter = check_row_filter(row_filter)
+
+    try:
+        # Pooled read-only connection (utils/external_db.py); returned with its transaction rolled back
+        with external_connection(source_creds, source_name) as source_conn:
+            source_cursor = source_conn.cursor()
+            source_cursor.execute(GET_SOURCE_TABLE_COLUMNS, (source_tablename,))
+            table_columns = [r[0] for r in source_cursor.fetchall()]
+            if not table_columns:
+                raise ValueError(f"Source table {source_tablename} not found")
+
+            missing = [column for column in column_list + key_columns if column not in table_columns]
+            if missing:
+                raise ValueError(f"Unknown columns in {source_tablename}: {', '.join(missing)}")
+
+            if row_filter:
+                try:
+                    source_cursor.execute(EXPLAIN_SOURCE_ROW_FILTER.format(
+                        tablename=source_tablename.replace('"', '""'), row_filter=row_filter))
+                except psycopg2.Error as e:
+                    raise ValueError(f"Invalid row filter: {str(e).strip()}")
+    except PoolExhausted as e:
+        raise ValueError(str(e))
+    except psycopg2.OperationalError as e:
+        raise ValueError(f"Failed to connect to source database: {str(e).strip()}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmark data for the source Postgres.
+
+Creates (drop + create) bench_customers, bench_orders, bench_skinny, bench_wide and
+bench_text_heavy with --rows rows each, using generate_series so nothing is sent
+over the wire. read_user can select them through the default privileges in
+databases/source_pg_db/init.sql.
+
+    python generate_data.py --rows 1000000 --datasets orders,wide
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict, List
+import psycopg2  # type: ignore
+import queries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def add_connection_args(parser: argparse.ArgumentParser):
+    """Source DB owner credentials (compose maps source_pg_db to localhost:5434)"""
+    parser.add_argument("--source-host", default="localhost")
+    parser.add_argument("--source-port", default="5434")
+    parser.add_argument("--source-db", default="source_db")
+    parser.add_argument("--source-admin-user", default="postgres")
+    parser.add_argument("--source-admin-password", default="postgres")
+
+
+def parse_datasets(value: str) -> List[str]:
+    temp_names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in temp_names if name not in queries.DATASETS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown datasets {unknown}; choose from {sorted(queries.DATASETS)}")
+    return temp_names
+
+
+def generate(args, datasets: List[str], rows: int) -> Dict[str, dict]:
+    """Create each dataset table with `rows` rows; returns {dataset: {tablename, rows, source_bytes, seconds}}"""
+    conn = psycopg2.connect(
+        host=args.source_host,
+        port=args.source_port,
+        database=args.source_db,
+        user=args.source_admin_user,
+        password=args.source_admin_password,
+    )
+    generated = {}
+    try:
+        for dataset in datasets:
+            source_tablename, create_sql, insert_sql = queries.DATASETS[dataset]
+            temp_started = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute(queries.DROP_TABLE.format(tablename=source_tablename))
+                cursor.execute(create_sql)
+                cursor.execute(insert_sql, (rows,))
+                cursor.execute(queries.ANALYZE_TABLE.format(tablename=source_tablename))
+                conn.commit()
+                cursor.execute(queries.GET_TABLE_SIZE, (source_tablename,))
+                source_bytes = cursor.fetchone()[0]
+            seconds = time.perf_counter() - temp_started
+            logger.info(f"Generated {rows} rows in {source_tablename} ({source_bytes} bytes) in {seconds:.1f}s")
+            generated[dataset] = {
+                "source_tablename": source_tablename,
+                "rows": rows,
+                "source_bytes": source_bytes,
+                "seconds": round(seconds, 3),
+            }
+    finally:
+        conn.close()
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--datasets", type=parse_datasets, default=list(queries.DATASETS))
+    add_connection_args(parser)
+    args = parser.parse_args()
+    generate(args, args.datasets, args.rows)
+
+
+if __name__ == "__main__":
+    main()
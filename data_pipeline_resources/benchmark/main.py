@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark.
+
+Generates synthetic source tables (generate_data.py), then runs the real loaders
+(source_to_dl/postgres_to_dl and dl_to_sink/dl_to_postgres) as subprocesses, the
+same way the drivers do, against the compose Postgres databases and MinIO as the
+S3 stand-in (or a local directory with --object-store local, no MinIO needed).
+Loader delays are disabled with SIMULATED_DELAY=0. For every dataset and stage
+it records wall/CPU time, peak RSS, rows/sec, MB/s (Parquet bytes) and
+the per-phase METRIC timings, and writes the medians of --repeat runs to a JSON
+file that can be compared between commits:
+
+    docker compose up -d source_pg_db sink_pg_db minio
+    pip install -r requirements.txt
+    python main.py run --rows 1000000 --repeat 3 --output before.json
+    (change something)
+    python main.py run --rows 1000000 --repeat 3 --output after.json
+    python main.py compare before.json after.json
+
+`python main.py encodings` compares Parquet writer settings on a table sample
+instead (parquet_encodings.py).
+
+Objects go to a separate bucket (datalake-benchmark) and tables are prefixed
+bench_, so the regular pipelines are not touched.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import generate_data
+import parquet_encodings
+import queries
+
+IST = timezone(timedelta(hours=5, minutes=30))
+RESOURCES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_LOADER = os.path.join(RESOURCES_DIR, "source_to_dl", "postgres_to_dl", "main.py")
+SINK_LOADER = os.path.join(RESOURCES_DIR, "dl_to_sink", "dl_to_postgres", "main.py")
+# object_store.py; the driver containers mount it at /common
+COMMON_DIR = os.path.join(RESOURCES_DIR, "common")
+
+# Metrics compared by `compare`; higher_is_better decides the sign of a regression
+COMPARED_METRICS = {
+    "wall_seconds": False,
+    "cpu_seconds": False,
+    "peak_rss_bytes": False,
+    "rows_per_sec": True,
+    "mb_per_sec": True,
+}
+
+
+def run_loader(script: str, env: Dict[str, str]) -> dict:
+    """Run one loader and parse its stdout protocol; raises if it exits non-zero"""
+    temp_env = dict(os.environ, SIMULATED_DELAY="0", PROFILE_ENABLED="0", PYTHONPATH=COMMON_DIR, **env)
+    with tempfile.TemporaryFile() as temp_log:
+        temp_started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script), env=temp_env,
+                                   stdout=subprocess.PIPE, stderr=temp_log)
+        stdout = process.stdout.read().decode("utf-8", errors="replace")
+        # wait4 gives this child's own rusage (RUSAGE_CHILDREN would mix in earlier runs)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - temp_started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        process.stdout.close()
+        if process.returncode != 0:
+            temp_log.seek(0)
+            tail = temp_log.read().decode("utf-8", errors="replace")[-2000:]
+            raise RuntimeError(f"{script} exited with {process.returncode}:\n{tail}")
+
+    result = {
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_bytes": usage.ru_maxrss * 1024,
+        "rows": 0,
+        "bytes": 0,
+        "phases": {},
+    }
+    for line in stdout.split("\n"):
+        line = line.strip()
+        if line.startswith("ROWS_PROCESSED:"):
+            result["rows"] = int(line.split(":", 1)[1])
+        elif line.startswith("METRIC:"):
+            _, key, value = line.split(":", 2)
+            if key == "bytes":
+                result["bytes"] = int(float(value))
+            else:
+                result["phases"][key] = float(value)
+    return result
+
+
+def source_to_dl_env(args, source_tablename: str) -> Dict[str, str]:
+    return {
+        "SOURCE_TABLENAME": source_tablename,
+        "LOAD_TYPE": "full",
+        "SOURCE_TYPE": "postgres",
+        "POSTGRES_HOST": args.source_host,
+        "POSTGRES_PORT": args.source_port,
+        "POSTGRES_DB": args.source_db,
+        "POSTGRES_USER": args.source_user,
+        "POSTGRES_PASSWORD": args.source_password,
+        # The loader's execution_tracking write is skipped when the table is missing
+        "CONFIG_DB_PATH": os.path.join(tempfile.gettempdir(), "benchmark_config.db"),
+        **object_store_env(args),
+    }
+
+
+def dl_to_sink_env(args, source_tablename: str) -> Dict[str, str]:
+    return {
+        "SOURCE_TABLE_NAME": source_tablename,
+        "SINK_TABLENAME": source_tablename,
+        "LOAD_TYPE": "full",
+        "SOURCE_TYPE": "postgres",
+        "SINK_POSTGRES_HOST": args.sink_host,
+        "SINK_POSTGRES_PORT": args.sink_port,
+        "SINK_POSTGRES_DB": args.sink_db,
+        "SINK_POSTGRES_USER": args.sink_user,
+        "SINK_POSTGRES_PASSWORD": args.sink_password,
+        **object_store_env(args),
+    }
+
+
+def object_store_env(args) -> Dict[str, str]:
+    return {
+        "OBJECT_STORE": args.object_store,
+        "LOCAL_OBJECT_STORE_ROOT": args.local_root,
+        "MINIO_ENDPOINT": args.minio_endpoint,
+        "MINIO_ACCESS_KEY": args.minio_access_key,
+        "MINIO_SECRET_KEY": args.minio_secret_key,
+        "MINIO_BUCKET": args.minio_bucket,
+    }
+
+
+def summarize(runs: List[dict]) -> dict:
+    """Median of each measurement across runs (max for peak RSS), plus the raw runs"""
+    def median(key: str) -> float:
+        return statistics.median(run[key] for run in runs)
+
+    wall_seconds = median("wall_seconds")
+    rows = runs[-1]["rows"]
+    temp_bytes = runs[-1]["bytes"]
+    phase_names = sorted({name for run in runs for name in run["phases"]})
+    return {
+        "rows": rows,
+        "bytes": temp_bytes,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(median("cpu_seconds"), 4),
+        "peak_rss_bytes": max(run["peak_rss_bytes"] for run in runs),
+        "rows_per_sec": round(rows / wall_seconds, 1) if wall_seconds else 0.0,
+        "mb_per_sec": round(temp_bytes / 1e6 / wall_seconds, 3) if wall_seconds else 0.0,
+        "phases": {
+            name: round(statistics.median(run["phases"][name] for run in runs if name in run["phases"]), 4)
+            for name in phase_names
+        },
+        "runs": runs,
+    }
+
+
+def git_revision() -> Optional[dict]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=RESOURCES_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=RESOURCES_DIR, capture_output=True,
+                                text=True, check=True).stdout
+        return {"commit": commit, "dirty": bool(status.strip())}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    generated = {}
+    if not args.skip_generate:
+        generated = generate_data.generate(args, args.datasets, args.rows)
+
+    results = {}
+    for dataset in args.datasets:
+        source_tablename = queries.DATASETS[dataset][0]
+        temp_source_runs, temp_sink_runs = [], []
+        for iteration in range(args.repeat):
+            print(f"{dataset}: run {iteration + 1}/{args.repeat}", file=sys.stderr)
+            temp_source_runs.append(run_loader(SOURCE_LOADER, source_to_dl_env(args, source_tablename)))
+            temp_sink_runs.append(run_loader(SINK_LOADER, dl_to_sink_env(args, source_tablename)))
+        source_to_dl = summarize(temp_source_runs)
+        dl_to_sink = summarize(temp_sink_runs)
+        end_to_end_seconds = source_to_dl["wall_seconds"] + dl_to_sink["wall_seconds"]
+        results[dataset] = {
+            "source_tablename": source_tablename,
+            "generate": generated.get(dataset),
+            "source_to_dl": source_to_dl,
+            "dl_to_sink": dl_to_sink,
+            "end_to_end": {
+                "wall_seconds": round(end_to_end_seconds, 4),
+                "rows_per_sec": round(source_to_dl["rows"] / end_to_end_seconds, 1) if end_to_end_seconds else 0.0,
+            },
+        }
+
+    report = {
+        "generated_at": datetime.now(IST).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "object_store": args.object_store,
+        "datasets": results,
+    }
+    output = args.output or f"benchmark_{datetime.now(IST).strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(json.dumps({dataset: {stage: {key: value for key, value in result[stage].items() if key != "runs"}
+                                for stage in ("source_to_dl", "dl_to_sink", "end_to_end")}
+                      for dataset, result in results.items()}, indent=2))
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+def compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{'dataset':<12} {'stage':<13} {'metric':<28} {'before':>14} {'after':>14} {'change':>9}")
+    for dataset in sorted(set(before["datasets"]) & set(after["datasets"])):
+        for stage in ("source_to_dl", "dl_to_sink"):
+            temp_before = before["datasets"][dataset][stage]
+            temp_after = after["datasets"][dataset][stage]
+            rows = [(name, temp_before.get(name), temp_after.get(name), higher_is_better)
+                    for name, higher_is_better in COMPARED_METRICS.items()]
+            rows += [(f"phase.{name}", temp_before["phases"].get(name), temp_after["phases"].get(name), False)
+                     for name in sorted(set(temp_before["phases"]) | set(temp_after["phases"]))]
+            for name, old, new, higher_is_better in rows:
+                if old is None or new is None:
+                    continue
+                change = (new - old) / old * 100 if old else 0.0
+                worse = change < 0 if higher_is_better else change > 0
+                flag = " !" if worse and abs(change) >= args.threshold else ""
+                print(f"{dataset:<12} {stage:<13} {name:<28} {old:>14,.4f} {new:>14,.4f} {change:>+8.1f}%{flag}")
+    if before.get("rows") != after.get("rows"):
+        print(f"warning: row counts differ ({before.get('rows')} vs {after.get('rows')})", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="generate data and benchmark both loaders")
+    run_parser.add_argument("--rows", type=int, default=100000)
+    run_parser.add_argument("--datasets", type=generate_data.parse_datasets, default=list(queries.DATASETS))
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--skip-generate", action="store_true", help="reuse the bench_ tables from a previous run")
+    run_parser.add_argument("--output", help="JSON report path (default benchmark_<timestamp>.json)")
+    generate_data.add_connection_args(run_parser)
+    # The loader reads as read_user, like the drivers
+    run_parser.add_argument("--source-user", default="read_user")
+    run_parser.add_argument("--source-password", default="read_password")
+    run_parser.add_argument("--sink-host", default="localhost")
+    run_parser.add_argument("--sink-port", default="5433")
+    run_parser.add_argument("--sink-db", default="sink_db")
+    run_parser.add_argument("--sink-user", default="postgres")
+    run_parser.add_argument("--sink-password", default="postgres")
+    run_parser.add_argument("--object-store", choices=("minio", "local"), default="minio",
+                            help="local writes under --local-root and needs no MinIO")
+    run_parser.add_argument("--local-root", default=os.path.join(tempfile.gettempdir(), "benchmark_datalake"))
+    run_parser.add_argument("--minio-endpoint", default="localhost:9000")
+    run_parser.add_argument("--minio-access-key", default="minioadmin")
+    run_parser.add_argument("--minio-secret-key", default="minioadmin")
+    run_parser.add_argument("--minio-bucket", default="datalake-benchmark")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="diff two JSON reports")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=5.0,
+                                help="flag regressions larger than this many percent")
+    compare_parser.set_defaults(func=compare)
+
+    encodings_parser = subparsers.add_parser("encodings", help="compare Parquet writer settings on a table sample")
+    encodings_parser.add_argument("--table", default="bench_orders", help="source table to sample")
+    encodings_parser.add_argument("--parquet", help="sample an existing Parquet file instead of the source DB")
+    encodings_parser.add_argument("--sample-rows", type=int, default=100000)
+    encodings_parser.add_argument("--incremental-key", help="also try each setting sorted by this column")
+    encodings_parser.add_argument("--codecs", default="snappy,zstd:1,zstd:3,zstd:9,lz4,gzip,none",
+                                  help="codec[:level] list")
+    encodings_parser.add_argument("--row-group-sizes", default="default,131072", help="rows per row group list")
+    encodings_parser.add_argument("--dictionary", default="all;none", help="';'-separated: all, none or column lists")
+    encodings_parser.add_argument("--statistics", default="1", help="1 and/or 0")
+    encodings_parser.add_argument("--repeat", type=int, default=3)
+    encodings_parser.add_argument("--output", help="JSON report path (default parquet_encodings_<timestamp>.json)")
+    generate_data.add_connection_args(encodings_parser)
+    encodings_parser.add_argument("--source-user", default="read_user")
+    encodings_parser.add_argument("--source-password", default="read_password")
+    encodings_parser.set_defaults(func=parquet_encodings.run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
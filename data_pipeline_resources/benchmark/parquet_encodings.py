@@ -0,0 +1,135 @@
+"""
+Parquet encoding benchmark.
+
+Reads a sample of a source table (or an existing Parquet file) once and writes it
+with every combination of the given codecs, row group sizes, dictionary and
+statistics settings (and sort order, when --incremental-key is given), using the
+loaders' writer (common/parquet_format.py). For each combination it reports file
+size, encode time and sink decode time (Parquet -> pandas, as dl_to_postgres does),
+so a table's dl_parquet_* settings can trade CPU for storage:
+
+    python main.py encodings --table bench_orders --sample-rows 200000 --incremental-key order_date
+    python main.py encodings --parquet /path/to/file.parquet --codecs snappy,zstd:3
+
+Dictionary settings are separated by ';' because a setting can be a column list:
+--dictionary 'all;none;status,customer_id'.
+"""
+
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+import queries
+
+IST = timezone(timedelta(hours=5, minutes=30))
+# Same writer as the loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+from parquet_format import CODECS, ParquetWriteOptions, parse_dictionary, write_parquet  # noqa: E402
+
+
+def parse_codecs(value: str) -> List[tuple]:
+    """'snappy,zstd:3' -> [('snappy', None), ('zstd', 3)]"""
+    codecs = []
+    for spec in value.split(","):
+        name, _, level = spec.strip().partition(":")
+        if name not in CODECS:
+            raise ValueError(f"unknown codec {name}; choose from {CODECS}")
+        codecs.append((name, int(level) if level else None))
+    return codecs
+
+
+def load_sample(args) -> pa.Table:
+    if args.parquet:
+        table = pq.read_table(args.parquet)
+        return table.slice(0, args.sample_rows)
+    import pandas as pd  # type: ignore
+    import psycopg2  # type: ignore
+    conn = psycopg2.connect(host=args.source_host, port=args.source_port, database=args.source_db,
+                            user=args.source_user, password=args.source_password)
+    try:
+        df = pd.read_sql_query(queries.SAMPLE_TABLE.format(tablename=args.table), conn, params=(args.sample_rows,))
+    finally:
+        conn.close()
+    # Same conversion as postgres_to_dl
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def combinations(args) -> List[ParquetWriteOptions]:
+    row_group_sizes = [None if size == "default" else int(size) for size in args.row_group_sizes.split(",")]
+    dictionaries = [parse_dictionary(value) for value in args.dictionary.split(";")]
+    statistics_flags = [flag.strip() != "0" for flag in args.statistics.split(",")]
+    sort_orders = [False, True] if args.incremental_key else [False]
+    return [
+        ParquetWriteOptions(codec, level, row_group_size, dictionary, write_statistics, sort)
+        for (codec, level), row_group_size, dictionary, write_statistics, sort
+        in itertools.product(parse_codecs(args.codecs), row_group_sizes, dictionaries, statistics_flags, sort_orders)
+    ]
+
+
+def measure(table: pa.Table, options: ParquetWriteOptions, incremental_key: Optional[str], repeat: int) -> dict:
+    """Median encode and decode seconds over `repeat` runs, and the file size"""
+    encode_seconds, decode_seconds = [], []
+    data = b""
+    for _ in range(repeat):
+        temp_buffer = io.BytesIO()
+        temp_started = time.perf_counter()
+        write_parquet(table, temp_buffer, options, incremental_key)
+        encode_seconds.append(time.perf_counter() - temp_started)
+        data = temp_buffer.getvalue()
+
+        temp_started = time.perf_counter()
+        pq.read_table(pa.BufferReader(data), use_pandas_metadata=True).to_pandas()
+        decode_seconds.append(time.perf_counter() - temp_started)
+
+    metadata = pq.read_metadata(pa.BufferReader(data))
+    return {
+        "options": options._asdict(),
+        "label": options.label(),
+        "bytes": len(data),
+        "row_groups": metadata.num_row_groups,
+        "encode_seconds": round(statistics.median(encode_seconds), 4),
+        "decode_seconds": round(statistics.median(decode_seconds), 4),
+    }
+
+
+def run(args):
+    table = load_sample(args)
+    print(f"Sample: {table.num_rows} rows, {table.num_columns} columns, {table.nbytes} bytes in memory",
+          file=sys.stderr)
+    if args.incremental_key and args.incremental_key not in table.column_names:
+        raise SystemExit(f"--incremental-key {args.incremental_key} is not a column of the sample")
+
+    # The loaders' defaults (no dl_parquet_* settings) are the baseline for the ratios
+    baseline = measure(table, ParquetWriteOptions(), args.incremental_key, args.repeat)
+    results = []
+    for options in combinations(args):
+        print(f"{options.label()}", file=sys.stderr)
+        result = measure(table, options, args.incremental_key, args.repeat)
+        result["size_vs_default"] = round(result["bytes"] / baseline["bytes"], 3) if baseline["bytes"] else None
+        results.append(result)
+    results.sort(key=lambda result: result["bytes"])
+
+    report = {
+        "generated_at": datetime.now(IST).isoformat(),
+        "source": args.parquet or args.table,
+        "rows": table.num_rows,
+        "repeat": args.repeat,
+        "baseline": baseline,
+        "results": results,
+    }
+    output = args.output or f"parquet_encodings_{datetime.now(IST).strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'setting':<48} {'bytes':>12} {'vs default':>10} {'encode s':>9} {'decode s':>9}")
+    for result in [dict(baseline, label=f"default ({baseline['label']})", size_vs_default=1.0)] + results:
+        print(f"{result['label']:<48} {result['bytes']:>12,} {result['size_vs_default']:>10.3f} "
+              f"{result['encode_seconds']:>9.4f} {result['decode_seconds']:>9.4f}")
+    print(f"Wrote {output}", file=sys.stderr)
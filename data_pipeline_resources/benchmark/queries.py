@@ -0,0 +1,119 @@
+"""
+SQL used by the benchmark data generator (source Postgres).
+
+Every generated value is derived from the row number, so two runs with the same
+--rows produce byte-identical tables and their results can be compared.
+"""
+
+DROP_TABLE = 'DROP TABLE IF EXISTS "{tablename}"'
+
+ANALYZE_TABLE = 'ANALYZE "{tablename}"'
+
+GET_TABLE_SIZE = "SELECT pg_total_relation_size(%s)"
+
+# Same shape as databases/source_pg_db/initial_tables.sql
+CREATE_BENCH_CUSTOMERS = """
+    CREATE TABLE bench_customers (
+        customer_id BIGINT PRIMARY KEY,
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        created_at TIMESTAMP NOT NULL
+    )
+"""
+
+INSERT_BENCH_CUSTOMERS = """
+    INSERT INTO bench_customers (customer_id, first_name, last_name, email, created_at)
+    SELECT i,
+           'first_' || (i % 5000),
+           'last_' || (i % 20000),
+           'customer_' || i || '@example.com',
+           TIMESTAMP '2023-01-01' + (i % 31536000) * INTERVAL '1 second'
+    FROM generate_series(1, %s::bigint) AS i
+"""
+
+CREATE_BENCH_ORDERS = """
+    CREATE TABLE bench_orders (
+        order_id BIGINT PRIMARY KEY,
+        customer_id BIGINT NOT NULL,
+        order_date TIMESTAMP NOT NULL,
+        total_amount DECIMAL(10, 2) NOT NULL,
+        status VARCHAR(20) NOT NULL
+    )
+"""
+
+INSERT_BENCH_ORDERS = """
+    INSERT INTO bench_orders (order_id, customer_id, order_date, total_amount, status)
+    SELECT i,
+           1 + (i * 7919) % 100000,
+           TIMESTAMP '2023-01-01' + (i % 31536000) * INTERVAL '1 second',
+           ((i * 104729) % 100000) / 100.0,
+           (ARRAY['pending', 'processing', 'shipped', 'completed', 'cancelled'])[(1 + i % 5)::int]
+    FROM generate_series(1, %s::bigint) AS i
+"""
+
+# Two narrow integer columns: per-row overhead dominates
+CREATE_BENCH_SKINNY = """
+    CREATE TABLE bench_skinny (
+        id BIGINT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+"""
+
+INSERT_BENCH_SKINNY = """
+    INSERT INTO bench_skinny (id, value)
+    SELECT i, (i * 2654435761) % 2147483647
+    FROM generate_series(1, %s::bigint) AS i
+"""
+
+# 60 mixed columns: per-column encode/decode dominates
+WIDE_INT_COLUMNS = 20
+WIDE_FLOAT_COLUMNS = 20
+WIDE_TEXT_COLUMNS = 20
+
+CREATE_BENCH_WIDE = "CREATE TABLE bench_wide (id BIGINT PRIMARY KEY, {columns})".format(
+    columns=", ".join(
+        [f"int_{n} INTEGER" for n in range(WIDE_INT_COLUMNS)]
+        + [f"float_{n} DOUBLE PRECISION" for n in range(WIDE_FLOAT_COLUMNS)]
+        + [f"text_{n} VARCHAR(32)" for n in range(WIDE_TEXT_COLUMNS)]
+    )
+)
+
+INSERT_BENCH_WIDE = "INSERT INTO bench_wide SELECT i, {values} FROM generate_series(1, %s::bigint) AS i".format(
+    values=", ".join(
+        [f"(i * {n + 3}) % 1000003" for n in range(WIDE_INT_COLUMNS)]
+        + [f"i / {n + 7}.0" for n in range(WIDE_FLOAT_COLUMNS)]
+        + [f"left(md5((i + {n})::text), 16)" for n in range(WIDE_TEXT_COLUMNS)]
+    )
+)
+
+# ~2 KB of text per row: bytes moved dominate
+CREATE_BENCH_TEXT_HEAVY = """
+    CREATE TABLE bench_text_heavy (
+        id BIGINT PRIMARY KEY,
+        title TEXT NOT NULL,
+        body TEXT NOT NULL,
+        notes TEXT NOT NULL
+    )
+"""
+
+INSERT_BENCH_TEXT_HEAVY = """
+    INSERT INTO bench_text_heavy (id, title, body, notes)
+    SELECT i,
+           'title ' || md5(i::text),
+           repeat(md5(i::text) || ' ', 40),
+           repeat(md5((i * 31)::text), 10)
+    FROM generate_series(1, %s::bigint) AS i
+"""
+
+# dataset -> (table, create, insert)
+DATASETS = {
+    "customers": ("bench_customers", CREATE_BENCH_CUSTOMERS, INSERT_BENCH_CUSTOMERS),
+    "orders": ("bench_orders", CREATE_BENCH_ORDERS, INSERT_BENCH_ORDERS),
+    "skinny": ("bench_skinny", CREATE_BENCH_SKINNY, INSERT_BENCH_SKINNY),
+    "wide": ("bench_wide", CREATE_BENCH_WIDE, INSERT_BENCH_WIDE),
+    "text_heavy": ("bench_text_heavy", CREATE_BENCH_TEXT_HEAVY, INSERT_BENCH_TEXT_HEAVY),
+}
+
+# Sample for the Parquet encoding benchmark (parquet_encodings.py)
+SAMPLE_TABLE = 'SELECT * FROM "{tablename}" LIMIT %s'
@@ -0,0 +1,135 @@
+"""
+Encrypted connection credentials, shared by the backend and the drivers.
+
+Source and destination credentials are stored as Fernet tokens of their JSON. The
+cipher is built once per ENCRYPTION_KEY value instead of on every call, and
+decrypted credentials are kept in a bounded LRU keyed by the token's sha256, so
+listing pages and drivers iterating over many pipelines decrypt each token once.
+
+Key rotation: ENCRYPTION_KEY may hold several comma-separated keys. The first
+encrypts, all of them decrypt (MultiFernet), so a new key is rolled out as
+"new,old"; rotate() re-encrypts a token under the first key (the backend's
+POST /connections/rotate-keys does it for every stored row), after which the
+old key can be removed.
+
+The backend also stores mask_credentials() of every saved credential set next to
+the token, so listings never need to decrypt at all. The mask is an allowlist:
+only PLAIN_CRED_KEYS keep their value, every other field (whatever its name) is
+stored as '********', which tells the UI a secret is set without storing it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Valid Fernet key for local development only; every deployment sets ENCRYPTION_KEY
+DEV_KEY = 'tpmw9F9U2Q3z9r4Q3z9r4Q3z9r4Q3z9r4Q3z9r4Q3z8='
+
+CREDENTIALS_CACHE_SIZE = int(os.getenv('CREDENTIALS_CACHE_SIZE', '256'))
+
+# Connection fields that are not secret (frontend constants/connectorConfig.ts); any other field is masked
+PLAIN_CRED_KEYS = ['host', 'port', 'dbname', 'user', 'username', 'region_name', 'bucket_name', 'prefix',
+                   'url', 'method', 'spreadsheet_link']
+MASK = '********'
+
+
+def parse_keys(value: str) -> List[str]:
+    return [key.strip() for key in value.split(',') if key.strip()]
+
+
+@lru_cache(maxsize=4)
+def _cipher(keys: str) -> MultiFernet:
+    key_list = parse_keys(keys)
+    if not key_list:
+        logger.warning("ENCRYPTION_KEY not set, using insecure default!")
+        key_list = [DEV_KEY]
+    return MultiFernet([Fernet(key.encode('utf-8')) for key in key_list])
+
+
+def get_cipher() -> MultiFernet:
+    """Cipher for the current ENCRYPTION_KEY; built once per distinct value"""
+    return _cipher(os.getenv('ENCRYPTION_KEY', ''))
+
+
+class CredentialsCache:
+    """Bounded LRU of decrypted credentials, keyed by the token's sha256 (never the token itself)"""
+
+    def __init__(self, size: int = CREDENTIALS_CACHE_SIZE):
+        self.size = size
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            creds = self._entries.get(digest)
+            if creds is None:
+                return None
+            self._entries.move_to_end(digest)
+            return dict(creds)
+
+    def put(self, digest: str, creds: Dict[str, Any]):
+        with self._lock:
+            self._entries[digest] = dict(creds)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+_cache = CredentialsCache()
+
+
+def encrypt(data: Dict[str, Any]) -> Optional[str]:
+    """Encrypts a dictionary to a Fernet token string (with the first ENCRYPTION_KEY)."""
+    if not data:
+        return None
+    return get_cipher().encrypt(json.dumps(data).encode('utf-8')).decode('utf-8')
+
+
+def decrypt(token: str) -> Optional[Dict[str, Any]]:
+    """Decrypts a Fernet token string back to a dictionary; None if no key can decrypt it."""
+    if not token:
+        return None
+    digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    creds = _cache.get(digest)
+    if creds is not None:
+        return creds
+    try:
+        # Legacy rows stored plain JSON
+        if token.strip().startswith('{') and token.strip().endswith('}'):
+            creds = json.loads(token)
+        else:
+            creds = json.loads(get_cipher().decrypt(token.encode('utf-8')).decode('utf-8'))
+    except (InvalidToken, ValueError) as e:
+        logger.error(f"Decryption failed: {e or type(e).__name__}")
+        return None
+    _cache.put(digest, creds)
+    return dict(creds)
+
+
+def rotate(token: str) -> Optional[str]:
+    """The token re-encrypted under the first ENCRYPTION_KEY; legacy JSON is encrypted. None if undecryptable."""
+    if not token:
+        return None
+    if token.strip().startswith('{') and token.strip().endswith('}'):
+        return encrypt(json.loads(token))
+    try:
+        return get_cipher().rotate(token.encode('utf-8')).decode('utf-8')
+    except InvalidToken:
+        logger.error("Rotation failed: no ENCRYPTION_KEY decrypts the token")
+        return None
+
+
+def mask_credentials(creds: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy of credentials with every field outside PLAIN_CRED_KEYS replaced by '********'.
+    """
+    if not creds:
+        return {}
+    return {k: v if k in PLAIN_CRED_KEYS else MASK for k, v in creds.items()}
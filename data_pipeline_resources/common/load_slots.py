@@ -0,0 +1,57 @@
+"""
+Per-source cap on concurrent heavy extractions.
+
+Before a heavy source-to-datalake load starts, driver_source_to_dl takes one of
+MAX_HEAVY_LOADS_PER_SOURCE slots of the source; when all are taken the table is
+skipped and stays due for the next driver run. A load is heavy when the p90 of its
+recent successful runs (scheduling.recent_durations) is HEAVY_LOAD_SECONDS or more,
+or when it has none in the duration window (first loads read the whole table).
+
+A slot is an flock on LOAD_SLOTS_DIR/<source>.<n>.lock, on the config DB volume, so
+overlapping driver runs share the slots, and the kernel releases it when the process
+exits: a crashed loader never leaks one. MAX_HEAVY_LOADS_PER_SOURCE=0 turns the cap off.
+"""
+
+import fcntl
+import hashlib
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+MAX_HEAVY_LOADS_PER_SOURCE = int(os.getenv('MAX_HEAVY_LOADS_PER_SOURCE', '2'))
+HEAVY_LOAD_SECONDS = float(os.getenv('HEAVY_LOAD_SECONDS', '300'))
+LOAD_SLOTS_DIR = os.getenv('LOAD_SLOTS_DIR', '/data/load_slots')
+
+
+def is_heavy(recent_duration_ms: Optional[float]) -> bool:
+    """recent_duration_ms: p90 of the recent successful runs, None without any"""
+    return recent_duration_ms is None or recent_duration_ms >= HEAVY_LOAD_SECONDS * 1000
+
+
+def slot_paths(source_name: str):
+    # Source names are free text: hash them into a file name
+    name = hashlib.sha256(source_name.encode('utf-8')).hexdigest()[:16]
+    return [os.path.join(LOAD_SLOTS_DIR, f"{name}.{index}.lock") for index in range(MAX_HEAVY_LOADS_PER_SOURCE)]
+
+
+@contextmanager
+def source_slot(source_name: str) -> Iterator[bool]:
+    """Hold a free slot of the source for the with block; yields False (holding nothing) when all are taken"""
+    if MAX_HEAVY_LOADS_PER_SOURCE <= 0:
+        yield True
+        return
+    os.makedirs(LOAD_SLOTS_DIR, exist_ok=True)
+    for path in slot_paths(source_name):
+        slot_file = open(path, 'w')
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot_file.close()
+            continue
+        try:
+            yield True
+        finally:
+            # Closing the file releases the lock
+            slot_file.close()
+        return
+    yield False
@@ -0,0 +1,114 @@
+"""
+Pipeline histograms of the driver containers.
+
+Each driver accumulates its histograms across runs in METRICS_DIR/<writer>.json;
+the backend's GET /metrics (backend/utils/metrics.py) merges those files with its
+own observations, so both sides use the buckets and loader metric keys below.
+Observations are buffered in memory and written once per driver run (flush).
+"""
+
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv('METRICS_DIR', '/data/metrics')
+
+SECONDS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, float('inf')]
+SIZE_BUCKETS = [10.0, 100.0, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, float('inf')]
+
+# Loader stdout lines "METRIC:<key>:<value>" -> (histogram, buckets)
+LOADER_METRICS = {
+    'extract_query_seconds': ('pipeline_extract_query_seconds', SECONDS_BUCKETS),
+    'parquet_encode_seconds': ('pipeline_parquet_encode_seconds', SECONDS_BUCKETS),
+    'minio_upload_seconds': ('pipeline_minio_upload_seconds', SECONDS_BUCKETS),
+    'minio_download_seconds': ('pipeline_minio_download_seconds', SECONDS_BUCKETS),
+    'sink_load_seconds': ('pipeline_sink_load_seconds', SECONDS_BUCKETS),
+    'bytes': ('pipeline_stage_bytes', SIZE_BUCKETS),
+}
+
+
+class DriverMetrics:
+    """
+    Buffered histograms of one driver: writer names its state file and the config DB
+    lock wait series, stage_type labels its pipeline stages.
+    """
+
+    def __init__(self, writer: str, stage_type: str, metrics_dir: Optional[str] = None):
+        self.writer = writer
+        self.stage_type = stage_type
+        self.metrics_dir = metrics_dir or METRICS_DIR
+        self.metrics_file = os.path.join(self.metrics_dir, f'{writer}.json')
+        self._observations = []
+
+    def labels(self, config: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            'source_tablename': config['source_tablename'],
+            'source_name': config.get('source_name') or '',
+            'destination_name': config.get('destination_name') or '',
+            'stage_type': self.stage_type,
+        }
+
+    def observe(self, name: str, buckets: List[float], value: float, labels: Dict[str, str]):
+        self._observations.append((name, buckets, value, labels))
+
+    def observe_loader_output(self, stdout: str, labels: Dict[str, str]):
+        for line in (stdout or '').split('\n'):
+            if not line.startswith('METRIC:'):
+                continue
+            try:
+                _, key, value = line.strip().split(':', 2)
+                name, buckets = LOADER_METRICS[key]
+                self.observe(name, buckets, float(value), labels)
+            except (KeyError, ValueError):
+                logger.warning(f"Ignoring malformed loader metric line: {line}")
+
+    def observe_stage(self, config: Dict[str, Any], status: str, started_at: datetime, rows_processed: Optional[int]):
+        labels = self.labels(config)
+        duration = (datetime.now(timezone.utc) - started_at).total_seconds()
+        self.observe('pipeline_stage_duration_seconds', SECONDS_BUCKETS, duration, dict(labels, status=status))
+        if rows_processed is not None:
+            self.observe('pipeline_stage_rows', SIZE_BUCKETS, rows_processed, labels)
+
+    def begin_write(self, conn: sqlite3.Connection):
+        """Open a write transaction now (BEGIN IMMEDIATE) and record how long the lock took"""
+        temp_started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        self.observe('config_db_lock_wait_seconds', SECONDS_BUCKETS, time.perf_counter() - temp_started,
+                     {'writer': self.writer})
+
+    def flush(self):
+        """Merge the buffered observations into the state file"""
+        if not self._observations:
+            return
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(self.metrics_file + '.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    with open(self.metrics_file) as f:
+                        histograms = json.load(f).get('histograms', {})
+                except (OSError, ValueError):
+                    histograms = {}
+                for name, buckets, value, labels in self._observations:
+                    series_list = histograms.setdefault(name, [])
+                    series = next((s for s in series_list if s['labels'] == labels and s['buckets'] == buckets), None)
+                    if series is None:
+                        series = {'labels': labels, 'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+                        series_list.append(series)
+                    series['counts'][next(i for i, bound in enumerate(buckets) if value <= bound)] += 1
+                    series['sum'] += value
+                    series['count'] += 1
+                temp_path = self.metrics_file + '.tmp'
+                with open(temp_path, 'w') as f:
+                    json.dump({'histograms': histograms}, f)
+                os.replace(temp_path, self.metrics_file)
+            self._observations.clear()
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {self.metrics_file}: {e}")
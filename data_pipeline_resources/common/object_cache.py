@@ -0,0 +1,152 @@
+"""
+On-disk read-through cache for datalake objects (sink workers).
+
+Entries are content-addressed by the object's ETag and size, so a rewritten
+object is simply a new entry and nothing needs invalidating. Parquet footers
+are cached separately from whole objects: planning needs only the footer, and
+the footer stays cached after the object itself has been evicted.
+
+    DL_CACHE_DIR        cache directory; unset or empty disables the cache
+    DL_CACHE_MAX_BYTES  size bound, enforced by evicting least recently used files
+
+A file's mtime is its last access time. Writers create a temp file and rename it
+into place, so concurrent loaders sharing the directory never see partial entries.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from typing import Optional, Union
+from object_store import ObjectInfo, ObjectStore
+
+logger = logging.getLogger(__name__)
+
+DL_CACHE_DIR = os.getenv('DL_CACHE_DIR', '')
+DL_CACHE_MAX_BYTES = int(os.getenv('DL_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+# Parquet files end with <footer><4-byte little-endian footer length>PAR1
+PARQUET_TAIL_BYTES = 8
+PARQUET_MAGIC = b'PAR1'
+
+
+class ObjectCache:
+    def __init__(self, store: ObjectStore, cache_dir: str, max_bytes: int):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.footers_dir = os.path.join(cache_dir, 'footers')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.footers_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_name(info: ObjectInfo) -> str:
+        return hashlib.sha256(f"{info.etag}:{info.size}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, path: str) -> bool:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def _write(self, path: str, data: bytes):
+        temp_path = f"{path}.{os.getpid()}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _map(path: str) -> Union[bytes, mmap.mmap]:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_buffer(self, info: ObjectInfo) -> Union[bytes, mmap.mmap]:
+        """Whole object, mmapped from the cache; fetched and stored on a miss"""
+        path = os.path.join(self.objects_dir, self._entry_name(info))
+        if self._lookup(path):
+            try:
+                return self._map(path)
+            except FileNotFoundError:
+                # Evicted by another loader between the lookup and the open
+                pass
+        data = self.store.get(info.key)
+        if info.size > self.max_bytes:
+            return data
+        try:
+            self._write(path, data)
+            self.evict(keep=path)
+        except OSError as e:
+            logger.warning(f"Could not cache {info.key}: {e}")
+        return data
+
+    def get_parquet_footer(self, info: ObjectInfo) -> bytes:
+        """Footer bytes (footer + length + magic), fetched with ranged GETs on a miss"""
+        path = os.path.join(self.footers_dir, self._entry_name(info))
+        if self._lookup(path):
+            try:
+                with open(path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                pass
+        tail = self.store.get(info.key, offset=info.size - PARQUET_TAIL_BYTES, length=PARQUET_TAIL_BYTES)
+        if len(tail) != PARQUET_TAIL_BYTES or tail[4:] != PARQUET_MAGIC:
+            raise ValueError(f"{self.store.uri(info.key)} is not a Parquet file")
+        footer_length = struct.unpack('<I', tail[:4])[0]
+        footer = self.store.get(info.key, offset=info.size - PARQUET_TAIL_BYTES - footer_length,
+                                length=footer_length) + tail
+        try:
+            self._write(path, footer)
+        except OSError as e:
+            logger.warning(f"Could not cache footer of {info.key}: {e}")
+        return footer
+
+    def get_parquet_metadata(self, info: ObjectInfo):
+        """pyarrow FileMetaData (row counts, row groups, schema) from the cached footer"""
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+        # read_metadata only looks at the end of the buffer; the leading magic makes it a valid file
+        return pq.read_metadata(pa.BufferReader(PARQUET_MAGIC + self.get_parquet_footer(info)))
+
+    def evict(self, keep: Optional[str] = None):
+        """Delete least recently used entries (objects first, then footers) until under max_bytes"""
+        entries = []
+        for directory in (self.objects_dir, self.footers_dir):
+            for entry in os.scandir(directory):
+                if entry.name.endswith('.part'):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((directory == self.footers_dir, st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, _, size, _ in entries)
+        for _, _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+
+
+def get_object_cache(store: ObjectStore) -> Optional[ObjectCache]:
+    """Cache over store as configured by DL_CACHE_DIR, or None when caching is off"""
+    if not DL_CACHE_DIR:
+        return None
+    return ObjectCache(store, DL_CACHE_DIR, DL_CACHE_MAX_BYTES)
@@ -0,0 +1,269 @@
+"""
+Object store used by the loaders for datalake reads and writes.
+
+    OBJECT_STORE=minio (default, also 's3')  MinIO or any S3 endpoint (MINIO_* env)
+    OBJECT_STORE=local                       files under LOCAL_OBJECT_STORE_ROOT/<bucket>/
+
+Keys and the paths printed to drivers stay the same for both backends
+(<bucket>/<key>, e.g. datalake/postgres_to_dl/dl_orders/...), so the config DB and
+UI do not care which one wrote a file.
+
+The driver containers mount this directory at /common and put it on PYTHONPATH.
+"""
+
+import logging
+import mmap
+import os
+import shutil
+import socket
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio_server:9000')
+MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
+MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+MINIO_BUCKET = os.getenv('MINIO_BUCKET', 'datalake')
+MINIO_USE_SSL = os.getenv('MINIO_USE_SSL', 'false').lower() == 'true'
+
+OBJECT_STORE = os.getenv('OBJECT_STORE', 'minio').lower()
+LOCAL_OBJECT_STORE_ROOT = os.getenv('LOCAL_OBJECT_STORE_ROOT', '/data/datalake')
+
+# Streams of unknown length are uploaded in parts of this size (S3 minimum is 5 MiB)
+MULTIPART_PART_SIZE = 16 * 1024 * 1024
+# Keys per multi-object delete request (S3 maximum is 1000)
+DELETE_BATCH_SIZE = 1000
+
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    last_modified: datetime
+    etag: str
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class ObjectStore(ABC):
+    """Bucket-scoped storage; keys are '/'-separated paths inside the bucket"""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def uri(self, key: str) -> str:
+        """Path recorded in file_paths / printed as FILE_PATH"""
+        return f"{self.bucket}/{key}"
+
+    @abstractmethod
+    def ensure_bucket(self):
+        ...
+
+    @abstractmethod
+    def put(self, key: str, stream: BinaryIO, length: int = -1, content_type: str = 'application/octet-stream'):
+        """Store stream under key; length=-1 streams it in MULTIPART_PART_SIZE parts"""
+
+    @abstractmethod
+    def get(self, key: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Whole object, or `length` bytes from `offset`"""
+
+    def get_buffer(self, key: str) -> Union[bytes, mmap.mmap]:
+        """Whole object as a buffer for pyarrow (pa.BufferReader); zero-copy where the backend allows"""
+        return self.get(key)
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        """Objects under prefix, recursively"""
+
+    @abstractmethod
+    def stat(self, key: str) -> ObjectInfo:
+        """Raises ObjectNotFound"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    def delete_many(self, keys: List[str]) -> List[str]:
+        """Delete keys (missing ones are ignored); returns the keys that could not be deleted"""
+        for key in keys:
+            self.delete(key)
+        return []
+
+
+class MinioObjectStore(ObjectStore):
+    def __init__(self, bucket: str, endpoint: str, access_key: str, secret_key: str, secure: bool):
+        from minio import Minio  # type: ignore
+        super().__init__(bucket)
+        self.client = Minio(self._resolve_endpoint(endpoint), access_key=access_key, secret_key=secret_key, secure=secure)
+
+    @staticmethod
+    def _resolve_endpoint(endpoint: str) -> str:
+        """The minio client rejects hostnames with underscores (minio_server), so connect by IP"""
+        endpoint = endpoint.replace('http://', '').replace('https://', '')
+        if ':' not in endpoint:
+            return endpoint
+        host, port = endpoint.split(':', 1)
+        try:
+            return f"{socket.gethostbyname(host)}:{port}"
+        except OSError:
+            return endpoint
+
+    def ensure_bucket(self):
+        from minio.error import S3Error  # type: ignore
+        try:
+            self.client.make_bucket(self.bucket)
+            logger.info(f"Created bucket: {self.bucket}")
+        except S3Error as e:
+            if getattr(e, 'code', '') not in ('BucketAlreadyOwnedByYou', 'BucketAlreadyExists'):
+                # e.g. a key without CreateBucket; assume it exists and let the write fail if not
+                logger.warning(f"Could not create bucket {self.bucket}, assuming it exists: {e}")
+
+    def put(self, key: str, stream: BinaryIO, length: int = -1, content_type: str = 'application/octet-stream'):
+        self.client.put_object(self.bucket, key, stream, length=length, content_type=content_type,
+                               part_size=MULTIPART_PART_SIZE if length < 0 else 0)
+
+    def get(self, key: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        from minio.error import S3Error  # type: ignore
+        try:
+            response = self.client.get_object(self.bucket, key, offset=offset, length=length or 0)
+        except S3Error as e:
+            if e.code == 'NoSuchKey':
+                raise ObjectNotFound(self.uri(key)) from e
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True):
+            if not obj.is_dir:
+                yield ObjectInfo(obj.object_name, obj.size, obj.last_modified, (obj.etag or '').strip('"'))
+
+    def stat(self, key: str) -> ObjectInfo:
+        from minio.error import S3Error  # type: ignore
+        try:
+            obj = self.client.stat_object(self.bucket, key)
+        except S3Error as e:
+            if e.code in ('NoSuchKey', 'NoSuchObject'):
+                raise ObjectNotFound(self.uri(key)) from e
+            raise
+        return ObjectInfo(obj.object_name, obj.size, obj.last_modified, (obj.etag or '').strip('"'))
+
+    def delete(self, key: str):
+        self.client.remove_object(self.bucket, key)
+
+    def delete_many(self, keys: List[str]) -> List[str]:
+        """One DeleteObjects request per DELETE_BATCH_SIZE keys instead of one request per key"""
+        from minio.deleteobjects import DeleteObject  # type: ignore
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            temp_batch = [DeleteObject(key) for key in keys[start:start + DELETE_BATCH_SIZE]]
+            # remove_objects is lazy: the request is sent while its errors are iterated
+            for error in self.client.remove_objects(self.bucket, temp_batch):
+                logger.warning(f"Could not delete {self.uri(error.name)}: {error.message}")
+                failed.append(error.name)
+        return failed
+
+
+class LocalObjectStore(ObjectStore):
+    """Files under <root>/<bucket>/<key>; for single-node runs, tests and benchmarks"""
+
+    def __init__(self, bucket: str, root: str):
+        super().__init__(bucket)
+        self.bucket_dir = os.path.join(os.path.abspath(root), bucket)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.bucket_dir, key))
+        if not path.startswith(self.bucket_dir + os.sep):
+            raise ValueError(f"Key escapes the bucket: {key}")
+        return path
+
+    def _info(self, key: str, path: str) -> ObjectInfo:
+        st = os.stat(path)
+        return ObjectInfo(
+            key,
+            st.st_size,
+            datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+            # Cheap stand-in for an S3 ETag: changes whenever the file is rewritten
+            f"{st.st_mtime_ns:x}-{st.st_size:x}",
+        )
+
+    def ensure_bucket(self):
+        os.makedirs(self.bucket_dir, exist_ok=True)
+
+    def put(self, key: str, stream: BinaryIO, length: int = -1, content_type: str = 'application/octet-stream'):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write next to the target and rename so readers never see a partial object
+        temp_path = f"{path}.{os.getpid()}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                if length < 0:
+                    shutil.copyfileobj(stream, f, MULTIPART_PART_SIZE)
+                else:
+                    f.write(stream.read(length))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, key: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        try:
+            with open(self._path(key), 'rb') as f:
+                f.seek(offset)
+                return f.read() if length is None else f.read(length)
+        except FileNotFoundError as e:
+            raise ObjectNotFound(self.uri(key)) from e
+
+    def get_buffer(self, key: str) -> Union[bytes, mmap.mmap]:
+        """Read-only mmap of the file: pyarrow decodes straight from the page cache"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b''
+                # The mapping stays valid after the file is closed
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError as e:
+            raise ObjectNotFound(self.uri(key)) from e
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        # Walk from the deepest directory fully contained in prefix, then filter by the rest
+        base = os.path.join(self.bucket_dir, os.path.dirname(prefix))
+        for dirpath, _, filenames in os.walk(base):
+            for filename in sorted(filenames):
+                if filename.endswith('.part'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, self.bucket_dir).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    try:
+                        yield self._info(key, path)
+                    except FileNotFoundError:
+                        continue
+
+    def stat(self, key: str) -> ObjectInfo:
+        try:
+            return self._info(key, self._path(key))
+        except FileNotFoundError as e:
+            raise ObjectNotFound(self.uri(key)) from e
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+def get_object_store(bucket: Optional[str] = None) -> ObjectStore:
+    """Store selected by OBJECT_STORE for the given (default MINIO_BUCKET) bucket"""
+    bucket = bucket or MINIO_BUCKET
+    if OBJECT_STORE == 'local':
+        return LocalObjectStore(bucket, LOCAL_OBJECT_STORE_ROOT)
+    if OBJECT_STORE in ('minio', 's3'):
+        return MinioObjectStore(bucket, MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY, MINIO_USE_SSL)
+    raise ValueError(f"Unknown OBJECT_STORE: {OBJECT_STORE}")
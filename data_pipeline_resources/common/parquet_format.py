@@ -0,0 +1,102 @@
+"""
+Parquet writer settings for datalake files.
+
+Each pipeline can override them in pipeline_config (dl_parquet_* columns); the
+drivers pass them to the loaders as environment variables:
+
+    PARQUET_COMPRESSION              snappy (default), zstd, lz4, gzip, brotli or none
+    PARQUET_COMPRESSION_LEVEL        codec level (zstd 1-22, gzip 1-9, brotli 0-11); unset = codec default
+    PARQUET_ROW_GROUP_SIZE           rows per row group; unset = pyarrow default
+    PARQUET_DICTIONARY               all (default), none, or a comma-separated list of columns
+    PARQUET_STATISTICS               1 (default) writes min/max statistics, 0 skips them
+    PARQUET_SORT_BY_INCREMENTAL_KEY  1 sorts rows by the incremental key before writing
+
+Unset values keep the output identical to DataFrame.to_parquet(engine='pyarrow').
+"""
+
+import os
+from typing import Dict, List, Mapping, NamedTuple, Optional, Union
+
+CODECS = ('snappy', 'zstd', 'lz4', 'gzip', 'brotli', 'none')
+
+
+class ParquetWriteOptions(NamedTuple):
+    compression: str = 'snappy'
+    compression_level: Optional[int] = None
+    row_group_size: Optional[int] = None
+    # True = every column, False = none, list = only these columns
+    dictionary: Union[bool, List[str]] = True
+    statistics: bool = True
+    sort_by_incremental_key: bool = False
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> 'ParquetWriteOptions':
+        level = environ.get('PARQUET_COMPRESSION_LEVEL')
+        row_group_size = environ.get('PARQUET_ROW_GROUP_SIZE')
+        return cls(
+            compression=(environ.get('PARQUET_COMPRESSION') or 'snappy').lower(),
+            compression_level=int(level) if level else None,
+            row_group_size=int(row_group_size) if row_group_size else None,
+            dictionary=parse_dictionary(environ.get('PARQUET_DICTIONARY') or 'all'),
+            statistics=environ.get('PARQUET_STATISTICS', '1') != '0',
+            sort_by_incremental_key=environ.get('PARQUET_SORT_BY_INCREMENTAL_KEY', '0') == '1',
+        )
+
+    def label(self) -> str:
+        """Short description, e.g. zstd:3/rg=131072/dict=all/stats/sorted"""
+        codec = self.compression if self.compression_level is None else f"{self.compression}:{self.compression_level}"
+        dictionary = {True: 'all', False: 'none'}.get(self.dictionary) if isinstance(self.dictionary, bool) \
+            else ','.join(self.dictionary)
+        parts = [codec, f"rg={self.row_group_size or 'default'}", f"dict={dictionary}"]
+        parts.append('stats' if self.statistics else 'nostats')
+        if self.sort_by_incremental_key:
+            parts.append('sorted')
+        return '/'.join(parts)
+
+
+def parse_dictionary(value: str) -> Union[bool, List[str]]:
+    value = value.strip()
+    if value.lower() == 'all':
+        return True
+    if value.lower() == 'none':
+        return False
+    return [column.strip() for column in value.split(',') if column.strip()]
+
+
+def parquet_env(config: Mapping) -> Dict[str, str]:
+    """Loader environment for a pipeline_config row; unset columns are left out (defaults apply)"""
+    env = {}
+    if config.get('dl_parquet_compression'):
+        env['PARQUET_COMPRESSION'] = config['dl_parquet_compression']
+    if config.get('dl_parquet_compression_level') is not None:
+        env['PARQUET_COMPRESSION_LEVEL'] = str(config['dl_parquet_compression_level'])
+    if config.get('dl_parquet_row_group_size'):
+        env['PARQUET_ROW_GROUP_SIZE'] = str(config['dl_parquet_row_group_size'])
+    if config.get('dl_parquet_dictionary'):
+        env['PARQUET_DICTIONARY'] = config['dl_parquet_dictionary']
+    if config.get('dl_parquet_statistics') is not None:
+        env['PARQUET_STATISTICS'] = '1' if config['dl_parquet_statistics'] else '0'
+    if config.get('dl_parquet_sort_by_incremental_key'):
+        env['PARQUET_SORT_BY_INCREMENTAL_KEY'] = '1'
+    return env
+
+
+def write_parquet(table, where, options: ParquetWriteOptions, incremental_key: Optional[str] = None):
+    """Write a pyarrow Table to a path or file-like object with the given settings"""
+    import pyarrow.parquet as pq  # type: ignore
+
+    if options.sort_by_incremental_key and incremental_key and incremental_key in table.column_names:
+        table = table.sort_by(incremental_key)
+    dictionary = options.dictionary
+    if isinstance(dictionary, list):
+        # Columns that are not in this file are ignored rather than failing the load
+        dictionary = [column for column in dictionary if column in table.column_names]
+    pq.write_table(
+        table,
+        where,
+        row_group_size=options.row_group_size,
+        compression=options.compression,
+        compression_level=options.compression_level,
+        use_dictionary=dictionary,
+        write_statistics=options.statistics,
+    )
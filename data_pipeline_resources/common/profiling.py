@@ -0,0 +1,108 @@
+"""
+Opt-in loader profiling (pipeline_config.profiling_enabled).
+
+With PROFILE_ENABLED=1 a loader runs its load under cProfile and tracemalloc and
+stores the result in the datalake next to the data:
+
+    <stage>/profiles/dl_<table>/yyyy/mm/dd/hh/<table>_yyyymmdd_hhmmss.prof   pstats, e.g. for snakeviz
+    <stage>/profiles/dl_<table>/yyyy/mm/dd/hh/<table>_yyyymmdd_hhmmss.json   summary (wall time, memory, top functions)
+
+stage is the pipeline stage (source_to_dl, dl_to_sink). The loader prints
+PROFILE_PATH:<uri of the .prof> for whoever ran it (drivers, backend runs) to
+store on the stage log.
+"""
+
+import io
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from object_store import ObjectStore
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', '0') == '1'
+PROFILE_TOP_FUNCTIONS = 30
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def run_profiled(func, *args):
+    """Run func under cProfile and tracemalloc.
+
+    Returns (func result, pstats dump, summary dict). The profiling modules are
+    imported here so that disabled runs pay nothing for them.
+    """
+    import cProfile
+    import marshal
+    import pstats
+    import resource
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    temp_started = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+        wall_seconds = time.perf_counter() - temp_started
+        _, temp_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = pstats.Stats(profiler)
+    top_functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+    summary = {
+        'wall_seconds': round(wall_seconds, 3),
+        'tracemalloc_peak_bytes': temp_peak,
+        # ru_maxrss is in KiB on Linux
+        'rss_high_water_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'top_functions': [
+            {
+                'function': f"{filename}:{line}({name})",
+                'calls': primitive_calls,
+                'total_seconds': round(total_time, 6),
+                'cumulative_seconds': round(cumulative_time, 6),
+            }
+            for (filename, line, name), (primitive_calls, _, total_time, cumulative_time, _) in top_functions
+        ],
+    }
+    return result, marshal.dumps(stats.stats), summary
+
+
+def profile_object_name(stage: str, tablename: str, now: Optional[datetime] = None) -> str:
+    """Object name of a profile without extension: <stage>/profiles/dl_<table>/yyyy/mm/dd/hh/<table>_yyyymmdd_hhmmss"""
+    now = now or datetime.now(IST)
+    return f"{stage}/profiles/dl_{tablename}/{now.strftime('%Y/%m/%d/%H')}/{tablename}_{now.strftime('%Y%m%d_%H%M%S')}"
+
+
+def upload_profile(store: ObjectStore, object_name: str, profile: bytes, summary: dict) -> str:
+    """Store <object_name>.prof and <object_name>.json; returns the .prof path"""
+    summary_bytes = json.dumps(summary).encode('utf-8')
+    store.put(f"{object_name}.prof", io.BytesIO(profile), length=len(profile),
+              content_type='application/octet-stream')
+    store.put(f"{object_name}.json", io.BytesIO(summary_bytes), length=len(summary_bytes),
+              content_type='application/json')
+    return store.uri(f"{object_name}.prof")
+
+
+def publish_profile(store: ObjectStore, stage: str, tablename: str, profile: bytes, summary: dict):
+    """Upload a profile and print its PROFILE_PATH line; a failed upload only logs, the load result stands"""
+    try:
+        profile_path = upload_profile(store, profile_object_name(stage, tablename), profile, summary)
+        print(f"PROFILE_PATH:{profile_path}", file=sys.stdout)
+        logger.info(f"Uploaded profile: {profile_path}")
+    except Exception as e:
+        logger.warning(f"Failed to upload profile: {e}")
+
+
+def parse_profile_path(stdout: str) -> Optional[str]:
+    """Datalake path of the loader's profile (PROFILE_PATH line), when profiling was on"""
+    for line in (stdout or '').split('\n'):
+        if line.startswith('PROFILE_PATH:'):
+            return line.split(':', 1)[1].strip()
+    return None
@@ -0,0 +1,112 @@
+"""
+Phase-aligned schedules.
+
+Runs of a pipeline are aligned to fixed slots: every schedule minutes counted from
+GRID_ORIGIN plus the pipeline's offset, e.g. schedule 60 / offset 25 runs at xx:25 IST.
+The offset is pipeline_config source_to_dl_schedule_offset / dl_to_sink_schedule_offset
+(0 <= offset < schedule), planned by the backend from recent run durations
+(backend/utils/schedule_planner.py). Pipelines without one get a deterministic offset
+from a hash of their table name (default_offset), so tables created together with the
+same schedule do not all start in the same minute.
+
+    due: the last run is older than the latest slot
+    never run: due now, so a new pipeline does not wait for its first slot; its
+               next run is at the next slot
+
+SCHEDULE_STAGGER=0 turns the default offsets off: pipelines without an offset then run
+schedule minutes after their last run (a pipeline that never ran, immediately).
+
+A pipeline's recent duration (recent_durations) is the p90 of its successful source
+stages over the last SCHEDULE_DURATION_WINDOW_HOURS. The backend plans offsets with it
+and driver_source_to_dl tells heavy loads by it (common/load_slots.py).
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+SCHEDULE_STAGGER = os.getenv('SCHEDULE_STAGGER', '1') != '0'
+
+# Run durations used to plan offsets and to tell heavy loads (common/load_slots.py)
+SCHEDULE_DURATION_WINDOW_HOURS = float(os.getenv('SCHEDULE_DURATION_WINDOW_HOURS', '168'))
+
+# Stage log pipeline_type of source stages: drivers, then manual runs (backend routers/runs.py)
+SOURCE_STAGE_TYPES = ('source_to_dl', 'loader_source_to_dl')
+
+# p90 duration of each table's successful source stages since ?, per stage type; the
+# percentile is the one of the backend's GET_DURATION_STATS_BY_TABLE (GET /stats/durations)
+RECENT_SOURCE_DURATIONS = """
+    WITH ranked AS (
+        SELECT source_tablename, pipeline_type, duration_ms,
+               ROW_NUMBER() OVER (PARTITION BY source_tablename, pipeline_type ORDER BY duration_ms) as rn,
+               COUNT(*) OVER (PARTITION BY source_tablename, pipeline_type) as cnt
+        FROM pipeline_run_stage_logs
+        WHERE status = 'success'
+        AND started_at >= ?
+        AND pipeline_type IN ('source_to_dl', 'loader_source_to_dl')
+        AND duration_ms IS NOT NULL
+    )
+    SELECT source_tablename, pipeline_type,
+           MIN(CASE WHEN rn >= 0.90 * cnt THEN duration_ms END) as p90_ms
+    FROM ranked
+    GROUP BY source_tablename, pipeline_type
+"""
+
+# Default sink stage offset: this many minutes after the source stage's
+DL_TO_SINK_LAG_MINUTES = 5
+
+# Slots are counted from an IST midnight, so hourly offsets are minutes past the hour
+GRID_ORIGIN = datetime(2000, 1, 1, tzinfo=IST)
+
+
+def default_offset(source_tablename: str, schedule_mins: int) -> int:
+    """Stable pseudo-random offset of a table (not hash(), which is salted per process)"""
+    digest = hashlib.sha256(source_tablename.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % schedule_mins
+
+
+def effective_offset(source_tablename: str, schedule_mins: int, offset_mins: Optional[int],
+                     stage: str = 'source_to_dl') -> Optional[int]:
+    """The configured offset, else the default one (None with SCHEDULE_STAGGER=0)"""
+    if offset_mins is not None or not SCHEDULE_STAGGER or not schedule_mins or schedule_mins <= 0:
+        return offset_mins
+    offset = default_offset(source_tablename, schedule_mins)
+    if stage == 'dl_to_sink':
+        offset = (offset + DL_TO_SINK_LAG_MINUTES) % schedule_mins
+    return offset
+
+
+def latest_slot(now: datetime, schedule_mins: int, offset_mins: int) -> datetime:
+    """The most recent slot at or before now"""
+    elapsed = (now - GRID_ORIGIN).total_seconds() / 60 - offset_mins
+    return GRID_ORIGIN + timedelta(minutes=(elapsed // schedule_mins) * schedule_mins + offset_mins)
+
+
+def next_due(now: datetime, last_run: Optional[datetime], schedule_mins: int,
+             offset_mins: Optional[int]) -> Optional[datetime]:
+    """
+    When the pipeline became due; None if it is not due at now. A pipeline that
+    never ran is due now; without an offset the next run is last_run + schedule.
+    """
+    if last_run is None:
+        return now
+    if offset_mins is None or not schedule_mins or schedule_mins <= 0:
+        next_run = last_run + timedelta(minutes=schedule_mins)
+        return next_run if now >= next_run else None
+
+    slot = latest_slot(now, schedule_mins, offset_mins % schedule_mins)
+    return slot if last_run < slot else None
+
+
+def recent_durations(cursor, now: Optional[datetime] = None) -> Dict[str, float]:
+    """p90 duration in ms of each table's successful source stages in the duration window"""
+    window_start = (now or datetime.now(IST)) - timedelta(hours=SCHEDULE_DURATION_WINDOW_HOURS)
+    rows = cursor.execute(RECENT_SOURCE_DURATIONS, (window_start.isoformat(),)).fetchall()
+    durations: Dict[str, float] = {}
+    # Driver stages first: manual runs only fill in tables the drivers have not run
+    for source_tablename, pipeline_type, p90_ms in sorted(rows, key=lambda row: SOURCE_STAGE_TYPES.index(row[1])):
+        durations.setdefault(source_tablename, p90_ms)
+    return durations
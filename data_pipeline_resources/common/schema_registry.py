@@ -0,0 +1,155 @@
+"""
+Source table schemas and their Arrow types.
+
+The source loader reads the table's columns from pg_attribute and writes Parquet
+with an explicit Arrow type per column instead of whatever pandas inferred, so
+every file of a table has the same schema. Each column also carries its source
+type in the Parquet field metadata (pg_type), which the sink loader uses to add
+columns that appear later (ALTER TABLE ADD COLUMN) instead of reloading the table.
+
+The drivers keep every schema version in the config DB (source_schema_versions)
+and pass the latest to the loader as SOURCE_SCHEMA:
+
+    {"fingerprint": "<md5>", "columns": [{"name": "id", "pg_type": "integer", "arrow_type": "int32"}, ...]}
+
+The loader only re-reads the catalog when the table's fingerprint (md5 of its
+column names and types, computed by the source) no longer matches, i.e. after DDL,
+and then prints SCHEMA:<json> for the driver to register as a new version.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+
+PG_TYPE_METADATA = b'pg_type'
+
+# format_type() names; types not listed here (json, arrays, enums, ...) keep the type pyarrow infers
+# from the values
+PG_TO_ARROW = {
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'real': pa.float32(),
+    'double precision': pa.float64(),
+    # numeric without a precision (or above decimal128's 38 digits): float64, as pandas used to read it
+    'numeric': pa.float64(),
+    'boolean': pa.bool_(),
+    'text': pa.string(),
+    'character varying': pa.string(),
+    'character': pa.string(),
+    'uuid': pa.string(),
+    'date': pa.date32(),
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+    'time without time zone': pa.time64('us'),
+    'interval': pa.duration('us'),
+    'bytea': pa.binary(),
+}
+
+# Types the sink can create as-is; anything else (e.g. a source enum) is added as its Arrow equivalent
+SINK_PG_TYPES = set(PG_TO_ARROW) | {'numeric', 'json', 'jsonb', 'time with time zone'}
+ARROW_TO_SINK = [
+    (pa.types.is_boolean, 'boolean'),
+    (pa.types.is_int16, 'smallint'),
+    (pa.types.is_int32, 'integer'),
+    (pa.types.is_integer, 'bigint'),
+    (pa.types.is_float32, 'real'),
+    (pa.types.is_floating, 'double precision'),
+    (pa.types.is_decimal, 'numeric'),
+    (pa.types.is_date, 'date'),
+    (pa.types.is_timestamp, 'timestamp without time zone'),
+    (pa.types.is_binary, 'bytea'),
+]
+
+NUMERIC_RE = re.compile(r'^numeric\((\d+),(\d+)\)$')
+# Columns with bounds/length: 'character varying(255)' -> 'character varying'
+MODIFIER_RE = re.compile(r'\(.*?\)')
+
+
+def arrow_type(pg_type: str) -> Optional[pa.DataType]:
+    """Arrow type for a format_type() name; None leaves it to pyarrow's inference"""
+    numeric = NUMERIC_RE.match(pg_type)
+    if numeric:
+        precision, scale = int(numeric.group(1)), int(numeric.group(2))
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.float64()
+    return PG_TO_ARROW.get(MODIFIER_RE.sub('', pg_type).strip())
+
+
+def fingerprint(columns: List[Tuple[str, str]]) -> str:
+    """Same md5 as the loader's catalog query: 'name type' pairs in column order, comma-separated"""
+    return hashlib.md5(','.join(f"{name} {pg_type}" for name, pg_type in columns).encode('utf-8')).hexdigest()
+
+
+class SourceSchema(NamedTuple):
+    fingerprint: str
+    columns: List[Tuple[str, str]]  # (name, format_type) in column order
+
+    @classmethod
+    def from_columns(cls, columns: List[Tuple[str, str]]) -> 'SourceSchema':
+        return cls(fingerprint(columns), list(columns))
+
+    @classmethod
+    def from_json(cls, text: str) -> 'SourceSchema':
+        data = json.loads(text)
+        return cls(data['fingerprint'], [(column['name'], column['pg_type']) for column in data['columns']])
+
+    def to_json(self) -> str:
+        columns = []
+        for name, pg_type in self.columns:
+            column_type = arrow_type(pg_type)
+            # arrow_type is informational (the API shows it); null = inferred from the values
+            columns.append({'name': name, 'pg_type': pg_type,
+                            'arrow_type': str(column_type) if column_type is not None else None})
+        return json.dumps({'fingerprint': self.fingerprint, 'columns': columns})
+
+    def pg_types(self) -> Dict[str, str]:
+        return dict(self.columns)
+
+
+def schema_from_env() -> Optional[SourceSchema]:
+    """The registered schema the driver passed as SOURCE_SCHEMA; None before the first run"""
+    value = os.getenv('SOURCE_SCHEMA', '')
+    return SourceSchema.from_json(value) if value else None
+
+
+def to_arrow(df: pd.DataFrame, schema: Optional[SourceSchema]) -> pa.Table:
+    """DataFrame -> Arrow table with the source types; columns not in the schema (e.g. cdc's) are inferred"""
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    if schema is None:
+        return pa.Table.from_pandas(df, schema=inferred, preserve_index=False)
+    pg_types = schema.pg_types()
+    arrow_schema = read_schema = inferred
+    for index, field in enumerate(inferred):
+        pg_type = pg_types.get(field.name)
+        if pg_type is None:
+            continue
+        column = pa.field(
+            field.name, arrow_type(pg_type) or field.type, metadata={PG_TYPE_METADATA: pg_type.encode('utf-8')}
+        )
+        arrow_schema = arrow_schema.set(index, column)
+        # Decimal values to float64 or floats to a decimal (a DataFrame read with pandas' default
+        # coerce_float): pyarrow converts them as they are, then casts
+        if column.type != field.type and (pa.types.is_decimal(column.type) or pa.types.is_decimal(field.type)):
+            column = column.with_type(field.type)
+        read_schema = read_schema.set(index, column)
+    table = pa.Table.from_pandas(df, schema=read_schema, preserve_index=False)
+    if read_schema.equals(arrow_schema):
+        return table
+    return table.cast(arrow_schema.with_metadata(table.schema.metadata))
+
+
+def sink_type(field: pa.Field) -> str:
+    """Column type for adding a Parquet column to a sink table"""
+    pg_type = (field.metadata or {}).get(PG_TYPE_METADATA, b'').decode('utf-8')
+    if pg_type and MODIFIER_RE.sub('', pg_type).strip() in SINK_PG_TYPES:
+        return pg_type
+    if pa.types.is_timestamp(field.type) and field.type.tz:
+        return 'timestamp with time zone'
+    for matches, sink_pg_type in ARROW_TO_SINK:
+        if matches(field.type):
+            return sink_pg_type
+    return 'text'
@@ -0,0 +1,116 @@
+"""
+Column projection and row filter for source extraction.
+
+Each pipeline can restrict what it extracts in pipeline_config; the drivers pass
+the settings to the loaders as environment variables:
+
+    SOURCE_COLUMNS      comma-separated source columns; unset = every column (SELECT *)
+    SOURCE_ROW_FILTER   SQL boolean expression ANDed into the source query's WHERE clause
+
+The source loader pushes both down to the source query; the sink loader reads only
+SOURCE_COLUMNS from the Parquet files. The backend validates both against the source
+schema when the config is saved (backend/utils/source_schema.py).
+"""
+
+import os
+import re
+from typing import Dict, List, Mapping, Optional
+
+# Tokens that would let a filter end the statement or hide the rest of the query
+FORBIDDEN_FILTER_TOKENS = (';', '--', '/*', '*/')
+
+# Opening tag of a Postgres dollar-quoted string: $$ or $tag$
+DOLLAR_QUOTE = re.compile(r'\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$')
+
+
+def parse_columns(value: Optional[str]) -> List[str]:
+    """'id, status,amount' -> ['id', 'status', 'amount']; duplicates are dropped"""
+    columns = []
+    for column in (value or '').split(','):
+        column = column.strip()
+        if column and column not in columns:
+            columns.append(column)
+    return columns
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def select_list(columns: List[str], *required: Optional[str]) -> str:
+    """SELECT list for the projection; the required columns (incremental and tiebreaker keys) are always extracted"""
+    if not columns:
+        return '*'
+    columns = columns + [column for column in required if column and column not in columns]
+    return ', '.join(quote_identifier(column) for column in columns)
+
+
+def _in_word(text: str, index: int) -> bool:
+    """Whether text[index] continues an identifier or keyword"""
+    return index > 0 and (text[index - 1].isalnum() or text[index - 1] in '_$')
+
+
+def _skip_quoted(row_filter: str, start: int) -> int:
+    """Index after the string literal, quoted identifier or dollar-quoted string at start;
+    ValueError if it is not terminated"""
+    quote = row_filter[start]
+    if quote == '$':
+        tag = DOLLAR_QUOTE.match(row_filter, start).group(0)
+        end = row_filter.find(tag, start + len(tag))
+        if end < 0:
+            raise ValueError("Row filter has an unterminated quoted string")
+        return end + len(tag)
+    # E'...' strings take backslash escapes; elsewhere a quote is escaped by doubling it
+    backslash_escapes = quote == "'" and start > 0 and row_filter[start - 1] in 'eE' and not _in_word(row_filter, start - 1)
+    index = start + 1
+    while index < len(row_filter):
+        char = row_filter[index]
+        if backslash_escapes and char == '\\':
+            index += 2
+        elif char == quote and row_filter[index + 1:index + 2] == quote:
+            index += 2
+        elif char == quote:
+            return index + 1
+        else:
+            index += 1
+    raise ValueError("Row filter has an unterminated quoted string")
+
+
+def check_row_filter(row_filter: str) -> str:
+    """The filter, stripped; ValueError if it could break out of its parentheses: statement
+    or comment tokens, or parentheses that do not balance outside quoted text"""
+    row_filter = row_filter.strip()
+    for token in FORBIDDEN_FILTER_TOKENS:
+        if token in row_filter:
+            raise ValueError(f"Row filter must be a single expression without '{token}'")
+    depth = 0
+    index = 0
+    while index < len(row_filter):
+        char = row_filter[index]
+        if char in '\'"' or (char == '$' and not _in_word(row_filter, index) and DOLLAR_QUOTE.match(row_filter, index)):
+            index = _skip_quoted(row_filter, index)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                raise ValueError("Row filter has a ')' without a matching '('")
+        index += 1
+    if depth:
+        raise ValueError("Row filter has a '(' without a matching ')'")
+    return row_filter
+
+
+def projection_env(config: Mapping) -> Dict[str, str]:
+    """Loader environment for a pipeline_config row; unset columns are left out (SELECT *)"""
+    env = {}
+    if config.get('source_to_dl_columns'):
+        env['SOURCE_COLUMNS'] = ','.join(parse_columns(config['source_to_dl_columns']))
+    if config.get('source_to_dl_row_filter'):
+        env['SOURCE_ROW_FILTER'] = config['source_to_dl_row_filter'].strip()
+    return env
+
+
+def columns_from_env(environ: Mapping[str, str] = os.environ) -> List[str]:
+    return parse_columns(environ.get('SOURCE_COLUMNS'))
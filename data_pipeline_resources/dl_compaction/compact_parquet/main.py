@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Compaction: merge the small Parquet files of a table's closed datalake partitions
+
+Every source_to_dl run writes one file per run into the hour partition
+source_to_dl/dl_tablename/yyyy/mm/dd/hh/. This job rewrites the small files of a
+partition into files of about DL_COMPACTION_TARGET_FILE_BYTES, sorted by the
+incremental key:
+
+    source_to_dl/compacted/dl_tablename/yyyy/mm/dd/hh/tablename_yyyymmdd_hh_partNNN.parquet
+    source_to_dl/compacted/dl_tablename/yyyy/mm/dd/hh/_manifest.json
+
+Compacted files live outside dl_tablename/ because the sink loader reads the
+newest file under that prefix; a freshly written compacted file would otherwise
+be picked up as new data. The manifest is written last and is the commit point:
+for a partition with a manifest, its outputs replace its inputs. The inputs are
+deleted by a later run once DL_COMPACTION_GRACE_HOURS have passed, so readers
+that listed them before the swap can finish.
+
+Partitions are skipped while they can still receive files (current hour) and
+while they hold the table's newest file, which the sink loader may still read.
+
+Only incremental (and cdc) files are compacted: every file of a full load is a
+whole snapshot, so merging an hour's snapshots would repeat each row once per run.
+The job refuses LOAD_TYPE=full.
+"""
+
+import os
+import sys
+import io
+import json
+import logging
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from object_store import ObjectInfo, ObjectNotFound, ObjectStore, get_object_store
+from parquet_format import ParquetWriteOptions, write_parquet
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+# IST timezone (UTC+5:30)
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Configs
+SOURCE_TABLENAME = os.getenv('SOURCE_TABLENAME')
+SOURCE_TYPE = os.getenv('SOURCE_TYPE', 'postgres')
+INCREMENTAL_KEY = os.getenv('INCREMENTAL_KEY') or None
+LOAD_TYPE = os.getenv('LOAD_TYPE')
+
+# Files at or above the target size are left alone
+DL_COMPACTION_TARGET_FILE_BYTES = int(os.getenv('DL_COMPACTION_TARGET_FILE_BYTES', str(128 * 1024 * 1024)))
+DL_COMPACTION_ROW_GROUP_ROWS = int(os.getenv('DL_COMPACTION_ROW_GROUP_ROWS', '131072'))
+# The table's Parquet settings (PARQUET_* env); its row group size, if set, wins over DL_COMPACTION_ROW_GROUP_ROWS
+PARQUET_OPTIONS = ParquetWriteOptions.from_env()
+PARQUET_OPTIONS = PARQUET_OPTIONS._replace(row_group_size=PARQUET_OPTIONS.row_group_size or DL_COMPACTION_ROW_GROUP_ROWS)
+# A partition needs at least this many small files to be worth rewriting
+DL_COMPACTION_MIN_FILES = int(os.getenv('DL_COMPACTION_MIN_FILES', '2'))
+DL_COMPACTION_GRACE_HOURS = float(os.getenv('DL_COMPACTION_GRACE_HOURS', '24'))
+
+MANIFEST_NAME = '_manifest.json'
+
+
+def raw_prefix(source_tablename: str) -> str:
+    return f"{SOURCE_TYPE}_to_dl/dl_{source_tablename}/"
+
+
+def compacted_prefix(source_tablename: str) -> str:
+    return f"{SOURCE_TYPE}_to_dl/compacted/dl_{source_tablename}/"
+
+
+def list_raw_partitions(store: ObjectStore, source_tablename: str) -> Dict[str, List[ObjectInfo]]:
+    """Parquet files under dl_tablename/, grouped by their yyyy/mm/dd/hh partition"""
+    prefix = raw_prefix(source_tablename)
+    partitions = {}
+    for obj in store.list(prefix):
+        parts = obj.key[len(prefix):].split('/')
+        if len(parts) != 5 or not obj.key.endswith('.parquet'):
+            continue
+        partitions.setdefault('/'.join(parts[:4]), []).append(obj)
+    return partitions
+
+
+def load_manifests(store: ObjectStore, source_tablename: str) -> Dict[str, dict]:
+    prefix = compacted_prefix(source_tablename)
+    manifests = {}
+    for obj in store.list(prefix):
+        if obj.key.endswith(f"/{MANIFEST_NAME}"):
+            manifest = json.loads(store.get(obj.key))
+            manifests[manifest['partition']] = manifest
+    return manifests
+
+
+def put_manifest(store: ObjectStore, source_tablename: str, manifest: dict):
+    data = json.dumps(manifest, indent=2).encode('utf-8')
+    key = f"{compacted_prefix(source_tablename)}{manifest['partition']}/{MANIFEST_NAME}"
+    store.put(key, io.BytesIO(data), length=len(data), content_type='application/json')
+
+
+def partition_closed(partition: str, now: datetime) -> bool:
+    """True once the partition's hour is over, i.e. no loader run can still write into it"""
+    year, month, day, hour = (int(part) for part in partition.split('/'))
+    return datetime(year, month, day, hour, tzinfo=IST) + timedelta(hours=1) <= now
+
+
+def merge_files(store: ObjectStore, inputs: List[ObjectInfo]) -> pa.Table:
+    """Inputs as one table sorted by the incremental key (columns added over time become nullable)"""
+    tables = [pq.read_table(pa.BufferReader(store.get_buffer(obj.key)), use_pandas_metadata=True) for obj in inputs]
+    # 'permissive' also widens types, e.g. files written before and after the explicit
+    # source types (common/schema_registry.py) can hold int64 and int32 for the same column
+    table = pa.concat_tables(tables, promote_options='permissive')
+    if INCREMENTAL_KEY and INCREMENTAL_KEY in table.column_names:
+        table = table.sort_by(INCREMENTAL_KEY)
+    elif INCREMENTAL_KEY:
+        logger.warning(f"Incremental key {INCREMENTAL_KEY} not in the files, keeping file order")
+    return table
+
+
+def compact_partition(store: ObjectStore, source_tablename: str, partition: str,
+                      inputs: List[ObjectInfo], now: datetime) -> dict:
+    """Write the merged outputs, then the manifest; returns the manifest"""
+    table = merge_files(store, inputs)
+    input_bytes = sum(obj.size for obj in inputs)
+    # Compressed bytes per row of the inputs; the merged output compresses at least as well
+    rows_per_file = max(1, int(DL_COMPACTION_TARGET_FILE_BYTES * table.num_rows / max(input_bytes, 1)))
+
+    prefix = f"{compacted_prefix(source_tablename)}{partition}/"
+    outputs = []
+    for index, offset in enumerate(range(0, table.num_rows, rows_per_file)):
+        temp_slice = table.slice(offset, rows_per_file)
+        temp_buffer = io.BytesIO()
+        write_parquet(temp_slice, temp_buffer, PARQUET_OPTIONS)
+        size = temp_buffer.getbuffer().nbytes
+        temp_buffer.seek(0)
+        # Deterministic names: a retry after a failed run overwrites its partial outputs
+        key = f"{prefix}{source_tablename}_{partition.replace('/', '')[:8]}_{partition[-2:]}_part{index:03d}.parquet"
+        store.put(key, temp_buffer, length=size, content_type='application/parquet')
+        outputs.append({'key': key, 'rows': temp_slice.num_rows, 'size': size})
+
+    manifest = {
+        'partition': partition,
+        'compacted_at': now.isoformat(),
+        'delete_after': (now + timedelta(hours=DL_COMPACTION_GRACE_HOURS)).isoformat(),
+        'rows': table.num_rows,
+        'inputs': [{'key': obj.key, 'etag': obj.etag, 'size': obj.size} for obj in inputs],
+        'outputs': outputs,
+        'inputs_deleted_at': None,
+    }
+    put_manifest(store, source_tablename, manifest)
+
+    # Leftovers of an earlier failed attempt that produced more parts
+    output_keys = {output['key'] for output in outputs}
+    for obj in list(store.list(prefix)):
+        if obj.key.endswith('.parquet') and obj.key not in output_keys:
+            store.delete(obj.key)
+    logger.info(f"Compacted {len(inputs)} files ({input_bytes} bytes) of {partition} "
+                f"into {len(outputs)} files ({sum(o['size'] for o in outputs)} bytes), {table.num_rows} rows")
+    return manifest
+
+
+def delete_superseded(store: ObjectStore, source_tablename: str, manifest: dict, now: datetime) -> int:
+    """Delete a compacted partition's inputs once its grace period is over; returns files deleted"""
+    if manifest.get('inputs_deleted_at') or datetime.fromisoformat(manifest['delete_after']) > now:
+        return 0
+    deleted = 0
+    for temp_input in manifest['inputs']:
+        try:
+            obj = store.stat(temp_input['key'])
+        except ObjectNotFound:
+            continue
+        if obj.etag != temp_input['etag']:
+            # Rewritten after compaction: not the data the outputs contain
+            logger.warning(f"Keeping {store.uri(obj.key)}: changed since it was compacted")
+            continue
+        store.delete(obj.key)
+        deleted += 1
+    manifest['inputs_deleted_at'] = now.isoformat()
+    put_manifest(store, source_tablename, manifest)
+    logger.info(f"Deleted {deleted} superseded files of {manifest['partition']}")
+    return deleted
+
+
+def compact_table(store: ObjectStore, source_tablename: str) -> tuple:
+    """Returns (rows compacted, output paths, input files compacted, superseded files deleted)"""
+    now = datetime.now(IST)
+    manifests = load_manifests(store, source_tablename)
+
+    deleted = 0
+    for manifest in manifests.values():
+        deleted += delete_superseded(store, source_tablename, manifest, now)
+
+    partitions = list_raw_partitions(store, source_tablename)
+    all_files = [obj for files in partitions.values() for obj in files]
+    if not all_files:
+        return 0, [], 0, deleted
+    latest = max(all_files, key=lambda obj: obj.last_modified)
+
+    rows_compacted, output_paths, files_compacted = 0, [], 0
+    for partition in sorted(partitions):
+        if partition in manifests or not partition_closed(partition, now):
+            continue
+        if any(obj.key == latest.key for obj in partitions[partition]):
+            continue
+        small_files = sorted((obj for obj in partitions[partition] if obj.size < DL_COMPACTION_TARGET_FILE_BYTES),
+                             key=lambda obj: obj.key)
+        if len(small_files) < DL_COMPACTION_MIN_FILES:
+            continue
+        temp_started = time.perf_counter()
+        manifest = compact_partition(store, source_tablename, partition, small_files, now)
+        logger.info(f"Partition {partition} took {time.perf_counter() - temp_started:.2f}s")
+        rows_compacted += manifest['rows']
+        output_paths.extend(store.uri(output['key']) for output in manifest['outputs'])
+        files_compacted += len(small_files)
+    return rows_compacted, output_paths, files_compacted, deleted
+
+
+def main():
+    if not SOURCE_TABLENAME:
+        logger.error("SOURCE_TABLENAME env var missing")
+        sys.exit(1)
+    if LOAD_TYPE == 'full':
+        logger.error(f"{SOURCE_TABLENAME} is a full load: its files are whole snapshots and are not compacted")
+        sys.exit(1)
+
+    logger.info(f"Starting compaction for {SOURCE_TABLENAME}")
+    try:
+        store = get_object_store()
+        rows_compacted, output_paths, files_compacted, deleted = compact_table(store, SOURCE_TABLENAME)
+    except Exception as e:
+        logger.error(f"Compaction failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    logger.info(f"Compacted {files_compacted} files into {len(output_paths)}, deleted {deleted} superseded files")
+    # Output metadata for driver to capture
+    for path in output_paths:
+        print(f"FILE_PATH:{path}", file=sys.stdout)
+    print(f"ROWS_PROCESSED:{rows_compacted}", file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
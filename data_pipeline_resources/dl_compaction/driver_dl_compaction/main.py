@@ -0,0 +1,270 @@
+import argparse
+import json
+import sqlite3
+import os
+import logging
+import subprocess
+import sys
+import uuid6
+from datetime import datetime, timedelta, timezone
+
+# IST timezone (UTC+5:30)
+IST = timezone(timedelta(hours=5, minutes=30))
+from typing import List, Dict, Any, Optional
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from parquet_format import parquet_env
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Config
+DB_PATH = os.getenv('CONFIG_DB_PATH', '/data/config.db')
+# The backend writes the same config DB concurrently; wait for locks instead of failing
+BUSY_TIMEOUT_MS = int(os.getenv('CONFIG_DB_BUSY_TIMEOUT_MS', '10000'))
+
+# Mounted from ./data_pipeline_resources/dl_compaction
+COMPACTION_SCRIPT = '/loaders/compact_parquet/main.py'
+RETENTION_SCRIPT = '/loaders/retention_gc/main.py'
+
+def get_db_connection():
+    if not os.path.exists(DB_PATH):
+        raise FileNotFoundError(f"Config database not found at {DB_PATH}")
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+def get_compaction_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Get tables with compaction enabled from pipeline_config"""
+    cursor = conn.cursor()
+    query = """
+        SELECT
+            source_tablename,
+            source_type,
+            source_to_dl_load_type,
+            source_to_dl_incremental_key,
+            dl_compaction_schedule,
+            dl_compaction_last_run_timestamp,
+            dl_parquet_compression,
+            dl_parquet_compression_level,
+            dl_parquet_row_group_size,
+            dl_parquet_dictionary,
+            dl_parquet_statistics
+        FROM pipeline_config
+        WHERE dl_compaction_is_active = 1
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_gc_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Get tables with datalake retention enabled, with the start of their last successful sink run"""
+    cursor = conn.cursor()
+    query = """
+        SELECT
+            source_tablename,
+            source_type,
+            source_to_dl_load_type,
+            dl_retention_keep_snapshots,
+            dl_retention_keep_days,
+            dl_gc_schedule,
+            dl_gc_last_run_timestamp,
+            (SELECT MAX(started_at) FROM pipeline_run_stage_logs
+             WHERE pipeline_run_stage_logs.source_tablename = pipeline_config.source_tablename
+               AND pipeline_type IN ('dl_to_sink', 'loader_dl_to_sink') AND status = 'success') AS sink_watermark
+        FROM pipeline_config
+        WHERE dl_gc_is_active = 1
+    """
+    cursor.execute(query)
+    return [dict(row) for row in cursor.fetchall()]
+
+def should_run_now(config: Dict[str, Any], job: str, default_schedule_mins: int) -> bool:
+    """job is the pipeline_config column prefix: dl_compaction or dl_gc"""
+    source_tablename = config['source_tablename']
+    schedule_mins = config[f'{job}_schedule'] or default_schedule_mins
+    last_run_str = config[f'{job}_last_run_timestamp']
+
+    if not last_run_str:
+        logger.info(f"Table {source_tablename} has never run {job}, scheduling now")
+        return True
+
+    try:
+        last_run = datetime.fromisoformat(last_run_str)
+        if datetime.now(IST) >= last_run + timedelta(minutes=schedule_mins):
+            logger.info(f"Table {source_tablename} is due for {job}")
+            return True
+    except ValueError:
+        logger.warning(f"Invalid timestamp format for {source_tablename}, scheduling now")
+        return True
+
+    return False
+
+def run_job(script: str, env: Dict[str, str]) -> tuple:
+    """Returns: (status, error_message, stdout)"""
+    if not os.path.exists(script):
+        error_msg = f"Job script not found: {script}"
+        logger.error(error_msg)
+        return 'failed', error_msg, ''
+
+    try:
+        result = subprocess.run(
+            [sys.executable, script],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=3600
+        )
+        if result.returncode != 0:
+            error_msg = result.stderr[-500:] if result.stderr else "Unknown error"
+            logger.error(f"Job {script} failed: {error_msg}")
+            return 'failed', error_msg, result.stdout
+        logger.info(result.stdout)
+        return 'success', None, result.stdout
+    except subprocess.TimeoutExpired:
+        logger.error(f"Job {script} timed out")
+        return 'failed', "Job timed out after 1 hour", ''
+    except Exception as e:
+        logger.error(f"Error executing {script}: {e}")
+        return 'failed', str(e), ''
+
+def trigger_compaction(config: Dict[str, Any]) -> tuple:
+    """
+    Runs the compaction job for one table.
+    Returns: (status, error_message, rows_processed, file_paths)
+    """
+    env = os.environ.copy()
+    env['SOURCE_TABLENAME'] = config['source_tablename']
+    env['SOURCE_TYPE'] = config.get('source_type') or 'postgres'
+    env['INCREMENTAL_KEY'] = config.get('source_to_dl_incremental_key') or ''
+    env['LOAD_TYPE'] = config.get('source_to_dl_load_type') or 'full'
+    # Compacted files use the table's codec and encodings too
+    env.update(parquet_env(config))
+
+    status, error_msg, stdout = run_job(COMPACTION_SCRIPT, env)
+    if status != 'success':
+        return status, error_msg, None, None
+
+    rows_processed = None
+    file_paths = []
+    for line in stdout.strip().split('\n'):
+        if line.startswith('ROWS_PROCESSED:'):
+            try:
+                rows_processed = int(line.split('ROWS_PROCESSED:')[1].strip())
+            except ValueError:
+                pass
+        if line.startswith('FILE_PATH:'):
+            file_paths.append(line.split('FILE_PATH:')[1].strip())
+    return 'success', None, rows_processed, ",".join(file_paths) if file_paths else None
+
+def trigger_gc(config: Dict[str, Any], dry_run: bool = False) -> tuple:
+    """
+    Runs the retention job for one table.
+    Returns: (status, error_message, report)
+    """
+    env = os.environ.copy()
+    env['SOURCE_TABLENAME'] = config['source_tablename']
+    env['SOURCE_TYPE'] = config.get('source_type') or 'postgres'
+    env['LOAD_TYPE'] = config.get('source_to_dl_load_type') or 'full'
+    env['KEEP_SNAPSHOTS'] = str(config.get('dl_retention_keep_snapshots') or 0)
+    env['KEEP_DAYS'] = str(config.get('dl_retention_keep_days') or 0)
+    env['SINK_WATERMARK'] = config.get('sink_watermark') or ''
+    env['DRY_RUN'] = '1' if dry_run else '0'
+
+    status, error_msg, stdout = run_job(RETENTION_SCRIPT, env)
+    report = None
+    for line in stdout.split('\n'):
+        if line.startswith('GC_REPORT:'):
+            report = json.loads(line.split('GC_REPORT:', 1)[1])
+    return status, error_msg, report
+
+def calculate_time_taken(started_at: datetime, completed_at: datetime) -> str:
+    """Calculate time taken in HH:MM:SS.mmm format (includes milliseconds)"""
+    seconds, milliseconds = divmod(calculate_duration_ms(started_at, completed_at), 1000)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def calculate_duration_ms(started_at: datetime, completed_at: datetime) -> int:
+    """Calculate time taken in integer milliseconds (stored in duration_ms for aggregation)"""
+    return round((completed_at - started_at).total_seconds() * 1000)
+
+def update_status(conn: sqlite3.Connection, source_tablename: str, job: str, status: str,
+                  error_message: Optional[str], rows_processed: Optional[int],
+                  file_paths: Optional[str], started_at: datetime):
+    """Record the run on pipeline_config and in pipeline_run_stage_logs (pipeline_type = job) in one transaction"""
+    completed_at = datetime.now(IST)
+    conn.execute("BEGIN IMMEDIATE")
+    cursor = conn.cursor()
+    # job is one of the fixed column prefixes, never user input
+    cursor.execute(f"""
+        UPDATE pipeline_config
+        SET {job}_last_run_timestamp = ?, {job}_last_run_status = ?
+        WHERE source_tablename = ?
+    """, (completed_at.isoformat(), status, source_tablename))
+    cursor.execute("""
+        INSERT INTO pipeline_run_stage_logs
+        (id, source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at, completed_at, time_taken, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (str(uuid6.uuid7()), source_tablename, job, status, error_message, rows_processed, file_paths,
+          started_at.isoformat(), completed_at.isoformat(),
+          calculate_time_taken(started_at, completed_at), calculate_duration_ms(started_at, completed_at)))
+    conn.commit()
+    logger.info(f"Logged {job} run for {source_tablename}: {status}")
+
+def dry_run_gc(conn: sqlite3.Connection, source_tablename: Optional[str]):
+    """Print what retention would delete for each table (or one table), without deleting or logging"""
+    configs = [c for c in get_gc_configs(conn) if source_tablename in (None, c['source_tablename'])]
+    reports = []
+    for config in configs:
+        status, error_msg, report = trigger_gc(config, dry_run=True)
+        reports.append(report or {'source_tablename': config['source_tablename'], 'error': error_msg})
+    print(json.dumps({
+        'tables': reports,
+        'bytes_to_reclaim': sum((r.get('bytes_to_reclaim') or 0) for r in reports),
+    }, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Datalake compaction and retention driver")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report the files retention would delete and the bytes it would reclaim, then exit")
+    parser.add_argument("--table", help="limit --dry-run to one source_tablename")
+    args = parser.parse_args()
+
+    logger.info("Starting DL Compaction Driver")
+    try:
+        conn = get_db_connection()
+        if args.dry_run:
+            dry_run_gc(conn, args.table)
+            conn.close()
+            return
+
+        # Retention first, so compaction does not rewrite files that are about to expire
+        configs = get_gc_configs(conn)
+        logger.info(f"Found {len(configs)} tables with retention enabled")
+        for config in configs:
+            if should_run_now(config, 'dl_gc', 1440):
+                started_at = datetime.now(IST)
+                status, error_msg, report = trigger_gc(config)
+                update_status(conn, config['source_tablename'], 'dl_gc', status, error_msg,
+                              None, None, started_at)
+
+        configs = get_compaction_configs(conn)
+        logger.info(f"Found {len(configs)} tables with compaction enabled")
+        for config in configs:
+            # Full load files are whole snapshots: merging them would repeat every row (the API refuses it too)
+            if (config['source_to_dl_load_type'] or 'full') == 'full':
+                logger.warning(f"Table {config['source_tablename']} is a full load, skipping compaction")
+                continue
+            if should_run_now(config, 'dl_compaction', 60):
+                started_at = datetime.now(IST)
+                status, error_msg, rows_processed, file_paths = trigger_compaction(config)
+                update_status(conn, config['source_tablename'], 'dl_compaction', status, error_msg,
+                              rows_processed, file_paths, started_at)
+
+        conn.close()
+    except Exception as e:
+        logger.error(f"Fatal error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Retention: delete a table's datalake files that its retention policy no longer keeps
+
+    full loads         keep the newest KEEP_SNAPSHOTS files and/or files of the last KEEP_DAYS days
+                       (a file is kept if either rule keeps it)
+    incremental loads  keep everything the sink has not loaded yet (written after SINK_WATERMARK,
+    and cdc loads      the start of the last successful dl_to_sink run), and the last KEEP_DAYS days
+
+The newest file is always kept, because it is the one the sink loader reads.
+Compacted partitions (see compact_parquet) are removed as a whole once their hour
+is older than the cutoff, manifest first so no reader sees a manifest without outputs.
+Deletes are sent as multi-object requests (ObjectStore.delete_many).
+
+DRY_RUN=1 only reports what would be deleted. The report is printed as a
+GC_REPORT:<json> line for the driver.
+"""
+
+import os
+import sys
+import json
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from object_store import ObjectInfo, ObjectStore, get_object_store
+
+# IST timezone (UTC+5:30)
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Configs
+SOURCE_TABLENAME = os.getenv('SOURCE_TABLENAME')
+SOURCE_TYPE = os.getenv('SOURCE_TYPE', 'postgres')
+LOAD_TYPE = os.getenv('LOAD_TYPE', 'full')
+# Unset or 0 means the rule does not apply
+KEEP_SNAPSHOTS = int(os.getenv('KEEP_SNAPSHOTS') or 0)
+KEEP_DAYS = float(os.getenv('KEEP_DAYS') or 0)
+SINK_WATERMARK = os.getenv('SINK_WATERMARK') or None
+DRY_RUN = os.getenv('DRY_RUN', '0') == '1'
+
+MANIFEST_NAME = '_manifest.json'
+
+
+def raw_prefix(source_tablename: str) -> str:
+    return f"{SOURCE_TYPE}_to_dl/dl_{source_tablename}/"
+
+
+def compacted_prefix(source_tablename: str) -> str:
+    return f"{SOURCE_TYPE}_to_dl/compacted/dl_{source_tablename}/"
+
+
+def retention_cutoff(files: List[ObjectInfo], now: datetime) -> Optional[datetime]:
+    """Files last modified before the cutoff are deleted; None keeps everything"""
+    if not files:
+        return None
+    days_cutoff = now - timedelta(days=KEEP_DAYS) if KEEP_DAYS else None
+
+    if LOAD_TYPE in ('incremental', 'cdc'):
+        if not SINK_WATERMARK:
+            logger.info("No successful sink run yet, keeping all incremental files")
+            return None
+        cutoff = datetime.fromisoformat(SINK_WATERMARK)
+        if days_cutoff:
+            cutoff = min(cutoff, days_cutoff)
+    else:
+        snapshot_cutoff = None
+        if KEEP_SNAPSHOTS:
+            newest_first = sorted(files, key=lambda obj: obj.last_modified, reverse=True)
+            if len(newest_first) <= KEEP_SNAPSHOTS:
+                return None
+            snapshot_cutoff = newest_first[KEEP_SNAPSHOTS - 1].last_modified
+        candidates = [c for c in (snapshot_cutoff, days_cutoff) if c]
+        if not candidates:
+            logger.info("No retention rule set, keeping all files")
+            return None
+        cutoff = min(candidates)
+
+    # Never the newest file: the sink loader reads it
+    return min(cutoff, max(obj.last_modified for obj in files))
+
+
+def expired_compacted_partitions(store: ObjectStore, source_tablename: str,
+                                 cutoff: datetime) -> Dict[str, List[ObjectInfo]]:
+    """Objects of compacted partitions whose hour ended before the cutoff, by partition"""
+    prefix = compacted_prefix(source_tablename)
+    partitions = {}
+    for obj in store.list(prefix):
+        parts = obj.key[len(prefix):].split('/')
+        if len(parts) != 5:
+            continue
+        year, month, day, hour = (int(part) for part in parts[:4])
+        if datetime(year, month, day, hour, tzinfo=IST) + timedelta(hours=1) <= cutoff:
+            partitions.setdefault('/'.join(parts[:4]), []).append(obj)
+    return partitions
+
+
+def collect_garbage(store: ObjectStore, source_tablename: str, now: datetime) -> dict:
+    raw_files = [obj for obj in store.list(raw_prefix(source_tablename)) if obj.key.endswith('.parquet')]
+    cutoff = retention_cutoff(raw_files, now)
+
+    expired_raw = [obj for obj in raw_files if cutoff and obj.last_modified < cutoff]
+    expired_compacted = expired_compacted_partitions(store, source_tablename, cutoff) if cutoff else {}
+    compacted_objects = [obj for objects in expired_compacted.values() for obj in objects]
+    manifests = [obj.key for obj in compacted_objects if obj.key.endswith(f"/{MANIFEST_NAME}")]
+    data_keys = [obj.key for obj in expired_raw] + \
+                [obj.key for obj in compacted_objects if not obj.key.endswith(f"/{MANIFEST_NAME}")]
+
+    report = {
+        'source_tablename': source_tablename,
+        'load_type': LOAD_TYPE,
+        'dry_run': DRY_RUN,
+        'cutoff': cutoff.astimezone(IST).isoformat() if cutoff else None,
+        'files_total': len(raw_files),
+        'bytes_total': sum(obj.size for obj in raw_files),
+        'files_to_delete': len(expired_raw),
+        'compacted_partitions_to_delete': len(expired_compacted),
+        'bytes_to_reclaim': sum(obj.size for obj in expired_raw) + sum(obj.size for obj in compacted_objects),
+        'files_failed': 0,
+    }
+    if DRY_RUN or not (manifests or data_keys):
+        return report
+
+    # Manifests first: a partition without its manifest is just unreferenced files
+    failed = store.delete_many(manifests)
+    failed += store.delete_many(data_keys)
+    report['files_failed'] = len(failed)
+    logger.info(f"Deleted {len(manifests) + len(data_keys) - len(failed)} objects "
+                f"({report['bytes_to_reclaim']} bytes) older than {report['cutoff']}")
+    return report
+
+
+def main():
+    if not SOURCE_TABLENAME:
+        logger.error("SOURCE_TABLENAME env var missing")
+        sys.exit(1)
+
+    logger.info(f"Starting retention for {SOURCE_TABLENAME} ({LOAD_TYPE}, dry run: {DRY_RUN})")
+    try:
+        store = get_object_store()
+        report = collect_garbage(store, SOURCE_TABLENAME, datetime.now(IST))
+    except Exception as e:
+        logger.error(f"Retention failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    logger.info(f"{report['files_to_delete']} of {report['files_total']} files and "
+                f"{report['compacted_partitions_to_delete']} compacted partitions expired, "
+                f"{report['bytes_to_reclaim']} bytes to reclaim")
+    # Output metadata for driver to capture
+    print(f"GC_REPORT:{json.dumps(report)}", file=sys.stdout)
+    if report['files_failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Loader: Datalake (MinIO) to Sink (Postgres)
+Loader: Datalake (MinIO/S3 or local object store) to Sink (Postgres)
 """
 
 import os
@@ -9,46 +9,28 @@ import logging
 import time
 import random
 import pandas as pd
-from minio import Minio
-from sqlalchemy import create_engine
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, inspect, text
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from object_store import ObjectInfo, ObjectStore, get_object_store
+from object_cache import get_object_cache
+from profiling import PROFILE_ENABLED, publish_profile, run_profiled
+from source_projection import columns_from_env, quote_identifier
+from schema_registry import sink_type
 import io
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-from cryptography.fernet import Fernet
 import json
 
-def decrypt(token: str) -> Optional[dict]:
-    """Decrypts a Fernet token string back to a dictionary."""
-    if not token:
-        return None  
-    try:
-        key = os.getenv("ENCRYPTION_KEY")
-        if not key:
-            logger.warning("No ENCRYPTION_KEY found.")
-            return None
-        f = Fernet(key.encode() if isinstance(key, str) else key)
-        # Check if legacy JSON
-        if token.strip().startswith('{') and token.strip().endswith('}'):
-             return json.loads(token)
-        json_bytes = f.decrypt(token.encode('utf-8'))
-        return json.loads(json_bytes.decode('utf-8'))
-    except Exception as e:
-        logger.error(f"Decryption failed: {e}")
-        return None
-
 # Configs
 SOURCE_TABLE_NAME = os.getenv('SOURCE_TABLE_NAME') # Source table name in DL
 SINK_TABLENAME = os.getenv('SINK_TABLENAME') # Target table name
-MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio_server:9000')
-MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
-MINIO_BUCKET = os.getenv('MINIO_BUCKET', 'datalake')
-MINIO_USE_SSL = os.getenv('MINIO_USE_SSL', 'false').lower() == 'true'
 
 # Sink DB Config
 POSTGRES_HOST = os.getenv('SINK_POSTGRES_HOST', 'sink_pg_db')
@@ -57,37 +39,30 @@ POSTGRES_DB = os.getenv('SINK_POSTGRES_DB', 'sink_db')
 POSTGRES_USER = os.getenv('SINK_POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.getenv('SINK_POSTGRES_PASSWORD', 'postgres')
 
-# Workaround for minio_server hostname with underscore
-try:
-    import socket
-    if ':' in MINIO_ENDPOINT:
-        host, port = MINIO_ENDPOINT.split(':')
-        try:
-            ip = socket.gethostbyname(host)
-            MINIO_ENDPOINT = f"{ip}:{port}"
-        except:
-            pass
-except:
-    pass
-
-def get_minio_client():
-    endpoint = MINIO_ENDPOINT.replace('http://', '').replace('https://', '')
-    return Minio(
-        endpoint,
-        access_key=MINIO_ACCESS_KEY,
-        secret_key=MINIO_SECRET_KEY,
-        secure=MINIO_USE_SSL
-    )
-
-def get_latest_parquet_file(client, bucket, source_table_name):
+# Projected pipelines (pipeline_config.source_to_dl_columns): read only these columns plus the incremental key
+SOURCE_COLUMNS = columns_from_env()
+INCREMENTAL_KEY = os.getenv('INCREMENTAL_KEY') or None
+
+# Change files of cdc pipelines carry this column (source_to_dl/postgres_to_dl/cdc.py); appending
+# them would turn deletes into NULL rows and updates into duplicates, so they are refused
+CDC_OP_COLUMN = '_cdc_op'
+
+# Artificial processing delay; SIMULATED_DELAY=0 skips it (data_pipeline_resources/benchmark)
+SIMULATED_DELAY = os.getenv('SIMULATED_DELAY', '1') == '1'
+
+def emit_metric(name: str, value: float):
+    """Print a timing/size for the driver or backend to record (see backend/utils/metrics.py)"""
+    print(f"METRIC:{name}:{value}", file=sys.stdout)
+
+def get_latest_parquet_file(store: ObjectStore, source_table_name) -> Optional[ObjectInfo]:
     # Standard prefix: {source_type}_to_dl/dl_{source_table_name}/
     source_type = os.getenv('SOURCE_TYPE', 'postgres')
     prefix = f"{source_type}_to_dl/dl_{source_table_name}/"
     
     # List objects recursively
-    objects = client.list_objects(bucket, prefix=prefix, recursive=True)
+    objects = store.list(prefix)
     
-    parquet_files = [obj for obj in objects if obj.object_name.endswith('.parquet')]
+    parquet_files = [obj for obj in objects if obj.key.endswith('.parquet')]
     
     if not parquet_files:
         return None
@@ -96,7 +71,33 @@ def get_latest_parquet_file(client, bucket, source_table_name):
     parquet_files.sort(key=lambda x: x.last_modified, reverse=True)
     return parquet_files[0]
 
-def load_to_sink(df, sink_tablename):
+def read_columns(schema: pa.Schema) -> Optional[List[str]]:
+    """Projected columns present in the file; None reads every column.
+    Files written before the projection was configured may hold more columns."""
+    if not SOURCE_COLUMNS:
+        return None
+    wanted = SOURCE_COLUMNS + ([INCREMENTAL_KEY] if INCREMENTAL_KEY and INCREMENTAL_KEY not in SOURCE_COLUMNS else [])
+    return [column for column in wanted if column in schema.names]
+
+def add_new_columns(engine, sink_tablename: str, df: pd.DataFrame, schema: pa.Schema) -> List[str]:
+    """ALTER TABLE ADD COLUMN for file columns the sink table does not have yet (a column
+    added in the source), so appending keeps working; returns the added columns"""
+    inspector = inspect(engine)
+    if not inspector.has_table(sink_tablename):
+        return []
+    existing = {column['name'] for column in inspector.get_columns(sink_tablename)}
+    fields = [schema.field(name) for name in df.columns if name not in existing and name in schema.names]
+    if not fields:
+        return []
+    with engine.begin() as conn:
+        for field in fields:
+            column_type = sink_type(field)
+            logger.info(f"Adding column {field.name} {column_type} to {sink_tablename}")
+            conn.execute(text(f"ALTER TABLE {quote_identifier(sink_tablename)} "
+                              f"ADD COLUMN IF NOT EXISTS {quote_identifier(field.name)} {column_type}"))
+    return [field.name for field in fields]
+
+def load_to_sink(df, sink_tablename, schema: Optional[pa.Schema] = None):
     # Connect to Sink DB using SQLAlchemy
     db_url = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
     engine = create_engine(db_url)
@@ -104,48 +105,96 @@ def load_to_sink(df, sink_tablename):
     # Write to DB
     load_type = os.getenv('LOAD_TYPE', 'full')
     if_exists = 'replace' if load_type == 'full' else 'append'
+    if if_exists == 'append' and schema is not None:
+        # Compatible schema change: new columns are added, rows loaded earlier get NULL
+        add_new_columns(engine, sink_tablename, df, schema)
     
     logger.info(f"Writing to Postgres table {sink_tablename} (if_exists={if_exists})")
+    temp_started = time.perf_counter()
     df.to_sql(sink_tablename, engine, if_exists=if_exists, index=False)
+    emit_metric('sink_load_seconds', time.perf_counter() - temp_started)
     logger.info("Write complete")
 
+def profile_sink_load(store: ObjectStore, df: pd.DataFrame, schema: pa.Schema):
+    """load_to_sink under the profiler; the profile is uploaded even if the load fails"""
+    def temp_load():
+        try:
+            load_to_sink(df, SINK_TABLENAME, schema)
+        except Exception as e:
+            return e
+        return None
+
+    error, profile, summary = run_profiled(temp_load)
+    publish_profile(store, 'dl_to_sink', SOURCE_TABLE_NAME, profile, summary)
+    if error is not None:
+        raise error
+
 def main():
     if not SINK_TABLENAME or not SOURCE_TABLE_NAME:
         logger.error("SINK_TABLENAME or SOURCE_TABLE_NAME env var missing")
         sys.exit(1)
     
     # Simulate processing time (4-10 seconds)
-    sleep_time = random.uniform(4, 10)
-    logger.info(f"Processing... (simulated delay: {sleep_time:.1f}s)")
-    time.sleep(sleep_time)
+    if SIMULATED_DELAY:
+        sleep_time = random.uniform(4, 10)
+        logger.info(f"Processing... (simulated delay: {sleep_time:.1f}s)")
+        time.sleep(sleep_time)
         
     logger.info(f"Starting generic loader for {SOURCE_TABLE_NAME} -> {SINK_TABLENAME}")
     
     try:
-        client = get_minio_client()
+        store = get_object_store()
+        # Read-through disk cache (DL_CACHE_DIR); None when disabled
+        cache = get_object_cache(store)
         
         # 1. Find latest file
-        latest_file = get_latest_parquet_file(client, MINIO_BUCKET, SOURCE_TABLE_NAME)
+        latest_file = get_latest_parquet_file(store, SOURCE_TABLE_NAME)
         if not latest_file:
-            logger.warning(f"No parquet files found for {SOURCE_TABLE_NAME} in MinIO")
+            logger.warning(f"No parquet files found for {SOURCE_TABLE_NAME} in {store.bucket}")
             # Output zero rows processed
             print(f"ROWS_PROCESSED:0", file=sys.stdout)
             sys.exit(0)
             
-        logger.info(f"Reading latest file: {latest_file.object_name}")
+        logger.info(f"Reading latest file: {latest_file.key}")
         
-        # 2. Read content
-        response = client.get_object(MINIO_BUCKET, latest_file.object_name)
-        data = response.read()
-        df = pd.read_parquet(io.BytesIO(data))
+        # 2. Read content (an mmap for the local store and cache hits, so pyarrow decodes without a copy)
+        # The footer has its own cache entry (no GET on a hit); an empty file needs nothing else
+        metadata = cache.get_parquet_metadata(latest_file) if cache else None
+        if metadata is not None and metadata.num_rows == 0:
+            logger.info("File has no rows, skipping the download")
+            schema = metadata.schema.to_arrow_schema()
+            empty = schema.empty_table()
+            columns = read_columns(schema)
+            df = (empty.select(columns) if columns is not None else empty).to_pandas()
+        else:
+            temp_started = time.perf_counter()
+            data = cache.get_buffer(latest_file) if cache else store.get_buffer(latest_file.key)
+            emit_metric('minio_download_seconds', time.perf_counter() - temp_started)
+            emit_metric('bytes', len(data))
+            # With the cached footer pyarrow does not parse the file's footer again
+            parquet_file = pq.ParquetFile(pa.BufferReader(data), metadata=metadata)
+            schema = parquet_file.schema_arrow
+            columns = read_columns(schema)
+            if columns is not None:
+                logger.info(f"Reading columns: {', '.join(columns)}")
+            df = parquet_file.read(columns=columns, use_pandas_metadata=True).to_pandas()
+        if CDC_OP_COLUMN in schema.names:
+            raise ValueError(f"{latest_file.key} is a cdc change file; the sink cannot apply changes yet")
+        if cache:
+            print(f"CACHE_HITS:{cache.hits}", file=sys.stdout)
+            print(f"CACHE_MISSES:{cache.misses}", file=sys.stdout)
+            logger.info(f"Cache hits: {cache.hits}, misses: {cache.misses}")
         rows_count = len(df)
         logger.info(f"Read {rows_count} rows")
         
         # 3. Write to Sink
-        load_to_sink(df, SINK_TABLENAME)
+        if PROFILE_ENABLED:
+            profile_sink_load(store, df, schema)
+        else:
+            load_to_sink(df, SINK_TABLENAME, schema)
         
         # 4. Output metadata for driver to capture
-        file_path = f"{MINIO_BUCKET}/{latest_file.object_name}"
+        file_path = store.uri(latest_file.key)
         print(f"FILE_PATH:{file_path}", file=sys.stdout)
         print(f"ROWS_PROCESSED:{rows_count}", file=sys.stdout)
         logger.info(f"Output file_path: {file_path}")
@@ -1,6 +1,5 @@
 import sqlite3
 import os
-import time
 import logging
 import subprocess
 import sys
@@ -9,40 +8,36 @@ from datetime import datetime, timedelta, timezone
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Inline decryption helper (same as source driver)
-from cryptography.fernet import Fernet
-import json
-
-def decrypt(token: str) -> Optional[dict]:
-    if not token: return None
-    try:
-        key = os.getenv("ENCRYPTION_KEY")
-        if not key: return None
-        f = Fernet(key.encode() if isinstance(key, str) else key)
-        if token.strip().startswith('{') and token.strip().endswith('}'): return json.loads(token)
-        json_bytes = f.decrypt(token.encode('utf-8'))
-        return json.loads(json_bytes.decode('utf-8'))
-    except Exception as e:
-        logger.error(f"Decryption failed: {e}")
-        return None
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from credentials import decrypt
+from metrics import SECONDS_BUCKETS, DriverMetrics
+from profiling import parse_profile_path
+from scheduling import effective_offset, next_due
+from source_projection import projection_env
 
 # Config
 DB_PATH = os.getenv('CONFIG_DB_PATH', '/data/config.db')
+# The backend writes the same config DB concurrently; wait for locks instead of failing
+BUSY_TIMEOUT_MS = int(os.getenv('CONFIG_DB_BUSY_TIMEOUT_MS', '10000'))
 
 def get_db_connection():
     if not os.path.exists(DB_PATH):
         raise FileNotFoundError(f"Config database not found at {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
+# Histograms exposed by the backend's GET /metrics, written to METRICS_DIR/driver_dl_to_sink.json
+metrics = DriverMetrics('driver_dl_to_sink', 'dl_to_sink')
+
 def get_sink_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
     """Get active sink configurations from pipeline_config"""
     cursor = conn.cursor()
@@ -51,11 +46,16 @@ def get_sink_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
         SELECT 
             source_tablename, 
             sink_tablename,
+            source_name,
             destination_name,
             dl_to_sink_schedule, 
+            dl_to_sink_schedule_offset,
             dl_to_sink_last_loader_run_timestamp, 
             dl_to_sink_load_type, 
-            sink_type
+            sink_type,
+            profiling_enabled,
+            source_to_dl_incremental_key,
+            source_to_dl_columns
         FROM pipeline_config
         WHERE dl_to_sink_is_active = 1 AND sink_type IS NOT NULL AND sink_type != ''
     """
@@ -65,17 +65,21 @@ def get_sink_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
 def should_run_now(config: Dict[str, Any]) -> bool:
     source_tablename = config['source_tablename'] # Use source name for logging, or sink name? Using source for consistency.
     schedule_mins = config['dl_to_sink_schedule']
+    offset_mins = effective_offset(source_tablename, schedule_mins, config.get('dl_to_sink_schedule_offset'), 'dl_to_sink')
     last_run_str = config['dl_to_sink_last_loader_run_timestamp']
 
-    if not last_run_str:
+    if not last_run_str and offset_mins is None:
         logger.info(f"Table {source_tablename} has never been run (sink), scheduling now")
         return True
 
     try:
-        last_run = datetime.fromisoformat(last_run_str)
-        next_run = last_run + timedelta(minutes=schedule_mins)
-        if datetime.now(IST) >= next_run:
+        last_run = datetime.fromisoformat(last_run_str) if last_run_str else None
+        now = datetime.now(IST)
+        # Phase-aligned when the table has a schedule offset (common/scheduling.py)
+        due_at = next_due(now, last_run, schedule_mins, offset_mins)
+        if due_at is not None:
             logger.info(f"Table {source_tablename} is due to run (sink)")
+            metrics.observe('pipeline_queue_wait_seconds', SECONDS_BUCKETS, (now - due_at).total_seconds(), metrics.labels(config))
             return True
     except ValueError:
         logger.warning(f"Invalid timestamp format for {source_tablename}, scheduling now")
@@ -86,7 +90,7 @@ def should_run_now(config: Dict[str, Any]) -> bool:
 def trigger_loader(config: Dict[str, Any]) -> tuple:
     """
     Triggers the appropriate loader script based on sink_type.
-    Returns: (status, error_message, rows_processed, file_path)
+    Returns: (status, error_message, rows_processed, file_path, profile_path, (cache_hits, cache_misses))
     """
     source_table_name = config['source_tablename']
     sink_table_name = config['sink_tablename']
@@ -106,13 +110,18 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
     if not loader_script or not os.path.exists(loader_script):
         error_msg = f"Loader script not found for sink type {sink_type}: {loader_script}"
         logger.error(error_msg)
-        return 'failed', error_msg, None, None
+        return 'failed', error_msg, None, None, None, (None, None)
 
     env = os.environ.copy()
     env['SOURCE_TABLE_NAME'] = source_table_name
     env['SINK_TABLENAME'] = sink_table_name
     env['LOAD_TYPE'] = config['dl_to_sink_load_type']
+    env['PROFILE_ENABLED'] = '1' if config.get('profiling_enabled') else '0'
     env['SOURCE_TYPE'] = config.get('source_type', 'postgres')
+    # Column-pruned Parquet reads for projected pipelines
+    env.update(projection_env(config))
+    if config.get('source_to_dl_incremental_key'):
+        env['INCREMENTAL_KEY'] = config['source_to_dl_incremental_key']
 
     # Fetch and pass destination credentials
     try:
@@ -137,6 +146,9 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
             text=True,
             timeout=3600
         )
+        metrics.observe_loader_output(result.stdout, metrics.labels(config))
+        profile_path = parse_profile_path(result.stdout)
+        cache_stats = parse_cache_stats(result.stdout)
         if result.returncode == 0:
             logger.info(f"Successfully loaded {source_table_name} to sink table {sink_table_name}")
             logger.info(result.stdout)
@@ -157,34 +169,51 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
             
             # Join file paths with comma separator
             file_paths_str = ",".join(file_paths) if file_paths else None
-            return 'success', None, rows_processed, file_paths_str
+            return 'success', None, rows_processed, file_paths_str, profile_path, cache_stats
         else:
             error_msg = result.stderr[:500] if result.stderr else "Unknown error"
             logger.error(f"Loader failed: {error_msg}")
-            return 'failed', error_msg, None, None
+            return 'failed', error_msg, None, None, profile_path, cache_stats
     except subprocess.TimeoutExpired:
         error_msg = "Loader timed out after 1 hour"
         logger.error(f"Loader timed out for {source_table_name}")
-        return 'failed', error_msg, None, None
+        return 'failed', error_msg, None, None, None, (None, None)
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error executing loader: {e}")
-        return 'failed', error_msg, None, None
+        return 'failed', error_msg, None, None, None, (None, None)
+
+def parse_cache_stats(stdout: str) -> Tuple[Optional[int], Optional[int]]:
+    """(hits, misses) of the loader's datalake cache (CACHE_HITS/CACHE_MISSES lines), when caching is on"""
+    hits, misses = None, None
+    for line in (stdout or '').split('\n'):
+        try:
+            if line.startswith('CACHE_HITS:'):
+                hits = int(line.split('CACHE_HITS:')[1].strip())
+            elif line.startswith('CACHE_MISSES:'):
+                misses = int(line.split('CACHE_MISSES:')[1].strip())
+        except ValueError:
+            pass
+    return hits, misses
 
 def calculate_time_taken(started_at: datetime, completed_at: datetime) -> str:
     """Calculate time taken in HH:MM:SS.mmm format (includes milliseconds)"""
-    delta = completed_at - started_at
-    total_seconds = delta.total_seconds()
-    hours, remainder = divmod(int(total_seconds), 3600)
+    seconds, milliseconds = divmod(calculate_duration_ms(started_at, completed_at), 1000)
+    hours, remainder = divmod(seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
-    milliseconds = int((total_seconds - int(total_seconds)) * 1000)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
 
+def calculate_duration_ms(started_at: datetime, completed_at: datetime) -> int:
+    """Calculate time taken in integer milliseconds (stored in duration_ms for aggregation)"""
+    return round((completed_at - started_at).total_seconds() * 1000)
+
 def log_pipeline_run(conn: sqlite3.Connection, source_tablename: str, pipeline_type: str, 
                      status: str, error_message: Optional[str] = None, 
                      rows_processed: Optional[int] = None, file_paths: Optional[str] = None,
-                     started_at: Optional[datetime] = None):
+                     started_at: Optional[datetime] = None, profile_path: Optional[str] = None,
+                     cache_stats: Tuple[Optional[int], Optional[int]] = (None, None)):
     """Insert a record into pipeline_run_logs table"""
+    metrics.begin_write(conn)
     cursor = conn.cursor()
     completed_at = datetime.now(IST)
     completed_at_str = completed_at.isoformat() if status in ['success', 'failed'] else None
@@ -192,20 +221,25 @@ def log_pipeline_run(conn: sqlite3.Connection, source_tablename: str, pipeline_t
     
     # Calculate time taken in HH:MM:SS format
     time_taken = None
+    duration_ms = None
     if started_at and status in ['success', 'failed']:
         time_taken = calculate_time_taken(started_at, completed_at)
+        duration_ms = calculate_duration_ms(started_at, completed_at)
     
     cursor.execute("""
         INSERT INTO pipeline_run_stage_logs 
-        (id, source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at, completed_at, time_taken)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (str(uuid6.uuid7()), source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at_str, completed_at_str, time_taken))
+        (id, source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at, completed_at, time_taken, duration_ms, profile_path, cache_hits, cache_misses)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (str(uuid6.uuid7()), source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at_str, completed_at_str, time_taken, duration_ms, profile_path, *cache_stats))
     conn.commit()
     logger.info(f"Logged pipeline run for {source_tablename}: {status} (time: {time_taken})")
 
 def update_status(conn: sqlite3.Connection, source_tablename: str, status: str,
                   error_message: Optional[str] = None, rows_processed: Optional[int] = None,
-                  file_paths: Optional[str] = None, started_at: Optional[datetime] = None):
+                  file_paths: Optional[str] = None, started_at: Optional[datetime] = None,
+                  profile_path: Optional[str] = None,
+                  cache_stats: Tuple[Optional[int], Optional[int]] = (None, None)):
+    metrics.begin_write(conn)
     cursor = conn.cursor()
     now = datetime.now(IST).isoformat()
     cursor.execute("""
@@ -216,7 +250,7 @@ def update_status(conn: sqlite3.Connection, source_tablename: str, status: str,
     conn.commit()
     
     # Log to pipeline_run_stage_logs table
-    log_pipeline_run(conn, source_tablename, 'dl_to_sink', status, error_message, rows_processed, file_paths, started_at)
+    log_pipeline_run(conn, source_tablename, 'dl_to_sink', status, error_message, rows_processed, file_paths, started_at, profile_path, cache_stats)
 
 def main():
     logger.info("Starting DL to Sink Driver")
@@ -229,7 +263,8 @@ def main():
         for config in configs:
             if should_run_now(config):
                 started_at = datetime.now(IST)
-                status, error_msg, rows_processed, file_paths = trigger_loader(config)
+                status, error_msg, rows_processed, file_paths, profile_path, cache_stats = trigger_loader(config)
+                metrics.observe_stage(config, status, started_at, rows_processed)
                 update_status(
                     conn, 
                     config['source_tablename'], 
@@ -237,13 +272,17 @@ def main():
                     error_msg,
                     rows_processed,
                     file_paths,
-                    started_at
+                    started_at,
+                    profile_path,
+                    cache_stats
                 )
         
         conn.close()
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        metrics.flush()
 
 if __name__ == "__main__":
     main()
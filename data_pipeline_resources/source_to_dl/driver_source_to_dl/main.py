@@ -1,10 +1,10 @@
 import sqlite3
 import os
-import time
 import logging
 import subprocess
 import sys
 import uuid6
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
 
 # IST timezone (UTC+5:30)
@@ -16,49 +16,58 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Import encryption utils - Assuming shared code, but since it's a separate container, 
-# we need to be careful. The driver container likely doesn't have the backend module structure.
-# For now, we will implement simple decrypt logic or assume the utils are available if mounted.
-# Since we can't easily import from backend/utils/encryption without proper python path,
-# and given requirements.txt has cryptography, we'll inline the decryption helper safely.
-from cryptography.fernet import Fernet
 import json
-
-def decrypt(token: str) -> Optional[dict]:
-    if not token: return None
-    try:
-        key = os.getenv("ENCRYPTION_KEY")
-        if not key: return None
-        f = Fernet(key.encode() if isinstance(key, str) else key)
-        if token.strip().startswith('{') and token.strip().endswith('}'): return json.loads(token)
-        json_bytes = f.decrypt(token.encode('utf-8'))
-        return json.loads(json_bytes.decode('utf-8'))
-    except Exception as e:
-        logger.error(f"Decryption failed: {e}")
-        return None
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from credentials import decrypt
+from metrics import SECONDS_BUCKETS, DriverMetrics
+from parquet_format import parquet_env
+from profiling import parse_profile_path
+from load_slots import is_heavy, source_slot
+from scheduling import effective_offset, next_due, recent_durations
+from source_projection import projection_env
 
 # Config
 DB_PATH = os.getenv('CONFIG_DB_PATH', '/data/config.db')
+# The backend writes the same config DB concurrently; wait for locks instead of failing
+BUSY_TIMEOUT_MS = int(os.getenv('CONFIG_DB_BUSY_TIMEOUT_MS', '10000'))
 
 def get_db_connection():
     if not os.path.exists(DB_PATH):
         raise FileNotFoundError(f"Config database not found at {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
+# Histograms exposed by the backend's GET /metrics, written to METRICS_DIR/driver_source_to_dl.json
+metrics = DriverMetrics('driver_source_to_dl', 'source_to_dl')
+
 def get_active_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
     cursor = conn.cursor()
     query = """
     SELECT 
         source_tablename, 
         source_name,
+        destination_name,
         source_to_dl_schedule, 
+        source_to_dl_schedule_offset,
         source_to_dl_load_type, 
         source_type, 
         source_to_dl_last_loader_run_timestamp,
         source_to_dl_incremental_key,
-        source_to_dl_last_incremental_value
+        source_to_dl_last_incremental_value,
+        source_to_dl_watermark,
+        source_to_dl_tiebreaker_key,
+        source_to_dl_incremental_overlap,
+        profiling_enabled,
+        dl_parquet_compression,
+        dl_parquet_compression_level,
+        dl_parquet_row_group_size,
+        dl_parquet_dictionary,
+        dl_parquet_statistics,
+        dl_parquet_sort_by_incremental_key,
+        source_to_dl_columns,
+        source_to_dl_row_filter
     FROM pipeline_config 
     WHERE source_to_dl_is_active = 1
     """
@@ -69,17 +78,17 @@ def get_active_configs(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
 def should_run_now(config: Dict[str, Any]) -> bool:
     source_tablename = config['source_tablename']
     schedule_mins = config['source_to_dl_schedule']
+    offset_mins = effective_offset(source_tablename, schedule_mins, config.get('source_to_dl_schedule_offset'))
     last_run_str = config['source_to_dl_last_loader_run_timestamp']
 
-    if not last_run_str:
-        logger.info(f"Table {source_tablename} has never been run, scheduling now")
-        return True
-
     try:
-        last_run = datetime.fromisoformat(last_run_str)
-        next_run = last_run + timedelta(minutes=schedule_mins)
-        if datetime.now(IST) >= next_run:
-            logger.info(f"Table {source_tablename} is due to run (last run: {last_run}, schedule: {schedule_mins}m)")
+        last_run = datetime.fromisoformat(last_run_str) if last_run_str else None
+        now = datetime.now(IST)
+        # Phase-aligned when the table has a schedule offset (common/scheduling.py)
+        due_at = next_due(now, last_run, schedule_mins, offset_mins)
+        if due_at is not None:
+            logger.info(f"Table {source_tablename} is due to run (last run: {last_run}, schedule: {schedule_mins}m, offset: {offset_mins}m)")
+            metrics.observe('pipeline_queue_wait_seconds', SECONDS_BUCKETS, (now - due_at).total_seconds(), metrics.labels(config))
             return True
     except ValueError:
         logger.warning(f"Invalid timestamp format for {source_tablename}, scheduling now")
@@ -87,10 +96,53 @@ def should_run_now(config: Dict[str, Any]) -> bool:
     
     return False
 
+def get_registered_schema(source_tablename: str) -> Optional[str]:
+    """Latest schema version of the table (source_schema_versions), passed to the loader as SOURCE_SCHEMA"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            "SELECT schema_json FROM source_schema_versions WHERE source_tablename = ? ORDER BY version DESC LIMIT 1",
+            (source_tablename,)
+        ).fetchone()
+        return row['schema_json'] if row else None
+    finally:
+        conn.close()
+
+def register_schema(source_tablename: str, schema_json: str):
+    """Store the loader's SCHEMA line as the table's next schema version, unless it is already the latest"""
+    fingerprint = json.loads(schema_json)['fingerprint']
+    conn = get_db_connection()
+    try:
+        metrics.begin_write(conn)
+        latest = conn.execute(
+            "SELECT version, fingerprint FROM source_schema_versions WHERE source_tablename = ? ORDER BY version DESC LIMIT 1",
+            (source_tablename,)
+        ).fetchone()
+        if latest is None or latest['fingerprint'] != fingerprint:
+            version = latest['version'] + 1 if latest else 1
+            conn.execute("""
+                INSERT INTO source_schema_versions (source_tablename, version, fingerprint, schema_json, registered_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (source_tablename, version, fingerprint, schema_json, datetime.now(IST).isoformat()))
+            logger.info(f"Registered schema version {version} for {source_tablename}")
+        conn.commit()
+    finally:
+        conn.close()
+
+def parse_watermark(stdout: str) -> tuple:
+    """(LAST_INCREMENTAL_VALUE, WATERMARK json) printed by the loader, None for those it did not print"""
+    new_incremental_value, new_watermark = None, None
+    for line in (stdout or '').split('\n'):
+        if "LAST_INCREMENTAL_VALUE:" in line:
+            new_incremental_value = line.split("LAST_INCREMENTAL_VALUE:")[1].strip()
+        if line.startswith("WATERMARK:"):
+            new_watermark = line[len("WATERMARK:"):].strip()
+    return new_incremental_value, new_watermark
+
 def trigger_loader(config: Dict[str, Any]) -> tuple:
     """
     Triggers the appropriate loader script based on source_type.
-    Returns: (status, new_incremental_value, error_message, rows_processed, file_path)
+    Returns: (status, new_incremental_value, new_watermark, error_message, rows_processed, file_path, profile_path)
     """
     source_tablename = config['source_tablename']
     source_name = config['source_name']
@@ -109,13 +161,16 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
     if not script_path or not os.path.exists(script_path):
         error_msg = f"Loader script not found for source type: {source_type} at {script_path}"
         logger.error(error_msg)
-        return 'failed', None, error_msg, None, None
+        return 'failed', None, None, error_msg, None, None, None
 
     # Prepare environment variables for the loader
     env = os.environ.copy()
     env['SOURCE_TABLENAME'] = source_tablename
     env['LOAD_TYPE'] = load_type
+    env['PROFILE_ENABLED'] = '1' if config.get('profiling_enabled') else '0'
     env['SOURCE_TYPE'] = source_type
+    env.update(parquet_env(config))
+    env.update(projection_env(config))
     
     # Pass incremental config if needed
     if config['source_to_dl_incremental_key']:
@@ -123,6 +178,20 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
     
     if config['source_to_dl_last_incremental_value']:
          env['LAST_INCREMENTAL_VALUE'] = str(config['source_to_dl_last_incremental_value'])
+    if config.get('source_to_dl_watermark'):
+         env['WATERMARK'] = config['source_to_dl_watermark']
+    if config.get('source_to_dl_tiebreaker_key'):
+         env['TIEBREAKER_KEY'] = config['source_to_dl_tiebreaker_key']
+    if config.get('source_to_dl_incremental_overlap'):
+         env['INCREMENTAL_OVERLAP'] = str(config['source_to_dl_incremental_overlap'])
+
+    # The loader only reads the source catalog again when the table no longer matches this schema
+    try:
+        registered_schema = get_registered_schema(source_tablename)
+        if registered_schema:
+            env['SOURCE_SCHEMA'] = registered_schema
+    except Exception as e:
+        logger.warning(f"Failed to read the registered schema of {source_tablename}: {e}")
 
     # Fetch and pass source credentials
     try:
@@ -149,20 +218,26 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
             text=True,
             timeout=3600 # 1 hour timeout
         )
+        metrics.observe_loader_output(result.stdout, metrics.labels(config))
+        profile_path = parse_profile_path(result.stdout)
+        # Also kept when the run fails: a cdc loader prints its LSN once the change file is
+        # stored, before advancing the slot (postgres_to_dl/cdc.py)
+        new_incremental_value, new_watermark = parse_watermark(result.stdout)
+        if new_incremental_value:
+            logger.info(f"Loader returned last_incremental_value: {new_incremental_value}")
         
         if result.returncode == 0:
             logger.info(f"Successfully loaded table: {source_tablename}")
             
             # Parse output for metadata
             lines = result.stdout.strip().split('\n')
-            new_incremental_value = None
+            new_schema = None
             rows_processed = None
             file_paths = []
             
             for line in lines:
-                if "LAST_INCREMENTAL_VALUE:" in line:
-                    new_incremental_value = line.split("LAST_INCREMENTAL_VALUE:")[1].strip()
-                    logger.info(f"Loader returned last_incremental_value: {new_incremental_value}")
+                if line.startswith("SCHEMA:"):
+                    new_schema = line[len("SCHEMA:"):].strip()
                 if "ROWS_PROCESSED:" in line:
                     try:
                         rows_processed = int(line.split("ROWS_PROCESSED:")[1].strip())
@@ -171,37 +246,47 @@ def trigger_loader(config: Dict[str, Any]) -> tuple:
                 if "FILE_PATH:" in line:
                     file_paths.append(line.split("FILE_PATH:")[1].strip())
             
+            if new_schema:
+                try:
+                    register_schema(source_tablename, new_schema)
+                except Exception as e:
+                    # The next run reports the schema again
+                    logger.warning(f"Failed to register the schema of {source_tablename}: {e}")
+
             # Join file paths with comma separator
             file_paths_str = ",".join(file_paths) if file_paths else None
-            return 'success', new_incremental_value, None, rows_processed, file_paths_str
+            return 'success', new_incremental_value, new_watermark, None, rows_processed, file_paths_str, profile_path
         else:
             error_msg = result.stderr[:500] if result.stderr else "Unknown error"
             logger.error(f"Loader failed for {source_tablename}. Stderr: {error_msg}")
-            return 'failed', None, error_msg, None, None
+            return 'failed', new_incremental_value, new_watermark, error_msg, None, None, profile_path
 
     except subprocess.TimeoutExpired:
         error_msg = f"Loader timed out after 1 hour"
         logger.error(f"Loader timed out for {source_tablename}")
-        return 'failed', None, error_msg, None, None
+        return 'failed', None, None, error_msg, None, None, None
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Unexpected error triggering loader: {e}")
-        return 'failed', None, error_msg, None, None
+        return 'failed', None, None, error_msg, None, None, None
 
 def calculate_time_taken(started_at: datetime, completed_at: datetime) -> str:
     """Calculate time taken in HH:MM:SS.mmm format (includes milliseconds)"""
-    delta = completed_at - started_at
-    total_seconds = delta.total_seconds()
-    hours, remainder = divmod(int(total_seconds), 3600)
+    seconds, milliseconds = divmod(calculate_duration_ms(started_at, completed_at), 1000)
+    hours, remainder = divmod(seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
-    milliseconds = int((total_seconds - int(total_seconds)) * 1000)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
 
+def calculate_duration_ms(started_at: datetime, completed_at: datetime) -> int:
+    """Calculate time taken in integer milliseconds (stored in duration_ms for aggregation)"""
+    return round((completed_at - started_at).total_seconds() * 1000)
+
 def log_pipeline_run(conn: sqlite3.Connection, source_tablename: str, pipeline_type: str, 
                      status: str, error_message: Optional[str] = None, 
                      rows_processed: Optional[int] = None, file_paths: Optional[str] = None,
-                     started_at: Optional[datetime] = None):
+                     started_at: Optional[datetime] = None, profile_path: Optional[str] = None):
     """Insert a record into pipeline_run_logs table"""
+    metrics.begin_write(conn)
     cursor = conn.cursor()
     completed_at = datetime.now(IST)
     completed_at_str = completed_at.isoformat() if status in ['success', 'failed'] else None
@@ -209,21 +294,25 @@ def log_pipeline_run(conn: sqlite3.Connection, source_tablename: str, pipeline_t
     
     # Calculate time taken in HH:MM:SS format
     time_taken = None
+    duration_ms = None
     if started_at and status in ['success', 'failed']:
         time_taken = calculate_time_taken(started_at, completed_at)
+        duration_ms = calculate_duration_ms(started_at, completed_at)
     
     cursor.execute("""
         INSERT INTO pipeline_run_stage_logs 
-        (id, source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at, completed_at, time_taken)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (str(uuid6.uuid7()), source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at_str, completed_at_str, time_taken))
+        (id, source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at, completed_at, time_taken, duration_ms, profile_path)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (str(uuid6.uuid7()), source_tablename, pipeline_type, status, error_message, rows_processed, file_paths, started_at_str, completed_at_str, time_taken, duration_ms, profile_path))
     conn.commit()
     logger.info(f"Logged pipeline run for {source_tablename}: {status} (time: {time_taken})")
 
 def update_execution_status(conn: sqlite3.Connection, source_tablename: str, status: str, 
                            new_inc_val: Optional[str] = None, error_message: Optional[str] = None,
                            rows_processed: Optional[int] = None, file_paths: Optional[str] = None,
-                           started_at: Optional[datetime] = None):
+                           started_at: Optional[datetime] = None, profile_path: Optional[str] = None,
+                           new_watermark: Optional[str] = None):
+    metrics.begin_write(conn)
     cursor = conn.cursor()
     now = datetime.now(IST).isoformat()
     
@@ -239,12 +328,14 @@ def update_execution_status(conn: sqlite3.Connection, source_tablename: str, sta
     if new_inc_val:
         cursor.execute("UPDATE pipeline_config SET source_to_dl_last_incremental_value = ? WHERE source_tablename = ?", (new_inc_val, source_tablename))
         logger.info(f"Updated source_to_dl_last_incremental_value for {source_tablename}: {new_inc_val}")
+    if new_watermark:
+        cursor.execute("UPDATE pipeline_config SET source_to_dl_watermark = ? WHERE source_tablename = ?", (new_watermark, source_tablename))
         
     conn.commit()
     logger.info(f"Updated loader run status for {source_tablename}: {status} at {now}")
     
     # Log to pipeline_run_stage_logs table
-    log_pipeline_run(conn, source_tablename, 'source_to_dl', status, error_message, rows_processed, file_paths, started_at)
+    log_pipeline_run(conn, source_tablename, 'source_to_dl', status, error_message, rows_processed, file_paths, started_at, profile_path)
 
 def main():
     logger.info("Starting driver script for source to dl loaders")
@@ -254,10 +345,21 @@ def main():
         
         logger.info(f"Found {len(configs)} active configurations")
         
+        durations = recent_durations(conn)
+        
         for config in configs:
-            if should_run_now(config):
+            if not should_run_now(config):
+                continue
+            # Heavy loads take one of the source's slots (common/load_slots.py); light ones run right away
+            heavy = is_heavy(durations.get(config['source_tablename']))
+            with source_slot(config['source_name'] or '') if heavy else nullcontext(True) as acquired:
+                if not acquired:
+                    logger.info(f"Table {config['source_tablename']} deferred: source {config['source_name']} "
+                                f"is running its maximum of heavy loads")
+                    continue
                 started_at = datetime.now(IST)
-                status, new_inc_val, error_msg, rows_processed, file_paths = trigger_loader(config)
+                status, new_inc_val, new_watermark, error_msg, rows_processed, file_paths, profile_path = trigger_loader(config)
+                metrics.observe_stage(config, status, started_at, rows_processed)
                 update_execution_status(
                     conn, 
                     config['source_tablename'], 
@@ -266,7 +368,9 @@ def main():
                     error_msg, 
                     rows_processed, 
                     file_paths,
-                    started_at
+                    started_at,
+                    profile_path,
+                    new_watermark
                 )
         
         conn.close()
@@ -275,6 +379,8 @@ def main():
     except Exception as e:
         logger.error(f"Driver execution failed: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        metrics.flush()
 
 if __name__ == "__main__":
     main()
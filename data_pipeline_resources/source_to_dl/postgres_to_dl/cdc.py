@@ -0,0 +1,160 @@
+"""
+Change data capture from a Postgres logical replication slot (LOAD_TYPE=cdc)
+
+Each table has its own slot (dl_<table>) using the test_decoding output plugin,
+which ships with Postgres. A run peeks at the slot's pending changes, the loader
+writes the ones for its table to a Parquet change file with two extra columns:
+
+    _cdc_op   R = snapshot row, I = insert, U = update (new row), D = delete (key columns only),
+              T = truncate (no values)
+    _cdc_lsn  LSN of the change, e.g. 0/16B3748; apply changes in this order
+
+and only then advances the slot to the last LSN read. A failed upload leaves the
+slot where it was, so the next run reads the same changes again (at least once).
+The LSN is also the pipeline's watermark: the loader prints it once the file is
+stored, before advancing the slot, and the driver stores it even when the run then
+fails. Changes at or below it are skipped, so a run that uploaded its file but could
+not advance the slot is not written again.
+
+The first run creates the slot and writes a snapshot of the table (R rows, at the
+slot's starting LSN), read on a separate read-only connection. Changes committed
+while the snapshot is read can show up in both; replaying by _cdc_lsn makes the
+later change win.
+
+The source needs wal_level=logical and the loader's user the REPLICATION attribute.
+A slot keeps WAL until it is advanced: drop it when a pipeline stops using cdc
+(SELECT pg_drop_replication_slot('dl_<table>')).
+"""
+
+import re
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd  # type: ignore
+
+PLUGIN = 'test_decoding'
+OP_COLUMN = '_cdc_op'
+LSN_COLUMN = '_cdc_lsn'
+
+# table public.orders: UPDATE: order_id[integer]:7 status[character varying]:'shipped'
+CHANGE_RE = re.compile(r'^table (?P<table>.+?): (?P<op>INSERT|UPDATE|DELETE|TRUNCATE):(?P<body>.*)$')
+VALUE_RE = re.compile(r'(?P<name>"(?:[^"]|"")+"|[^\s\[]+)\[(?P<type>[^\]]+)\]:(?P<value>\'(?:[^\']|\'\')*\'|\S+)')
+OPS = {'INSERT': 'I', 'UPDATE': 'U', 'DELETE': 'D', 'TRUNCATE': 'T'}
+
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+FLOAT_TYPES = {'real', 'double precision'}
+
+
+def slot_name(source_tablename: str) -> str:
+    """Slot names may only contain lower case letters, digits and underscores"""
+    return re.sub(r'[^a-z0-9_]', '_', f"dl_{source_tablename}".lower())[:63]
+
+
+def lsn_to_int(lsn: str) -> int:
+    """'16/B374D848' -> 0x16B374D848, for comparing LSNs"""
+    high, _, low = lsn.partition('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def unquote(text: str, quote: str) -> str:
+    if len(text) >= 2 and text[0] == quote and text[-1] == quote:
+        return text[1:-1].replace(quote * 2, quote)
+    return text
+
+
+def convert_value(type_name: str, raw: str) -> Any:
+    """test_decoding's text output -> the Python value psycopg2 would return for a SELECT"""
+    if raw == 'null' or raw == 'unchanged-toast-datum':
+        # Unchanged TOASTed values are not in the WAL record
+        return None
+    value = unquote(raw, "'")
+    if type_name in INTEGER_TYPES:
+        return int(value)
+    if type_name in FLOAT_TYPES:
+        return float(value)
+    if type_name == 'numeric' or type_name.startswith('numeric('):
+        return Decimal(value)
+    if type_name == 'boolean':
+        return value == 'true'
+    if type_name.startswith('timestamp'):
+        return pd.Timestamp(value)
+    if type_name == 'date':
+        return date.fromisoformat(value)
+    return value
+
+
+def parse_change(data: str, source_tablename: str) -> Optional[Tuple[str, Dict[str, Any], Dict[str, str]]]:
+    """(op, column values, column types) for a change of the table, None for other tables and BEGIN/COMMIT"""
+    match = CHANGE_RE.match(data)
+    if not match:
+        return None
+    table = match.group('table')
+    if table not in (f"public.{source_tablename}", f'public."{source_tablename}"'):
+        return None
+    op = OPS[match.group('op')]
+    body = match.group('body')
+    if op == 'T':
+        return op, {}, {}
+    if 'new-tuple:' in body:
+        # UPDATE of the key (or REPLICA IDENTITY FULL): keep the new row
+        body = body.split('new-tuple:', 1)[1]
+    values, types = {}, {}
+    for value in VALUE_RE.finditer(body):
+        name = unquote(value.group('name'), '"')
+        values[name] = convert_value(value.group('type'), value.group('value'))
+        types[name] = value.group('type')
+    if not values:
+        # DELETE from a table without a replica identity: nothing to identify the row by
+        return None
+    return op, values, types
+
+
+def changes_to_dataframe(changes: List[Tuple[str, str]], source_tablename: str,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """(lsn, data) rows of pg_logical_slot_peek_changes -> the table's changes with op/LSN columns"""
+    rows, column_types = [], {}
+    for lsn, data in changes:
+        change = parse_change(data, source_tablename)
+        if change is None:
+            continue
+        op, values, types = change
+        if columns:
+            values = {column: value for column, value in values.items() if column in columns}
+        values[OP_COLUMN] = op
+        values[LSN_COLUMN] = lsn
+        rows.append(values)
+        column_types.update(types)
+    df = pd.DataFrame(rows)
+    for column, type_name in column_types.items():
+        if type_name in INTEGER_TYPES and column in df.columns:
+            # Deletes and truncates leave gaps; keep the column integer rather than float
+            df[column] = df[column].astype('Int64')
+    return df
+
+
+def get_slot(cursor, name: str) -> Optional[str]:
+    """The slot's confirmed LSN, None if the slot does not exist"""
+    cursor.execute("SELECT confirmed_flush_lsn::text FROM pg_replication_slots WHERE slot_name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create_slot(cursor, name: str) -> str:
+    """Create the slot; returns the LSN its changes start after"""
+    cursor.execute("SELECT lsn::text FROM pg_create_logical_replication_slot(%s, %s)", (name, PLUGIN))
+    return cursor.fetchone()[0]
+
+
+def peek_changes(cursor, name: str, max_changes: int) -> List[Tuple[str, str]]:
+    """Pending changes of every table, without consuming them; ends on a transaction boundary"""
+    cursor.execute(
+        "SELECT lsn::text, data FROM pg_logical_slot_peek_changes(%s, NULL, %s, "
+        "'include-xids', '0', 'skip-empty-xacts', '1')",
+        (name, max_changes)
+    )
+    return cursor.fetchall()
+
+
+def advance_slot(cursor, name: str, lsn: str):
+    """Confirm everything up to lsn; the server may then recycle that WAL"""
+    cursor.execute("SELECT pg_replication_slot_advance(%s, %s::pg_lsn)", (name, lsn))
@@ -4,10 +4,11 @@ Postgres to Datalake Loader
 
 This script:
 1. Reads data from PostgreSQL source database
-2. Handles full and incremental loads
-3. Writes data to MinIO (S3-compatible) object storage
+2. Handles full and incremental loads, and change data capture (cdc.py)
+3. Writes data to the datalake object store (MinIO/S3 or local filesystem)
 4. Outputs last_incremental_value for incremental loads
-5. Writes execution status to config database
+5. Outputs the table's schema when it changed (common/schema_registry.py)
+6. Writes execution status to config database
 """
 
 import os
@@ -20,12 +21,20 @@ from datetime import datetime, timezone, timedelta
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
-from typing import Optional
+from typing import List, Optional
 import psycopg2  # type: ignore
 import pandas as pd  # type: ignore
-from minio import Minio  # type: ignore
-from minio.error import S3Error  # type: ignore
 import io
+# data_pipeline_resources/common, on PYTHONPATH in the driver containers
+from object_store import get_object_store
+from parquet_format import ParquetWriteOptions, write_parquet
+from profiling import PROFILE_ENABLED, publish_profile, run_profiled
+from source_projection import check_row_filter, columns_from_env, quote_identifier, select_list
+from schema_registry import SourceSchema, schema_from_env, to_arrow
+# Logical replication for LOAD_TYPE=cdc, typed watermarks for LOAD_TYPE=incremental
+import cdc
+import watermark
+from watermark import Watermark
 
 # Configure logging
 logging.basicConfig(
@@ -34,34 +43,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from cryptography.fernet import Fernet
 import json
 
-def decrypt(token: str) -> Optional[dict]:
-    """Decrypts a Fernet token string back to a dictionary."""
-    if not token:
-        return None  
-    try:
-        key = os.getenv("ENCRYPTION_KEY")
-        if not key:
-            logger.warning("No ENCRYPTION_KEY found.")
-            return None
-        f = Fernet(key.encode() if isinstance(key, str) else key)
-        # Check if legacy JSON
-        if token.strip().startswith('{') and token.strip().endswith('}'):
-             return json.loads(token)
-        json_bytes = f.decrypt(token.encode('utf-8'))
-        return json.loads(json_bytes.decode('utf-8'))
-    except Exception as e:
-        logger.error(f"Decryption failed: {e}")
-        return None
-
 # Configuration from environment variables
 SOURCE_TABLENAME = os.getenv('SOURCE_TABLENAME')
 LOAD_TYPE = os.getenv('LOAD_TYPE', 'full')
 SOURCE_TYPE = os.getenv('SOURCE_TYPE', 'postgres')
 INCREMENTAL_KEY = os.getenv('INCREMENTAL_KEY')
 LAST_INCREMENTAL_VALUE = os.getenv('LAST_INCREMENTAL_VALUE', '')
+# Typed watermark (pipeline_config.source_to_dl_watermark, see watermark.py), tiebreaker column and overlap
+WATERMARK = os.getenv('WATERMARK', '')
+TIEBREAKER_KEY = os.getenv('TIEBREAKER_KEY') or None
+INCREMENTAL_OVERLAP = int(os.getenv('INCREMENTAL_OVERLAP') or '0')
+# Per-pipeline projection and row filter (pipeline_config.source_to_dl_columns/_row_filter, see common/source_projection.py)
+SOURCE_COLUMNS = columns_from_env()
+SOURCE_ROW_FILTER = os.getenv('SOURCE_ROW_FILTER', '')
+# Latest registered schema of the table (source_schema_versions, see common/schema_registry.py)
+REGISTERED_SCHEMA = schema_from_env()
+# LOAD_TYPE=cdc: replication slot (default dl_<table>) and the most changes read per run
+CDC_SLOT_NAME = os.getenv('CDC_SLOT_NAME', '')
+CDC_MAX_CHANGES = int(os.getenv('CDC_MAX_CHANGES', '100000'))
 
 # Database connections
 POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'source_pg_db')
@@ -70,28 +71,20 @@ POSTGRES_DB = os.getenv('POSTGRES_DB', 'source_db')
 POSTGRES_USER = os.getenv('POSTGRES_USER', 'read_user')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'read_password')
 
-# MinIO configuration
-MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio_server:9000')
-MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
-MINIO_BUCKET = os.getenv('MINIO_BUCKET', 'datalake')
-MINIO_USE_SSL = os.getenv('MINIO_USE_SSL', 'false').lower() == 'true'
-# Try to resolve hostname to IP to avoid DNS issues
-try:
-    import socket
-    if ':' in MINIO_ENDPOINT:
-        host, port = MINIO_ENDPOINT.split(':')
-        try:
-            ip = socket.gethostbyname(host)
-            MINIO_ENDPOINT = f"{ip}:{port}"
-        except:
-            pass  # Use original if resolution fails
-except:
-    pass
+# Per-pipeline Parquet writer settings (pipeline_config.dl_parquet_*, see common/parquet_format.py)
+PARQUET_OPTIONS = ParquetWriteOptions.from_env()
 
 # Config database
 CONFIG_DB_PATH = os.getenv('CONFIG_DB_PATH', '/data/config.db')
 
+# Artificial processing delay; SIMULATED_DELAY=0 skips it (data_pipeline_resources/benchmark)
+SIMULATED_DELAY = os.getenv('SIMULATED_DELAY', '1') == '1'
+
+
+def emit_metric(name: str, value: float):
+    """Print a timing/size for the driver or backend to record (see backend/utils/metrics.py)"""
+    print(f"METRIC:{name}:{value}", file=sys.stdout)
+
 
 def get_postgres_connection():
     """Get PostgreSQL database connection"""
@@ -109,167 +102,191 @@ def get_postgres_connection():
         raise
 
 
-def get_minio_client():
-    """Get MinIO client"""
-    try:
-        # Remove http:// or https:// prefix if present
-        endpoint = MINIO_ENDPOINT.replace('http://', '').replace('https://', '')
-        
-        client = Minio(
-            endpoint,
-            access_key=MINIO_ACCESS_KEY,
-            secret_key=MINIO_SECRET_KEY,
-            secure=MINIO_USE_SSL
-        )
-        return client
-    except Exception as e:
-        logger.error(f"Error creating MinIO client: {e}")
-        raise
-
+def get_source_schema(pg_conn, source_tablename: str) -> SourceSchema:
+    """The table's columns and types; the catalog is only read again when its
+    fingerprint no longer matches the registered schema, i.e. after DDL"""
+    cursor = pg_conn.cursor()
+    relation = quote_identifier(source_tablename)
+    cursor.execute("""
+        SELECT md5(string_agg(attname || ' ' || format_type(atttypid, atttypmod), ',' ORDER BY attnum))
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    """, (relation,))
+    current_fingerprint = cursor.fetchone()[0]
+    if REGISTERED_SCHEMA and REGISTERED_SCHEMA.fingerprint == current_fingerprint:
+        return REGISTERED_SCHEMA
 
-def ensure_minio_bucket(client: Minio, bucket_name: str):
-    """Ensure MinIO bucket exists, create if it doesn't"""
-    try:
-        # Try to create bucket, ignore error if it already exists
-        try:
-            client.make_bucket(bucket_name)
-            logger.info(f"Created bucket: {bucket_name}")
-        except S3Error as e:
-            error_code = getattr(e, 'code', '')
-            if error_code in ['BucketAlreadyOwnedByYou', 'BucketAlreadyExists']:
-                logger.info(f"Bucket {bucket_name} already exists")
-            else:
-                # If bucket creation fails, assume it exists and try to use it
-                logger.warning(f"Could not create bucket {bucket_name}, assuming it exists: {e}")
-    except Exception as e:
-        logger.warning(f"Error ensuring bucket exists, will try to proceed: {e}")
+    cursor.execute("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """, (relation,))
+    schema = SourceSchema.from_columns([(name, pg_type) for name, pg_type in cursor.fetchall()])
+    if REGISTERED_SCHEMA:
+        added = [name for name, _ in schema.columns if name not in REGISTERED_SCHEMA.pg_types()]
+        logger.info(f"Schema of {source_tablename} changed" + (f", added columns: {', '.join(added)}" if added else ''))
+    # For the driver to register as the table's next schema version
+    print(f"SCHEMA:{schema.to_json()}", file=sys.stdout)
+    return schema
 
 
 def build_query(source_tablename: str, load_type: str, incremental_key: Optional[str], 
-                last_incremental_value: Optional[str]) -> tuple[str, Optional[tuple]]:
-    """Build SQL query based on load type
+                last_watermark: Optional[Watermark], columns: Optional[List[str]] = None,
+                row_filter: Optional[str] = None, tiebreaker_key: Optional[str] = None,
+                overlap: int = 0) -> tuple[str, Optional[tuple]]:
+    """Build SQL query based on load type, projecting `columns` (all when empty) and
+    keeping only the rows matching `row_filter`
     
     Returns:
         Tuple of (query: str, params: Optional[tuple])
     """
+    select = f'SELECT {select_list(columns or [], incremental_key, tiebreaker_key)} FROM "{source_tablename}"'
+    conditions = [f'({check_row_filter(row_filter)})'] if row_filter else []
+
     if load_type == 'full':
-        query = f'SELECT * FROM "{source_tablename}"'
+        query = select + (f' WHERE {" AND ".join(conditions)}' if conditions else '')
         return query, None
     
     elif load_type == 'incremental':
         if not incremental_key:
             raise ValueError("incremental_key is required for incremental loads")
         
-        if last_incremental_value:
-            # Query records where incremental_key > last_incremental_value
-            # Using parameterized query for safety
-            query = f'SELECT * FROM "{source_tablename}" WHERE "{incremental_key}" > %s ORDER BY "{incremental_key}"'
-            return query, (last_incremental_value,)
-        else:
-            # First incremental load - get all records
-            query = f'SELECT * FROM "{source_tablename}" ORDER BY "{incremental_key}"'
-            return query, None
+        params = None
+        if last_watermark:
+            # Using parameterized query for safety (so a '%' in the row filter must be escaped)
+            conditions = [condition.replace('%', '%%') for condition in conditions]
+            if last_watermark.type is None:
+                # Text watermark of an earlier version: compared as before, typed from the next run on
+                conditions.append(f'"{incremental_key}" > %s')
+                params = (last_watermark.value,)
+            elif tiebreaker_key:
+                # Re-read the boundary (and overlap window); rows already loaded are dropped by watermark.drop_loaded
+                conditions.append(f'"{incremental_key}" >= %s::{last_watermark.type}')
+                params = (watermark.lower_bound(last_watermark, overlap),)
+            else:
+                conditions.append(f'"{incremental_key}" > %s::{last_watermark.type}')
+                params = (last_watermark.value,)
+        # Without a watermark (first incremental load) - get all records
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        order = f'"{incremental_key}"' + (f', "{tiebreaker_key}"' if tiebreaker_key and tiebreaker_key != incremental_key else '')
+        query = f'{select}{where} ORDER BY {order}'
+        return query, params
     
     else:
         raise ValueError(f"Unknown load_type: {load_type}")
 
 
-def get_max_incremental_value(df: pd.DataFrame, incremental_key: str) -> Optional[str]:
-    """Get the maximum value of incremental_key from the dataframe"""
-    if df.empty or incremental_key not in df.columns:
-        return None
+def write_to_dl(df: pd.DataFrame, source_tablename: str, incremental_key: Optional[str],
+                source_schema: Optional[SourceSchema]) -> tuple[str, int]:
+    """Write a DataFrame as one Parquet file of the table's current hour partition,
+    with the source schema's column types
+
+    Returns:
+        Tuple of (full datalake path: str, rows written: int)
+    """
+    # Connect to the datalake (MinIO/S3 or local, see common/object_store.py)
+    store = get_object_store()
+    logger.info(f"Using {type(store).__name__} bucket {store.bucket}")
     
-    max_value = df[incremental_key].max()
-    if pd.isna(max_value):
-        return None
+    # Ensure bucket exists
+    store.ensure_bucket()
     
-    # Convert to ISO format string if it's a datetime
-    if isinstance(max_value, pd.Timestamp):
-        return max_value.isoformat()
-    elif isinstance(max_value, datetime):
-        return max_value.isoformat()
-    else:
-        return str(max_value)
+    # Define object path
+    # Standard: source_to_dl/dl_tablename/yyyy/mm/dd/hh/tablename_yyyymmdd_hhmmss.parquet
+    # Use IST timezone for consistency
+    now = datetime.now(IST)
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
+    year = now.strftime('%Y')
+    month = now.strftime('%m')
+    day = now.strftime('%d')
+    hour = now.strftime('%H')
+    
+    object_name = f"{SOURCE_TYPE}_to_dl/dl_{source_tablename}/{year}/{month}/{day}/{hour}/{source_tablename}_{timestamp}.parquet"
+    rows_count = len(df)
+    
+    # Convert DataFrame to Parquet format in memory
+    logger.info(f"Encoding Parquet ({PARQUET_OPTIONS.label()})")
+    temp_started = time.perf_counter()
+    parquet_buffer = io.BytesIO()
+    write_parquet(to_arrow(df, source_schema), parquet_buffer, PARQUET_OPTIONS, incremental_key)
+    parquet_buffer.seek(0)
+    emit_metric('parquet_encode_seconds', time.perf_counter() - temp_started)
+    emit_metric('bytes', parquet_buffer.getbuffer().nbytes)
+    
+    # Upload to the datalake
+    logger.info(f"Uploading to datalake: {store.uri(object_name)}")
+    temp_started = time.perf_counter()
+    store.put(
+        object_name,
+        parquet_buffer,
+        length=parquet_buffer.getbuffer().nbytes,
+        content_type='application/parquet'
+    )
+    emit_metric('minio_upload_seconds', time.perf_counter() - temp_started)
+    
+    logger.info(f"Successfully uploaded {rows_count} rows to {object_name}")
+    return store.uri(object_name), rows_count
 
 
-def load_data_to_minio(source_tablename: str, load_type: str, 
+def load_data_to_dl(source_tablename: str, load_type: str, 
                        incremental_key: Optional[str], 
-                       last_incremental_value: Optional[str]) -> tuple[bool, Optional[str], Optional[str], Optional[str], Optional[int]]:
-    """Load data from Postgres to MinIO
+                       last_incremental_value: Optional[str]) -> tuple[bool, Optional[str], Optional[Watermark], Optional[str], Optional[int]]:
+    """Load data from Postgres to the datalake
     
     Returns:
-        Tuple of (success: bool, error: Optional[str], max_incremental_value: Optional[str], file_path: Optional[str], rows_processed: Optional[int])
+        Tuple of (success: bool, error: Optional[str], new_watermark: Optional[Watermark], file_path: Optional[str], rows_processed: Optional[int])
     """
+    if load_type == 'cdc':
+        return load_cdc_to_dl(source_tablename, incremental_key, last_incremental_value)
+
     pg_conn = None
     try:
+        last_watermark = watermark.load(WATERMARK, last_incremental_value) if load_type == 'incremental' else None
+        if INCREMENTAL_OVERLAP and not TIEBREAKER_KEY:
+            logger.warning("INCREMENTAL_OVERLAP needs a TIEBREAKER_KEY to drop re-read rows, ignoring it")
+
         # Connect to PostgreSQL
         logger.info(f"Connecting to PostgreSQL: {POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
         pg_conn = get_postgres_connection()
+        # The extraction only reads; a configured row filter cannot write to the source
+        pg_conn.set_session(readonly=True)
+        source_schema = get_source_schema(pg_conn, source_tablename)
         
         # Build query
-        query, query_params = build_query(source_tablename, load_type, incremental_key, last_incremental_value)
+        query, query_params = build_query(source_tablename, load_type, incremental_key, last_watermark,
+                                          SOURCE_COLUMNS, SOURCE_ROW_FILTER, TIEBREAKER_KEY, INCREMENTAL_OVERLAP)
         logger.info(f"Executing query: {query}")
         if query_params:
             logger.info(f"Query parameters: {query_params}")
         
         # Execute query and fetch data
-        df = pd.read_sql_query(query, pg_conn, params=query_params)
+        temp_started = time.perf_counter()
+        df = pd.read_sql_query(query, pg_conn, params=query_params, coerce_float=False)
+        emit_metric('extract_query_seconds', time.perf_counter() - temp_started)
         logger.info(f"Fetched {len(df)} rows from {source_tablename}")
+        pg_conn.close()
+        
+        new_watermark = None
+        if load_type == 'incremental' and incremental_key:
+            if TIEBREAKER_KEY:
+                # Boundary and overlap rows an earlier run already wrote
+                fetched = len(df)
+                df = watermark.drop_loaded(df, incremental_key, TIEBREAKER_KEY, last_watermark)
+                logger.info(f"Dropped {fetched - len(df)} rows loaded by an earlier run")
+            new_watermark = watermark.advance(df, incremental_key, TIEBREAKER_KEY, INCREMENTAL_OVERLAP, last_watermark)
         
         if df.empty:
             logger.warning(f"No data found for {source_tablename}")
             # Still return success, but no incremental value to update
             return True, None, None, None, 0
         
-        # Get max incremental value for incremental loads
-        max_incremental_value = None
-        if load_type == 'incremental' and incremental_key:
-            max_incremental_value = get_max_incremental_value(df, incremental_key)
-            logger.info(f"Max incremental value: {max_incremental_value}")
-        
-        # Connect to MinIO
-        logger.info(f"Connecting to MinIO: {MINIO_ENDPOINT}")
-        minio_client = get_minio_client()
-        
-        # Ensure bucket exists
-        ensure_minio_bucket(minio_client, MINIO_BUCKET)
-        
-        # Define object path
-        # Standard: source_to_dl/dl_tablename/yyyy/mm/dd/hh/tablename_yyyymmdd_hhmmss.parquet
-        # Use IST timezone for consistency
-        now = datetime.now(IST)
-        timestamp = now.strftime('%Y%m%d_%H%M%S')
-        year = now.strftime('%Y')
-        month = now.strftime('%m')
-        day = now.strftime('%d')
-        hour = now.strftime('%H')
-        
-        object_name = f"{SOURCE_TYPE}_to_dl/dl_{source_tablename}/{year}/{month}/{day}/{hour}/{source_tablename}_{timestamp}.parquet"
-        rows_count = len(df)
-        
-        # Convert DataFrame to Parquet format in memory
-        parquet_buffer = io.BytesIO()
-        df.to_parquet(parquet_buffer, index=False, engine='pyarrow')
-        parquet_buffer.seek(0)
-        
-        # Upload to MinIO
-        logger.info(f"Uploading to MinIO: {MINIO_BUCKET}/{object_name}")
-        minio_client.put_object(
-            MINIO_BUCKET,
-            object_name,
-            parquet_buffer,
-            length=parquet_buffer.getbuffer().nbytes,
-            content_type='application/parquet'
-        )
+        if new_watermark:
+            logger.info(f"New watermark: {new_watermark.value} ({new_watermark.type}, {len(new_watermark.seen)} boundary rows)")
         
-        logger.info(f"Successfully uploaded {rows_count} rows to {object_name}")
+        full_path, rows_count = write_to_dl(df, source_tablename, incremental_key, source_schema)
         
-        # Close PostgreSQL connection
-        pg_conn.close()
-        
-        # Return full MinIO path
-        full_path = f"{MINIO_BUCKET}/{object_name}"
-        return True, None, max_incremental_value, full_path, rows_count
+        return True, None, new_watermark, full_path, rows_count
         
     except Exception as e:
         error_msg = f"Error loading data: {str(e)}"
@@ -279,6 +296,85 @@ def load_data_to_minio(source_tablename: str, load_type: str,
         return False, error_msg, None, None, None
 
 
+def print_watermark(new_watermark: Watermark):
+    """LAST_INCREMENTAL_VALUE / WATERMARK lines for the driver to store"""
+    print(f"LAST_INCREMENTAL_VALUE:{new_watermark.value}", file=sys.stdout, flush=True)
+    print(f"WATERMARK:{new_watermark.to_json()}", file=sys.stdout, flush=True)
+    logger.info(f"Output last_incremental_value: {new_watermark.value}")
+
+
+def load_cdc_to_dl(source_tablename: str, incremental_key: Optional[str],
+                   last_lsn: Optional[str]) -> tuple[bool, Optional[str], Optional[Watermark], Optional[str], Optional[int]]:
+    """Load the changes pending in the table's replication slot to the datalake (see cdc.py)
+
+    The first run creates the slot and loads a snapshot of the table instead.
+    Returns the same tuple as load_data_to_dl, with the confirmed LSN as the watermark.
+    """
+    pg_conn = None
+    try:
+        logger.info(f"Connecting to PostgreSQL: {POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
+        pg_conn = get_postgres_connection()
+        # Slot functions cannot run inside a transaction that has already read data
+        pg_conn.autocommit = True
+        cursor = pg_conn.cursor()
+        slot = CDC_SLOT_NAME or cdc.slot_name(source_tablename)
+        source_schema = get_source_schema(pg_conn, source_tablename)
+
+        if cdc.get_slot(cursor, slot) is None:
+            start_lsn = cdc.create_slot(cursor, slot)
+            logger.info(f"Created replication slot {slot} at {start_lsn}, loading snapshot")
+            query, _ = build_query(source_tablename, 'full', None, None, SOURCE_COLUMNS, SOURCE_ROW_FILTER)
+            # The slot connection is autocommit and its user has REPLICATION: run the snapshot
+            # (and the pipeline's row filter) in a read-only transaction of its own
+            snapshot_conn = get_postgres_connection()
+            try:
+                snapshot_conn.set_session(readonly=True)
+                temp_started = time.perf_counter()
+                df = pd.read_sql_query(query, snapshot_conn, coerce_float=False)
+                emit_metric('extract_query_seconds', time.perf_counter() - temp_started)
+            finally:
+                snapshot_conn.close()
+            df[cdc.OP_COLUMN] = 'R'
+            df[cdc.LSN_COLUMN] = start_lsn
+            new_lsn = start_lsn
+        else:
+            if SOURCE_ROW_FILTER:
+                logger.warning("The row filter only applies to the snapshot; changes are loaded unfiltered")
+            temp_started = time.perf_counter()
+            changes = cdc.peek_changes(cursor, slot, CDC_MAX_CHANGES)
+            emit_metric('extract_query_seconds', time.perf_counter() - temp_started)
+            if not changes:
+                logger.info(f"No pending changes in {slot}")
+                pg_conn.close()
+                return True, None, None, None, 0
+            new_lsn = changes[-1][0]
+            if last_lsn:
+                # Already written by a run that could not advance the slot afterwards
+                changes = [change for change in changes if cdc.lsn_to_int(change[0]) > cdc.lsn_to_int(last_lsn)]
+            df = cdc.changes_to_dataframe(changes, source_tablename, SOURCE_COLUMNS)
+            logger.info(f"Read {len(changes)} changes up to {new_lsn}, {len(df)} for {source_tablename}")
+
+        full_path, rows_count = None, 0
+        if not df.empty:
+            full_path, rows_count = write_to_dl(df, source_tablename, incremental_key, source_schema)
+        # Only once the file is stored: a failed upload leaves the changes in the slot. The
+        # watermark goes out before the advance, so the driver stores it even if that fails
+        new_watermark = Watermark('pg_lsn', new_lsn)
+        print_watermark(new_watermark)
+        cdc.advance_slot(cursor, slot, new_lsn)
+        logger.info(f"Advanced {slot} to {new_lsn}")
+
+        pg_conn.close()
+        return True, None, new_watermark, full_path, rows_count
+
+    except Exception as e:
+        error_msg = f"Error loading changes: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        if pg_conn:
+            pg_conn.close()
+        return False, error_msg, None, None, None
+
+
 def write_status_to_config(success: bool, error: Optional[str] = None):
     """Write execution status to config database"""
     try:
@@ -319,9 +415,10 @@ def main():
         sys.exit(1)
     
     # Simulate processing time (3-8 seconds)
-    sleep_time = random.uniform(3, 8)
-    logger.info(f"Processing... (simulated delay: {sleep_time:.1f}s)")
-    time.sleep(sleep_time)
+    if SIMULATED_DELAY:
+        sleep_time = random.uniform(3, 8)
+        logger.info(f"Processing... (simulated delay: {sleep_time:.1f}s)")
+        time.sleep(sleep_time)
     
     logger.info(f"Starting Postgres to Datalake loader for table: {SOURCE_TABLENAME}")
     logger.info(f"Load type: {LOAD_TYPE}")
@@ -329,14 +426,26 @@ def main():
     if LOAD_TYPE == 'incremental':
         logger.info(f"Incremental key: {INCREMENTAL_KEY}")
         logger.info(f"Last incremental value: {LAST_INCREMENTAL_VALUE or 'None (first run)'}")
+    elif LOAD_TYPE == 'cdc':
+        logger.info(f"Confirmed LSN: {LAST_INCREMENTAL_VALUE or 'None (first run)'}")
+    if SOURCE_COLUMNS:
+        logger.info(f"Columns: {', '.join(SOURCE_COLUMNS)}")
+    if SOURCE_ROW_FILTER:
+        logger.info(f"Row filter: {SOURCE_ROW_FILTER}")
     
     # Load data
-    success, error, max_incremental_value, file_path, rows_processed = load_data_to_minio(
+    load_args = (
         SOURCE_TABLENAME,
         LOAD_TYPE,
         INCREMENTAL_KEY if INCREMENTAL_KEY else None,
         LAST_INCREMENTAL_VALUE if LAST_INCREMENTAL_VALUE else None
     )
+    if PROFILE_ENABLED:
+        result, profile, summary = run_profiled(load_data_to_dl, *load_args)
+        success, error, new_watermark, file_path, rows_processed = result
+        publish_profile(get_object_store(), 'source_to_dl', SOURCE_TABLENAME, profile, summary)
+    else:
+        success, error, new_watermark, file_path, rows_processed = load_data_to_dl(*load_args)
     
     # Write status to config
     write_status_to_config(success, error)
@@ -349,9 +458,9 @@ def main():
         if rows_processed is not None:
             print(f"ROWS_PROCESSED:{rows_processed}", file=sys.stdout)
             logger.info(f"Output rows_processed: {rows_processed}")
-        if LOAD_TYPE == 'incremental' and max_incremental_value:
-            print(f"LAST_INCREMENTAL_VALUE:{max_incremental_value}", file=sys.stdout)
-            logger.info(f"Output last_incremental_value: {max_incremental_value}")
+        # cdc prints its watermark itself, before advancing the slot
+        if LOAD_TYPE == 'incremental' and new_watermark:
+            print_watermark(new_watermark)
     
     if not success:
         logger.error(f"Load failed: {error}")
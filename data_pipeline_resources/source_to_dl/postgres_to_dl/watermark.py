@@ -0,0 +1,155 @@
+"""
+Typed incremental watermarks (LOAD_TYPE=incremental)
+
+The watermark is stored as JSON in pipeline_config.source_to_dl_watermark and
+passed to the loader as WATERMARK:
+
+    {"type": "timestamp", "value": "2023-01-15T10:30:00.123456",
+     "seen": [["2023-01-15T10:30:00.123456", "42"], ...]}
+
+type     the Postgres type the value is cast to in the source query, taken from the
+         extracted column (timestamp, timestamptz, date, bigint, numeric, double precision
+         or text); the value is written in that type's own text form, with full precision
+         and without time zone conversion
+seen     (key, tiebreaker) of the rows already loaded at or after value - overlap
+
+With a tiebreaker key (usually the primary key) the next run reads
+key >= value - overlap and drops the rows in `seen`, so rows sharing the boundary
+value, and rows committed late with a key inside the overlap window, are loaded
+exactly once. Without one it reads key > value, as before.
+
+A pipeline that only has the old text watermark (source_to_dl_last_incremental_value)
+runs once with key > value and gets a typed watermark from then on.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, List, NamedTuple, Optional, Tuple
+import pandas as pd  # type: ignore
+
+# pg_lsn is the confirmed LSN of cdc pipelines (cdc.py), stored the same way
+TYPES = ('timestamp', 'timestamptz', 'date', 'bigint', 'numeric', 'double precision', 'text', 'pg_lsn')
+# Beyond this many boundary rows, the oldest are forgotten (they may then be loaded twice, never skipped)
+MAX_SEEN = 10000
+
+
+class Watermark(NamedTuple):
+    type: Optional[str]  # None = legacy text watermark, compared without a cast
+    value: str
+    seen: List[Tuple[str, str]] = []
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Watermark':
+        data = json.loads(text)
+        if data['type'] not in TYPES:
+            raise ValueError(f"Unknown watermark type: {data['type']}")
+        return cls(data['type'], data['value'], [tuple(entry) for entry in data.get('seen', [])])
+
+    def to_json(self) -> str:
+        return json.dumps({'type': self.type, 'value': self.value, 'seen': [list(entry) for entry in self.seen]})
+
+
+def load(watermark_json: Optional[str], last_incremental_value: Optional[str]) -> Optional[Watermark]:
+    if watermark_json:
+        loaded = Watermark.from_json(watermark_json)
+        # The LSN of a pipeline that used to be cdc is no incremental key value
+        return loaded if loaded.type != 'pg_lsn' else None
+    if last_incremental_value:
+        return Watermark(None, last_incremental_value)
+    return None
+
+
+def pg_type(series: pd.Series) -> str:
+    """Postgres type of an extracted column, from what psycopg2/pandas made of it"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'timestamptz' if getattr(series.dt, 'tz', None) is not None else 'timestamp'
+    if pd.api.types.is_integer_dtype(series):
+        return 'bigint'
+    if pd.api.types.is_float_dtype(series):
+        return 'double precision'
+    sample = series.dropna()
+    sample = sample.iloc[0] if len(sample) else None
+    if isinstance(sample, Decimal):
+        return 'numeric'
+    if isinstance(sample, datetime):
+        return 'timestamptz' if sample.tzinfo else 'timestamp'
+    if isinstance(sample, date):
+        return 'date'
+    return 'text'
+
+
+def serialize(value: Any) -> str:
+    """Text form Postgres parses back to the same value"""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return serialize(value.item())
+    return str(value)
+
+
+def parse(type_name: str, text: str) -> Any:
+    if type_name in ('timestamp', 'timestamptz'):
+        return pd.Timestamp(text)
+    if type_name == 'date':
+        return date.fromisoformat(text)
+    if type_name == 'bigint':
+        return int(text)
+    if type_name == 'numeric':
+        return Decimal(text)
+    if type_name == 'double precision':
+        return float(text)
+    return text
+
+
+def lower_bound(watermark: Watermark, overlap: int) -> str:
+    """value - overlap (seconds for time keys, key units for numbers); text keys have no overlap"""
+    value = parse(watermark.type, watermark.value)
+    if not overlap or watermark.type == 'text':
+        return watermark.value
+    if watermark.type == 'date':
+        return (pd.Timestamp(value) - timedelta(seconds=overlap)).date().isoformat()
+    if watermark.type in ('timestamp', 'timestamptz'):
+        return serialize(value - timedelta(seconds=overlap))
+    return serialize(value - type(value)(overlap))
+
+
+def row_ids(df: pd.DataFrame, incremental_key: str, tiebreaker_key: str) -> pd.Series:
+    return pd.Series(list(zip(df[incremental_key].map(serialize), df[tiebreaker_key].map(serialize))),
+                     index=df.index)
+
+
+def drop_loaded(df: pd.DataFrame, incremental_key: str, tiebreaker_key: str,
+                watermark: Optional[Watermark]) -> pd.DataFrame:
+    """Rows not loaded by an earlier run, one per tiebreaker value (the last in key order)"""
+    df = df.drop_duplicates(subset=[tiebreaker_key], keep='last')
+    if watermark and watermark.seen:
+        df = df[~row_ids(df, incremental_key, tiebreaker_key).isin(set(watermark.seen))]
+    return df
+
+
+def advance(df: pd.DataFrame, incremental_key: str, tiebreaker_key: Optional[str], overlap: int,
+            previous: Optional[Watermark]) -> Optional[Watermark]:
+    """Watermark after loading df; never moves back (a batch of late rows only adds to `seen`)"""
+    keys = df[incremental_key].dropna()
+    if keys.empty:
+        # NULL keys never match key > value; nothing to advance to
+        return previous
+    type_name = pg_type(keys)
+    value = keys.max()
+    if previous and previous.type == type_name and parse(type_name, previous.value) > value:
+        value = parse(type_name, previous.value)
+    current = Watermark(type_name, serialize(value))
+    if not tiebreaker_key:
+        return current
+
+    floor = parse(type_name, lower_bound(current, overlap))
+    in_window = df[df[incremental_key].notna() & (df[incremental_key] >= floor)]
+    seen = list(row_ids(in_window, incremental_key, tiebreaker_key))
+    if previous and previous.type == type_name:
+        seen = [entry for entry in previous.seen if parse(type_name, entry[0]) >= floor] + seen
+    seen = list(dict.fromkeys(seen))
+    return current._replace(seen=seen[-MAX_SEEN:])
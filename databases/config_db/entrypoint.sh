@@ -2,6 +2,7 @@
 
 DB_FILE="/data/config.db"
 INIT_SQL="/init.sql"
+MIGRATIONS_DIR="/migrations"
 
 # Check if database needs initialization
 if [ ! -f "$DB_FILE" ]; then
@@ -12,6 +13,30 @@ else
     echo "Database already exists."
 fi
 
+# WAL lets the backend and driver containers read while one of them writes.
+# journal_mode is persistent, so setting it once here covers every client.
+sqlite3 "$DB_FILE" "PRAGMA journal_mode = WAL;" > /dev/null
+
+# Apply pending schema migrations in filename order.
+# Each migration runs in its own transaction and is recorded in schema_migrations,
+# so this is safe to run on every container start.
+sqlite3 "$DB_FILE" "CREATE TABLE IF NOT EXISTS schema_migrations (version TEXT PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);"
+
+for migration in "$MIGRATIONS_DIR"/*.sql; do
+    [ -f "$migration" ] || continue
+    version=$(basename "$migration" .sql)
+    applied=$(sqlite3 "$DB_FILE" "SELECT 1 FROM schema_migrations WHERE version = '$version';")
+    if [ -n "$applied" ]; then
+        continue
+    fi
+
+    echo "Applying migration $version..."
+    if ! { echo "BEGIN;"; cat "$migration"; echo "INSERT INTO schema_migrations (version) VALUES ('$version');"; echo "COMMIT;"; } | sqlite3 -bail "$DB_FILE"; then
+        echo "Migration $version failed, aborting."
+        exit 1
+    fi
+done
+echo "Schema migrations up to date."
+
 # Keep the container running so you can access it
 exec tail -f /dev/null
-
@@ -0,0 +1,36 @@
+-- Secondary indexes for the run log access paths used by the backend API.
+-- Without these every /logs, /runs and /stats request is a full table scan.
+
+-- /logs (no table filter) and GET_DAILY_RUNS: range on started_at, covers status
+CREATE INDEX IF NOT EXISTS idx_stage_logs_started_at
+    ON pipeline_run_stage_logs (started_at, status);
+
+-- /logs?source_tablename=... and GET_LOGS_BY_TABLE: equality + ORDER BY started_at DESC
+CREATE INDEX IF NOT EXISTS idx_stage_logs_table_started_at
+    ON pipeline_run_stage_logs (source_tablename, started_at);
+
+-- GET_RUNS_PER_TABLE: GROUP BY source_tablename, covers status and rows_processed
+CREATE INDEX IF NOT EXISTS idx_stage_logs_table_status_rows
+    ON pipeline_run_stage_logs (source_tablename, status, rows_processed);
+
+-- GET_STATUS_DISTRIBUTION and GET_TOTAL_STATS: GROUP BY / aggregate over status
+CREATE INDEX IF NOT EXISTS idx_stage_logs_status_rows
+    ON pipeline_run_stage_logs (status, rows_processed);
+
+-- GET_PIPELINE_TYPE_DISTRIBUTION and GET_LOADED_RECORDS_STATS
+CREATE INDEX IF NOT EXISTS idx_stage_logs_type_status_started_at
+    ON pipeline_run_stage_logs (pipeline_type, status, started_at, source_tablename, rows_processed);
+
+-- GET_STAGE_LOGS_BY_RUN_ID: equality on pipeline_run_id, ORDER BY stage_order
+CREATE INDEX IF NOT EXISTS idx_stage_logs_run_id_stage_order
+    ON pipeline_run_stage_logs (pipeline_run_id, stage_order);
+
+-- GET_ALL_RUNS_MASTER: ORDER BY started_at DESC LIMIT 50
+CREATE INDEX IF NOT EXISTS idx_runs_master_started_at
+    ON pipeline_runs_master (started_at);
+
+-- GET_RUNS_MASTER_BY_TABLE: equality + ORDER BY started_at DESC LIMIT 50
+CREATE INDEX IF NOT EXISTS idx_runs_master_table_started_at
+    ON pipeline_runs_master (source_tablename, started_at);
+
+ANALYZE;
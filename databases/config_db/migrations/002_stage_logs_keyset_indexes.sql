@@ -0,0 +1,15 @@
+-- /logs paginates by keyset on (started_at, id), so the started_at indexes
+-- also carry id to serve the tie-breaker without a sort.
+
+DROP INDEX IF EXISTS idx_stage_logs_started_at;
+DROP INDEX IF EXISTS idx_stage_logs_table_started_at;
+
+-- /logs (no table filter) and GET_DAILY_RUNS: range on started_at, covers status
+CREATE INDEX IF NOT EXISTS idx_stage_logs_started_at_id
+    ON pipeline_run_stage_logs (started_at, id, status);
+
+-- /logs?source_tablename=... and GET_LOGS_BY_TABLE: equality + ORDER BY started_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_stage_logs_table_started_at_id
+    ON pipeline_run_stage_logs (source_tablename, started_at, id);
+
+ANALYZE;
@@ -0,0 +1,124 @@
+-- Hourly and daily rollups of terminal stage logs, so dashboard stats no longer
+-- aggregate the whole pipeline_run_stage_logs table on every request.
+--
+-- Buckets use the wall-clock prefix of started_at as stored (IST, see drivers/runs.py):
+--   bucket_hour = 'YYYY-MM-DDTHH:00:00', bucket_date = 'YYYY-MM-DD'
+-- Rollups are maintained by triggers when a log is inserted in, or updated to, a
+-- terminal status ('success'/'failed'). Deleting raw logs does not touch them.
+
+CREATE TABLE IF NOT EXISTS pipeline_stats_hourly (
+    bucket_hour TEXT NOT NULL,
+    source_tablename TEXT NOT NULL,
+    pipeline_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    total_duration_ms INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_hour, source_tablename, pipeline_type, status)
+);
+
+CREATE TABLE IF NOT EXISTS pipeline_stats_daily (
+    bucket_date TEXT NOT NULL,
+    source_tablename TEXT NOT NULL,
+    pipeline_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    total_duration_ms INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_date, source_tablename, pipeline_type, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stats_hourly_type_status_hour
+    ON pipeline_stats_hourly (pipeline_type, status, bucket_hour, source_tablename, rows_processed);
+
+CREATE TRIGGER IF NOT EXISTS trg_stage_logs_rollup_insert
+AFTER INSERT ON pipeline_run_stage_logs
+WHEN NEW.status IN ('success', 'failed')
+BEGIN
+    INSERT INTO pipeline_stats_hourly
+        (bucket_hour, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+    VALUES (
+        substr(COALESCE(NEW.started_at, NEW.completed_at), 1, 13) || ':00:00',
+        NEW.source_tablename, NEW.pipeline_type, NEW.status, 1,
+        COALESCE(NEW.rows_processed, 0),
+        COALESCE(CAST(ROUND((julianday(NEW.completed_at) - julianday(NEW.started_at)) * 86400000) AS INTEGER), 0)
+    )
+    ON CONFLICT (bucket_hour, source_tablename, pipeline_type, status) DO UPDATE SET
+        run_count = run_count + excluded.run_count,
+        rows_processed = rows_processed + excluded.rows_processed,
+        total_duration_ms = total_duration_ms + excluded.total_duration_ms;
+
+    INSERT INTO pipeline_stats_daily
+        (bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+    VALUES (
+        substr(COALESCE(NEW.started_at, NEW.completed_at), 1, 10),
+        NEW.source_tablename, NEW.pipeline_type, NEW.status, 1,
+        COALESCE(NEW.rows_processed, 0),
+        COALESCE(CAST(ROUND((julianday(NEW.completed_at) - julianday(NEW.started_at)) * 86400000) AS INTEGER), 0)
+    )
+    ON CONFLICT (bucket_date, source_tablename, pipeline_type, status) DO UPDATE SET
+        run_count = run_count + excluded.run_count,
+        rows_processed = rows_processed + excluded.rows_processed,
+        total_duration_ms = total_duration_ms + excluded.total_duration_ms;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stage_logs_rollup_update
+AFTER UPDATE OF status ON pipeline_run_stage_logs
+WHEN NEW.status IN ('success', 'failed') AND OLD.status NOT IN ('success', 'failed')
+BEGIN
+    INSERT INTO pipeline_stats_hourly
+        (bucket_hour, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+    VALUES (
+        substr(COALESCE(NEW.started_at, NEW.completed_at), 1, 13) || ':00:00',
+        NEW.source_tablename, NEW.pipeline_type, NEW.status, 1,
+        COALESCE(NEW.rows_processed, 0),
+        COALESCE(CAST(ROUND((julianday(NEW.completed_at) - julianday(NEW.started_at)) * 86400000) AS INTEGER), 0)
+    )
+    ON CONFLICT (bucket_hour, source_tablename, pipeline_type, status) DO UPDATE SET
+        run_count = run_count + excluded.run_count,
+        rows_processed = rows_processed + excluded.rows_processed,
+        total_duration_ms = total_duration_ms + excluded.total_duration_ms;
+
+    INSERT INTO pipeline_stats_daily
+        (bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+    VALUES (
+        substr(COALESCE(NEW.started_at, NEW.completed_at), 1, 10),
+        NEW.source_tablename, NEW.pipeline_type, NEW.status, 1,
+        COALESCE(NEW.rows_processed, 0),
+        COALESCE(CAST(ROUND((julianday(NEW.completed_at) - julianday(NEW.started_at)) * 86400000) AS INTEGER), 0)
+    )
+    ON CONFLICT (bucket_date, source_tablename, pipeline_type, status) DO UPDATE SET
+        run_count = run_count + excluded.run_count,
+        rows_processed = rows_processed + excluded.rows_processed,
+        total_duration_ms = total_duration_ms + excluded.total_duration_ms;
+END;
+
+-- Daily rollups plus logs that are still running (not yet in the rollups).
+-- The dashboard summary reads from this view.
+CREATE VIEW IF NOT EXISTS pipeline_stats_daily_live AS
+SELECT bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms
+FROM pipeline_stats_daily
+UNION ALL
+SELECT substr(started_at, 1, 10) as bucket_date, source_tablename, pipeline_type, status,
+       COUNT(*) as run_count, SUM(COALESCE(rows_processed, 0)) as rows_processed, 0 as total_duration_ms
+FROM pipeline_run_stage_logs
+WHERE status = 'running'
+GROUP BY substr(started_at, 1, 10), source_tablename, pipeline_type, status;
+
+-- Backfill existing history
+INSERT INTO pipeline_stats_hourly
+    (bucket_hour, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+SELECT substr(COALESCE(started_at, completed_at), 1, 13) || ':00:00',
+       source_tablename, pipeline_type, status, COUNT(*),
+       SUM(COALESCE(rows_processed, 0)),
+       SUM(COALESCE(CAST(ROUND((julianday(completed_at) - julianday(started_at)) * 86400000) AS INTEGER), 0))
+FROM pipeline_run_stage_logs
+WHERE status IN ('success', 'failed')
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO pipeline_stats_daily
+    (bucket_date, source_tablename, pipeline_type, status, run_count, rows_processed, total_duration_ms)
+SELECT substr(bucket_hour, 1, 10), source_tablename, pipeline_type, status,
+       SUM(run_count), SUM(rows_processed), SUM(total_duration_ms)
+FROM pipeline_stats_hourly
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,20 @@
+-- Numeric stage durations.
+--
+-- time_taken is display text and was written in two formats ('HH:MM:SS.mmm' by the
+-- drivers, str(timedelta) by the backend), so it cannot be aggregated. duration_ms
+-- holds completed_at - started_at in integer milliseconds and is set by every writer
+-- that completes a stage log; existing rows are backfilled from their timestamps.
+
+ALTER TABLE pipeline_run_stage_logs ADD COLUMN duration_ms INTEGER;
+
+UPDATE pipeline_run_stage_logs
+SET duration_ms = CAST(ROUND((julianday(completed_at) - julianday(started_at)) * 86400000) AS INTEGER)
+WHERE duration_ms IS NULL
+AND started_at IS NOT NULL
+AND completed_at IS NOT NULL;
+
+-- Covers the /stats/durations window scans (percentiles per table and stage type)
+CREATE INDEX IF NOT EXISTS idx_stage_logs_status_started_at_duration
+    ON pipeline_run_stage_logs (status, started_at, source_tablename, pipeline_type, duration_ms, rows_processed);
+
+ANALYZE;
@@ -0,0 +1,9 @@
+-- Opt-in loader profiling.
+--
+-- pipeline_config.profiling_enabled runs that table's loaders under cProfile and
+-- tracemalloc; the loader uploads the profile to the datalake and the stage log
+-- keeps its path in profile_path (served by GET /logs/{log_id}/profile).
+
+ALTER TABLE pipeline_config ADD COLUMN profiling_enabled BOOLEAN DEFAULT 0;
+
+ALTER TABLE pipeline_run_stage_logs ADD COLUMN profile_path TEXT;
@@ -0,0 +1,10 @@
+-- Datalake read cache statistics.
+--
+-- The dl_to_sink loader reads through an on-disk cache (DL_CACHE_DIR, see
+-- data_pipeline_resources/common/object_cache.py) and reports how many of its
+-- lookups (Parquet footer and whole object) were served locally. NULL when the
+-- cache is disabled or the stage does not read the datalake.
+
+ALTER TABLE pipeline_run_stage_logs ADD COLUMN cache_hits INTEGER;
+
+ALTER TABLE pipeline_run_stage_logs ADD COLUMN cache_misses INTEGER;
@@ -0,0 +1,14 @@
+-- Datalake small-file compaction.
+--
+-- driver_dl_compaction merges the small Parquet files of a table's closed hourly
+-- partitions into target-sized files under <source_type>_to_dl/compacted/dl_<table>/
+-- (data_pipeline_resources/dl_compaction). Scheduled per table like the loaders;
+-- off by default.
+
+ALTER TABLE pipeline_config ADD COLUMN dl_compaction_schedule INTEGER DEFAULT 60;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_compaction_is_active BOOLEAN DEFAULT 0;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_compaction_last_run_timestamp TIMESTAMP;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_compaction_last_run_status TEXT;
@@ -0,0 +1,20 @@
+-- Datalake retention.
+--
+-- When dl_gc_is_active is set, driver_dl_compaction deletes the table's datalake
+-- files that its policy no longer keeps (data_pipeline_resources/dl_compaction/retention_gc):
+-- full loads keep the newest dl_retention_keep_snapshots files and/or the last
+-- dl_retention_keep_days days; incremental loads keep everything written since the
+-- last successful dl_to_sink run (and the last dl_retention_keep_days days).
+-- NULL or 0 disables a rule.
+
+ALTER TABLE pipeline_config ADD COLUMN dl_retention_keep_snapshots INTEGER;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_retention_keep_days INTEGER;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_gc_schedule INTEGER DEFAULT 1440;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_gc_is_active BOOLEAN DEFAULT 0;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_gc_last_run_timestamp TIMESTAMP;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_gc_last_run_status TEXT;
@@ -0,0 +1,23 @@
+-- Per-pipeline Parquet writer settings for datalake files.
+--
+-- Passed to the source loader (and the compaction job) as PARQUET_* environment
+-- variables, see data_pipeline_resources/common/parquet_format.py. NULL keeps the
+-- pyarrow defaults, i.e. the files written before this migration:
+--   dl_parquet_compression              snappy, zstd, lz4, gzip, brotli or none
+--   dl_parquet_compression_level        codec level, NULL = codec default
+--   dl_parquet_row_group_size           rows per row group
+--   dl_parquet_dictionary               'all', 'none' or comma-separated columns
+--   dl_parquet_statistics               0 skips min/max statistics
+--   dl_parquet_sort_by_incremental_key  1 sorts each file by source_to_dl_incremental_key
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_compression TEXT;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_compression_level INTEGER;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_row_group_size INTEGER;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_dictionary TEXT;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_statistics BOOLEAN;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_parquet_sort_by_incremental_key BOOLEAN DEFAULT 0;
@@ -0,0 +1,12 @@
+-- Column projection and row filter pushed down to the source query.
+--
+-- Passed to the source loader as SOURCE_COLUMNS / SOURCE_ROW_FILTER and to the
+-- sink loader as SOURCE_COLUMNS (column-pruned Parquet reads). NULL keeps the
+-- SELECT * of the rows written before this migration:
+--   source_to_dl_columns     comma-separated source columns; the incremental key is always added
+--   source_to_dl_row_filter  SQL boolean expression ANDed into the WHERE clause
+-- Both are checked against the source schema when saved through /config.
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_columns TEXT;
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_row_filter TEXT;
@@ -0,0 +1,15 @@
+-- Typed incremental watermarks with a tiebreaker key and overlap window.
+--
+-- source_to_dl_watermark holds the loader's WATERMARK JSON (value, Postgres type and
+-- the boundary rows already loaded, see data_pipeline_resources/source_to_dl/postgres_to_dl/watermark.py).
+-- source_to_dl_last_incremental_value keeps the plain value for display; pipelines
+-- without a typed watermark fall back to it once.
+--   source_to_dl_tiebreaker_key          unique column (usually the primary key) ordering rows with equal keys
+--   source_to_dl_incremental_overlap     re-read window below the watermark, seconds for time keys or key
+--                                        units for numeric keys; needs the tiebreaker key
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_watermark TEXT;
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_tiebreaker_key TEXT;
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_incremental_overlap INTEGER DEFAULT 0;
@@ -0,0 +1,17 @@
+-- Schema registry: every version of a source table's columns, as seen by the source loader.
+--
+-- The drivers pass the latest version to the loader (SOURCE_SCHEMA); the loader writes
+-- Parquet with those explicit Arrow types and reports a new version (SCHEMA:<json>) only
+-- when the source table's fingerprint changed, i.e. after DDL.
+-- See data_pipeline_resources/common/schema_registry.py.
+--   fingerprint    md5 of the 'name type' pairs in column order
+--   schema_json    {"fingerprint": ..., "columns": [{"name", "pg_type", "arrow_type"}, ...]}
+
+CREATE TABLE IF NOT EXISTS source_schema_versions (
+    source_tablename TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    schema_json TEXT NOT NULL,
+    registered_at TIMESTAMP,
+    PRIMARY KEY (source_tablename, version)
+);
@@ -0,0 +1,12 @@
+-- Non-secret projection of each source's and destination's credentials, written with them.
+--
+-- The backend stores mask_credentials() of the plaintext (passwords, keys and tokens
+-- replaced by '********') as JSON next to the encrypted token, so GET /sources,
+-- /sources/summary and /destinations list connections without decrypting anything.
+-- See data_pipeline_resources/common/credentials.py.
+-- Rows saved before this migration have NULL and are masked on read until they are
+-- saved again or POST /connections/rotate-keys re-encrypts them.
+
+ALTER TABLE sources_config ADD COLUMN source_creds_masked TEXT;
+
+ALTER TABLE destinations_config ADD COLUMN destination_creds_masked TEXT;
@@ -0,0 +1,89 @@
+-- Version counter per config table, behind the ETags of the cached listing endpoints
+-- (backend/utils/response_cache.py): GET /config, /stages, /sources/summary, /destinations/summary.
+--
+-- Bumped by triggers rather than by the API routers, because the drivers and the
+-- backend's run threads also write pipeline_config (watermarks, run status), and
+-- every such write must invalidate the cached responses.
+
+CREATE TABLE IF NOT EXISTS config_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO config_versions (table_name) VALUES
+    ('pipeline_config'),
+    ('sources_config'),
+    ('destinations_config'),
+    ('pipeline_stages');
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_config_version_insert
+AFTER INSERT ON pipeline_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_config_version_update
+AFTER UPDATE ON pipeline_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_config_version_delete
+AFTER DELETE ON pipeline_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sources_config_version_insert
+AFTER INSERT ON sources_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'sources_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sources_config_version_update
+AFTER UPDATE ON sources_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'sources_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sources_config_version_delete
+AFTER DELETE ON sources_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'sources_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_destinations_config_version_insert
+AFTER INSERT ON destinations_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'destinations_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_destinations_config_version_update
+AFTER UPDATE ON destinations_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'destinations_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_destinations_config_version_delete
+AFTER DELETE ON destinations_config
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'destinations_config';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_stages_version_insert
+AFTER INSERT ON pipeline_stages
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_stages';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_stages_version_update
+AFTER UPDATE ON pipeline_stages
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_stages';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pipeline_stages_version_delete
+AFTER DELETE ON pipeline_stages
+BEGIN
+    UPDATE config_versions SET version = version + 1 WHERE table_name = 'pipeline_stages';
+END;
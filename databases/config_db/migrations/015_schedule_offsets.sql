@@ -0,0 +1,12 @@
+-- Phase offsets for pipeline schedules (data_pipeline_resources/common/scheduling.py).
+--
+-- NULL keeps the old behaviour: the next run is schedule minutes after the last one.
+-- With an offset the runs are aligned to fixed slots, schedule minutes apart and offset
+-- minutes past the IST grid (schedule 60 / offset 25 = xx:25), so pipelines onboarded
+-- together do not all start at once. Assigned by POST /config/bulk.
+--   source_to_dl_schedule_offset   minutes, 0 <= offset < source_to_dl_schedule
+--   dl_to_sink_schedule_offset     minutes, 0 <= offset < dl_to_sink_schedule
+
+ALTER TABLE pipeline_config ADD COLUMN source_to_dl_schedule_offset INTEGER;
+
+ALTER TABLE pipeline_config ADD COLUMN dl_to_sink_schedule_offset INTEGER;
@@ -0,0 +1,5 @@
+-- The sink loader cannot apply cdc change files (_cdc_op / _cdc_lsn rows) yet: it appends or
+-- replaces rows, so deletes would load as NULL rows and updates as duplicates. cdc pipelines
+-- land in the datalake only; /config refuses an active sink stage for them from now on.
+
+UPDATE pipeline_config SET dl_to_sink_is_active = 0 WHERE source_to_dl_load_type = 'cdc';
@@ -0,0 +1,9 @@
+-- source_creds_masked / destination_creds_masked were built by masking known secret names, so
+-- other secret fields (connection_string, security_token, service_account_json, ...) were
+-- stored in plaintext. mask_credentials() now keeps only an allowlist of non-secret fields.
+-- Clear the stored projections: rows are masked on read from the token until they are saved
+-- again or POST /connections/rotate-keys rewrites them.
+
+UPDATE sources_config SET source_creds_masked = NULL;
+
+UPDATE destinations_config SET destination_creds_masked = NULL;
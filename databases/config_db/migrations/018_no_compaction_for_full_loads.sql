@@ -0,0 +1,5 @@
+-- Every datalake file of a full load is a complete snapshot: compacting an hour partition
+-- concatenated its snapshots, repeating each row once per run. Compaction is for incremental
+-- (and cdc) files only; the driver skips full loads and /config refuses the combination.
+
+UPDATE pipeline_config SET dl_compaction_is_active = 0 WHERE COALESCE(source_to_dl_load_type, 'full') = 'full';
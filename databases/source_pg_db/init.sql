@@ -1,6 +1,9 @@
 -- Create read-only user for source database
 CREATE USER read_user WITH PASSWORD 'read_password';
 
+-- Replication slots for cdc pipelines (pg_create_logical_replication_slot and friends)
+ALTER USER read_user WITH REPLICATION;
+
 -- Grant connect privilege
 GRANT CONNECT ON DATABASE source_db TO read_user;
 
@@ -11,6 +11,7 @@ import { ConnectorIcon } from '../../components/common/ConnectorIcon';
 import { Modal } from '../../components/common/Modal';
 import { DestinationForm } from '../../components/features/destinations/DestinationForm';
 import { DropdownMenu } from '../../components/common/DropdownMenu';
+import { fetchJsonCached } from '../../utils/api';
 
 export default function DestinationsPage() {
     const [destinations, setDestinations] = useState<DestinationConfig[]>([]);
@@ -25,10 +26,7 @@ export default function DestinationsPage() {
 
     const fetchDestinations = async () => {
         try {
-            const res = await fetch('http://localhost:8000/destinations/summary');
-            if (res.ok) {
-                setDestinations(await res.json());
-            }
+            setDestinations(await fetchJsonCached<DestinationConfig[]>('http://localhost:8000/destinations/summary'));
         } catch (e) {
             console.error("Failed to fetch destinations", e);
         } finally {
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect, useCallback } from 'react';
 import { useSearchParams } from 'next/navigation';
-import { Config, PipelineLog, PipelineRun, PipelineStage, ConfigCreate } from '../types';
+import { Config, PipelineLog, PipelineLogPage, PipelineRun, PipelineStage, ConfigCreate } from '../types';
 import { Header } from '../components/layout/Header';
 import { Footer } from '../components/layout/Footer';
 import { StatsOverview } from '../components/features/stats/StatsOverview';
@@ -13,6 +13,7 @@ import { LogDetailsModal } from '../components/features/logs/LogDetailsModal';
 import { PipelineGrid } from '../components/features/pipelines/PipelineGrid';
 import { ConfigEditor } from '../components/features/pipelines/ConfigEditor';
 import { AddPipelineModal } from '../components/features/pipelines/AddPipelineModal';
+import { fetchJsonCached } from '../utils/api';
 
 
 interface LogStats {
@@ -59,6 +60,10 @@ export default function Home() {
   // Logs State
   const [logsLoading, setLogsLoading] = useState(false);
   const [logsPage, setLogsPage] = useState(1);
+  // Cursor that fetches each visited page (index 0 = first page), for keyset pagination
+  const [logsCursors, setLogsCursors] = useState<(string | null)[]>([null]);
+  const [logsNextCursor, setLogsNextCursor] = useState<string | null>(null);
+  const [logsTotalEstimate, setLogsTotalEstimate] = useState<number | null>(null);
   const [selectedTable, setSelectedTable] = useState<string | null>(null);
   const [selectedLog, setSelectedLog] = useState<PipelineLog | null>(null);
 
@@ -77,18 +82,19 @@ export default function Home() {
   const fetchDashboardData = useCallback(async () => {
     setLoading(true);
     try {
-      const [configRes, statsRes, stagesRes, runsRes] = await Promise.all([
-        fetch('http://localhost:8000/config'),
+      // Config and stages rarely change: conditional GETs answered with 304 reuse the last body
+      const [configData, statsRes, stagesData, runsRes] = await Promise.all([
+        fetchJsonCached<Config[]>('http://localhost:8000/config'),
         fetch('http://localhost:8000/logs/stats/summary'),
-        fetch('http://localhost:8000/stages').catch(() => ({ ok: false })),
+        fetchJsonCached<PipelineStage[]>('http://localhost:8000/stages').catch(() => null),
         fetch('http://localhost:8000/runs').catch(() => ({ ok: false }))
       ]);
 
-      if (!configRes.ok || !statsRes.ok) throw new Error('Failed to fetch data');
+      if (!statsRes.ok) throw new Error('Failed to fetch data');
 
-      setConfigs(await configRes.json());
+      setConfigs(configData);
       setStats(await statsRes.json());
-      if (stagesRes.ok) setStages(await (stagesRes as Response).json());
+      if (stagesData) setStages(stagesData);
       if (runsRes.ok) setPipelineRuns(await (runsRes as Response).json());
     } catch (err) {
       setError('Failed to load data. Is the backend running?');
@@ -106,22 +112,37 @@ export default function Home() {
     setLogsLoading(true);
     try {
       const params = new URLSearchParams({
-        page: logsPage.toString(),
         limit: '10',
         source_tablename: selectedTable,
         start_date: startDate,
-        end_date: endDate + 'T23:59:59'
+        end_date: endDate + 'T23:59:59',
+        include_total: 'true'
       });
+      const cursor = logsCursors[logsPage - 1];
+      if (cursor) params.set('cursor', cursor);
       const logsRes = await fetch(`http://localhost:8000/logs?${params.toString()}`);
       if (logsRes.ok) {
-        setLogs(await logsRes.json());
+        const data: PipelineLogPage = await logsRes.json();
+        setLogs(data.logs);
+        setLogsNextCursor(data.next_cursor);
+        setLogsTotalEstimate(data.total_estimate);
       }
     } catch (e) {
       console.error("Failed to fetch logs", e);
     } finally {
       setLogsLoading(false);
     }
-  }, [logsPage, startDate, endDate, selectedTable]);
+  }, [logsPage, logsCursors, startDate, endDate, selectedTable]);
+
+  const handleNextLogsPage = () => {
+    if (!logsNextCursor) return;
+    setLogsCursors(prev => [...prev.slice(0, logsPage), logsNextCursor]);
+    setLogsPage(p => p + 1);
+  };
+
+  const handlePrevLogsPage = () => {
+    setLogsPage(p => Math.max(1, p - 1));
+  };
 
   const fetchLoadedStats = useCallback(async (hours: number | null) => {
     if (hours === null) {
@@ -146,6 +167,12 @@ export default function Home() {
     if (activeTab === 'logs') fetchLogs();
   }, [activeTab, fetchLogs]);
 
+  // Cursors are only valid for the filters they were issued under
+  useEffect(() => {
+    setLogsPage(1);
+    setLogsCursors([null]);
+  }, [startDate, endDate, selectedTable]);
+
   useEffect(() => {
     fetchLoadedStats(selectedTimeRange);
   }, [selectedTimeRange, fetchLoadedStats]);
@@ -199,19 +226,27 @@ export default function Home() {
     }
   };
 
-  const handleSaveConfig = async (updatedConfig: Config) => {
+  const handleSaveConfig = async (config: Config) => {
+    // cdc change files are not loaded to the sink, so cdc pipelines keep their sink stage off;
+    // full loads are not compacted (each file is a whole snapshot)
+    let updatedConfig = config.source_to_dl_load_type === 'cdc' ? { ...config, dl_to_sink_is_active: 0 } : config;
+    if (updatedConfig.source_to_dl_load_type === 'full') updatedConfig = { ...updatedConfig, dl_compaction_is_active: 0 };
     try {
       const res = await fetch(`http://localhost:8000/config/${updatedConfig.source_tablename}`, {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(updatedConfig),
       });
-      if (!res.ok) throw new Error('Failed to update config');
+      if (!res.ok) {
+        // Validation errors (e.g. an unknown projected column) come back as 400 with a detail
+        const err = await res.json().catch(() => ({}));
+        throw new Error(err.detail || 'Failed to update config');
+      }
       setConfigs(prev => prev.map(c => c.source_tablename === updatedConfig.source_tablename ? updatedConfig : c));
       setEditingId(null);
       setNotification({ message: 'Configuration saved successfully!', type: 'success' });
-    } catch (err) {
-      setNotification({ message: 'Failed to save configuration.', type: 'error' });
+    } catch (err: any) {
+      setNotification({ message: `Failed to save configuration: ${err.message}`, type: 'error' });
     }
   };
 
@@ -268,6 +303,7 @@ export default function Home() {
     setStartDate(defaultStartDate);
     setEndDate(defaultEndDate);
     setLogsPage(1);
+    setLogsCursors([null]);
     setLogs([]);
     setNotification({ message: 'Filters reset', type: 'success' });
   };
@@ -343,7 +379,10 @@ export default function Home() {
                     loading={logsLoading}
                     selectedTable={selectedTable}
                     page={logsPage}
-                    setPage={setLogsPage}
+                    hasNextPage={!!logsNextCursor}
+                    totalEstimate={logsTotalEstimate}
+                    onNextPage={handleNextLogsPage}
+                    onPrevPage={handlePrevLogsPage}
                     onShowDetails={setSelectedLog}
                   />
                 </div>
@@ -11,6 +11,7 @@ import { ConnectorIcon } from '../../components/common/ConnectorIcon';
 import { Modal } from '../../components/common/Modal';
 import { SourceForm } from '../../components/features/sources/SourceForm';
 import { DropdownMenu } from '../../components/common/DropdownMenu';
+import { fetchJsonCached } from '../../utils/api';
 
 export default function SourcesPage() {
     const [sources, setSources] = useState<SourceConfig[]>([]);
@@ -25,10 +26,7 @@ export default function SourcesPage() {
 
     const fetchSources = async () => {
         try {
-            const res = await fetch('http://localhost:8000/sources/summary');
-            if (res.ok) {
-                setSources(await res.json());
-            }
+            setSources(await fetchJsonCached<SourceConfig[]>('http://localhost:8000/sources/summary'));
         } catch (e) {
             console.error("Failed to fetch sources", e);
         } finally {
@@ -1,8 +1,8 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { Modal } from '../../common/Modal';
-import { PipelineLog } from '../../../types';
+import { PipelineLog, StageProfile } from '../../../types';
 import { Badge } from '../../common/Badge';
-import { formatTimestamp } from '../../../utils/formatters';
+import { formatBytes, formatTimestamp } from '../../../utils/formatters';
 
 interface LogDetailsModalProps {
     log: PipelineLog | null;
@@ -10,6 +10,23 @@ interface LogDetailsModalProps {
 }
 
 export const LogDetailsModal: React.FC<LogDetailsModalProps> = ({ log, onClose }) => {
+    const [profile, setProfile] = useState<StageProfile | null>(null);
+    const [profileError, setProfileError] = useState<string | null>(null);
+
+    useEffect(() => {
+        setProfile(null);
+        setProfileError(null);
+        if (!log?.profile_path) return;
+
+        fetch(`http://localhost:8000/logs/${log.id}/profile`)
+            .then(res => {
+                if (!res.ok) throw new Error('Failed to load profile');
+                return res.json();
+            })
+            .then(setProfile)
+            .catch(err => setProfileError(err.message));
+    }, [log?.id, log?.profile_path]);
+
     if (!log) return null;
 
     return (
@@ -43,6 +60,12 @@ export const LogDetailsModal: React.FC<LogDetailsModalProps> = ({ log, onClose }
                     <label className="text-xs font-bold text-gray-500 uppercase tracking-wider">Time Taken</label>
                     <p className="text-gray-300 font-mono text-sm">{log.time_taken || '-'}</p>
                 </div>
+                {log.cache_hits != null && (
+                    <div className="space-y-1">
+                        <label className="text-xs font-bold text-gray-500 uppercase tracking-wider">Cache Hits / Misses</label>
+                        <p className="text-gray-300 font-mono text-sm">{log.cache_hits} / {log.cache_misses ?? 0}</p>
+                    </div>
+                )}
             </div>
 
             {log.file_paths && (
@@ -57,6 +80,67 @@ export const LogDetailsModal: React.FC<LogDetailsModalProps> = ({ log, onClose }
                 </div>
             )}
 
+            {log.profile_path && (
+                <div className="space-y-3 bg-black/20 p-4 rounded-xl border border-white/5">
+                    <div className="flex items-center justify-between">
+                        <label className="text-xs font-bold text-gray-500 uppercase tracking-wider flex items-center gap-2">
+                            <svg className="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 19v-6a2 2 0 00-2-2H5a2 2 0 00-2 2v6a2 2 0 002 2h2a2 2 0 002-2zm0 0V9a2 2 0 012-2h2a2 2 0 012 2v10m-6 0a2 2 0 002 2h2a2 2 0 002-2m0 0V5a2 2 0 012-2h2a2 2 0 012 2v14a2 2 0 01-2 2h-2a2 2 0 01-2-2z" /></svg>
+                            Loader Profile
+                        </label>
+                        <a
+                            href={`http://localhost:8000/logs/${log.id}/profile/download`}
+                            className="text-xs text-indigo-300 hover:text-indigo-200 font-medium"
+                        >
+                            Download .prof
+                        </a>
+                    </div>
+                    <div className="font-mono text-xs text-indigo-300 break-all">{log.profile_path}</div>
+
+                    {profileError && <p className="text-red-300 text-sm">{profileError}</p>}
+
+                    {profile && (
+                        <>
+                            <div className="grid grid-cols-3 gap-4">
+                                <div className="space-y-1">
+                                    <label className="text-xs font-bold text-gray-500 uppercase tracking-wider">Profiled Time</label>
+                                    <p className="text-gray-300 font-mono text-sm">{profile.wall_seconds.toFixed(2)}s</p>
+                                </div>
+                                <div className="space-y-1">
+                                    <label className="text-xs font-bold text-gray-500 uppercase tracking-wider">Python Peak</label>
+                                    <p className="text-gray-300 font-mono text-sm">{formatBytes(profile.tracemalloc_peak_bytes)}</p>
+                                </div>
+                                <div className="space-y-1">
+                                    <label className="text-xs font-bold text-gray-500 uppercase tracking-wider">RSS High-Water</label>
+                                    <p className="text-gray-300 font-mono text-sm">{formatBytes(profile.rss_high_water_bytes)}</p>
+                                </div>
+                            </div>
+                            <div className="max-h-48 overflow-y-auto">
+                                <table className="w-full text-left text-xs font-mono">
+                                    <thead className="text-gray-500">
+                                        <tr>
+                                            <th className="py-1 pr-2">Function</th>
+                                            <th className="py-1 pr-2 text-right">Calls</th>
+                                            <th className="py-1 pr-2 text-right">Self (s)</th>
+                                            <th className="py-1 text-right">Cumulative (s)</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody className="text-gray-300">
+                                        {profile.top_functions.slice(0, 15).map((fn) => (
+                                            <tr key={fn.function} className="border-t border-white/5">
+                                                <td className="py-1 pr-2 break-all">{fn.function}</td>
+                                                <td className="py-1 pr-2 text-right">{fn.calls}</td>
+                                                <td className="py-1 pr-2 text-right">{fn.total_seconds.toFixed(3)}</td>
+                                                <td className="py-1 text-right">{fn.cumulative_seconds.toFixed(3)}</td>
+                                            </tr>
+                                        ))}
+                                    </tbody>
+                                </table>
+                            </div>
+                        </>
+                    )}
+                </div>
+            )}
+
             {log.error_message && (
                 <div className="space-y-2 bg-red-500/5 p-4 rounded-xl border border-red-500/10">
                     <label className="text-xs font-bold text-red-400 uppercase tracking-wider flex items-center gap-2">
@@ -9,12 +9,15 @@ interface LogTableProps {
     loading: boolean;
     selectedTable: string | null;
     page: number;
-    setPage: React.Dispatch<React.SetStateAction<number>>;
+    hasNextPage: boolean;
+    totalEstimate: number | null;
+    onNextPage: () => void;
+    onPrevPage: () => void;
     onShowDetails: (log: PipelineLog) => void;
 }
 
 export const LogTable: React.FC<LogTableProps> = ({
-    logs, loading, selectedTable, page, setPage, onShowDetails
+    logs, loading, selectedTable, page, hasNextPage, totalEstimate, onNextPage, onPrevPage, onShowDetails
 }) => {
     const [activeMenuLogId, setActiveMenuLogId] = useState<string | null>(null);
 
@@ -108,7 +111,7 @@ export const LogTable: React.FC<LogTableProps> = ({
             {/* Pagination Footer */}
             <div className="border-t border-white/5 bg-black/20 p-3 flex justify-between items-center">
                 <button
-                    onClick={() => setPage(p => Math.max(1, p - 1))}
+                    onClick={onPrevPage}
                     disabled={page === 1 || loading}
                     className={`px-3 py-1.5 rounded-lg text-xs font-bold uppercase tracking-wider transition-all flex items-center gap-2 ${page === 1
                         ? 'text-gray-600 cursor-not-allowed'
@@ -121,13 +124,16 @@ export const LogTable: React.FC<LogTableProps> = ({
 
                 <div className="flex items-center gap-2">
                     <span className="text-xs text-gray-400 font-mono">Page <span className="text-white font-bold">{page}</span></span>
+                    {totalEstimate !== null && (
+                        <span className="text-xs text-gray-500 font-mono">of ~{Math.max(1, Math.ceil(totalEstimate / 10)).toLocaleString()}</span>
+                    )}
                     {loading && <span className="text-xs text-indigo-400 animate-pulse ml-2">Loading...</span>}
                 </div>
 
                 <button
-                    onClick={() => setPage(p => p + 1)}
-                    disabled={logs.length < 10 || loading}
-                    className={`px-3 py-1.5 rounded-lg text-xs font-bold uppercase tracking-wider transition-all flex items-center gap-2 ${logs.length < 10
+                    onClick={onNextPage}
+                    disabled={!hasNextPage || loading}
+                    className={`px-3 py-1.5 rounded-lg text-xs font-bold uppercase tracking-wider transition-all flex items-center gap-2 ${!hasNextPage
                         ? 'text-gray-600 cursor-not-allowed'
                         : 'text-gray-400 hover:text-white hover:bg-white/5'
                         }`}
@@ -1,10 +1,25 @@
 import React, { useState, useEffect } from 'react';
-import { ConfigCreate, SourceConfig, DestinationConfig } from '../../../types';
+import { ConfigCreate, SourceConfig, DestinationConfig, SourceTable, SourceCatalogPage } from '../../../types';
 import { Modal } from '../../common/Modal';
 import { Button } from '../../common/Button';
 import { Input } from '../../common/Input';
 import { Select } from '../../common/Select';
 
+// Tables listed per catalog request; narrow down with the search box
+const CATALOG_PAGE_SIZE = 100;
+
+const formatBytes = (bytes: number | null) => {
+    if (bytes === null) return '?';
+    const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+    let value = bytes;
+    let unit = 0;
+    while (value >= 1024 && unit < units.length - 1) {
+        value /= 1024;
+        unit++;
+    }
+    return `${value.toFixed(unit ? 1 : 0)} ${units[unit]}`;
+};
+
 interface AddPipelineModalProps {
     isOpen: boolean;
     onClose: () => void;
@@ -27,7 +42,12 @@ export const AddPipelineModal: React.FC<AddPipelineModalProps> = ({ isOpen, onCl
 
     const [sources, setSources] = useState<SourceConfig[]>([]);
     const [destinations, setDestinations] = useState<DestinationConfig[]>([]);
-    const [tables, setTables] = useState<string[]>([]);
+    const [tables, setTables] = useState<SourceTable[]>([]);
+    const [tableTotal, setTableTotal] = useState(0);
+    const [tableSearch, setTableSearch] = useState('');
+    // Refresh Table List bumps the counter; the next fetch bypasses the backend's catalog cache once
+    const [refreshCatalog, setRefreshCatalog] = useState(0);
+    const refreshPending = React.useRef(false);
     const [selectedSource, setSelectedSource] = useState<string>('');
     const [selectedSink, setSelectedSink] = useState<string>('');
     const [loadingTables, setLoadingTables] = useState(false);
@@ -51,31 +71,44 @@ export const AddPipelineModal: React.FC<AddPipelineModalProps> = ({ isOpen, onCl
         }
     }, [isOpen]);
 
-    // Fetch Tables when Source is Selected
+    // Fetch Tables when Source is Selected (cached catalog of the loaders' public schema, searched server-side)
     useEffect(() => {
         if (!selectedSource) return;
 
         const fetchTables = async () => {
             setLoadingTables(true);
             try {
-                // Find source name based on ID (or just use string if IDs match, assuming selectedSource is source_name)
-                // The Select returns the value. Let's assume value is source_name.
-                const res = await fetch(`http://localhost:8000/sources/${selectedSource}/tables`);
+                // The Select's value is the source_name
+                const params = new URLSearchParams({ schema: 'public', limit: String(CATALOG_PAGE_SIZE) });
+                if (tableSearch) params.set('search', tableSearch);
+                if (refreshPending.current) {
+                    params.set('refresh', 'true');
+                    refreshPending.current = false;
+                }
+                const res = await fetch(`http://localhost:8000/sources/${selectedSource}/catalog?${params}`);
                 if (res.ok) {
-                    setTables(await res.json());
+                    const page: SourceCatalogPage = await res.json();
+                    setTables(page.tables);
+                    setTableTotal(page.total);
                 } else {
                     setTables([]);
+                    setTableTotal(0);
                 }
             } catch (e) {
                 console.error("Failed to load tables", e);
                 setTables([]);
+                setTableTotal(0);
             } finally {
                 setLoadingTables(false);
             }
         };
 
-        fetchTables();
-    }, [selectedSource]);
+        // Wait for a pause in typing before searching
+        const timer = setTimeout(fetchTables, tableSearch ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [selectedSource, tableSearch, refreshCatalog]);
+
+    const selectedTable = tables.find(t => t.name === config.source_tablename);
 
     const handleSave = () => {
         onSave({
@@ -108,17 +141,42 @@ export const AddPipelineModal: React.FC<AddPipelineModalProps> = ({ isOpen, onCl
                     />
 
                     <Select
-                        label="Source Table"
+                        label={`Source Table (${tables.length} of ${tableTotal})`}
                         value={config.source_tablename}
                         onChange={(e) => setConfig({ ...config, source_tablename: e.target.value })}
                         options={[
                             { value: '', label: 'Select Table...' },
-                            ...tables.map(t => ({ value: t, label: t }))
+                            ...tables.map(t => ({
+                                value: t.name,
+                                label: `${t.name} (~${t.row_estimate ?? '?'} rows, ${formatBytes(t.total_bytes)})`
+                            }))
                         ]}
                         disabled={!selectedSource || loadingTables}
                     />
                 </div>
 
+                <div className="grid grid-cols-2 gap-4 items-end">
+                    <Input
+                        label="Search Tables"
+                        value={tableSearch}
+                        onChange={(e) => setTableSearch(e.target.value)}
+                        placeholder="e.g. order"
+                        disabled={!selectedSource}
+                    />
+                    <Button variant="ghost" onClick={() => { refreshPending.current = true; setRefreshCatalog(n => n + 1); }} disabled={!selectedSource || loadingTables}>
+                        Refresh Table List
+                    </Button>
+                </div>
+
+                {selectedTable && (
+                    <p className="text-xs text-gray-500">
+                        {selectedTable.kind}
+                        {selectedTable.primary_key.length > 0 && ` | primary key: ${selectedTable.primary_key.join(', ')}`}
+                        {selectedTable.indexed_time_columns.length > 0 && ` | indexed time columns: ${selectedTable.indexed_time_columns.join(', ')}`}
+                        {selectedTable.partition_key.length > 0 && ` | partitioned by: ${selectedTable.partition_key.join(', ')}`}
+                    </p>
+                )}
+
                 {/* Sink Selection */}
                 <div className="grid grid-cols-2 gap-4">
                     <Select
@@ -161,7 +219,8 @@ export const AddPipelineModal: React.FC<AddPipelineModalProps> = ({ isOpen, onCl
                         onChange={(e) => setConfig({ ...config, source_to_dl_load_type: e.target.value })}
                         options={[
                             { value: 'incremental', label: 'Incremental' },
-                            { value: 'full', label: 'Full Replace' }
+                            { value: 'full', label: 'Full Replace' },
+                            { value: 'cdc', label: 'Change Data Capture' }
                         ]}
                     />
                 </div>
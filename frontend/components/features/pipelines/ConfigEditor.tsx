@@ -78,9 +78,152 @@ export const ConfigEditor: React.FC<ConfigEditorProps> = ({
                                         onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_load_type: e.target.value })}
                                         options={[
                                             { value: 'incremental', label: 'Incremental' },
-                                            { value: 'full', label: 'Full Replace' }
+                                            { value: 'full', label: 'Full Replace' },
+                                            { value: 'cdc', label: 'Change Data Capture (Postgres WAL)' }
                                         ]}
                                     />
+
+                                    <Select
+                                        label="Loader Profiling"
+                                        value={String(tempConfig?.profiling_enabled || 0)}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, profiling_enabled: Number(e.target.value) })}
+                                        options={[
+                                            { value: '0', label: 'Off' },
+                                            { value: '1', label: 'On (slower runs)' }
+                                        ]}
+                                    />
+
+                                    {/* Full loads write a whole snapshot per run: compacting them would repeat every row */}
+                                    <Select
+                                        label="Datalake Compaction"
+                                        value={tempConfig?.source_to_dl_load_type === 'full' ? '0' : String(tempConfig?.dl_compaction_is_active || 0)}
+                                        disabled={tempConfig?.source_to_dl_load_type === 'full'}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_compaction_is_active: Number(e.target.value) })}
+                                        options={[
+                                            { value: '0', label: 'Off' },
+                                            { value: '1', label: 'On' }
+                                        ]}
+                                    />
+
+                                    <Input
+                                        label="Compaction Frequency (Minutes)"
+                                        type="number"
+                                        value={tempConfig?.dl_compaction_schedule || 60}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_compaction_schedule: Number(e.target.value) })}
+                                    />
+
+                                    <Select
+                                        label="Datalake Retention"
+                                        value={String(tempConfig?.dl_gc_is_active || 0)}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_gc_is_active: Number(e.target.value) })}
+                                        options={[
+                                            { value: '0', label: 'Keep Everything' },
+                                            { value: '1', label: 'Enforce Policy' }
+                                        ]}
+                                    />
+
+                                    <Input
+                                        label="Keep Snapshots (Full Loads, 0 = All)"
+                                        type="number"
+                                        value={tempConfig?.dl_retention_keep_snapshots || 0}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_retention_keep_snapshots: Number(e.target.value) })}
+                                    />
+
+                                    <Input
+                                        label="Keep Days (0 = All)"
+                                        type="number"
+                                        value={tempConfig?.dl_retention_keep_days || 0}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_retention_keep_days: Number(e.target.value) })}
+                                    />
+
+                                    <Select
+                                        label="Parquet Compression"
+                                        value={tempConfig?.dl_parquet_compression || 'snappy'}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_compression: e.target.value })}
+                                        options={[
+                                            { value: 'snappy', label: 'Snappy (default)' },
+                                            { value: 'zstd', label: 'Zstandard' },
+                                            { value: 'lz4', label: 'LZ4' },
+                                            { value: 'gzip', label: 'Gzip' },
+                                            { value: 'brotli', label: 'Brotli' },
+                                            { value: 'none', label: 'None' }
+                                        ]}
+                                    />
+
+                                    <Input
+                                        label="Compression Level (Blank = Codec Default)"
+                                        type="number"
+                                        value={tempConfig?.dl_parquet_compression_level ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_compression_level: e.target.value === '' ? undefined : Number(e.target.value) })}
+                                    />
+
+                                    <Input
+                                        label="Row Group Size (Rows)"
+                                        type="number"
+                                        value={tempConfig?.dl_parquet_row_group_size ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_row_group_size: e.target.value === '' ? undefined : Number(e.target.value) })}
+                                    />
+
+                                    <Input
+                                        label="Dictionary Columns (all / none / list)"
+                                        value={tempConfig?.dl_parquet_dictionary || 'all'}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_dictionary: e.target.value })}
+                                    />
+
+                                    <Select
+                                        label="Parquet Statistics"
+                                        value={String(tempConfig?.dl_parquet_statistics ?? 1)}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_statistics: Number(e.target.value) })}
+                                        options={[
+                                            { value: '1', label: 'Write Min/Max' },
+                                            { value: '0', label: 'Skip' }
+                                        ]}
+                                    />
+
+                                    <Select
+                                        label="Sort by Incremental Key"
+                                        value={String(tempConfig?.dl_parquet_sort_by_incremental_key || 0)}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, dl_parquet_sort_by_incremental_key: Number(e.target.value) })}
+                                        options={[
+                                            { value: '0', label: 'Off' },
+                                            { value: '1', label: 'On' }
+                                        ]}
+                                    />
+
+                                    <Input
+                                        label="Columns (Blank = All)"
+                                        placeholder="id, status, updated_at"
+                                        value={tempConfig?.source_to_dl_columns ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_columns: e.target.value })}
+                                    />
+
+                                    <Input
+                                        label="Row Filter (SQL, Blank = All Rows)"
+                                        placeholder="status <> 'deleted'"
+                                        value={tempConfig?.source_to_dl_row_filter ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_row_filter: e.target.value })}
+                                    />
+
+                                    <Input
+                                        label="Incremental Key"
+                                        placeholder="updated_at"
+                                        value={tempConfig?.source_to_dl_incremental_key ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_incremental_key: e.target.value })}
+                                    />
+
+                                    <Input
+                                        label="Tiebreaker Key (Blank = None)"
+                                        placeholder="id"
+                                        value={tempConfig?.source_to_dl_tiebreaker_key ?? ''}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_tiebreaker_key: e.target.value })}
+                                    />
+
+                                    <Input
+                                        label="Overlap Window (Seconds / Key Units)"
+                                        type="number"
+                                        value={tempConfig?.source_to_dl_incremental_overlap || 0}
+                                        onChange={(e) => setTempConfig({ ...tempConfig!, source_to_dl_incremental_overlap: Number(e.target.value) })}
+                                    />
                                 </div>
 
                                 <div className="flex justify-end space-x-3 mt-6 pt-4 border-t border-white/5">
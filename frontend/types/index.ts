@@ -14,6 +14,28 @@ export interface Config {
     sink_type?: string;
     source_name?: string;
     destination_name?: string;
+    profiling_enabled?: number;
+    dl_compaction_schedule?: number;
+    dl_compaction_is_active?: number;
+    dl_compaction_last_run_status?: string;
+    dl_compaction_last_run_timestamp?: string;
+    dl_retention_keep_snapshots?: number;
+    dl_retention_keep_days?: number;
+    dl_gc_is_active?: number;
+    dl_gc_last_run_status?: string;
+    dl_gc_last_run_timestamp?: string;
+    dl_parquet_compression?: string;
+    dl_parquet_compression_level?: number;
+    dl_parquet_row_group_size?: number;
+    dl_parquet_dictionary?: string;
+    dl_parquet_statistics?: number;
+    dl_parquet_sort_by_incremental_key?: number;
+    source_to_dl_columns?: string;
+    source_to_dl_row_filter?: string;
+    source_to_dl_incremental_key?: string;
+    source_to_dl_tiebreaker_key?: string;
+    source_to_dl_incremental_overlap?: number;
+    source_to_dl_watermark?: string;
 }
 
 export interface ConfigCreate {
@@ -46,6 +68,27 @@ export interface SourceConfig {
     created_at?: string;
 }
 
+// GET /sources/{source_name}/catalog
+export interface SourceTable {
+    schema: string;
+    name: string;
+    qualified_name: string;
+    kind: string;
+    row_estimate: number | null;
+    total_bytes: number | null;
+    primary_key: string[];
+    indexed_time_columns: string[];
+    partition_key: string[];
+}
+
+export interface SourceCatalogPage {
+    tables: SourceTable[];
+    total: number;
+    limit: number;
+    offset: number;
+    fetched_at: string;
+}
+
 export interface DestinationConfig {
     id?: string;
     destination_name: string;
@@ -65,9 +108,34 @@ export interface PipelineLog {
     started_at: string;
     completed_at: string | null;
     time_taken: string | null;
+    duration_ms?: number | null;
+    profile_path?: string | null;
+    cache_hits?: number | null;
+    cache_misses?: number | null;
     stage_order?: number;
 }
 
+export interface ProfileFunction {
+    function: string;
+    calls: number;
+    total_seconds: number;
+    cumulative_seconds: number;
+}
+
+export interface StageProfile {
+    profile_path: string;
+    wall_seconds: number;
+    tracemalloc_peak_bytes: number;
+    rss_high_water_bytes: number;
+    top_functions: ProfileFunction[];
+}
+
+export interface PipelineLogPage {
+    logs: PipelineLog[];
+    next_cursor: string | null;
+    total_estimate: number | null;
+}
+
 export interface PipelineStage {
     id: string;
     pipeline_name: string;
@@ -0,0 +1,15 @@
+// Conditional GETs for the cached listing endpoints (GET /config, /stages, /sources/summary,
+// /destinations/summary): the last body and ETag are kept per URL, and a 304 reuses the body.
+const etagCache = new Map<string, { etag: string; data: unknown }>();
+
+export const fetchJsonCached = async <T>(url: string): Promise<T> => {
+    const cached = etagCache.get(url);
+    const res = await fetch(url, cached ? { headers: { 'If-None-Match': cached.etag } } : undefined);
+    if (res.status === 304 && cached) return cached.data as T;
+    if (!res.ok) throw new Error(`GET ${url} failed with ${res.status}`);
+
+    const data = await res.json();
+    const etag = res.headers.get('ETag');
+    if (etag) etagCache.set(url, { etag, data });
+    return data as T;
+};
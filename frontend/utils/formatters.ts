@@ -25,3 +25,15 @@ export const timeAgo = (dateString: string | null | undefined): string => {
     if (interval > 1) return Math.floor(interval) + " minutes ago";
     return Math.floor(seconds) + " seconds ago";
 };
+
+export const formatBytes = (bytes: number | null | undefined): string => {
+    if (bytes === null || bytes === undefined) return '-';
+    const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+    let value = bytes;
+    let unit = 0;
+    while (value >= 1024 && unit < units.length - 1) {
+        value /= 1024;
+        unit++;
+    }
+    return `${value.toFixed(unit === 0 ? 0 : 1)} ${units[unit]}`;
+};
@@ -0,0 +1,47 @@
+"""
+Run from the repository root: python -m pytest tests
+
+The backend, the loaders and data_pipeline_resources/common import each other as
+top-level modules, as on the containers' PYTHONPATH; the same directories go on sys.path here.
+"""
+
+import glob
+import importlib.util
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in ('data_pipeline_resources/common', 'data_pipeline_resources/source_to_dl/postgres_to_dl', 'backend'):
+    sys.path.insert(0, os.path.join(ROOT, path))
+
+
+@pytest.fixture
+def config_db(tmp_path):
+    """Path of a config DB built like databases/config_db/entrypoint.sh does: init.sql, then every migration"""
+    path = str(tmp_path / 'config.db')
+    conn = sqlite3.connect(path)
+    with open(os.path.join(ROOT, 'databases', 'config_db', 'init.sql')) as f:
+        conn.executescript(f.read())
+    for migration in sorted(glob.glob(os.path.join(ROOT, 'databases', 'config_db', 'migrations', '*.sql'))):
+        with open(migration) as f:
+            conn.executescript(f.read())
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def script_module(monkeypatch):
+    """Import a driver or job script (they are all main.py) by path under data_pipeline_resources, with env set first"""
+    def load(relative_path, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        path = os.path.join(ROOT, 'data_pipeline_resources', relative_path)
+        spec = importlib.util.spec_from_file_location(f"script_{relative_path.replace('/', '_')[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
@@ -0,0 +1,144 @@
+"""Bulk onboarding plans (backend/utils/bulk_onboarding.py)"""
+
+import pytest
+
+from utils.bulk_onboarding import (BULK_LARGE_TABLE_BYTES, BULK_LARGE_TABLE_ROWS, LARGE_FULL_LOAD_SCHEDULE,
+                                   build_plan, incremental_key, is_large, plan_table, select_tables)
+
+GB = 1024 ** 3
+
+
+def table(name, schema='public', indexed=(), partition_key=(), primary_key=('id',), rows=1000, total_bytes=8192,
+          kind='table'):
+    return {'schema': schema, 'name': name, 'kind': kind, 'row_estimate': rows, 'total_bytes': total_bytes,
+            'indexed_time_columns': list(indexed), 'partition_key': list(partition_key),
+            'primary_key': list(primary_key)}
+
+
+CATALOG = [table('orders'), table('order_items'), table('customers'), table('audit', schema='ops')]
+
+
+class TestSelectTables:
+    @pytest.mark.parametrize('tables, table_regex, selected, missing', [
+        (None, None, ['orders', 'order_items', 'customers'], []),
+        (None, '', ['orders', 'order_items', 'customers'], []),
+        (None, '^order', ['orders', 'order_items'], []),
+        (None, 'items$', ['order_items'], []),
+        (None, 'nothing', [], []),
+        # tables outside the public schema are never onboarded
+        (None, 'audit', [], []),
+        (['customers', 'orders'], None, ['customers', 'orders'], []),
+        ([' orders ', 'orders', ''], None, ['orders'], []),
+        (['orders', 'missing', 'audit'], None, ['orders'], ['missing', 'audit']),
+        ([], None, [], []),
+    ])
+    def test_selection(self, tables, table_regex, selected, missing):
+        chosen, not_found = select_tables(CATALOG, tables, table_regex)
+        assert [t['name'] for t in chosen] == selected
+        assert not_found == missing
+
+    @pytest.mark.parametrize('tables, table_regex, message', [
+        (['orders'], '^order', 'not both'),
+        (None, '(unclosed', 'Invalid table_regex'),
+    ])
+    def test_bad_selection(self, tables, table_regex, message):
+        with pytest.raises(ValueError, match=message):
+            select_tables(CATALOG, tables, table_regex)
+
+
+class TestIncrementalKey:
+    @pytest.mark.parametrize('indexed, partition_key, expected', [
+        # the partition key, when it is an indexed time column
+        (['created_at', 'updated_at', 'order_date'], ['order_date'], 'order_date'),
+        # then an update timestamp
+        (['created_at', 'updated_at'], [], 'updated_at'),
+        (['created_at', 'LastModified'], [], 'LastModified'),
+        (['created_at', 'changed_on'], ['region'], 'changed_on'),
+        # a multi-column partition key is not used
+        (['created_at', 'updated_at'], ['created_at', 'region'], 'updated_at'),
+        # then any indexed time column
+        (['created_at', 'shipped_at'], [], 'created_at'),
+        (['created_at'], ['order_date'], 'created_at'),
+        ([], ['order_date'], None),
+        ([], [], None),
+    ])
+    def test_preference(self, indexed, partition_key, expected):
+        assert incremental_key(table('orders', indexed=indexed, partition_key=partition_key)) == expected
+
+    def test_missing_catalog_fields(self):
+        assert incremental_key({'name': 'orders'}) is None
+
+
+@pytest.mark.parametrize('rows, total_bytes, large', [
+    (1000, 8192, False),
+    (BULK_LARGE_TABLE_ROWS, 0, True),
+    (0, BULK_LARGE_TABLE_BYTES, True),
+    (None, None, False),
+    (BULK_LARGE_TABLE_ROWS - 1, BULK_LARGE_TABLE_BYTES - 1, False),
+])
+def test_is_large(rows, total_bytes, large):
+    assert is_large(table('orders', rows=rows, total_bytes=total_bytes)) is large
+
+
+class TestPlanTable:
+    @pytest.mark.parametrize('indexed, primary_key, load_type, tiebreaker', [
+        (['updated_at'], ['id'], 'incremental', 'id'),
+        # no single-column primary key: no tiebreaker
+        (['updated_at'], ['order_id', 'line_no'], 'incremental', None),
+        (['updated_at'], [], 'incremental', None),
+        # full loads need no tiebreaker
+        ([], ['id'], 'full', None),
+    ])
+    def test_load_type_and_tiebreaker(self, indexed, primary_key, load_type, tiebreaker):
+        plan = plan_table(table('orders', indexed=indexed, primary_key=primary_key), 'stg_', 60, 60)
+        assert plan['source_to_dl_load_type'] == plan['dl_to_sink_load_type'] == load_type
+        assert plan['source_to_dl_tiebreaker_key'] == tiebreaker
+        assert plan['sink_tablename'] == 'stg_orders'
+        has_note = any('primary key' in note for note in plan['notes'])
+        assert has_note is (load_type == 'incremental' and tiebreaker is None)
+
+    @pytest.mark.parametrize('indexed, total_bytes, schedules, compaction, sorted_files', [
+        # large and incremental: compacted, files sorted by the key, schedule kept
+        (['updated_at'], 2 * GB, (60, 30), 1, 1),
+        # large without a key: reloaded daily and never compacted (every file is a full snapshot)
+        ([], 2 * GB, (LARGE_FULL_LOAD_SCHEDULE, LARGE_FULL_LOAD_SCHEDULE), 0, 0),
+        # small tables keep the requested schedule and are not compacted
+        (['updated_at'], 8192, (60, 30), 0, 0),
+        ([], 8192, (60, 30), 0, 0),
+    ])
+    def test_large_tables(self, indexed, total_bytes, schedules, compaction, sorted_files):
+        plan = plan_table(table('orders', indexed=indexed, total_bytes=total_bytes), '', 60, 30)
+        assert (plan['source_to_dl_schedule'], plan['dl_to_sink_schedule']) == schedules
+        assert plan['dl_compaction_is_active'] == compaction
+        assert plan['dl_parquet_sort_by_incremental_key'] == sorted_files
+
+    def test_large_daily_fallback_keeps_longer_schedules(self):
+        plan = plan_table(table('orders', total_bytes=2 * GB), '', 10080, 10080)
+        assert plan['source_to_dl_schedule'] == plan['dl_to_sink_schedule'] == 10080
+
+    def test_never_analyzed(self):
+        plan = plan_table(table('orders', rows=None), '', 60, 60)
+        assert any('Never analyzed' in note for note in plan['notes'])
+
+
+class TestBuildPlan:
+    def test_skips_existing_and_missing_tables(self):
+        result = build_plan(CATALOG, ['orders'], [], ['orders', 'customers', 'missing'], None, 'stg_', 60, 60)
+        assert [p['source_tablename'] for p in result['create']] == ['customers']
+        assert result['skipped'] == [
+            {'source_tablename': 'missing', 'reason': 'Not found in the source catalog'},
+            {'source_tablename': 'orders', 'reason': 'A pipeline for this table already exists'},
+        ]
+
+    def test_offsets_are_assigned(self):
+        result = build_plan(CATALOG, [], [], None, None, '', 60, 60)
+        assert len(result['create']) == 3
+        for plan in result['create']:
+            assert 0 <= plan['source_to_dl_schedule_offset'] < 60
+            assert 0 <= plan['dl_to_sink_schedule_offset'] < 60
+        assert result['peak_concurrent_loads']['before'] == 0
+        assert result['peak_concurrent_loads']['after'] >= 1
+
+    def test_bad_selection_raises(self):
+        with pytest.raises(ValueError):
+            build_plan(CATALOG, [], [], ['orders'], 'orders', '', 60, 60)
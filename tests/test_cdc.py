@@ -0,0 +1,188 @@
+"""
+Change data capture (data_pipeline_resources/source_to_dl/postgres_to_dl/cdc.py): test_decoding
+output parsing, change files, and the LSN watermark around a failed slot advance.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+import cdc
+
+
+def change(body, table='public.orders'):
+    return f"table {table}: {body}"
+
+
+ORDER_11 = change("INSERT: order_id[integer]:11 customer_id[integer]:101 "
+                  "order_date[timestamp without time zone]:'2023-02-16 09:00:00' total_amount[numeric]:99.99 "
+                  "status[character varying]:'pending'")
+
+
+class TestParseChange:
+    def test_insert(self):
+        op, values, types = cdc.parse_change(ORDER_11, 'orders')
+        assert op == 'I'
+        assert values == {'order_id': 11, 'customer_id': 101, 'order_date': pd.Timestamp('2023-02-16 09:00:00'),
+                          'total_amount': Decimal('99.99'), 'status': 'pending'}
+        assert types['status'] == 'character varying'
+
+    def test_quoted_identifiers(self):
+        data = change('INSERT: "Order Id"[integer]:1 "say ""hi"""[text]:\'x\' plain[text]:\'y\'',
+                      table='public."Order Items"')
+        _, values, _ = cdc.parse_change(data, 'Order Items')
+        assert values == {'Order Id': 1, 'say "hi"': 'x', 'plain': 'y'}
+
+    @pytest.mark.parametrize('raw, expected', [
+        ("'it''s shipped'", "it's shipped"),
+        ("''''", "'"),
+        ("''", ''),
+        ("'two words and a : colon'", 'two words and a : colon'),
+        ("'looks[text]:''like a column'''", "looks[text]:'like a column'"),
+    ])
+    def test_quote_escapes(self, raw, expected):
+        _, values, _ = cdc.parse_change(change(f"INSERT: order_id[integer]:1 status[text]:{raw} n[integer]:2"), 'orders')
+        assert values == {'order_id': 1, 'status': expected, 'n': 2}
+
+    def test_nulls_and_unchanged_toast(self):
+        _, values, _ = cdc.parse_change(
+            change("UPDATE: order_id[integer]:1 note[text]:null body[text]:unchanged-toast-datum"), 'orders')
+        assert values == {'order_id': 1, 'note': None, 'body': None}
+
+    @pytest.mark.parametrize('type_name, raw, expected', [
+        ('boolean', 'true', True),
+        ('boolean', 'false', False),
+        ('date', "'2023-01-15'", date(2023, 1, 15)),
+        ('double precision', '1.5', 1.5),
+        ('numeric(10,2)', '150.50', Decimal('150.50')),
+        ('bigint', '-9007199254740993', -9007199254740993),
+        ('timestamp with time zone', "'2023-01-15 10:30:00+05:30'", pd.Timestamp('2023-01-15 10:30:00+05:30')),
+        ('jsonb', '\'{"a": 1}\'', '{"a": 1}'),
+    ])
+    def test_types(self, type_name, raw, expected):
+        _, values, _ = cdc.parse_change(change(f"INSERT: v[{type_name}]:{raw}"), 'orders')
+        assert values == {'v': expected}
+
+    def test_update_of_the_key_keeps_the_new_row(self):
+        data = change("UPDATE: old-key: order_id[integer]:7 new-tuple: order_id[integer]:70 status[text]:'x'")
+        assert cdc.parse_change(data, 'orders') == ('U', {'order_id': 70, 'status': 'x'},
+                                                    {'order_id': 'integer', 'status': 'text'})
+
+    def test_delete_has_the_key(self):
+        assert cdc.parse_change(change("DELETE: order_id[integer]:3"), 'orders') == ('D', {'order_id': 3},
+                                                                                      {'order_id': 'integer'})
+
+    def test_delete_without_replica_identity_is_dropped(self):
+        assert cdc.parse_change(change("DELETE: (no-tuple-data)"), 'orders') is None
+
+    def test_truncate(self):
+        assert cdc.parse_change(change("TRUNCATE: (no-flags)"), 'orders') == ('T', {}, {})
+
+    @pytest.mark.parametrize('data', [
+        change("INSERT: id[integer]:1", table='public.customers'),
+        change("INSERT: id[integer]:1", table='public.orders_archive'),
+        change("INSERT: id[integer]:1", table='sales.orders'),
+        'BEGIN', 'COMMIT',
+    ])
+    def test_other_tables_and_transactions_are_skipped(self, data):
+        assert cdc.parse_change(data, 'orders') is None
+
+
+class TestChangesToDataframe:
+    CHANGES = [
+        ('0/16B3700', 'BEGIN'),
+        ('0/16B3748', ORDER_11),
+        ('0/16B3750', change("INSERT: id[integer]:1 name[text]:'Alice'", table='public.customers')),
+        ('0/16B3790', change("UPDATE: order_id[integer]:11 customer_id[integer]:null status[character varying]:'shipped'")),
+        ('0/16B37A0', change("DELETE: order_id[integer]:3")),
+        ('0/16B37B0', change("TRUNCATE: (no-flags)")),
+        ('0/16B37C0', 'COMMIT'),
+    ]
+
+    def test_rows_in_lsn_order(self):
+        df = cdc.changes_to_dataframe(self.CHANGES, 'orders')
+        assert df[cdc.OP_COLUMN].tolist() == ['I', 'U', 'D', 'T']
+        assert df[cdc.LSN_COLUMN].tolist() == ['0/16B3748', '0/16B3790', '0/16B37A0', '0/16B37B0']
+        assert 'name' not in df.columns
+
+    def test_integer_columns_stay_integer(self):
+        df = cdc.changes_to_dataframe(self.CHANGES, 'orders')
+        assert str(df['order_id'].dtype) == 'Int64' and str(df['customer_id'].dtype) == 'Int64'
+        assert df['order_id'].tolist()[:3] == [11, 11, 3]
+        assert df['customer_id'].isna().tolist() == [False, True, True, True]
+
+    def test_projection(self):
+        df = cdc.changes_to_dataframe(self.CHANGES, 'orders', ['order_id', 'status'])
+        assert list(df.columns) == ['order_id', 'status', cdc.OP_COLUMN, cdc.LSN_COLUMN]
+
+    def test_no_changes_for_the_table(self):
+        assert cdc.changes_to_dataframe(self.CHANGES[2:3], 'orders').empty
+
+
+def test_lsn_order():
+    assert cdc.lsn_to_int('16/B374D848') == 0x16B374D848
+    assert cdc.lsn_to_int('0/FFFFFFFF') < cdc.lsn_to_int('1/0')
+
+
+def test_slot_name():
+    assert cdc.slot_name('Order-Items') == 'dl_order_items'
+    assert len(cdc.slot_name('t' * 100)) == 63
+
+
+class FakeConnection:
+    autocommit = False
+
+    def cursor(self):
+        return None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def loader(script_module, monkeypatch):
+    loader = script_module('source_to_dl/postgres_to_dl/main.py', SOURCE_TABLENAME='orders', LOAD_TYPE='cdc')
+    monkeypatch.setattr(loader, 'get_postgres_connection', FakeConnection)
+    monkeypatch.setattr(loader, 'get_source_schema', lambda conn, tablename: None)
+    monkeypatch.setattr(loader.cdc, 'get_slot', lambda cursor, name: '0/16B3700')
+    monkeypatch.setattr(loader.cdc, 'peek_changes', lambda cursor, name, max_changes: TestChangesToDataframe.CHANGES)
+    return loader
+
+
+def test_failed_advance_does_not_write_the_changes_twice(loader, monkeypatch, capsys):
+    written = []
+    monkeypatch.setattr(loader, 'write_to_dl', lambda df, *args: written.append(df) or ('s3://dl/orders.parquet', len(df)))
+
+    def advance_fails(cursor, name, lsn):
+        raise RuntimeError('connection lost')
+    monkeypatch.setattr(loader.cdc, 'advance_slot', advance_fails)
+    success, _, _, _, _ = loader.load_cdc_to_dl('orders', None, None)
+    assert not success and len(written) == 1
+
+    # What the driver stores from the failed run's output (driver_source_to_dl parse_watermark)
+    printed = dict(line.split(':', 1) for line in capsys.readouterr().out.splitlines() if ':' in line)
+    assert printed['LAST_INCREMENTAL_VALUE'] == '0/16B37C0'
+
+    advanced = []
+    monkeypatch.setattr(loader.cdc, 'advance_slot', lambda cursor, name, lsn: advanced.append(lsn))
+    success, _, new_watermark, _, rows = loader.load_cdc_to_dl('orders', None, printed['LAST_INCREMENTAL_VALUE'])
+    assert success and rows == 0 and len(written) == 1
+    assert advanced == ['0/16B37C0'] and new_watermark.value == '0/16B37C0'
+
+
+def test_driver_keeps_the_watermark_of_a_failed_run(script_module, config_db):
+    driver = script_module('source_to_dl/driver_source_to_dl/main.py', CONFIG_DB_PATH=config_db)
+    stdout = "LAST_INCREMENTAL_VALUE:0/16B37C0\nWATERMARK:{\"type\": \"pg_lsn\", \"value\": \"0/16B37C0\"}\n"
+    assert driver.parse_watermark(stdout) == ('0/16B37C0', '{"type": "pg_lsn", "value": "0/16B37C0"}')
+    assert driver.parse_watermark('') == (None, None)
+
+    conn = driver.get_db_connection()
+    conn.execute("INSERT INTO pipeline_config (source_tablename, sink_tablename, source_to_dl_load_type) "
+                 "VALUES ('orders', 'orders', 'cdc')")
+    conn.commit()
+    driver.update_execution_status(conn, 'orders', 'failed', '0/16B37C0', 'connection lost',
+                                   new_watermark=driver.parse_watermark(stdout)[1])
+    row = conn.execute("SELECT source_to_dl_last_incremental_value, source_to_dl_watermark FROM pipeline_config").fetchone()
+    assert tuple(row) == ('0/16B37C0', '{"type": "pg_lsn", "value": "0/16B37C0"}')
@@ -0,0 +1,73 @@
+"""Full loads are never compacted (dl_compaction driver, compact_parquet job, /config)"""
+
+import os
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+from routers.configs import check_compaction
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'databases', 'config_db', 'migrations', '018_no_compaction_for_full_loads.sql')
+
+
+def add_pipeline(conn, source_tablename, load_type, dl_compaction_is_active=1):
+    conn.execute("INSERT INTO pipeline_config (source_tablename, sink_tablename, source_to_dl_load_type, "
+                 "dl_compaction_is_active) VALUES (?, ?, ?, ?)",
+                 (source_tablename, source_tablename, load_type, dl_compaction_is_active))
+
+
+@pytest.mark.parametrize('load_type, active, refused', [
+    ('full', 1, True), (None, 1, True), ('full', 0, False),
+    ('incremental', 1, False), ('cdc', 1, False), ('incremental', 0, False),
+])
+def test_check_compaction(load_type, active, refused):
+    if refused:
+        with pytest.raises(HTTPException) as e:
+            check_compaction(load_type, active)
+        assert e.value.status_code == 400
+    else:
+        check_compaction(load_type, active)
+
+
+def test_driver_skips_full_loads(config_db, script_module, monkeypatch):
+    driver = script_module('dl_compaction/driver_dl_compaction/main.py', CONFIG_DB_PATH=config_db)
+    conn = driver.get_db_connection()
+    add_pipeline(conn, 'orders', 'incremental')
+    # Enabled before /config refused it
+    add_pipeline(conn, 'customers', 'full')
+    conn.commit()
+
+    triggered = []
+    monkeypatch.setattr(driver, 'get_gc_configs', lambda conn: [])
+    monkeypatch.setattr(driver, 'trigger_compaction', lambda config: triggered.append(config) or ('success', None, 0, None))
+    monkeypatch.setattr(driver, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr('sys.argv', ['main.py'])
+    driver.main()
+    assert [(c['source_tablename'], c['source_to_dl_load_type']) for c in triggered] == [('orders', 'incremental')]
+
+
+def test_job_passes_the_load_type(script_module, monkeypatch):
+    driver = script_module('dl_compaction/driver_dl_compaction/main.py')
+    captured = {}
+    monkeypatch.setattr(driver, 'run_job', lambda script, env: captured.update(env) or ('success', None, ''))
+    driver.trigger_compaction({'source_tablename': 'orders', 'source_to_dl_load_type': 'incremental'})
+    assert captured['LOAD_TYPE'] == 'incremental'
+
+
+def test_job_refuses_full_loads(script_module):
+    job = script_module('dl_compaction/compact_parquet/main.py', SOURCE_TABLENAME='orders', LOAD_TYPE='full')
+    with pytest.raises(SystemExit) as e:
+        job.main()
+    assert e.value.code == 1
+
+
+def test_migration_turns_compaction_off_for_full_loads(config_db):
+    conn = sqlite3.connect(config_db)
+    add_pipeline(conn, 'orders', 'incremental')
+    add_pipeline(conn, 'customers', 'full')
+    with open(MIGRATION) as f:
+        conn.executescript(f.read())
+    assert dict(conn.execute("SELECT source_tablename, dl_compaction_is_active FROM pipeline_config")) == \
+        {'orders': 1, 'customers': 0}
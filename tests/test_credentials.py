@@ -0,0 +1,77 @@
+"""Stored credential projections (data_pipeline_resources/common/credentials.py, backend/utils/encryption.py)"""
+
+import json
+import os
+import re
+
+import pytest
+
+from credentials import MASK, PLAIN_CRED_KEYS, decrypt, encrypt, mask_credentials, rotate
+from utils.encryption import SUMMARY_CRED_KEYS, masked_json, read_masked, summary_creds
+
+CONNECTOR_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'frontend', 'constants', 'connectorConfig.ts')
+CONNECTOR_RE = re.compile(r"id: '(\w+)',\s*name: '[^']*',\s*fields: \[(.*?)\]\s*\}", re.S)
+FIELD_RE = re.compile(r"\{ key: '(\w+)', label: '[^']*', type: '(\w+)'")
+
+
+def connector_fields():
+    """(connector, key, field type) of every credential field the UI asks for"""
+    with open(CONNECTOR_CONFIG) as f:
+        source = f.read()
+    fields = [(connector, key, field_type)
+              for connector, body in CONNECTOR_RE.findall(source)
+              for key, field_type in FIELD_RE.findall(body)]
+    assert len(fields) > 20
+    return fields
+
+
+def connector_creds():
+    """Credentials of each connector with a distinct value per field"""
+    creds = {}
+    for connector, key, _ in connector_fields():
+        creds.setdefault(connector, {})[key] = f'value-of-{connector}-{key}'
+    return creds
+
+
+@pytest.mark.parametrize('connector, key, field_type', connector_fields())
+def test_every_connector_field(connector, key, field_type):
+    creds = connector_creds()[connector]
+    masked = json.loads(masked_json(creds))
+    assert set(masked) == set(creds)
+    if field_type in ('password', 'textarea') or key not in PLAIN_CRED_KEYS:
+        assert masked[key] == MASK
+        assert creds[key] not in masked_json(creds)
+    else:
+        assert masked[key] == creds[key]
+
+
+@pytest.mark.parametrize('key', ['connection_string', 'security_token', 'service_account_json', 'api_key',
+                                 'access_token', 'private_key', 'client_secret', 'some_future_field'])
+def test_unknown_fields_are_masked(key):
+    assert mask_credentials({'host': 'db', key: 'hunter2'}) == {'host': 'db', key: MASK}
+
+
+def test_summary_keys_are_plain():
+    assert set(SUMMARY_CRED_KEYS) <= set(PLAIN_CRED_KEYS)
+
+
+def test_empty():
+    assert masked_json(None) is None
+    assert masked_json({}) is None
+    assert mask_credentials({}) == {}
+
+
+def test_rows_without_a_projection_are_masked_on_read():
+    creds = {'connection_string': 'mongodb://u:hunter2@h/db', 'dbname': 'test'}
+    token = encrypt(creds)
+    assert decrypt(token) == creds
+    assert read_masked(None, token) == {'connection_string': MASK, 'dbname': 'test'}
+    assert read_masked(masked_json(creds), token) == {'connection_string': MASK, 'dbname': 'test'}
+    assert summary_creds(None, token) == {'dbname': 'test'}
+
+
+def test_rotated_rows_are_masked_by_allowlist():
+    creds = {'host': 'h', 'security_token': 'TOKEN123'}
+    token = rotate(encrypt(creds))
+    assert masked_json(decrypt(token)) == json.dumps({'host': 'h', 'security_token': MASK})
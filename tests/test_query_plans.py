@@ -0,0 +1,45 @@
+"""Query plans of the config DB queries against the migrated schema (backend/db/query_plans.py)"""
+
+import sqlite3
+
+import pytest
+
+from db.query_plans import INDEXED_TABLES, check_query_plans, collect_queries, find_full_scans
+
+
+@pytest.fixture
+def conn(config_db):
+    conn = sqlite3.connect(config_db)
+    yield conn
+    conn.close()
+
+
+def test_no_query_scans_a_run_log_table(conn):
+    assert check_query_plans(conn) == []
+
+
+def test_checks_every_query(conn):
+    assert len(collect_queries()) > 50
+    assert 'GET_ALL_LOGS (next page)' in collect_queries()
+
+
+def test_fails_without_the_run_log_indexes(conn):
+    placeholders = ', '.join('?' * len(INDEXED_TABLES))
+    indexes = conn.execute(f"SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                           f"AND tbl_name IN ({placeholders})", INDEXED_TABLES).fetchall()
+    for (name,) in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    failures = dict(check_query_plans(conn))
+    assert failures
+    assert all(line.startswith('SCAN ') for plan in failures.values() for line in plan)
+
+
+@pytest.mark.parametrize('plan, expected', [
+    (['SCAN pipeline_run_stage_logs'], ['SCAN pipeline_run_stage_logs']),
+    (['SCAN pipeline_runs_master'], ['SCAN pipeline_runs_master']),
+    (['SCAN pipeline_runs_master USING INDEX idx_runs_master_started'], []),
+    (['SEARCH pipeline_run_stage_logs USING INDEX idx_stage_logs_run (run_id=?)'], []),
+    (['SCAN pipeline_config'], []),
+])
+def test_find_full_scans(plan, expected):
+    assert find_full_scans(plan) == expected
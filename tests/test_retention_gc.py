@@ -0,0 +1,163 @@
+"""Datalake retention (data_pipeline_resources/dl_compaction/retention_gc/main.py) on a LocalObjectStore"""
+
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from object_store import LocalObjectStore
+
+SCRIPT = 'dl_compaction/retention_gc/main.py'
+RAW = 'postgres_to_dl/dl_orders/'
+COMPACTED = 'postgres_to_dl/compacted/dl_orders/'
+
+
+class RecordingStore(LocalObjectStore):
+    """Keeps the batches passed to delete_many, in order"""
+
+    def __init__(self, bucket, root):
+        super().__init__(bucket, root)
+        self.deleted = []
+
+    def delete_many(self, keys):
+        self.deleted.append(list(keys))
+        return super().delete_many(keys)
+
+
+@pytest.fixture
+def gc(script_module):
+    def load(**env):
+        defaults = {'LOAD_TYPE': 'full', 'KEEP_SNAPSHOTS': '', 'KEEP_DAYS': '', 'SINK_WATERMARK': '', 'DRY_RUN': '0'}
+        return script_module(SCRIPT, **{**defaults, **env})
+    return load
+
+
+@pytest.fixture
+def now(gc):
+    return datetime(2024, 6, 10, 12, 0, tzinfo=gc().IST)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore('datalake', str(tmp_path))
+    store.ensure_bucket()
+    return store
+
+
+def put(store, key, modified, size=10):
+    store.put(key, io.BytesIO(b'x' * size), size)
+    timestamp = modified.timestamp()
+    os.utime(store._path(key), (timestamp, timestamp))
+
+
+@pytest.fixture
+def daily_files(store, now):
+    """One raw file per day, newest first: age 0 (now) to age 4 days"""
+    for age in range(5):
+        put(store, f'{RAW}orders_{age}.parquet', now - timedelta(days=age), size=100 + age)
+    return store
+
+
+def remaining_ages(store):
+    return sorted(int(obj.key.rsplit('_', 1)[1].split('.')[0]) for obj in store.list(RAW))
+
+
+class TestFullLoads:
+    @pytest.mark.parametrize('env, kept', [
+        ({'KEEP_SNAPSHOTS': '2'}, [0, 1]),
+        ({'KEEP_SNAPSHOTS': '5'}, [0, 1, 2, 3, 4]),
+        ({'KEEP_SNAPSHOTS': '9'}, [0, 1, 2, 3, 4]),
+        ({'KEEP_DAYS': '2.5'}, [0, 1, 2]),
+        # kept if either rule keeps it
+        ({'KEEP_SNAPSHOTS': '2', 'KEEP_DAYS': '3.5'}, [0, 1, 2, 3]),
+        ({'KEEP_SNAPSHOTS': '4', 'KEEP_DAYS': '1.5'}, [0, 1, 2, 3]),
+        ({'KEEP_SNAPSHOTS': '1', 'KEEP_DAYS': '0.5'}, [0]),
+        # no rule set
+        ({}, [0, 1, 2, 3, 4]),
+    ])
+    def test_retention_rules(self, gc, daily_files, now, env, kept):
+        report = gc(**env).collect_garbage(daily_files, 'orders', now)
+        assert remaining_ages(daily_files) == kept
+        assert report['files_total'] == 5
+        assert report['files_to_delete'] == 5 - len(kept)
+        assert report['files_failed'] == 0
+
+    def test_newest_file_is_always_kept(self, gc, store, now):
+        for age in (3, 4, 5):
+            put(store, f'{RAW}orders_{age}.parquet', now - timedelta(days=age))
+        gc(KEEP_DAYS='1').collect_garbage(store, 'orders', now)
+        assert remaining_ages(store) == [3]
+
+    def test_only_parquet_files_count(self, gc, daily_files, now):
+        put(daily_files, f'{RAW}_SUCCESS', now - timedelta(days=9))
+        report = gc(KEEP_SNAPSHOTS='1').collect_garbage(daily_files, 'orders', now)
+        assert report['files_total'] == 5
+        assert f'{RAW}_SUCCESS' in [obj.key for obj in daily_files.list(RAW)]
+
+    def test_no_files(self, gc, store, now):
+        report = gc(KEEP_DAYS='1').collect_garbage(store, 'orders', now)
+        assert report['cutoff'] is None
+        assert store.deleted == []
+
+
+class TestIncrementalLoads:
+    @pytest.mark.parametrize('load_type', ['incremental', 'cdc'])
+    def test_keeps_everything_before_the_first_sink_run(self, gc, daily_files, now, load_type):
+        report = gc(LOAD_TYPE=load_type, KEEP_DAYS='1').collect_garbage(daily_files, 'orders', now)
+        assert remaining_ages(daily_files) == [0, 1, 2, 3, 4]
+        assert report['cutoff'] is None
+
+    @pytest.mark.parametrize('watermark_age, keep_days, kept', [
+        (2.5, '', [0, 1, 2]),
+        # files the sink has loaded are still kept for KEEP_DAYS
+        (2.5, '3.5', [0, 1, 2, 3]),
+        (2.5, '1', [0, 1, 2]),
+        # the sink has loaded everything: only the newest file stays
+        (0, '', [0]),
+    ])
+    def test_sink_watermark(self, gc, daily_files, now, watermark_age, keep_days, kept):
+        watermark = (now - timedelta(days=watermark_age)).isoformat()
+        gc(LOAD_TYPE='incremental', SINK_WATERMARK=watermark, KEEP_DAYS=keep_days).collect_garbage(
+            daily_files, 'orders', now)
+        assert remaining_ages(daily_files) == kept
+
+
+class TestCompactedPartitions:
+    @pytest.fixture
+    def partitions(self, store, now):
+        """A compacted partition three days old and one for the current hour"""
+        old, recent = now - timedelta(days=3), now
+        for hour in (old, recent):
+            prefix = f"{COMPACTED}{hour:%Y/%m/%d/%H}/"
+            put(store, f'{prefix}part-0.parquet', hour, size=1000)
+            put(store, f'{prefix}part-1.parquet', hour, size=1000)
+            put(store, f'{prefix}_manifest.json', hour, size=50)
+        put(store, f'{RAW}orders_0.parquet', now, size=100)
+        put(store, f'{RAW}orders_4.parquet', now - timedelta(days=4), size=104)
+        return f"{COMPACTED}{old:%Y/%m/%d/%H}/", f"{COMPACTED}{recent:%Y/%m/%d/%H}/"
+
+    def test_expired_manifest_first(self, gc, store, now, partitions):
+        old_prefix, recent_prefix = partitions
+        report = gc(KEEP_DAYS='1').collect_garbage(store, 'orders', now)
+
+        assert report['compacted_partitions_to_delete'] == 1
+        manifests, data = store.deleted
+        assert manifests == [f'{old_prefix}_manifest.json']
+        assert sorted(data) == sorted([f'{RAW}orders_4.parquet', f'{old_prefix}part-0.parquet',
+                                       f'{old_prefix}part-1.parquet'])
+        assert not list(store.list(old_prefix))
+        assert len(list(store.list(recent_prefix))) == 3
+
+    def test_dry_run_report(self, gc, store, now, partitions):
+        before = sorted(obj.key for obj in store.list('postgres_to_dl/'))
+        report = gc(KEEP_DAYS='1', DRY_RUN='1').collect_garbage(store, 'orders', now)
+
+        assert report['dry_run'] is True
+        assert report['files_total'] == 2
+        assert report['bytes_total'] == 204
+        assert report['files_to_delete'] == 1
+        assert report['compacted_partitions_to_delete'] == 1
+        assert report['bytes_to_reclaim'] == 104 + 1000 + 1000 + 50
+        assert store.deleted == []
+        assert sorted(obj.key for obj in store.list('postgres_to_dl/')) == before
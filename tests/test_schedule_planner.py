@@ -0,0 +1,56 @@
+"""Offset planning (backend/utils/schedule_planner.py), including schedules longer than a day"""
+
+import pytest
+
+from utils.schedule_planner import PLAN_HORIZON_MINUTES, Timeline, peak, plan_offsets, sink_offset
+
+DAY, WEEK = 1440, 10080
+
+
+def pipeline(name, schedule, duration=1, offset=None):
+    p = {"source_tablename": name, "schedule": schedule, "duration_minutes": duration}
+    if offset is not None:
+        p["offset"] = offset
+    return p
+
+
+class TestTimeline:
+    def test_horizon_is_the_lcm(self):
+        assert Timeline([15, 20]).horizon == 60
+
+    def test_horizon_is_capped(self):
+        assert Timeline([7, 11, 13, 60]).horizon == PLAN_HORIZON_MINUTES
+
+    @pytest.mark.parametrize('schedules', [[WEEK], [60, WEEK], [DAY, 2 * DAY], [7, WEEK]])
+    def test_long_schedules_fit(self, schedules):
+        timeline = Timeline(schedules)
+        assert timeline.horizon >= max(schedules)
+        for schedule in schedules:
+            assert timeline.minutes(schedule, schedule - 1, 2)
+
+    def test_weekly_and_hourly_share_a_week(self):
+        timeline = Timeline([60, WEEK])
+        assert timeline.horizon == WEEK
+        assert len(timeline.minutes(60, 0, 1)) == WEEK // 60
+        assert timeline.minutes(WEEK, 5000, 3) == [5000, 5001, 5002]
+
+    def test_empty(self):
+        assert Timeline([]).peak() == 0
+
+
+class TestPlanOffsets:
+    def test_weekly_schedules_are_planned(self):
+        offsets, planned_peak = plan_offsets(
+            [pipeline("hourly", 60, offset=0)],
+            [pipeline("weekly_a", WEEK, 30), pipeline("weekly_b", WEEK, 30), pipeline("two_days", 2 * DAY, 10)])
+        assert all(0 <= offsets[name] < schedule
+                   for name, schedule in (("weekly_a", WEEK), ("weekly_b", WEEK), ("two_days", 2 * DAY)))
+        assert planned_peak == 1
+
+    def test_peak_of_placements(self):
+        assert peak([pipeline("a", WEEK, 5, offset=100), pipeline("b", WEEK, 5, offset=102)]) == 2
+        assert peak([]) == 0
+
+
+def test_sink_offset_wraps():
+    assert sink_offset(WEEK - 2, 5, WEEK) == 3
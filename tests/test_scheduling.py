@@ -0,0 +1,110 @@
+"""Phase-aligned schedules (data_pipeline_resources/common/scheduling.py)"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import scheduling
+from scheduling import IST, default_offset, effective_offset, latest_slot, next_due
+
+
+def at(hour, minute=0, day=15):
+    return datetime(2023, 1, day, hour, minute, tzinfo=IST)
+
+
+class TestNeverRun:
+    @pytest.mark.parametrize('schedule, offset', [(60, 25), (60, 59), (1440, 600), (10080, 9000), (60, None)])
+    def test_due_immediately(self, schedule, offset):
+        now = at(1, 5)
+        assert next_due(now, None, schedule, offset) == now
+
+    def test_then_follows_its_slots(self):
+        first_run = at(1, 5)
+        assert next_due(at(1, 20), first_run, 60, 25) is None
+        assert next_due(at(1, 30), first_run, 60, 25) == at(1, 25)
+        assert next_due(at(2, 0), at(1, 26), 60, 25) is None
+
+
+class TestNextDue:
+    def test_due_once_per_slot(self):
+        assert next_due(at(10, 26), at(9, 25), 60, 25) == at(10, 25)
+        assert next_due(at(10, 26), at(10, 25), 60, 25) is None
+
+    def test_missed_slots_run_once(self):
+        assert next_due(at(15, 0), at(9, 25), 60, 25) == at(14, 25)
+
+    def test_daily_offset_is_minutes_past_ist_midnight(self):
+        assert next_due(at(10, 0, day=16), at(10, 0), 1440, 600) == at(10, 0, day=16)
+        assert next_due(at(9, 59, day=16), at(10, 0), 1440, 600) is None
+
+    def test_without_offset_follows_the_last_run(self):
+        assert next_due(at(10, 59), at(10), 60, None) is None
+        assert next_due(at(11, 0), at(10), 60, None) == at(11)
+
+
+def test_latest_slot_is_at_or_before_now():
+    assert latest_slot(at(10, 25), 60, 25) == at(10, 25)
+    assert latest_slot(at(10, 24), 60, 25) == at(9, 25)
+
+
+class TestEffectiveOffset:
+    def test_configured_offset_wins(self):
+        assert effective_offset('orders', 60, 7) == 7
+
+    def test_default_is_stable_and_in_range(self):
+        assert effective_offset('orders', 60, None) == default_offset('orders', 60)
+        assert all(0 <= default_offset(f't{i}', 60) < 60 for i in range(100))
+
+    def test_sink_stage_lags_the_source(self):
+        source = effective_offset('orders', 60, None)
+        assert effective_offset('orders', 60, None, 'dl_to_sink') == (source + scheduling.DL_TO_SINK_LAG_MINUTES) % 60
+
+    def test_stagger_off(self, monkeypatch):
+        monkeypatch.setattr(scheduling, 'SCHEDULE_STAGGER', False)
+        assert effective_offset('orders', 60, None) is None
+
+
+class TestRecentDurations:
+    @pytest.fixture
+    def conn(self, config_db):
+        conn = sqlite3.connect(config_db)
+        yield conn
+        conn.close()
+
+    def add_stages(self, conn, source_tablename, pipeline_type, durations_ms, started_at=None, status='success'):
+        started_at = (started_at or at(9)).isoformat()
+        conn.executemany(
+            "INSERT INTO pipeline_run_stage_logs (id, source_tablename, pipeline_type, status, started_at, duration_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(f'{source_tablename}-{pipeline_type}-{started_at}-{i}', source_tablename, pipeline_type, status,
+              started_at, duration) for i, duration in enumerate(durations_ms)])
+
+    def test_p90_not_average(self, conn):
+        # nine quick runs and one slow one: the average (1450) would call it light, the p90 does not
+        self.add_stages(conn, 'orders', 'source_to_dl', [1000] * 8 + [1500, 5000])
+        assert scheduling.recent_durations(conn, at(10)) == {'orders': 1500}
+
+    def test_driver_stages_win_over_manual_runs(self, conn):
+        self.add_stages(conn, 'orders', 'source_to_dl', [2000])
+        self.add_stages(conn, 'orders', 'loader_source_to_dl', [9000])
+        self.add_stages(conn, 'customers', 'loader_source_to_dl', [3000])
+        assert scheduling.recent_durations(conn, at(10)) == {'orders': 2000, 'customers': 3000}
+
+    def test_only_successful_source_stages_in_the_window(self, conn):
+        self.add_stages(conn, 'orders', 'dl_to_sink', [9000])
+        self.add_stages(conn, 'orders', 'source_to_dl', [9000], status='failed')
+        window = timedelta(hours=scheduling.SCHEDULE_DURATION_WINDOW_HOURS)
+        self.add_stages(conn, 'customers', 'source_to_dl', [9000], started_at=at(9) - window)
+        assert scheduling.recent_durations(conn, at(10)) == {}
+
+
+class TestDriverShouldRunNow:
+    @pytest.mark.parametrize('stagger', [True, False])
+    @pytest.mark.parametrize('offset', [None, 25])
+    def test_never_run_is_due(self, script_module, monkeypatch, stagger, offset):
+        driver = script_module('source_to_dl/driver_source_to_dl/main.py')
+        monkeypatch.setattr(scheduling, 'SCHEDULE_STAGGER', stagger)
+        assert driver.should_run_now({'source_tablename': 'orders', 'source_to_dl_schedule': 60,
+                                      'source_to_dl_schedule_offset': offset,
+                                      'source_to_dl_last_loader_run_timestamp': None})
@@ -0,0 +1,97 @@
+"""Source types of Parquet columns (data_pipeline_resources/common/schema_registry.py)"""
+
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from schema_registry import PG_TYPE_METADATA, SourceSchema, arrow_type, sink_type, to_arrow
+
+# databases/source_pg_db/initial_tables.sql
+ORDERS = SourceSchema.from_columns([
+    ('order_id', 'integer'), ('customer_id', 'integer'), ('order_date', 'timestamp without time zone'),
+    ('total_amount', 'numeric(10,2)'), ('status', 'character varying(20)'),
+])
+
+
+def orders(total_amounts, customer_ids):
+    return pd.DataFrame({
+        'order_id': range(1, len(total_amounts) + 1),
+        'customer_id': customer_ids,
+        'order_date': pd.to_datetime(['2023-01-15 10:30:00'] * len(total_amounts)),
+        'total_amount': total_amounts,
+        'status': ['completed'] * len(total_amounts),
+    })
+
+
+@pytest.mark.parametrize('pg_type, expected', [
+    ('integer', pa.int32()),
+    ('character varying(255)', pa.string()),
+    ('numeric(10,2)', pa.decimal128(10, 2)),
+    ('numeric(38,0)', pa.decimal128(38, 0)),
+    ('numeric(50,2)', pa.float64()),
+    ('numeric', pa.float64()),
+    ('timestamp with time zone', pa.timestamp('us', tz='UTC')),
+    ('jsonb', None),
+])
+def test_arrow_type(pg_type, expected):
+    assert arrow_type(pg_type) == expected
+
+
+class TestToArrow:
+    def test_decimal_values(self):
+        # pd.read_sql_query(..., coerce_float=False), as the source loader reads
+        table = to_arrow(orders([Decimal('99.99'), None, Decimal('150.50')], [1, None, 3]), ORDERS)
+        assert table.schema.field('total_amount').type == pa.decimal128(10, 2)
+        assert table.column('total_amount').to_pylist() == [Decimal('99.99'), None, Decimal('150.50')]
+
+    def test_float_values_of_a_decimal_column(self):
+        # pandas' default coerce_float turns Decimal into float64
+        table = to_arrow(orders([99.99, None, 150.5, 0.1 + 0.2], [1, 2, 3, 4]), ORDERS)
+        assert table.schema.field('total_amount').type == pa.decimal128(10, 2)
+        assert table.column('total_amount').to_pylist() == [Decimal('99.99'), None, Decimal('150.50'), Decimal('0.30')]
+
+    def test_integers_with_nulls(self):
+        df = orders([Decimal('1.00')] * 3, [1, None, 3])
+        assert df['customer_id'].dtype == 'float64'
+        table = to_arrow(df, ORDERS)
+        assert table.schema.field('customer_id').type == pa.int32()
+        assert table.column('customer_id').to_pylist() == [1, None, 3]
+
+    def test_all_null_decimal_column(self):
+        table = to_arrow(orders([None, None], [1, 2]), ORDERS)
+        assert table.schema.field('total_amount').type == pa.decimal128(10, 2)
+        assert table.column('total_amount').null_count == 2
+
+    def test_unconstrained_numeric_stays_float64(self):
+        schema = SourceSchema.from_columns([('amount', 'numeric')])
+        for values in ([Decimal('1.5'), Decimal('123456.789')], [Decimal('2')]):
+            table = to_arrow(pd.DataFrame({'amount': values}), schema)
+            assert table.schema.field('amount').type == pa.float64()
+        assert table.column('amount').to_pylist() == [2.0]
+
+    def test_every_file_has_the_same_schema(self):
+        first = to_arrow(orders([Decimal('1.5')], [1]), ORDERS)
+        second = to_arrow(orders([Decimal('12345678.25'), None], [None, 2]), ORDERS)
+        assert first.schema.equals(second.schema)
+
+    def test_pg_type_metadata_and_pandas_metadata(self):
+        table = to_arrow(orders([99.99], [1]), ORDERS)
+        assert table.schema.field('total_amount').metadata == {PG_TYPE_METADATA: b'numeric(10,2)'}
+        assert b'pandas' in table.schema.metadata
+        assert sink_type(table.schema.field('total_amount')) == 'numeric(10,2)'
+
+    def test_columns_outside_the_schema_are_inferred(self):
+        df = orders([Decimal('1.00')], [1]).assign(_cdc_op='I')
+        table = to_arrow(df, ORDERS)
+        assert table.schema.field('_cdc_op').type == pa.string()
+        assert table.schema.field('_cdc_op').metadata is None
+
+    def test_without_schema(self):
+        table = to_arrow(orders([99.99], [1]), None)
+        assert table.schema.field('total_amount').type == pa.float64()
+
+
+def test_schema_json_round_trip():
+    assert SourceSchema.from_json(ORDERS.to_json()) == ORDERS
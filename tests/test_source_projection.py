@@ -0,0 +1,96 @@
+"""Column projection and row filter checks (data_pipeline_resources/common/source_projection.py)"""
+
+import re
+
+import pytest
+
+from source_projection import (check_row_filter, columns_from_env, parse_columns, projection_env, quote_identifier,
+                               select_list)
+
+
+class TestCheckRowFilter:
+    # build_query splices the filter as WHERE (<filter>): anything that closes that parenthesis, ends the
+    # statement or comments out the rest must be refused
+    @pytest.mark.parametrize('row_filter, message', [
+        ("1=1) UNION SELECT * FROM pg_user WHERE (true", "')' without a matching '('"),
+        ("status = 'x') OR (1=1", "')' without a matching '('"),
+        ("true) --", "without '--'"),
+        ("(true", "'(' without a matching ')'"),
+        ("status = 'x'; DROP TABLE orders", "without ';'"),
+        ("true -- ignore the rest", "without '--'"),
+        ("true /* ) */", "without '/*'"),
+        ("true */", "without '*/'"),
+        # forbidden tokens are refused even inside string literals
+        ("note = 'a;b'", "without ';'"),
+        ("note = $$ -- $$", "without '--'"),
+        ("note = E'/*'", "without '/*'"),
+        # a backslash-escaped quote does not end an E'' string, so the ')' after it is outside
+        ("note = E'\\')' ) OR (true", "')' without a matching '('"),
+        ("note = E'\\'", "unterminated quoted string"),
+        ("name = 'abc", "unterminated quoted string"),
+        ('"weird)col = 1', "unterminated quoted string"),
+        ("body = $$ ) OR (true", "unterminated quoted string"),
+        ("body = $a$ ) $b$", "unterminated quoted string"),
+    ])
+    def test_refuses_breakouts(self, row_filter, message):
+        with pytest.raises(ValueError, match=re.escape(message)):
+            check_row_filter(row_filter)
+
+    @pytest.mark.parametrize('row_filter', [
+        "status <> 'deleted'",
+        "(a = 1 OR b = 2) AND c IS NOT NULL",
+        "created_at >= now() - interval '30 days'",
+        "name = 'it''s (here)'",
+        "name = 'has ) paren'",
+        '"weird)col" = 1',
+        '"a""b(" = 1',
+        "note = E'it\\'s )'",
+        "body = $$ ( $$",
+        "body = $tag$ ) ' $tag$",
+        "price$1 = 2",
+        "region IN ('EU', 'US') AND (amount > 10)",
+    ])
+    def test_accepts_expressions(self, row_filter):
+        assert check_row_filter(row_filter) == row_filter
+
+    def test_strips_whitespace(self):
+        assert check_row_filter("  status = 'open'\n") == "status = 'open'"
+
+
+class TestColumns:
+    @pytest.mark.parametrize('value, expected', [
+        (None, []),
+        ('', []),
+        (' a, b ,a,, ', ['a', 'b']),
+        ('Mixed Case,x', ['Mixed Case', 'x']),
+    ])
+    def test_parse_columns(self, value, expected):
+        assert parse_columns(value) == expected
+
+    @pytest.mark.parametrize('name, expected', [
+        ('id', '"id"'),
+        ('Mixed Case', '"Mixed Case"'),
+        ('we"ird', '"we""ird"'),
+        ('x"; DROP TABLE t; --', '"x""; DROP TABLE t; --"'),
+    ])
+    def test_quote_identifier(self, name, expected):
+        assert quote_identifier(name) == expected
+
+    @pytest.mark.parametrize('columns, required, expected', [
+        ([], ('id',), '*'),
+        (['a', 'b'], (), '"a", "b"'),
+        (['a'], ('id', 'a'), '"a", "id"'),
+        (['a', 'we"ird'], ('updated_at',), '"a", "we""ird", "updated_at"'),
+        (['a'], (None, 'id'), '"a", "id"'),
+    ])
+    def test_select_list(self, columns, required, expected):
+        assert select_list(columns, *required) == expected
+
+    def test_projection_env_round_trip(self):
+        env = projection_env({'source_to_dl_columns': ' a, b,a', 'source_to_dl_row_filter': " status = 'open' "})
+        assert env == {'SOURCE_COLUMNS': 'a,b', 'SOURCE_ROW_FILTER': "status = 'open'"}
+        assert columns_from_env(env) == ['a', 'b']
+
+    def test_projection_env_unset(self):
+        assert projection_env({'source_to_dl_columns': None, 'source_to_dl_row_filter': ''}) == {}
+        assert columns_from_env({}) == []
@@ -0,0 +1,239 @@
+"""
+Typed watermarks (data_pipeline_resources/source_to_dl/postgres_to_dl/watermark.py) on
+orders.order_date-shaped data: a timestamp key with ties, order_id as the tiebreaker.
+
+run() replays what the loader does with a tiebreaker key: read key >= lower_bound
+ordered by (key, tiebreaker), drop_loaded, advance. The property tests check that
+every row arriving on time or within the overlap window is loaded exactly once.
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+import watermark
+from watermark import Watermark
+
+KEY, TIEBREAKER = 'order_date', 'order_id'
+
+# databases/source_pg_db/initial_tables.sql
+SAMPLE_ORDER_DATES = [
+    '2023-01-15 10:30:00', '2023-01-16 14:20:00', '2023-01-20 09:15:00', '2023-01-22 11:45:00',
+    '2023-01-25 16:10:00', '2023-01-28 13:00:00', '2023-02-01 08:45:00', '2023-02-05 15:30:00',
+    '2023-02-10 12:20:00', '2023-02-15 10:00:00',
+]
+
+
+def orders(rows, tz=None) -> pd.DataFrame:
+    """(order_id, order_date) rows as psycopg2/pandas return them"""
+    df = pd.DataFrame(rows, columns=[TIEBREAKER, KEY])
+    df[TIEBREAKER] = df[TIEBREAKER].astype('int64')
+    df[KEY] = pd.to_datetime(df[KEY])
+    if tz:
+        df[KEY] = df[KEY].dt.tz_localize(tz)
+    return df
+
+
+def sample_orders(tz=None) -> pd.DataFrame:
+    return orders(list(enumerate(SAMPLE_ORDER_DATES, start=1)), tz)
+
+
+def run(table: pd.DataFrame, previous, overlap: int = 0):
+    """One incremental run against the source table; returns (rows written, new watermark)"""
+    batch = table
+    if previous is not None:
+        floor = watermark.parse(previous.type, watermark.lower_bound(previous, overlap))
+        batch = table[table[KEY] >= floor]
+    batch = batch.sort_values([KEY, TIEBREAKER])
+    loaded = watermark.drop_loaded(batch, KEY, TIEBREAKER, previous)
+    return loaded, watermark.advance(loaded, KEY, TIEBREAKER, overlap, previous)
+
+
+def ids(df: pd.DataFrame):
+    return sorted(df[TIEBREAKER].tolist())
+
+
+class TestLowerBound:
+    def test_without_overlap_is_the_value(self):
+        mark = Watermark('timestamp', '2023-02-15T10:00:00')
+        assert watermark.lower_bound(mark, 0) == '2023-02-15T10:00:00'
+
+    def test_timestamp_overlap_is_seconds(self):
+        mark = Watermark('timestamp', '2023-02-15T10:00:00.123456')
+        assert watermark.lower_bound(mark, 90) == '2023-02-15T09:58:30.123456'
+
+    def test_timestamptz_keeps_the_offset(self):
+        mark = Watermark('timestamptz', '2023-02-15T10:00:00+05:30')
+        assert watermark.lower_bound(mark, 3600) == '2023-02-15T09:00:00+05:30'
+
+    def test_date_overlap_reaches_the_previous_day(self):
+        assert watermark.lower_bound(Watermark('date', '2023-02-15'), 60) == '2023-02-14'
+        assert watermark.lower_bound(Watermark('date', '2023-02-15'), 2 * 86400) == '2023-02-13'
+
+    def test_numeric_overlap_is_key_units(self):
+        assert watermark.lower_bound(Watermark('bigint', '100'), 5) == '95'
+        assert watermark.lower_bound(Watermark('numeric', '10.50'), 2) == '8.50'
+        assert watermark.lower_bound(Watermark('double precision', '1.5'), 1) == '0.5'
+
+    def test_text_keys_have_no_overlap(self):
+        assert watermark.lower_bound(Watermark('text', 'b'), 10) == 'b'
+
+
+class TestDropLoaded:
+    def test_without_watermark_keeps_everything(self):
+        assert ids(watermark.drop_loaded(sample_orders(), KEY, TIEBREAKER, None)) == list(range(1, 11))
+
+    def test_drops_seen_rows(self):
+        mark = Watermark('timestamp', '2023-02-15T10:00:00',
+                         [('2023-02-10T12:20:00', '9'), ('2023-02-15T10:00:00', '10')])
+        assert ids(watermark.drop_loaded(sample_orders(), KEY, TIEBREAKER, mark)) == list(range(1, 9))
+
+    def test_a_row_read_twice_keeps_its_last_version(self):
+        batch = orders([(3, '2023-01-20 09:15:00'), (4, '2023-01-22 11:45:00'), (3, '2023-01-23 08:00:00')])
+        loaded = watermark.drop_loaded(batch, KEY, TIEBREAKER, None)
+        assert loaded.set_index(TIEBREAKER)[KEY][3] == pd.Timestamp('2023-01-23 08:00:00')
+
+    def test_seen_matches_by_key_and_tiebreaker(self):
+        # order 10 moved to a later order_date: a new version, not the row loaded before
+        mark = Watermark('timestamp', '2023-02-15T10:00:00', [('2023-02-15T10:00:00', '10')])
+        batch = orders([(10, '2023-02-16 09:00:00')])
+        assert ids(watermark.drop_loaded(batch, KEY, TIEBREAKER, mark)) == [10]
+
+
+class TestAdvance:
+    def test_first_load_takes_the_max_key(self):
+        mark = watermark.advance(sample_orders(), KEY, TIEBREAKER, 0, None)
+        assert (mark.type, mark.value) == ('timestamp', '2023-02-15T10:00:00')
+        assert mark.seen == [('2023-02-15T10:00:00', '10')]
+
+    def test_without_tiebreaker_keeps_no_seen_rows(self):
+        mark = watermark.advance(sample_orders(), KEY, None, 0, None)
+        assert mark == Watermark('timestamp', '2023-02-15T10:00:00')
+
+    def test_overlap_window_is_remembered(self):
+        mark = watermark.advance(sample_orders(), KEY, TIEBREAKER, 6 * 86400, None)
+        assert [tiebreaker for _, tiebreaker in mark.seen] == ['9', '10']
+
+    def test_empty_batch_keeps_the_watermark(self):
+        previous = Watermark('timestamp', '2023-02-15T10:00:00', [('2023-02-15T10:00:00', '10')])
+        assert watermark.advance(sample_orders().iloc[:0], KEY, TIEBREAKER, 0, previous) is previous
+
+    def test_never_moves_back(self):
+        previous = Watermark('timestamp', '2023-02-15T10:00:00', [('2023-02-15T10:00:00', '10')])
+        late = orders([(11, '2023-02-15 09:30:00')])
+        mark = watermark.advance(late, KEY, TIEBREAKER, 3600, previous)
+        assert mark.value == '2023-02-15T10:00:00'
+        assert mark.seen == [('2023-02-15T10:00:00', '10'), ('2023-02-15T09:30:00', '11')]
+
+    def test_seen_rows_below_the_window_are_forgotten(self):
+        previous = Watermark('timestamp', '2023-02-15T10:00:00', [('2023-02-15T10:00:00', '10')])
+        mark = watermark.advance(orders([(11, '2023-02-16 10:00:00')]), KEY, TIEBREAKER, 3600, previous)
+        assert mark.seen == [('2023-02-16T10:00:00', '11')]
+
+    def test_max_seen_keeps_the_newest(self, monkeypatch):
+        monkeypatch.setattr(watermark, 'MAX_SEEN', 3)
+        ties = orders([(order_id, '2023-02-15 10:00:00') for order_id in range(11, 16)])
+        mark = watermark.advance(ties, KEY, TIEBREAKER, 0, None)
+        assert [tiebreaker for _, tiebreaker in mark.seen] == ['13', '14', '15']
+
+    def test_other_key_types(self):
+        df = pd.DataFrame({'id': [1, 2], 'amount': [Decimal('99.99'), Decimal('149.50')],
+                           'day': [date(2023, 1, 15), date(2023, 1, 16)], 'code': ['a', 'b']})
+        assert watermark.advance(df, 'id', None, 0, None) == Watermark('bigint', '2')
+        assert watermark.advance(df, 'amount', None, 0, None) == Watermark('numeric', '149.50')
+        assert watermark.advance(df, 'day', None, 0, None) == Watermark('date', '2023-01-16')
+        assert watermark.advance(df, 'code', None, 0, None) == Watermark('text', 'b')
+
+    def test_json_round_trip(self):
+        mark = watermark.advance(sample_orders(), KEY, TIEBREAKER, 86400, None)
+        assert Watermark.from_json(mark.to_json()) == mark
+
+
+class TestNaiveAndIst:
+    def test_ist_timestamps_are_timestamptz_with_their_offset(self):
+        mark = watermark.advance(sample_orders('Asia/Kolkata'), KEY, TIEBREAKER, 0, None)
+        assert (mark.type, mark.value) == ('timestamptz', '2023-02-15T10:00:00+05:30')
+        assert watermark.parse(mark.type, mark.value) == pd.Timestamp('2023-02-15 04:30:00', tz='UTC')
+
+    def test_ist_ties_load_once(self):
+        table = sample_orders('Asia/Kolkata')
+        loaded, mark = run(table, None)
+        table = pd.concat([table, orders([(11, '2023-02-15 10:00:00')], 'Asia/Kolkata')])
+        loaded, mark = run(table, mark)
+        assert ids(loaded) == [11]
+        loaded, mark = run(table, mark)
+        assert loaded.empty
+
+    def test_naive_watermark_then_ist_column(self):
+        # The column became timestamptz: the naive watermark is not compared with aware values
+        previous = Watermark('timestamp', '2023-02-15T10:00:00', [('2023-02-15T10:00:00', '10')])
+        mark = watermark.advance(orders([(11, '2023-02-15 09:00:00')], 'Asia/Kolkata'), KEY, TIEBREAKER, 0, previous)
+        assert (mark.type, mark.value) == ('timestamptz', '2023-02-15T09:00:00+05:30')
+        assert mark.seen == [('2023-02-15T09:00:00+05:30', '11')]
+
+    def test_naive_value_is_not_converted(self):
+        mark = watermark.advance(sample_orders(), KEY, TIEBREAKER, 0, None)
+        assert '+' not in mark.value and watermark.parse(mark.type, mark.value).tzinfo is None
+
+
+class TestIncrementalRuns:
+    def test_rows_sharing_the_boundary_load_once(self):
+        table = sample_orders()
+        loaded, mark = run(table, None)
+        assert ids(loaded) == list(range(1, 11))
+        # Committed after the run, with the boundary order_date
+        table = pd.concat([table, orders([(11, '2023-02-15 10:00:00'), (12, '2023-02-15 10:00:00')])])
+        loaded, mark = run(table, mark)
+        assert ids(loaded) == [11, 12]
+        loaded, mark = run(table, mark)
+        assert loaded.empty
+
+    def test_late_rows_inside_the_overlap_load_once(self):
+        table = sample_orders()
+        _, mark = run(table, None, overlap=3600)
+        table = pd.concat([table, orders([(11, '2023-02-15 09:30:00')])])
+        loaded, mark = run(table, mark, overlap=3600)
+        assert ids(loaded) == [11]
+        loaded, _ = run(table, mark, overlap=3600)
+        assert loaded.empty
+
+    def test_late_rows_outside_the_overlap_are_missed(self):
+        table = sample_orders()
+        _, mark = run(table, None, overlap=3600)
+        table = pd.concat([table, orders([(11, '2023-02-15 08:00:00')])])
+        loaded, _ = run(table, mark, overlap=3600)
+        assert loaded.empty
+
+    def test_past_max_seen_rows_load_twice_never_skipped(self, monkeypatch):
+        monkeypatch.setattr(watermark, 'MAX_SEEN', 3)
+        table = orders([(order_id, '2023-02-15 10:00:00') for order_id in range(1, 6)])
+        loaded, mark = run(table, None)
+        assert ids(loaded) == [1, 2, 3, 4, 5]
+        loaded, _ = run(table, mark)
+        assert ids(loaded) == [1, 2]
+
+    @pytest.mark.parametrize('tz', [None, 'Asia/Kolkata'])
+    @pytest.mark.parametrize('seed', range(20))
+    def test_every_row_loads_exactly_once(self, seed, tz):
+        rng = random.Random(seed)
+        overlap = rng.choice([0, 600, 3600])
+        start = pd.Timestamp('2023-01-15 10:30:00')
+        table = orders([], tz)
+        mark, loaded_ids, next_id, clock = None, [], 1, start
+        for _ in range(rng.randint(3, 12)):
+            # Coarse order_dates (whole minutes) so batches share boundary values
+            clock += timedelta(minutes=rng.randint(0, 5))
+            rows = []
+            for _ in range(rng.randint(0, 8)):
+                lateness = rng.randint(0, overlap // 60) if overlap and rng.random() < 0.3 else 0
+                rows.append((next_id, str(max(start, clock - timedelta(minutes=lateness)))))
+                next_id += 1
+            table = pd.concat([table, orders(rows, tz)]) if rows else table
+            loaded, mark = run(table, mark, overlap)
+            loaded_ids += loaded[TIEBREAKER].tolist()
+            if mark is not None:
+                assert Watermark.from_json(mark.to_json()) == mark
+        assert sorted(loaded_ids) == list(range(1, next_id))